@@ -21,7 +21,6 @@
 # Serverless function for processing alerts from the SQS queue.
 ###############################################################################
 
-import json
 import logging
 import os
 import sys
@@ -32,6 +31,7 @@ from datetime import datetime
 sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
 from core.utils import log_event, get_client_config
+from core.batch_io import process_sqs_records
 
 # Configure logging
 logger = logging.getLogger()
@@ -61,30 +61,18 @@ def lambda_handler(event, context):
         records = event['Records']
         logger.info(f"Processing {len(records)} SQS messages")
         
-        results = []
+        # Process records concurrently; a failed alert is reported on its own
+        # (batchItemFailures) so only that message is redelivered
+        batch = process_sqs_records(records, lambda message_body, record: process_alert(message_body))
         
-        # Process each record
-        for record in records:
-            try:
-                # Parse message body
-                message_body = json.loads(record['body'])
-                
-                # Process the alert
-                result = process_alert(message_body)
-                
-                results.append({
-                    'message_id': record.get('messageId', 'unknown'),
-                    'success': result.get('success', False),
-                    'error': result.get('error') if not result.get('success', False) else None
-                })
-                
-            except Exception as e:
-                logger.error(f"Error processing SQS message: {str(e)}")
-                results.append({
-                    'message_id': record.get('messageId', 'unknown'),
-                    'success': False,
-                    'error': str(e)
-                })
+        results = [
+            {
+                'message_id': r['message_id'],
+                'success': r['success'],
+                'error': r.get('error') if not r['success'] else None
+            }
+            for r in batch['results']
+        ]
         
         # Summarize results
         successful = sum(1 for r in results if r.get('success', False))
@@ -95,6 +83,7 @@ def lambda_handler(event, context):
             'successful': successful,
             'failed': len(records) - successful,
             'results': results,
+            'batchItemFailures': batch['batchItemFailures'],
             'timestamp': datetime.utcnow().isoformat() + "Z"
         }
         
@@ -102,10 +91,14 @@ def lambda_handler(event, context):
         # Log error
         logger.error(f"Error in alert processor: {str(e)}")
         
-        # Return error response
+        # Return error response; every record is reported failed so none is lost
         return {
             'success': False,
             'error': str(e),
+            'batchItemFailures': [
+                {'itemIdentifier': record.get('messageId')}
+                for record in event.get('Records', []) if isinstance(record, dict)
+            ],
             'timestamp': datetime.utcnow().isoformat() + "Z"
         }
 
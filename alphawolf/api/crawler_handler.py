@@ -31,16 +31,13 @@ from datetime import datetime
 # Add parent directory to path for imports
 sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
-from core.web_crawler import WebCrawler
+from core.web_crawler import get_default_crawler
 from core.utils import log_event
 
 # Configure logging
 logger = logging.getLogger()
 logger.setLevel(logging.INFO)
 
-# Initialize services
-web_crawler = WebCrawler()
-
 def lambda_handler(event, context):
     """
     Lambda handler for scheduled web crawling.
@@ -113,7 +110,7 @@ def handle_api_request(event):
     
     # Get source status if requested
     if body.get('action', '') == 'status' or query_params.get('action', '') == 'status':
-        status = web_crawler.get_source_status()
+        status = get_default_crawler().get_source_status()
         
         return {
             'statusCode': 200,
@@ -132,7 +129,7 @@ def handle_api_request(event):
     logger.info(f"Starting crawl for client {client_id}, topic: {topic or 'all'}, force_refresh: {force_refresh}")
     start_time = time.time()
     
-    crawl_result = web_crawler.crawl(topic, force_refresh)
+    crawl_result = get_default_crawler().crawl(topic, force_refresh)
     
     # Calculate duration
     duration = time.time() - start_time
@@ -198,7 +195,7 @@ def handle_scheduled_event(event):
     # If no topics specified, crawl all sources
     if not topics:
         logger.info("Starting crawl for all topics (scheduled event)")
-        crawl_result = web_crawler.crawl(force_refresh=False)
+        crawl_result = get_default_crawler().crawl(force_refresh=False)
         
         return {
             'success': True,
@@ -213,7 +210,7 @@ def handle_scheduled_event(event):
     results = []
     for topic in topics:
         logger.info(f"Starting crawl for topic: {topic} (scheduled event)")
-        crawl_result = web_crawler.crawl(topic, force_refresh=False)
+        crawl_result = get_default_crawler().crawl(topic, force_refresh=False)
         
         results.append({
             'topic': topic,
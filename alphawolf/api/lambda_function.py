@@ -28,73 +28,78 @@ import logging
 import datetime
 import uuid
 import traceback
-try:
-    import boto3
-    from boto3.dynamodb.conditions import Key, Attr
-except ImportError:
-    # Mock boto3 for local testing
-    boto3 = None
-try:
-    import botocore.exceptions
-except ImportError:
-    # Mock botocore for local testing
-    class botocore:
-        class exceptions:
-            ClientError = Exception
 
-# Import local modules
+# Only what every route needs is imported here. boto3, the family protection
+# system and the web crawler are loaded on first use by the routes that need
+# them, so a cold start pays only for the route being served.
 try:
-    from ..core.family_protection import FamilyProtectionSystem
-    from ..core.web_crawler import WebCrawler
-    # from ..core.risk_model import RiskAnalyzer  # Import when implemented
+    from ..core import services
+    from ..core.batch_io import BufferedTableWriter, SQSBatchSender, fail_records, process_sqs_records
 except ImportError:
     # When running as Lambda function
-    try:
-        from core.family_protection import FamilyProtectionSystem
-        from core.web_crawler import WebCrawler
-        # from core.risk_model import RiskAnalyzer  # Import when implemented
-    except ImportError:
-        # Fallback for local testing
-        FamilyProtectionSystem = None
-        WebCrawler = None
-        # RiskAnalyzer = None
+    from core import services
+    from core.batch_io import BufferedTableWriter, SQSBatchSender, fail_records, process_sqs_records
 
 # Configure logging
 logger = logging.getLogger(__name__)
 log_level = os.environ.get("LOG_LEVEL", "INFO")
 logging.basicConfig(level=getattr(logging, log_level))
 
-# Initialize services if running in AWS
-if os.environ.get("AWS_LAMBDA_FUNCTION_NAME") and boto3:
-    sqs_client = boto3.client('sns')
-    dynamodb = boto3.resource('dynamodb')
-    
-    # Get table references from environment variables
-    interactions_table_name = os.environ.get("INTERACTIONS_TABLE", "alphawolf-interactions")
-    locations_table_name = os.environ.get("LOCATIONS_TABLE", "alphawolf-locations")
-    content_table_name = os.environ.get("CONTENT_TABLE", "alphawolf-content")
-    
-    # Initialize DynamoDB tables
-    interactions_table = dynamodb.Table(interactions_table_name)
-    locations_table = dynamodb.Table(locations_table_name)
-    content_table = dynamodb.Table(content_table_name)
-    
-    # Initialize SQS queue
-    sqs_client = boto3.client('sqs')
-    alert_queue_url = os.environ.get("ALERT_QUEUE_URL")
-else:
-    # Mock services for local testing
-    sqs_client = None
-    dynamodb = None
-    interactions_table = None
-    locations_table = None
-    content_table = None
-    alert_queue_url = None
+# Interaction records are batched per invocation; the table is created on first write
+interactions_writer = BufferedTableWriter(
+    key_names=("request_id", "timestamp"),
+    table_factory=lambda: services.get_table("interactions")
+)
+
+# AlphaWolf core components, created on first use
+_components = {}
+
+def get_family_protection():
+    """
+    Get the FamilyProtectionSystem, creating it on first use
+    
+    Returns:
+    - FamilyProtectionSystem instance, or None if it is unavailable
+    """
+    if "family_protection" not in _components:
+        try:
+            try:
+                from ..core.family_protection import FamilyProtectionSystem
+            except ImportError:
+                from core.family_protection import FamilyProtectionSystem
+            _components["family_protection"] = FamilyProtectionSystem()
+        except Exception as e:
+            logger.error(f"Error initializing family protection system: {str(e)}")
+            _components["family_protection"] = None
+    return _components["family_protection"]
+
+def get_web_crawler():
+    """
+    Get the WebCrawler, creating it on first use
+    
+    Returns:
+    - WebCrawler instance, or None if it is unavailable
+    """
+    if "web_crawler" not in _components:
+        try:
+            try:
+                from ..core.web_crawler import WebCrawler
+            except ImportError:
+                from core.web_crawler import WebCrawler
+            _components["web_crawler"] = WebCrawler()
+        except Exception as e:
+            logger.error(f"Error initializing web crawler: {str(e)}")
+            _components["web_crawler"] = None
+    return _components["web_crawler"]
 
-# Initialize AlphaWolf core components
-family_protection = FamilyProtectionSystem() if FamilyProtectionSystem else None
-web_crawler = WebCrawler() if WebCrawler else None
-# risk_analyzer = RiskAnalyzer() if RiskAnalyzer else None
+# Components listed in ALPHAWOLF_WARM_ROUTES (e.g. "family_protection") are
+# built during init instead, for functions that use provisioned concurrency.
+_WARMERS = {"family_protection": get_family_protection, "web_crawler": get_web_crawler}
+for _name in filter(None, (n.strip() for n in os.environ.get("ALPHAWOLF_WARM_ROUTES", "").split(","))):
+    if _name in _WARMERS:
+        _WARMERS[_name]()
+    else:
+        logger.warning(f"Unknown component in ALPHAWOLF_WARM_ROUTES: {_name}")
 
 def lambda_handler(event, context):
     """
@@ -107,13 +112,19 @@ def lambda_handler(event, context):
     Returns:
     - API Gateway response object
     """
+    # Interaction records written while handling the event go out in one batch
+    with interactions_writer.deferred():
+        return _handle_event(event, context)
+
+def _handle_event(event, context):
+    """Dispatch an event to its handler (see lambda_handler)."""
     logger.info(f"Received event: {json.dumps(event)}")
     
     # Record request in interactions table if available
     request_id = str(uuid.uuid4())
     timestamp = datetime.datetime.utcnow().isoformat()
     
-    if interactions_table:
+    if interactions_writer.table is not None:
         try:
             # Store interaction record
             interaction_item = {
@@ -139,7 +150,7 @@ def lambda_handler(event, context):
                     # If body isn't valid JSON, store as string
                     interaction_item["request_body"] = event.get("body", "")[:1000]  # Limit size
                     
-            interactions_table.put_item(Item=interaction_item)
+            interactions_writer.put(interaction_item)
         except Exception as e:
             logger.error(f"Error storing interaction: {e}")
     
@@ -162,7 +173,7 @@ def lambda_handler(event, context):
         logger.error(traceback.format_exc())
         
         # Record error in interactions table if available
-        if interactions_table:
+        if interactions_writer.table is not None:
             try:
                 error_item = {
                     "request_id": request_id,
@@ -172,7 +183,7 @@ def lambda_handler(event, context):
                     "error_traceback": traceback.format_exc(),
                     "ttl": int(datetime.datetime.utcnow().timestamp() + 2592000)  # 30 days retention
                 }
-                interactions_table.put_item(Item=error_item)
+                interactions_writer.put(error_item)
             except Exception as inner_e:
                 logger.error(f"Error storing error record: {inner_e}")
         
@@ -213,6 +224,7 @@ def handle_api_gateway_event(event, request_id, timestamp):
         services_status = {}
         
         # Check DynamoDB connection
+        dynamodb = services.get_dynamodb()
         if dynamodb:
             try:
                 # Test listTables to verify DynamoDB access
@@ -225,6 +237,8 @@ def handle_api_gateway_event(event, request_id, timestamp):
             services_status["dynamodb"] = "not configured"
             
         # Check SQS connection
+        sqs_client = services.get_client("sqs")
+        alert_queue_url = services.get_alert_queue_url()
         if sqs_client and alert_queue_url:
             try:
                 # Test queue attributes to verify SQS access
@@ -275,8 +289,9 @@ def handle_api_gateway_event(event, request_id, timestamp):
     
     # Handle family protection endpoints
     if path.endswith("/safety") and http_method == "POST":
-        # Check required parameters
-        required_params = ["latitude", "longitude", "user_id"]
+        # Check required parameters; "locations" carries several fixes for one user
+        batch_request = isinstance(body.get("locations"), list)
+        required_params = ["locations", "user_id"] if batch_request else ["latitude", "longitude", "user_id"]
         if not all(param in body for param in required_params):
             return {
                 "statusCode": 400,
@@ -292,42 +307,42 @@ def handle_api_gateway_event(event, request_id, timestamp):
             }
         
         # Call family protection system
+        family_protection = get_family_protection()
         if family_protection:
-            result = family_protection.check_location_safety(
-                latitude=body["latitude"],
-                longitude=body["longitude"],
-                safety_zones=body.get("safety_zones", []),
-                user_id=body["user_id"],
-                timestamp=body.get("timestamp")
-            )
+            fixes = body["locations"] if batch_request else [body]
             
-            # Check for alert and send to SQS if needed
-            if "alert" in result and sqs_client and alert_queue_url:
-                try:
-                    # Send alert to SQS queue
-                    alert_message = {
-                        "alert_type": "location",
-                        "severity": result["alert"]["severity"],
-                        "message": result["alert"]["message"],
-                        "alert_id": result["alert"]["alert_id"],
-                        "timestamp": result["alert"]["alert_timestamp"],
-                        "location": {
-                            "latitude": result["latitude"],
-                            "longitude": result["longitude"]
-                        },
-                        "user_id": result["user_id"]
-                    }
-                    
-                    sqs_client.send_message(
-                        QueueUrl=alert_queue_url,
-                        MessageBody=json.dumps(alert_message)
+            # Zones are compiled once per user; omit safety_zones to reuse the last
+            # set. This container may not have seen them, so ask for them rather
+            # than judge the fixes against no zones at all.
+            if not len(family_protection.get_compiled_zones(body["user_id"], body.get("safety_zones"))):
+                return {
+                    "statusCode": 409,
+                    "headers": {
+                        "Content-Type": "application/json",
+                        "Access-Control-Allow-Origin": "*"
+                    },
+                    "body": json.dumps({
+                        "error": "Safety zones unknown",
+                        "message": "No safety zones are known for this user; send safety_zones with the request",
+                        "request_id": request_id
+                    })
+                }
+            
+            # Location records are written in one batch.
+            with family_protection.deferred_writes():
+                results = [
+                    family_protection.check_location_safety(
+                        latitude=fix.get("latitude"),
+                        longitude=fix.get("longitude"),
+                        safety_zones=body.get("safety_zones"),
+                        user_id=body["user_id"],
+                        timestamp=fix.get("timestamp")
                     )
-                    
-                    result["alert"]["queued"] = True
-                except Exception as e:
-                    logger.error(f"Error sending alert to SQS: {e}")
-                    result["alert"]["queued"] = False
-                    result["alert"]["queue_error"] = str(e)
+                    for fix in fixes
+                ]
+            
+            # Send any alerts to SQS
+            queue_alerts(results, "location")
             
             return {
                 "statusCode": 200,
@@ -335,7 +350,7 @@ def handle_api_gateway_event(event, request_id, timestamp):
                     "Content-Type": "application/json",
                     "Access-Control-Allow-Origin": "*"
                 },
-                "body": json.dumps(result)
+                "body": json.dumps({"results": results, "request_id": request_id} if batch_request else results[0])
             }
         else:
             return {
@@ -369,6 +384,7 @@ def handle_api_gateway_event(event, request_id, timestamp):
             }
         
         # Call family protection system
+        family_protection = get_family_protection()
         if family_protection:
             result = family_protection.detect_unusual_movement(
                 current_location=body["current_location"],
@@ -376,30 +392,8 @@ def handle_api_gateway_event(event, request_id, timestamp):
                 user_id=body["user_id"]
             )
             
-            # Check for alert and send to SQS if needed
-            if "alert" in result and sqs_client and alert_queue_url:
-                try:
-                    # Send alert to SQS queue
-                    alert_message = {
-                        "alert_type": "movement",
-                        "severity": result["alert"]["severity"],
-                        "message": result["alert"]["message"],
-                        "alert_id": result["alert"]["alert_id"],
-                        "timestamp": result["alert"]["alert_timestamp"],
-                        "assessment": result["assessment"],
-                        "user_id": result["user_id"]
-                    }
-                    
-                    sqs_client.send_message(
-                        QueueUrl=alert_queue_url,
-                        MessageBody=json.dumps(alert_message)
-                    )
-                    
-                    result["alert"]["queued"] = True
-                except Exception as e:
-                    logger.error(f"Error sending alert to SQS: {e}")
-                    result["alert"]["queued"] = False
-                    result["alert"]["queue_error"] = str(e)
+            # Send alert to SQS if needed
+            queue_alerts([result], "movement")
             
             return {
                 "statusCode": 200,
@@ -445,6 +439,7 @@ def handle_api_gateway_event(event, request_id, timestamp):
             }
         
         # Call web crawler
+        web_crawler = get_web_crawler()
         if web_crawler:
             results = web_crawler.search_topic(
                 topic=topic,
@@ -502,6 +497,7 @@ def handle_api_gateway_event(event, request_id, timestamp):
             }
         
         # Call web crawler
+        web_crawler = get_web_crawler()
         if web_crawler:
             results = web_crawler.get_latest_research(
                 condition=condition,
@@ -563,68 +559,118 @@ def handle_api_gateway_event(event, request_id, timestamp):
             })
         }
 
+def queue_alerts(results, alert_type):
+    """
+    Send the alerts found in assessment results to the alert queue
+    
+    All alerts go out in send_message_batch requests, and each alert is
+    marked with whether it was queued.
+    
+    Parameters:
+    - results: Assessment results from the family protection system
+    - alert_type: "location" or "movement"
+    """
+    alerting = [result for result in results if "alert" in result]
+    if not alerting:
+        # No alert: don't create the SQS client at all
+        return
+    
+    sender = SQSBatchSender(services.get_client("sqs"), services.get_alert_queue_url())
+    if not sender.enabled:
+        return
+    
+    pending = []
+    for result in alerting:
+        alert_message = {
+            "alert_type": alert_type,
+            "severity": result["alert"]["severity"],
+            "message": result["alert"]["message"],
+            "alert_id": result["alert"]["alert_id"],
+            "timestamp": result["alert"]["alert_timestamp"],
+            "user_id": result["user_id"]
+        }
+        if alert_type == "location":
+            alert_message["location"] = {
+                "latitude": result["latitude"],
+                "longitude": result["longitude"]
+            }
+        else:
+            alert_message["assessment"] = result["assessment"]
+        pending.append((result["alert"], sender.send(alert_message)))
+    
+    outcome = sender.flush()
+    for alert, entry_id in pending:
+        error = outcome.get(entry_id, "Alert was not sent")
+        alert["queued"] = error is None
+        if error is not None:
+            logger.error(f"Error sending alert to SQS: {error}")
+            alert["queue_error"] = error
+
 def handle_sqs_event(event, request_id, timestamp):
     """
     Handle SQS events
     
+    Records are processed concurrently and their interaction records are
+    written in one batch before the response is built. The response lists
+    only the records that failed, including those whose interaction record
+    wasn't stored (batchItemFailures), so Lambda redelivers just those.
+    
     Parameters:
     - event: The Lambda event object
     - request_id: Unique request ID
     - timestamp: Request timestamp
     
     Returns:
-    - Success response
+    - Success response with batchItemFailures
     """
-    # Process each SQS record
-    for record in event.get("Records", []):
-        try:
-            # Parse message body
-            body = json.loads(record.get("body", "{}"))
-            
-            # Store in interactions table
-            if interactions_table:
-                try:
-                    interaction_item = {
-                        "request_id": request_id,
-                        "timestamp": timestamp,
-                        "event_type": "sqs_message",
-                        "message_body": json.dumps(body),
-                        "message_id": record.get("messageId", "unknown"),
-                        "ttl": int(datetime.datetime.utcnow().timestamp() + 2592000)  # 30 days retention
-                    }
-                    interactions_table.put_item(Item=interaction_item)
-                except Exception as e:
-                    logger.error(f"Error storing SQS interaction: {e}")
-            
-            # Handle different message types
-            alert_type = body.get("alert_type")
-            
-            if alert_type == "location":
-                if family_protection:
-                    # Process location alert
-                    logger.info(f"Processing location alert for user: {body.get('user_id')}")
-                    # Additional processing would go here
-                    pass
-            elif alert_type == "movement":
-                if family_protection:
-                    # Process movement alert
-                    logger.info(f"Processing movement alert for user: {body.get('user_id')}")
-                    # Additional processing would go here
-                    pass
-            elif alert_type == "communication":
-                # Process communication alert
-                logger.info(f"Processing communication alert for user: {body.get('user_id')}")
-                # Additional processing would go here
-                pass
-            else:
-                logger.warning(f"Unknown alert type: {alert_type}")
-        except Exception as e:
-            logger.error(f"Error processing SQS record: {e}")
-            logger.error(traceback.format_exc())
+    def process_record(body, record):
+        # Store in interactions table (one record per message, batched)
+        if interactions_writer.table is not None:
+            stored = interactions_writer.put({
+                "request_id": record.get("messageId", request_id),
+                "timestamp": timestamp,
+                "invocation_id": request_id,
+                "event_type": "sqs_message",
+                "message_body": json.dumps(body),
+                "message_id": record.get("messageId", "unknown"),
+                "ttl": int(datetime.datetime.utcnow().timestamp() + 2592000)  # 30 days retention
+            }, entry_id=record.get("messageId"))
+            if not stored:
+                raise RuntimeError("Error storing interaction record")
+        
+        # Handle different message types
+        alert_type = body.get("alert_type")
+        
+        if alert_type == "location":
+            # Process location alert
+            logger.info(f"Processing location alert for user: {body.get('user_id')}")
+            # Additional processing would go here
+            pass
+        elif alert_type == "movement":
+            # Process movement alert
+            logger.info(f"Processing movement alert for user: {body.get('user_id')}")
+            # Additional processing would go here
+            pass
+        elif alert_type == "communication":
+            # Process communication alert
+            logger.info(f"Processing communication alert for user: {body.get('user_id')}")
+            # Additional processing would go here
+            pass
+        else:
+            logger.warning(f"Unknown alert type: {alert_type}")
+    
+    records = event.get("Records", [])
+    with interactions_writer.deferred():
+        batch = process_sqs_records(records, process_record)
+        # Write the interaction records before answering, so messages whose
+        # record wasn't stored are redelivered
+        fail_records(records, batch, interactions_writer.flush())
+    failures = batch["batchItemFailures"]
     
     return {
         "statusCode": 200,
-        "body": f"Processed {len(event.get('Records', []))} SQS messages"
+        "body": f"Processed {len(records)} SQS messages ({len(failures)} failed)",
+        "batchItemFailures": failures
     }
 
 def handle_cloudwatch_event(event, request_id, timestamp):
@@ -640,7 +686,7 @@ def handle_cloudwatch_event(event, request_id, timestamp):
     - Success response
     """
     # Store event in interactions table
-    if interactions_table:
+    if interactions_writer.table is not None:
         try:
             interaction_item = {
                 "request_id": request_id,
@@ -649,7 +695,7 @@ def handle_cloudwatch_event(event, request_id, timestamp):
                 "event_details": json.dumps(event),
                 "ttl": int(datetime.datetime.utcnow().timestamp() + 2592000)  # 30 days retention
             }
-            interactions_table.put_item(Item=interaction_item)
+            interactions_writer.put(interaction_item)
         except Exception as e:
             logger.error(f"Error storing scheduled event interaction: {e}")
     
@@ -661,6 +707,7 @@ def handle_cloudwatch_event(event, request_id, timestamp):
         logger.info("Running scheduled maintenance tasks")
         
         # Example: Clear old cache entries
+        web_crawler = get_web_crawler()
         if web_crawler:
             logger.info("Refreshing web crawler cache...")
             # Additional tasks would go here
@@ -684,7 +731,7 @@ def handle_direct_invocation(event, request_id, timestamp):
     - Response object
     """
     # Store event in interactions table
-    if interactions_table:
+    if interactions_writer.table is not None:
         try:
             interaction_item = {
                 "request_id": request_id,
@@ -693,7 +740,7 @@ def handle_direct_invocation(event, request_id, timestamp):
                 "event_details": json.dumps(event),
                 "ttl": int(datetime.datetime.utcnow().timestamp() + 2592000)  # 30 days retention
             }
-            interactions_table.put_item(Item=interaction_item)
+            interactions_writer.put(interaction_item)
         except Exception as e:
             logger.error(f"Error storing direct invocation interaction: {e}")
     
@@ -702,11 +749,12 @@ def handle_direct_invocation(event, request_id, timestamp):
     
     if action == "check_location_safety":
         # Check location safety
+        family_protection = get_family_protection()
         if family_protection:
             return family_protection.check_location_safety(
                 latitude=event.get("latitude"),
                 longitude=event.get("longitude"),
-                safety_zones=event.get("safety_zones", []),
+                safety_zones=event.get("safety_zones"),
                 user_id=event.get("user_id"),
                 timestamp=event.get("timestamp")
             )
@@ -715,6 +763,7 @@ def handle_direct_invocation(event, request_id, timestamp):
     
     elif action == "analyze_unusual_movement":
         # Analyze unusual movement
+        family_protection = get_family_protection()
         if family_protection:
             return family_protection.detect_unusual_movement(
                 current_location=event.get("current_location", {}),
@@ -726,6 +775,7 @@ def handle_direct_invocation(event, request_id, timestamp):
     
     elif action == "search_topic":
         # Search for content on a topic
+        web_crawler = get_web_crawler()
         if web_crawler:
             return web_crawler.search_topic(
                 topic=event.get("topic", ""),
@@ -737,6 +787,7 @@ def handle_direct_invocation(event, request_id, timestamp):
     
     elif action == "get_research":
         # Get latest research
+        web_crawler = get_web_crawler()
         if web_crawler:
             return web_crawler.get_latest_research(
                 condition=event.get("condition", ""),
@@ -793,6 +844,7 @@ if __name__ == "__main__":
     }
     
     # Only test if family protection is available
+    family_protection = get_family_protection()
     if family_protection:
         response = lambda_handler(api_event, None)
         print(f"Location safety response: {json.dumps(response, indent=2)}")
@@ -32,11 +32,19 @@ from datetime import datetime
 sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
 from core.risk_model import analyze_input
-from core.family_protection import FamilyProtectionSystem
 from core.utils import log_event, generate_session_id, sanitize_input
 
-# Initialize services
-family_protection = FamilyProtectionSystem()
+# The family protection system is only needed for requests that carry a
+# location, so it is imported and built on first use
+_family_protection = None
+
+def get_family_protection():
+    """Get the FamilyProtectionSystem, creating it on first use"""
+    global _family_protection
+    if _family_protection is None:
+        from core.family_protection import FamilyProtectionSystem
+        _family_protection = FamilyProtectionSystem()
+    return _family_protection
 
 def lambda_handler(event, context):
     """
@@ -75,7 +83,7 @@ def lambda_handler(event, context):
         # Check location safety if coordinates provided
         location_safety = None
         if location and 'latitude' in location and 'longitude' in location:
-            location_safety = family_protection.check_location_safety(
+            location_safety = get_family_protection().check_location_safety(
                 client_id, 
                 float(location['latitude']), 
                 float(location['longitude'])
@@ -84,7 +92,7 @@ def lambda_handler(event, context):
         # Enhanced risk assessment with Aegis AI if applicable
         enhanced_assessment = None
         if is_high_risk or (location_safety and not location_safety['is_safe']):
-            enhanced_assessment = family_protection.integrate_with_aegis(
+            enhanced_assessment = get_family_protection().integrate_with_aegis(
                 client_id,
                 {
                     'risk_score': risk_score,
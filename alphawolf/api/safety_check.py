@@ -31,16 +31,13 @@ from datetime import datetime
 # Add parent directory to path for imports
 sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
-from core.family_protection import FamilyProtectionSystem
+from core.family_protection import get_default_system
 from core.utils import log_event, generate_session_id
 
 # Configure logging
 logger = logging.getLogger()
 logger.setLevel(logging.INFO)
 
-# Initialize services
-family_protection = FamilyProtectionSystem()
-
 def lambda_handler(event, context):
     """
     Lambda handler for safety check API endpoint.
@@ -83,13 +80,30 @@ def lambda_handler(event, context):
         # Get safety radius from environment or request
         safety_radius = body.get('safety_radius', os.environ.get('SAFETY_RADIUS', 100))
         
-        # Check location safety
-        safety_result = family_protection.check_location_safety(
-            client_id, 
-            latitude, 
-            longitude
+        # Check location safety (zones are cached per client when not resent);
+        # the system is built on the first request rather than at import
+        safety_result = get_default_system().check_location_safety(
+            latitude=latitude,
+            longitude=longitude,
+            safety_zones=body.get('safety_zones'),
+            user_id=client_id
         )
         
+        # Zones not sent and not cached in this container: nothing to check against
+        if safety_result.get('zones_unknown'):
+            return {
+                'statusCode': 409,
+                'headers': {
+                    'Content-Type': 'application/json',
+                    'Access-Control-Allow-Origin': '*'
+                },
+                'body': json.dumps({
+                    'error': 'Safety zones unknown',
+                    'message': safety_result['message'],
+                    'timestamp': datetime.utcnow().isoformat() + "Z"
+                })
+            }
+        
         # Add metadata to result
         result = {
             'client_id': client_id,
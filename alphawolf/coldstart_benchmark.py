@@ -0,0 +1,219 @@
+# © 2025 The Christman AI Project. All rights reserved.
+#
+# This code is released as part of a trauma-informed, dignity-first AI ecosystem
+# designed to protect, empower, and elevate vulnerable populations.
+#
+# By using, modifying, or distributing this software, you agree to uphold the following:
+# 1. Truth — No deception, no manipulation.
+# 2. Dignity — Respect the autonomy and humanity of all users.
+# 3. Protection — Never use this to exploit or harm vulnerable individuals.
+# 4. Transparency — Disclose all modifications and contributions clearly.
+# 5. No Erasure — Preserve the mission and ethical origin of this work.
+#
+# This is not just code. This is redemption in code.
+# Contact: lumacognify@thechristmanaiproject.com
+# https://thechristmanaiproject.com
+###############################################################################
+# AlphaWolf - LumaCognify AI
+# Part of The Christman AI Project
+#
+# COLD START BENCHMARK
+# Measures handler import time and first-invocation latency locally.
+# Every run is a fresh Python process, as a new Lambda container would be.
+#
+# Modes:
+#   local - ALPHAWOLF_LOCAL_AWS stand-ins, no AWS SDK involved
+#   sdk   - Lambda environment with boto3 clients built for real; calls go
+#           to a closed local port and fail fast, so SDK set-up cost is
+#           included without touching AWS
+###############################################################################
+
+import datetime
+import json
+import os
+import statistics
+import subprocess
+import sys
+from typing import Any, Dict, List, Optional
+
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+
+
+def _api_event(method: str, path: str, body: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
+    return {
+        "httpMethod": method,
+        "path": path,
+        "body": json.dumps(body) if body is not None else None
+    }
+
+
+def _wandering_body() -> Dict[str, Any]:
+    # Six earlier fixes around the same spot, so the request raises a wandering alert
+    start = datetime.datetime(2025, 1, 1, 14, 0, 0)
+    fixes = [
+        {
+            "latitude": 37.7749 + 0.0001 * (i % 2),
+            "longitude": -122.4194,
+            "timestamp": (start + datetime.timedelta(minutes=i)).isoformat()
+        }
+        for i in range(7)
+    ]
+    return {
+        "user_id": "benchmark-user",
+        "current_location": fixes[-1],
+        "previous_locations": fixes[:-1]
+    }
+
+
+SAFETY_ZONES = [
+    {"name": "Home", "center": {"latitude": 37.7749, "longitude": -122.4194}, "radius": 200}
+]
+
+# name -> (handler module, event; None means import only)
+SCENARIOS = {
+    "api_health": ("api.lambda_function", _api_event("GET", "/health")),
+    "api_track_wandering": ("api.lambda_function", _api_event("POST", "/api/v1/track", _wandering_body())),
+    "api_safety": ("api.lambda_function", _api_event("POST", "/api/v1/safety", {
+        "user_id": "benchmark-user",
+        "latitude": 37.7849,
+        "longitude": -122.4094,
+        "safety_zones": SAFETY_ZONES
+    })),
+    "safety_check": ("api.safety_check", {"body": json.dumps({
+        "client_id": "benchmark-user",
+        "location": {"latitude": 37.7849, "longitude": -122.4094},
+        "safety_zones": SAFETY_ZONES
+    })}),
+    "alert_processor": ("api.alert_processor", {"Records": [
+        {
+            "messageId": f"m{i}",
+            "body": json.dumps({"alert_type": "movement", "severity": "medium",
+                                "user_id": "benchmark-user", "message": "benchmark"})
+        }
+        for i in range(3)
+    ]}),
+    "crawler_handler": ("api.crawler_handler", None)
+}
+
+# Runs in the child process: time the import, then two invocations
+_CHILD = """
+import importlib, json, logging, sys, time
+started = time.perf_counter()
+module = importlib.import_module(sys.argv[1])
+imported = time.perf_counter()
+logging.disable(logging.CRITICAL)
+event = json.loads(sys.argv[2])
+first = second = None
+if event is not None:
+    module.lambda_handler(event, None)
+    first = time.perf_counter()
+    module.lambda_handler(event, None)
+    second = time.perf_counter()
+print(json.dumps({
+    "import_ms": (imported - started) * 1000,
+    "first_ms": (first - imported) * 1000 if first else None,
+    "warm_ms": (second - first) * 1000 if first else None
+}))
+"""
+
+
+def _environment(mode: str) -> Dict[str, str]:
+    env = {k: v for k, v in os.environ.items()
+           if not k.startswith(("AWS_", "ALPHAWOLF_"))}
+    env["PYTHONPATH"] = BASE_DIR
+    env["LOG_LEVEL"] = "WARNING"
+    if mode == "local":
+        env["ALPHAWOLF_LOCAL_AWS"] = "1"
+    elif mode == "sdk":
+        env.update({
+            "AWS_LAMBDA_FUNCTION_NAME": "alphawolf-coldstart-benchmark",
+            "AWS_DEFAULT_REGION": "us-east-1",
+            "AWS_ACCESS_KEY_ID": "benchmark",
+            "AWS_SECRET_ACCESS_KEY": "benchmark",
+            "AWS_ENDPOINT_URL": "http://127.0.0.1:9",
+            "AWS_MAX_ATTEMPTS": "1",
+            "AWS_RETRY_MODE": "standard",
+            "ALERT_QUEUE_URL": "http://127.0.0.1:9/000000000000/alphawolf-alerts"
+        })
+    else:
+        raise ValueError(f"Unknown mode: {mode}")
+    return env
+
+
+def _percentile(values: List[float], fraction: float) -> float:
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(round(fraction * (len(ordered) - 1))))]
+
+
+def measure(scenario: str, mode: str = "local", runs: int = 15) -> Dict[str, Any]:
+    """
+    Cold start one handler repeatedly, each time in a new process
+
+    Parameters:
+    - scenario: Key of SCENARIOS
+    - mode: "local" or "sdk"
+    - runs: Number of cold starts
+
+    Returns:
+    - Median and p99 of import time, first invocation, and import plus
+      first invocation (the cold request), plus the warm invocation median
+    """
+    module, event = SCENARIOS[scenario]
+    env = _environment(mode)
+    samples = []
+    for _ in range(runs):
+        completed = subprocess.run(
+            [sys.executable, "-c", _CHILD, module, json.dumps(event)],
+            cwd=BASE_DIR, env=env, capture_output=True, text=True
+        )
+        if completed.returncode != 0:
+            return {"scenario": scenario, "error": completed.stderr.strip().splitlines()[-1:]}
+        samples.append(json.loads(completed.stdout.strip().splitlines()[-1]))
+
+    result = {"scenario": scenario, "module": module, "runs": runs}
+    series = {"import_ms": [s["import_ms"] for s in samples]}
+    if event is not None:
+        series["first_ms"] = [s["first_ms"] for s in samples]
+        series["cold_ms"] = [s["import_ms"] + s["first_ms"] for s in samples]
+        result["warm_ms_median"] = statistics.median(s["warm_ms"] for s in samples)
+    for name, values in series.items():
+        result[f"{name}_median"] = statistics.median(values)
+        result[f"{name}_p99"] = _percentile(values, 0.99)
+    return result
+
+
+def run_benchmark(mode: str = "local", runs: int = 15,
+                  scenarios: Optional[List[str]] = None) -> List[Dict[str, Any]]:
+    """
+    Measure cold starts for every handler scenario
+
+    Parameters:
+    - mode: "local" (in-memory stand-ins) or "sdk" (real boto3 clients)
+    - runs: Cold starts per scenario
+    - scenarios: Subset of SCENARIOS to run (default: all)
+
+    Returns:
+    - One result dictionary per scenario
+    """
+    return [measure(name, mode, runs) for name in (scenarios or SCENARIOS)]
+
+
+if __name__ == "__main__":
+    mode = sys.argv[1] if len(sys.argv) > 1 else "local"
+    runs = int(sys.argv[2]) if len(sys.argv) > 2 else 15
+    print(f"cold starts per scenario: {runs} ({mode} mode); times in ms, median / p99")
+    print(f"{'scenario':<22}{'import':>16}{'first call':>16}{'cold request':>16}{'warm':>8}")
+
+    def cell(result, name):
+        if f"{name}_median" not in result:
+            return f"{'-':>16}"
+        return f"{result[name + '_median']:>8.1f} /{result[name + '_p99']:>6.1f}"
+
+    for result in run_benchmark(mode, runs):
+        if "error" in result:
+            print(f"{result['scenario']:<22}failed: {' '.join(result['error'])}")
+            continue
+        warm = result.get("warm_ms_median")
+        warm_text = f"{warm:>8.1f}" if warm is not None else f"{'-':>8}"
+        print(f"{result['scenario']:<22}{cell(result, 'import_ms')}{cell(result, 'first_ms')}"
+              f"{cell(result, 'cold_ms')}{warm_text}")
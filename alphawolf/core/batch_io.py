@@ -0,0 +1,571 @@
+# © 2025 The Christman AI Project. All rights reserved.
+#
+# This code is released as part of a trauma-informed, dignity-first AI ecosystem
+# designed to protect, empower, and elevate vulnerable populations.
+#
+# By using, modifying, or distributing this software, you agree to uphold the following:
+# 1. Truth — No deception, no manipulation.
+# 2. Dignity — Respect the autonomy and humanity of all users.
+# 3. Protection — Never use this to exploit or harm vulnerable individuals.
+# 4. Transparency — Disclose all modifications and contributions clearly.
+# 5. No Erasure — Preserve the mission and ethical origin of this work.
+#
+# This is not just code. This is redemption in code.
+# Contact: lumacognify@thechristmanaiproject.com
+# https://thechristmanaiproject.com
+"""
+AlphaWolf Batched AWS I/O
+Part of The Christman AI Project - LumaCognify AI
+
+Helpers that let the Lambda handlers do their DynamoDB and SQS work in
+batches: buffered table writes flushed through ``batch_write_item``, alert
+messages sent with ``send_message_batch``, and SQS event processing that
+runs independent records concurrently and reports only the failed ones
+back to Lambda (``batchItemFailures``) so a single bad record doesn't
+force the whole batch to be redelivered.
+
+In-memory stand-ins for a DynamoDB table and an SQS client are included
+so the handlers can be exercised locally without AWS.
+
+"HOW CAN I HELP YOU LOVE YOURSELF MORE"
+"""
+
+import json
+import logging
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+from decimal import Decimal
+from types import SimpleNamespace
+from typing import Dict, List, Any, Optional, Callable, Tuple
+
+logger = logging.getLogger(__name__)
+
+# Service limits
+DYNAMODB_BATCH_SIZE = 25
+SQS_BATCH_SIZE = 10
+SQS_MAX_BATCH_BYTES = 256 * 1024
+
+# Records processed at once within one invocation
+DEFAULT_BATCH_WORKERS = int(os.environ.get("BATCH_WORKERS", "8"))
+
+# Times items DynamoDB leaves unprocessed are resent before they count as failed
+UNPROCESSED_RETRIES = 3
+
+
+def to_dynamodb_item(item: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    Convert an item for the DynamoDB resource API
+
+    The resource API rejects Python floats, so they become Decimals.
+    """
+    return json.loads(json.dumps(item, default=str), parse_float=Decimal)
+
+
+# ----------------------------------------------------------
+# DynamoDB
+# ----------------------------------------------------------
+
+class BufferedTableWriter:
+    """
+    Table writes that are batched while inside ``deferred()``
+
+    Outside a deferred block each put goes straight to ``put_item``, so
+    callers that never batch behave as before. Inside one, items are
+    buffered (from any thread) and written with ``batch_write_item`` when
+    the outermost block exits, or when ``flush()`` is called.
+    """
+
+    def __init__(self, table: Any = None, key_names: Optional[Tuple[str, ...]] = None,
+                 table_factory: Optional[Callable[[], Any]] = None):
+        """
+        Initialize the writer
+
+        Parameters:
+        - table: DynamoDB Table resource (None disables writes)
+        - key_names: Primary key attributes; duplicate keys within one flush
+          are collapsed (last write wins) instead of failing the batch
+        - table_factory: Called on first use to get the table when none is
+          given, so the resource isn't built until something is written
+        """
+        self._table = table
+        self._table_factory = table_factory if table is None else None
+        self.key_names = tuple(key_names) if key_names else None
+        self._pending: List[Tuple[Dict[str, Any], Optional[str]]] = []
+        self._depth = 0
+        self._lock = threading.Lock()
+        self.stats = {"direct_writes": 0, "batched_writes": 0, "flushes": 0, "errors": 0}
+
+    @property
+    def table(self) -> Any:
+        """The table being written to (resolved from table_factory on first use)."""
+        if self._table is None and self._table_factory is not None:
+            with self._lock:
+                if self._table_factory is not None:
+                    self._table = self._table_factory()
+                    self._table_factory = None
+        return self._table
+
+    @table.setter
+    def table(self, table: Any):
+        self._table = table
+        self._table_factory = None
+
+    @contextmanager
+    def deferred(self):
+        """Buffer writes for the duration of the block, then flush them."""
+        with self._lock:
+            self._depth += 1
+        try:
+            yield self
+        finally:
+            with self._lock:
+                self._depth -= 1
+                flush_now = self._depth == 0
+            if flush_now:
+                self.flush()
+
+    def put(self, item: Dict[str, Any], entry_id: Optional[str] = None) -> bool:
+        """
+        Write an item now, or queue it if inside deferred()
+
+        Parameters:
+        - item: Item to write
+        - entry_id: Caller's id for the item; flush() reports its outcome
+          under this id
+
+        Returns:
+        - False if the write was attempted and failed
+        """
+        if self.table is None:
+            return True
+        with self._lock:
+            if self._depth:
+                self._pending.append((item, entry_id))
+                return True
+        try:
+            self.table.put_item(Item=to_dynamodb_item(item))
+            self.stats["direct_writes"] += 1
+            return True
+        except Exception as e:
+            self.stats["errors"] += 1
+            logger.error(f"Error writing item: {str(e)}")
+            return False
+
+    def _item_key(self, item: Dict[str, Any]) -> Any:
+        if self.key_names:
+            return tuple(str(item.get(k)) for k in self.key_names)
+        return json.dumps(item, sort_keys=True, default=str)
+
+    def flush(self) -> Dict[str, Optional[str]]:
+        """
+        Write every queued item with batch_write_item
+
+        Items DynamoDB returns as UnprocessedItems are resent (with backoff)
+        up to UNPROCESSED_RETRIES times; after that, and for requests that
+        raise, the items count as failed.
+
+        Returns:
+        - Dictionary of entry id -> None if written or an error message,
+          for items that were queued with an entry_id
+        """
+        with self._lock:
+            pending, self._pending = self._pending, []
+        if not pending or self.table is None:
+            return {entry_id: None for _, entry_id in pending if entry_id is not None}
+
+        # BatchWriteItem rejects two puts for the same key in one request;
+        # the last write wins and speaks for the ids of the ones it replaced
+        latest: Dict[Any, Tuple[Dict[str, Any], List[str]]] = {}
+        for item, entry_id in pending:
+            converted = to_dynamodb_item(item)
+            key = self._item_key(converted)
+            entry_ids = latest[key][1] if key in latest else []
+            if entry_id is not None:
+                entry_ids.append(entry_id)
+            latest[key] = (converted, entry_ids)
+
+        errors: Dict[Any, str] = {}
+        keys = list(latest)
+        for start in range(0, len(keys), DYNAMODB_BATCH_SIZE):
+            chunk = keys[start:start + DYNAMODB_BATCH_SIZE]
+            errors.update(self._write_chunk({key: latest[key][0] for key in chunk}))
+
+        written = len(latest) - len(errors)
+        self.stats["batched_writes"] += written
+        self.stats["flushes"] += 1
+        if errors:
+            self.stats["errors"] += len(errors)
+            logger.error(f"Error flushing {len(errors)} of {len(latest)} items: {next(iter(errors.values()))}")
+
+        outcome: Dict[str, Optional[str]] = {}
+        for key, (_, entry_ids) in latest.items():
+            for entry_id in entry_ids:
+                outcome[entry_id] = errors.get(key)
+        return outcome
+
+    def _write_chunk(self, items: Dict[Any, Dict[str, Any]]) -> Dict[Any, str]:
+        """Write up to 25 items; returns item key -> error for those not written."""
+        client = getattr(getattr(self.table, "meta", None), "client", None)
+        if client is None:
+            # Table without a client (e.g. a stand-in): all or nothing
+            try:
+                with self.table.batch_writer() as batch:
+                    for item in items.values():
+                        batch.put_item(Item=item)
+                return {}
+            except Exception as e:
+                return {key: str(e) for key in items}
+
+        remaining = dict(items)
+        for attempt in range(UNPROCESSED_RETRIES + 1):
+            if attempt:
+                time.sleep(0.05 * 2 ** (attempt - 1))
+            try:
+                response = client.batch_write_item(RequestItems={
+                    self.table.name: [{"PutRequest": {"Item": item}} for item in remaining.values()]
+                })
+            except Exception as e:
+                return {key: str(e) for key in remaining}
+            unprocessed = (response.get("UnprocessedItems") or {}).get(self.table.name, [])
+            unprocessed_keys = {self._item_key(request["PutRequest"]["Item"]) for request in unprocessed}
+            remaining = {key: item for key, item in remaining.items() if key in unprocessed_keys}
+            if not remaining:
+                return {}
+        return {key: "Item left unprocessed by DynamoDB" for key in remaining}
+
+
+# ----------------------------------------------------------
+# SQS
+# ----------------------------------------------------------
+
+class SQSBatchSender:
+    """
+    Queue of outgoing SQS messages sent with send_message_batch
+
+    Messages are grouped into requests of at most 10 entries and 256 KB.
+    Entries the service reports as failed (other than sender faults) are
+    retried once.
+    """
+
+    def __init__(self, client: Any = None, queue_url: Optional[str] = None):
+        self.client = client
+        self.queue_url = queue_url
+        self._pending: List[Tuple[str, str]] = []
+        self._counter = 0
+        self._lock = threading.Lock()
+
+    @property
+    def enabled(self) -> bool:
+        return bool(self.client and self.queue_url)
+
+    def send(self, message: Dict[str, Any]) -> Optional[str]:
+        """
+        Queue a message
+
+        Returns:
+        - Entry id used to look up the result of flush(), or None when
+          no queue is configured
+        """
+        if not self.enabled:
+            return None
+        with self._lock:
+            self._counter += 1
+            entry_id = f"m{self._counter}"
+            self._pending.append((entry_id, json.dumps(message, default=str)))
+        return entry_id
+
+    def flush(self) -> Dict[str, Optional[str]]:
+        """
+        Send every queued message
+
+        Returns:
+        - Dictionary of entry id -> None on success or an error message
+        """
+        with self._lock:
+            entries, self._pending = self._pending, []
+        outcome: Dict[str, Optional[str]] = {}
+        retry: List[Tuple[str, str]] = []
+        for chunk in self._chunks(entries):
+            retry.extend(self._send_chunk(chunk, outcome))
+        for chunk in self._chunks(retry):
+            self._send_chunk(chunk, outcome)
+        return outcome
+
+    @staticmethod
+    def _chunks(entries: List[Tuple[str, str]]):
+        chunk, size = [], 0
+        for entry in entries:
+            entry_size = len(entry[1].encode("utf-8"))
+            if chunk and (len(chunk) == SQS_BATCH_SIZE or size + entry_size > SQS_MAX_BATCH_BYTES):
+                yield chunk
+                chunk, size = [], 0
+            chunk.append(entry)
+            size += entry_size
+        if chunk:
+            yield chunk
+
+    def _send_chunk(self, chunk: List[Tuple[str, str]],
+                    outcome: Dict[str, Optional[str]]) -> List[Tuple[str, str]]:
+        """Send one request; returns entries worth retrying."""
+        bodies = dict(chunk)
+        try:
+            response = self.client.send_message_batch(
+                QueueUrl=self.queue_url,
+                Entries=[{"Id": entry_id, "MessageBody": body} for entry_id, body in chunk]
+            )
+        except Exception as e:
+            logger.error(f"Error sending message batch: {str(e)}")
+            for entry_id, _ in chunk:
+                outcome[entry_id] = str(e)
+            return []
+
+        for success in response.get("Successful", []):
+            outcome[success["Id"]] = None
+        retry = []
+        for failure in response.get("Failed", []):
+            entry_id = failure["Id"]
+            retryable = not failure.get("SenderFault", False) and entry_id not in outcome
+            outcome[entry_id] = failure.get("Message") or failure.get("Code") or "send failed"
+            if retryable:
+                retry.append((entry_id, bodies[entry_id]))
+        return retry
+
+
+# ----------------------------------------------------------
+# SQS event processing
+# ----------------------------------------------------------
+
+def process_sqs_records(records: List[Dict[str, Any]],
+                        handler: Callable[[Dict[str, Any], Dict[str, Any]], Any],
+                        max_workers: int = DEFAULT_BATCH_WORKERS) -> Dict[str, Any]:
+    """
+    Process an SQS batch, reporting failures per record
+
+    Records are handled concurrently. Records from the same FIFO message
+    group are handled in order, and once one fails the rest of its group
+    is reported as failed without being processed, as Lambda requires for
+    FIFO queues.
+
+    Parameters:
+    - records: The event's Records
+    - handler: Called with (parsed JSON body, record); it fails the record
+      by raising or by returning a dict with success False
+    - max_workers: Records processed at once
+
+    Returns:
+    - Dictionary with results (in record order) and batchItemFailures, the
+      partial batch response Lambda expects
+    """
+    results: List[Optional[Dict[str, Any]]] = [None] * len(records)
+
+    def run(index: int) -> bool:
+        record = records[index]
+        message_id = record.get("messageId", "unknown")
+        try:
+            body = json.loads(record.get("body") or "{}")
+            outcome = handler(body, record)
+            success = not (isinstance(outcome, dict) and outcome.get("success") is False)
+            results[index] = {
+                "message_id": message_id,
+                "success": success,
+                "error": None if success else outcome.get("error"),
+                "result": outcome
+            }
+            return success
+        except Exception as e:
+            logger.error(f"Error processing SQS message {message_id}: {str(e)}")
+            results[index] = {"message_id": message_id, "success": False, "error": str(e)}
+            return False
+
+    def run_group(indexes: List[int]):
+        for position, index in enumerate(indexes):
+            if not run(index):
+                for skipped in indexes[position + 1:]:
+                    results[skipped] = {
+                        "message_id": records[skipped].get("messageId", "unknown"),
+                        "success": False,
+                        "error": "Skipped after an earlier failure in its message group"
+                    }
+                return
+
+    # Standard-queue records are independent; FIFO records are grouped
+    groups: Dict[str, List[int]] = {}
+    units: List[List[int]] = []
+    for index, record in enumerate(records):
+        group_id = (record.get("attributes") or {}).get("MessageGroupId")
+        if group_id is None:
+            units.append([index])
+        else:
+            if group_id not in groups:
+                groups[group_id] = []
+                units.append(groups[group_id])
+            groups[group_id].append(index)
+
+    if len(units) <= 1 or max_workers <= 1:
+        for unit in units:
+            run_group(unit)
+    else:
+        with ThreadPoolExecutor(max_workers=min(max_workers, len(units))) as executor:
+            list(executor.map(run_group, units))
+
+    return {
+        "results": results,
+        "batchItemFailures": [
+            {"itemIdentifier": result["message_id"]}
+            for result in results if not result["success"]
+        ]
+    }
+
+
+def fail_records(records: List[Dict[str, Any]], batch: Dict[str, Any],
+                 errors: Dict[str, Optional[str]]) -> Dict[str, Any]:
+    """
+    Mark records of a processed batch as failed after the fact
+
+    Used when work that was deferred past the handler (e.g. buffered table
+    writes) fails. Later records of the same FIFO message group are failed
+    too, as Lambda requires.
+
+    Parameters:
+    - records: The event's Records
+    - batch: Result of process_sqs_records for those records (updated in place)
+    - errors: Message id -> error message, or None for no error
+
+    Returns:
+    - The updated batch
+    """
+    failed_groups = set()
+    for index, record in enumerate(records):
+        message_id = record.get("messageId", "unknown")
+        group_id = (record.get("attributes") or {}).get("MessageGroupId")
+        result = batch["results"][index]
+        error = errors.get(message_id)
+        if error is None and group_id is not None and group_id in failed_groups and result["success"]:
+            error = "Skipped after an earlier failure in its message group"
+        if error is not None and result["success"]:
+            batch["results"][index] = {**result, "success": False, "error": error}
+        if group_id is not None and not batch["results"][index]["success"]:
+            failed_groups.add(group_id)
+
+    batch["batchItemFailures"] = [
+        {"itemIdentifier": result["message_id"]}
+        for result in batch["results"] if not result["success"]
+    ]
+    return batch
+
+
+# ----------------------------------------------------------
+# Local stand-ins
+# ----------------------------------------------------------
+
+class InMemoryTable:
+    """
+    Minimal in-memory DynamoDB Table for local runs
+
+    Supports put_item, get_item, batch_writer and (through ``meta.client``)
+    batch_write_item, keyed on key_names. Like the real resource API it
+    rejects float attribute values. ``fail_when`` can mark items whose
+    writes should fail; batch_write_item leaves them unprocessed.
+    """
+
+    def __init__(self, key_names: Tuple[str, ...] = ("id",),
+                 fail_when: Optional[Callable[[Dict[str, Any]], bool]] = None,
+                 name: str = "local"):
+        self.key_names = tuple(key_names)
+        self.fail_when = fail_when
+        self.name = name
+        self.meta = SimpleNamespace(client=self)
+        self.items: Dict[Tuple, Dict[str, Any]] = {}
+        self.calls = {"put_item": 0, "batch_write_item": 0}
+        self._lock = threading.Lock()
+
+    def _store(self, item: Dict[str, Any]):
+        if any(isinstance(value, float) for value in item.values()):
+            raise TypeError("Float types are not supported. Use Decimal types instead.")
+        if self.fail_when and self.fail_when(item):
+            raise RuntimeError("Simulated write failure")
+        self.items[tuple(item.get(k) for k in self.key_names)] = item
+
+    def put_item(self, Item: Dict[str, Any]):
+        with self._lock:
+            self.calls["put_item"] += 1
+            self._store(Item)
+        return {}
+
+    def get_item(self, Key: Dict[str, Any]):
+        item = self.items.get(tuple(Key.get(k) for k in self.key_names))
+        return {"Item": item} if item is not None else {}
+
+    def batch_write_item(self, RequestItems: Dict[str, List[Dict[str, Any]]]):
+        requests = RequestItems.get(self.name, [])
+        if len(requests) > DYNAMODB_BATCH_SIZE:
+            raise ValueError("Too many items requested for the BatchWriteItem call")
+        unprocessed = []
+        with self._lock:
+            self.calls["batch_write_item"] += 1
+            for request in requests:
+                item = request["PutRequest"]["Item"]
+                if self.fail_when and self.fail_when(item):
+                    unprocessed.append(request)
+                else:
+                    self._store(item)
+        return {"UnprocessedItems": {self.name: unprocessed} if unprocessed else {}}
+
+    @contextmanager
+    def batch_writer(self):
+        pending: List[Dict[str, Any]] = []
+
+        class _Batch:
+            def put_item(self, Item):
+                pending.append(Item)
+
+        yield _Batch()
+        with self._lock:
+            for start in range(0, len(pending), DYNAMODB_BATCH_SIZE):
+                self.calls["batch_write_item"] += 1
+                for item in pending[start:start + DYNAMODB_BATCH_SIZE]:
+                    self._store(item)
+
+
+class InMemorySQS:
+    """
+    Minimal in-memory SQS client for local runs
+
+    Supports send_message and send_message_batch (with the service's
+    10-entry limit). ``fail_when`` can mark message bodies to reject.
+    """
+
+    def __init__(self, fail_when: Optional[Callable[[str], bool]] = None):
+        self.fail_when = fail_when
+        self.messages: List[Dict[str, Any]] = []
+        self.calls = {"send_message": 0, "send_message_batch": 0}
+        self._lock = threading.Lock()
+
+    def send_message(self, QueueUrl: str, MessageBody: str, **kwargs):
+        with self._lock:
+            self.calls["send_message"] += 1
+            if self.fail_when and self.fail_when(MessageBody):
+                raise RuntimeError("Simulated send failure")
+            self.messages.append({"queue_url": QueueUrl, "body": MessageBody})
+            return {"MessageId": str(len(self.messages))}
+
+    def send_message_batch(self, QueueUrl: str, Entries: List[Dict[str, Any]], **kwargs):
+        if len(Entries) > SQS_BATCH_SIZE:
+            raise ValueError("Too many entries in batch request")
+        with self._lock:
+            self.calls["send_message_batch"] += 1
+            successful, failed = [], []
+            for entry in Entries:
+                if self.fail_when and self.fail_when(entry["MessageBody"]):
+                    failed.append({"Id": entry["Id"], "SenderFault": True,
+                                   "Code": "InvalidMessageContents", "Message": "Simulated rejection"})
+                    continue
+                self.messages.append({"queue_url": QueueUrl, "body": entry["MessageBody"]})
+                successful.append({"Id": entry["Id"], "MessageId": str(len(self.messages))})
+            return {"Successful": successful, "Failed": failed}
+
+    def get_queue_attributes(self, QueueUrl: str, AttributeNames=None):
+        return {"Attributes": {"QueueArn": f"arn:local:sqs:{QueueUrl}"}}
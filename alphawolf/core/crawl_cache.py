@@ -0,0 +1,424 @@
+# © 2025 The Christman AI Project. All rights reserved.
+#
+# This code is released as part of a trauma-informed, dignity-first AI ecosystem
+# designed to protect, empower, and elevate vulnerable populations.
+#
+# By using, modifying, or distributing this software, you agree to uphold the following:
+# 1. Truth — No deception, no manipulation.
+# 2. Dignity — Respect the autonomy and humanity of all users.
+# 3. Protection — Never use this to exploit or harm vulnerable individuals.
+# 4. Transparency — Disclose all modifications and contributions clearly.
+# 5. No Erasure — Preserve the mission and ethical origin of this work.
+#
+# This is not just code. This is redemption in code.
+# Contact: lumacognify@thechristmanaiproject.com
+# https://thechristmanaiproject.com
+"""
+AlphaWolf Crawl Cache
+Part of The Christman AI Project - LumaCognify AI
+
+Single-file cache for the web crawler. Fetched HTML and extracted content
+are stored zlib-compressed in one SQLite database, keyed by the MD5 of the
+URL (the same key the old per-file cache used, so those files can be
+imported). Entries expire after a TTL and the least recently used ones are
+evicted once the cache grows past its size limit.
+
+Inside Lambda the packaged cache is read-only, so it is copied to /tmp on
+first use and warm invocations keep reading and writing that copy.
+
+"HOW CAN I HELP YOU LOVE YOURSELF MORE"
+"""
+
+import os
+import json
+import time
+import zlib
+import shutil
+import hashlib
+import logging
+import sqlite3
+import threading
+from typing import Any, Dict, Iterable, List, Optional
+
+logger = logging.getLogger(__name__)
+
+CACHE_FILENAME = "crawl_cache.sqlite"
+LAMBDA_CACHE_DIR = "/tmp/alphawolf"
+
+# Entry kinds
+HTML = "html"
+CONTENT = "content"
+
+# SQLite limits the number of bound parameters per statement
+_BATCH = 500
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS entries (
+    key TEXT NOT NULL,
+    kind TEXT NOT NULL,
+    url TEXT,
+    stored_at REAL NOT NULL,
+    accessed_at REAL NOT NULL,
+    size INTEGER NOT NULL,
+    body BLOB NOT NULL,
+    PRIMARY KEY (key, kind)
+);
+CREATE INDEX IF NOT EXISTS entries_accessed ON entries (accessed_at);
+CREATE INDEX IF NOT EXISTS entries_stored ON entries (stored_at);
+"""
+
+
+def url_key(url: str) -> str:
+    """Cache key for a URL."""
+    return hashlib.md5(url.encode()).hexdigest()
+
+
+def resolve_cache_path(cache_dir: str) -> str:
+    """
+    Work out where the cache database should live
+
+    CRAWL_CACHE_PATH overrides the location. Inside Lambda the deployment
+    package is read-only, so a cache shipped in cache_dir is copied to /tmp
+    once per container; later (warm) invocations reuse the copy.
+
+    Parameters:
+    - cache_dir: Directory holding the packaged cache
+
+    Returns:
+    - Path of a writable cache database
+    """
+    override = os.environ.get("CRAWL_CACHE_PATH")
+    if override:
+        return override
+
+    packaged = os.path.join(cache_dir, CACHE_FILENAME)
+    if not os.environ.get("AWS_LAMBDA_FUNCTION_NAME"):
+        return packaged
+
+    local_copy = os.path.join(LAMBDA_CACHE_DIR, CACHE_FILENAME)
+    if not os.path.exists(local_copy):
+        os.makedirs(LAMBDA_CACHE_DIR, exist_ok=True)
+        if os.path.exists(packaged):
+            try:
+                # Copy then rename so a concurrent reader never sees half a file
+                partial = f"{local_copy}.{os.getpid()}"
+                shutil.copyfile(packaged, partial)
+                os.replace(partial, local_copy)
+                logger.info(f"Copied packaged crawl cache to {local_copy}")
+            except Exception as e:
+                logger.error(f"Error copying packaged crawl cache: {str(e)}")
+    return local_copy
+
+
+class CrawlCache:
+    """
+    Compressed, size-bounded page cache in a single SQLite file
+    """
+
+    def __init__(self,
+                 path: str,
+                 ttl_seconds: float = 7 * 24 * 3600,
+                 max_bytes: int = 64 * 1024 * 1024,
+                 compression_level: int = 6):
+        """
+        Open (or create) the cache
+
+        Parameters:
+        - path: Database file, or ":memory:"
+        - ttl_seconds: How long an entry stays fresh
+        - max_bytes: Compressed size the cache is trimmed back to
+        - compression_level: zlib level for stored bodies
+        """
+        self.path = path
+        self.ttl_seconds = ttl_seconds
+        self.max_bytes = max_bytes
+        self.compression_level = compression_level
+        self._lock = threading.Lock()
+
+        directory = os.path.dirname(path)
+        if directory and path != ":memory:":
+            os.makedirs(directory, exist_ok=True)
+
+        self._db = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+        self._db.execute("PRAGMA journal_mode=WAL" if path != ":memory:" else "PRAGMA journal_mode=MEMORY")
+        self._db.execute("PRAGMA synchronous=NORMAL")
+        self._db.executescript(_SCHEMA)
+        self._total_bytes = self._db.execute("SELECT COALESCE(SUM(size), 0) FROM entries").fetchone()[0]
+
+    # Encoding
+
+    def _encode(self, kind: str, value: Any) -> bytes:
+        text = value if kind == HTML else json.dumps(value, ensure_ascii=False, separators=(",", ":"))
+        return zlib.compress(text.encode("utf-8"), self.compression_level)
+
+    @staticmethod
+    def _decode(kind: str, body: bytes) -> Any:
+        text = zlib.decompress(body).decode("utf-8")
+        return text if kind == HTML else json.loads(text)
+
+    # Reads
+
+    def get(self, url: str, kind: str = HTML) -> Optional[Any]:
+        """
+        Get a fresh entry
+
+        Parameters:
+        - url: The cached URL
+        - kind: HTML or CONTENT
+
+        Returns:
+        - Cached HTML string or content dictionary, or None if missing/expired
+        """
+        return self.get_many([url], kind).get(url)
+
+    def get_many(self, urls: Iterable[str], kind: str = HTML) -> Dict[str, Any]:
+        """
+        Get fresh entries for several URLs in one query
+
+        Parameters:
+        - urls: URLs to look up
+        - kind: HTML or CONTENT
+
+        Returns:
+        - Dictionary of URL -> cached value for the URLs that were found
+        """
+        keys = {url_key(url): url for url in urls}
+        if not keys:
+            return {}
+
+        now = time.time()
+        found = {}
+        with self._lock:
+            key_list = list(keys)
+            for start in range(0, len(key_list), _BATCH):
+                batch = key_list[start:start + _BATCH]
+                placeholders = ",".join("?" * len(batch))
+                rows = self._db.execute(
+                    f"SELECT key, body FROM entries WHERE kind = ? AND stored_at > ? AND key IN ({placeholders})",
+                    [kind, now - self.ttl_seconds, *batch]
+                ).fetchall()
+                for key, body in rows:
+                    try:
+                        found[key] = self._decode(kind, body)
+                    except Exception as e:
+                        logger.error(f"Error decoding cached {kind} for {keys[key]}: {str(e)}")
+            if found:
+                self._db.executemany(
+                    "UPDATE entries SET accessed_at = ? WHERE key = ? AND kind = ?",
+                    [(now, key, kind) for key in found]
+                )
+        return {keys[key]: value for key, value in found.items()}
+
+    # Writes
+
+    def put(self, url: str, value: Any, kind: str = HTML) -> None:
+        """
+        Store an entry, evicting old ones if the cache is over its size limit
+
+        Parameters:
+        - url: The URL being cached
+        - value: HTML string (HTML) or JSON-serializable dictionary (CONTENT)
+        - kind: HTML or CONTENT
+        """
+        self.put_many({url: value}, kind)
+
+    def put_many(self, values: Dict[str, Any], kind: str = HTML) -> None:
+        """
+        Store several entries in one transaction
+
+        Parameters:
+        - values: Dictionary of URL -> value
+        - kind: HTML or CONTENT
+        """
+        if not values:
+            return
+        now = time.time()
+        rows = []
+        for url, value in values.items():
+            body = self._encode(kind, value)
+            rows.append((url_key(url), kind, url, now, now, len(body), body))
+
+        with self._lock:
+            self._db.execute("BEGIN")
+            try:
+                for row in rows:
+                    previous = self._db.execute(
+                        "SELECT size FROM entries WHERE key = ? AND kind = ?", row[:2]
+                    ).fetchone()
+                    self._db.execute("INSERT OR REPLACE INTO entries VALUES (?, ?, ?, ?, ?, ?, ?)", row)
+                    self._total_bytes += row[5] - (previous[0] if previous else 0)
+                self._db.execute("COMMIT")
+            except Exception:
+                self._db.execute("ROLLBACK")
+                self._total_bytes = self._db.execute("SELECT COALESCE(SUM(size), 0) FROM entries").fetchone()[0]
+                raise
+            if self._total_bytes > self.max_bytes:
+                self._evict_locked(now)
+
+    # Eviction
+
+    def evict(self) -> int:
+        """
+        Drop expired entries, then least recently used ones until under max_bytes
+
+        Returns:
+        - Number of entries removed
+        """
+        with self._lock:
+            return self._evict_locked(time.time())
+
+    def _evict_locked(self, now: float) -> int:
+        removed = self._db.execute(
+            "DELETE FROM entries WHERE stored_at <= ?", (now - self.ttl_seconds,)
+        ).rowcount
+        total = self._db.execute("SELECT COALESCE(SUM(size), 0) FROM entries").fetchone()[0]
+
+        if total > self.max_bytes:
+            # Trim to 90% so a burst of writes doesn't evict on every put
+            target = int(self.max_bytes * 0.9)
+            victims = []
+            for key, kind, size in self._db.execute(
+                "SELECT key, kind, size FROM entries ORDER BY accessed_at"
+            ).fetchall():
+                if total <= target:
+                    break
+                victims.append((key, kind))
+                total -= size
+            self._db.executemany("DELETE FROM entries WHERE key = ? AND kind = ?", victims)
+            removed += len(victims)
+
+        self._total_bytes = total
+        if removed:
+            logger.debug(f"Evicted {removed} crawl cache entries ({total} bytes remain)")
+        return removed
+
+    # Maintenance
+
+    def stats(self) -> Dict[str, Any]:
+        """Entry counts and sizes (for diagnostics)."""
+        with self._lock:
+            counts = dict(self._db.execute("SELECT kind, COUNT(*) FROM entries GROUP BY kind").fetchall())
+        return {
+            "path": self.path,
+            "entries": sum(counts.values()),
+            "html_entries": counts.get(HTML, 0),
+            "content_entries": counts.get(CONTENT, 0),
+            "bytes": self._total_bytes,
+            "max_bytes": self.max_bytes
+        }
+
+    def import_directory(self, directory: str) -> int:
+        """
+        Import an old-style cache directory of <md5>.html / <md5>.json files
+
+        The files' modification times become the entries' stored times, so
+        stale pages stay stale.
+
+        Parameters:
+        - directory: The old cache directory
+
+        Returns:
+        - Number of entries imported
+        """
+        rows = []
+        for name in os.listdir(directory):
+            key, ext = os.path.splitext(name)
+            kind = {".html": HTML, ".json": CONTENT}.get(ext)
+            if not kind or len(key) != 32:
+                continue
+            path = os.path.join(directory, name)
+            try:
+                with open(path, "r", encoding="utf-8") as f:
+                    value = f.read() if kind == HTML else json.load(f)
+            except Exception as e:
+                logger.error(f"Error reading old cache file {path}: {str(e)}")
+                continue
+            stored = os.path.getmtime(path)
+            url = value.get("url") if kind == CONTENT and isinstance(value, dict) else None
+            body = self._encode(kind, value)
+            rows.append((key, kind, url, stored, stored, len(body), body))
+
+        with self._lock:
+            self._db.execute("BEGIN")
+            self._db.executemany("INSERT OR REPLACE INTO entries VALUES (?, ?, ?, ?, ?, ?, ?)", rows)
+            self._db.execute("COMMIT")
+            self._evict_locked(time.time())
+        return len(rows)
+
+    def export(self, path: str) -> None:
+        """
+        Write a compacted copy of the cache, e.g. to ship with a deployment
+
+        Parameters:
+        - path: Destination file (replaced if it exists)
+        """
+        if os.path.exists(path):
+            os.remove(path)
+        with self._lock:
+            self._evict_locked(time.time())
+            self._db.execute("VACUUM INTO ?", (path,))
+
+    def close(self) -> None:
+        """Close the database."""
+        with self._lock:
+            self._db.close()
+
+
+class DomainTokenBucket:
+    """
+    Per-domain token bucket that never blocks
+
+    Callers ask for a token and either get one or learn how long until the
+    next one is available, so they can crawl another domain in the meantime
+    instead of sleeping.
+    """
+
+    def __init__(self, delay: float, burst: int = 1):
+        """
+        Initialize the limiter
+
+        Parameters:
+        - delay: Seconds per request per domain once the burst is used up
+        - burst: Requests a domain can take back to back
+        """
+        self.rate = 1.0 / delay if delay > 0 else float("inf")
+        self.burst = max(1, burst)
+        self._buckets: Dict[str, List[float]] = {}
+        self._lock = threading.Lock()
+
+    def try_acquire(self, domain: str) -> float:
+        """
+        Take a token for a domain if one is available
+
+        Parameters:
+        - domain: The domain about to be requested
+
+        Returns:
+        - 0.0 if a token was taken, otherwise seconds until one will be free
+        """
+        now = time.monotonic()
+        with self._lock:
+            bucket = self._buckets.get(domain)
+            if bucket is None:
+                bucket = self._buckets[domain] = [float(self.burst), now]
+            tokens = min(self.burst, bucket[0] + (now - bucket[1]) * self.rate)
+            bucket[1] = now
+            if tokens >= 1.0:
+                bucket[0] = tokens - 1.0
+                return 0.0
+            bucket[0] = tokens
+            return (1.0 - tokens) / self.rate
+
+
+if __name__ == "__main__":
+    # Build a cache file to ship with a deployment, optionally from an old cache directory:
+    #   python -m core.crawl_cache <output file> [old cache directory]
+    import sys
+
+    logging.basicConfig(level=logging.INFO)
+    output = sys.argv[1]
+    staging = CrawlCache(":memory:", max_bytes=1 << 62)
+    if len(sys.argv) > 2:
+        print(f"imported {staging.import_directory(sys.argv[2])} entries")
+    staging.export(output)
+    print(f"wrote {output} ({os.path.getsize(output)} bytes)")
@@ -28,9 +28,11 @@ import json
 import logging
 import datetime
 import hashlib
+import math
 import re
 import time
 import uuid
+from collections import OrderedDict
 from typing import Dict, List, Any, Optional, Tuple, Union
 from urllib.parse import urlparse
 
@@ -43,6 +45,16 @@ try:
         validate_coordinates,
         format_timestamp
     )
+    from .geofence import CompiledZones
+    from .batch_io import BufferedTableWriter, process_sqs_records
+    from .services import get_table
+    from .trajectory import (
+        TrajectoryEngine,
+        SEVERITY_CODES,
+        parse_timestamp,
+        summarize_track,
+        track_from_locations
+    )
 except ImportError:
     # When running as Lambda function
     from utils import (
@@ -52,6 +64,16 @@ except ImportError:
         validate_coordinates,
         format_timestamp
     )
+    from geofence import CompiledZones
+    from batch_io import BufferedTableWriter, process_sqs_records
+    from services import get_table
+    from trajectory import (
+        TrajectoryEngine,
+        SEVERITY_CODES,
+        parse_timestamp,
+        summarize_track,
+        track_from_locations
+    )
 
 # Configure logging
 logger = logging.getLogger(__name__)
@@ -65,6 +87,9 @@ DEFAULT_CONFIG = {
     "alert_notification_email": os.environ.get("ALERT_NOTIFICATION_EMAIL", "alerts@example.com"),
     "max_cache_age_days": int(os.environ.get("MAX_CACHE_AGE_DAYS", "7")),
     "safe_speed_threshold_kph": 60.0,  # Maximum safe speed in km/h
+    "zone_cache_size": int(os.environ.get("ZONE_CACHE_SIZE", "1024")),  # Users with compiled zones kept
+    "trajectory_max_users": int(os.environ.get("TRAJECTORY_MAX_USERS", "10000")),  # Users with movement state kept
+    "trajectory_history_size": int(os.environ.get("TRAJECTORY_HISTORY_SIZE", "2880")),  # Fixes buffered per user
     "unsafe_words": [
         "lost", "confused", "help", "don't know", "where am i",
         "scared", "afraid", "alone", "hurt", "pain", "fallen",
@@ -72,55 +97,56 @@ DEFAULT_CONFIG = {
     ]
 }
 
-# Initialize optional services
-try:
-    import boto3
-    # Initialize AWS services if running in AWS Lambda
-    if os.environ.get("AWS_LAMBDA_FUNCTION_NAME"):
-        sns_client = boto3.client('sns')
-        sqs_client = boto3.client('sqs')
-        dynamodb = boto3.resource('dynamodb')
-        locations_table = dynamodb.Table(os.environ.get("LOCATIONS_TABLE", "alphawolf-locations"))
-except ImportError:
-    # If running outside AWS or boto3 not available
-    sns_client = None
-    sqs_client = None
-    dynamodb = None
-    locations_table = None
+# AWS services (the locations table) are created on first use by core.services
 
-# Risk analysis integration
-try:
-    from .risk_model import RiskAnalyzer
-    risk_analyzer = RiskAnalyzer()
-except ImportError:
-    # Simple fallback risk analyzer
-    class RiskAnalyzer:
-        def analyze_text(self, text, context=None):
-            # Simple keyword-based risk detection as fallback
-            risk_level = 0.0
-            unsafe_words = DEFAULT_CONFIG["unsafe_words"]
-            
-            # Check for unsafe words
-            text_lower = text.lower()
-            for word in unsafe_words:
-                if word.lower() in text_lower:
-                    risk_level += 0.2
-                    risk_level = min(risk_level, 0.9)  # Cap at 0.9
-                    
-            # Return result
-            return {
-                "risk_score": risk_level,
-                "risk_level": "high" if risk_level >= DEFAULT_CONFIG["high_risk_threshold"] else 
-                              "medium" if risk_level >= DEFAULT_CONFIG["medium_risk_threshold"] else "low",
-                "unsafe_matches": [word for word in unsafe_words if word.lower() in text_lower],
-                "analysis_timestamp": datetime.datetime.utcnow().isoformat()
-            }
+# Risk analysis integration; the analyzer is built on first use
+class KeywordRiskAnalyzer:
+    """Simple keyword-based risk detection, used when risk_model is unavailable"""
     
-    risk_analyzer = RiskAnalyzer()
+    def analyze_text(self, text, context=None):
+        risk_level = 0.0
+        unsafe_words = DEFAULT_CONFIG["unsafe_words"]
+        
+        # Check for unsafe words
+        text_lower = text.lower()
+        for word in unsafe_words:
+            if word.lower() in text_lower:
+                risk_level += 0.2
+                risk_level = min(risk_level, 0.9)  # Cap at 0.9
+                
+        # Return result
+        return {
+            "risk_score": risk_level,
+            "risk_level": "high" if risk_level >= DEFAULT_CONFIG["high_risk_threshold"] else 
+                          "medium" if risk_level >= DEFAULT_CONFIG["medium_risk_threshold"] else "low",
+            "unsafe_matches": [word for word in unsafe_words if word.lower() in text_lower],
+            "analysis_timestamp": datetime.datetime.utcnow().isoformat()
+        }
+
+_risk_analyzer = None
+
+def get_risk_analyzer():
+    """Get the shared risk analyzer, creating it on first use"""
+    global _risk_analyzer
+    if _risk_analyzer is None:
+        try:
+            from .risk_model import RiskAnalyzer
+            _risk_analyzer = RiskAnalyzer()
+        except ImportError:
+            _risk_analyzer = KeywordRiskAnalyzer()
+    return _risk_analyzer
 
 def analyze_text(text, context=None):
     """Helper function to analyze text with the risk analyzer"""
-    return risk_analyzer.analyze_text(text, context)
+    return get_risk_analyzer().analyze_text(text, context)
+
+def analyze_texts(texts, contexts=None):
+    """Analyze several messages, in one analyze_many call when the analyzer has it"""
+    analyzer = get_risk_analyzer()
+    contexts = contexts if contexts is not None else [None] * len(texts)
+    if hasattr(analyzer, "analyze_many"):
+        return analyzer.analyze_many(texts, contexts=contexts)
+    return [analyzer.analyze_text(text, context) for text, context in zip(texts, contexts)]
 
 
 class FamilyProtectionSystem:
@@ -142,12 +168,88 @@ class FamilyProtectionSystem:
         instance_hash = hashlib.md5(str(datetime.datetime.utcnow().timestamp()).encode()).hexdigest()[:8]
         self.instance_id = f"family_protection_{instance_hash}"
         
+        # Compiled safety zones per user: user_id -> (zones fingerprint, CompiledZones)
+        self._zone_cache = OrderedDict()
+        
+        # Location records; batched while inside deferred_writes()
+        self.location_writer = BufferedTableWriter(
+            key_names=("user_id", "timestamp"),
+            table_factory=lambda: get_table("locations")
+        )
+        
+        # Incremental movement state per user (last fix, speed stats, grid visits, track)
+        self.trajectories = TrajectoryEngine(
+            max_users=self.config["trajectory_max_users"],
+            history_size=self.config["trajectory_history_size"]
+        )
+        
         logger.info(f"FamilyProtectionSystem initialized with ID {self.instance_id}")
+    
+    def get_compiled_zones(self, 
+                          user_id: str, 
+                          safety_zones: Optional[List[Dict[str, Any]]] = None) -> CompiledZones:
+        """
+        Get a user's safety zones compiled for evaluation, reusing earlier work
+        
+        Geometry is rebuilt only when the zone definitions change. When
+        safety_zones is None the zones last seen for the user are used, so
+        callers (e.g. the /safety endpoint) need not resend them.
+        
+        Parameters:
+        - user_id: Identifier of the user being monitored
+        - safety_zones: Optional list of safety zone definitions
+        
+        Returns:
+        - CompiledZones for the user (empty if none are known)
+        """
+        cached = self._zone_cache.get(user_id)
+        if safety_zones is None:
+            if cached is None:
+                return CompiledZones([])
+            self._zone_cache.move_to_end(user_id)
+            return cached[1]
+        
+        fingerprint = hashlib.sha1(
+            json.dumps(safety_zones, sort_keys=True, default=str).encode()
+        ).hexdigest()
+        if cached is not None and cached[0] == fingerprint:
+            self._zone_cache.move_to_end(user_id)
+            return cached[1]
+        
+        compiled = CompiledZones(safety_zones)
+        self._zone_cache[user_id] = (fingerprint, compiled)
+        self._zone_cache.move_to_end(user_id)
+        while len(self._zone_cache) > self.config["zone_cache_size"]:
+            self._zone_cache.popitem(last=False)
+        return compiled
+    
+    def set_safety_zones(self, user_id: str, safety_zones: List[Dict[str, Any]]) -> int:
+        """
+        Register (and compile) a user's safety zones
+        
+        Parameters:
+        - user_id: Identifier of the user being monitored
+        - safety_zones: List of safety zone definitions
+        
+        Returns:
+        - Number of usable zones
+        """
+        return len(self.get_compiled_zones(user_id, safety_zones))
+        
+    def deferred_writes(self):
+        """
+        Context manager that batches location writes until it exits
+        
+        Handlers processing many locations in one invocation wrap the work in
+        this so records go out through one batch_writer flush instead of one
+        put_item each.
+        """
+        return self.location_writer.deferred()
         
     def check_location_safety(self, 
                              latitude: float, 
                              longitude: float, 
-                             safety_zones: List[Dict[str, Any]], 
+                             safety_zones: Optional[List[Dict[str, Any]]], 
                              user_id: str,
                              timestamp: Optional[str] = None) -> Dict[str, Any]:
         """
@@ -156,12 +258,13 @@ class FamilyProtectionSystem:
         Parameters:
         - latitude: The current latitude
         - longitude: The current longitude
-        - safety_zones: List of safety zone definitions
+        - safety_zones: List of safety zone definitions (None: the user's cached zones)
         - user_id: Identifier of the user being monitored
         - timestamp: Optional timestamp of the location update
         
         Returns:
-        - Safety assessment result
+        - Safety assessment result; zones_unknown is set (and is_safe is None)
+          when the user has no usable safety zones
         """
         # Validate coordinates
         if not validate_coordinates(latitude, longitude):
@@ -172,75 +275,36 @@ class FamilyProtectionSystem:
                 "timestamp": format_timestamp(timestamp or datetime.datetime.utcnow())
             }
             
+        # Without zones there is nothing to be outside of: report that rather
+        # than raise a false "outside all safety zones" alert
+        zones = self.get_compiled_zones(user_id, safety_zones)
+        if not len(zones):
+            return {
+                "is_safe": None,
+                "zones_unknown": True,
+                "message": "No safety zones are known for this user; send safety_zones with the request",
+                "user_id": user_id,
+                "timestamp": format_timestamp(timestamp or datetime.datetime.utcnow()),
+                "latitude": float(latitude),
+                "longitude": float(longitude)
+            }
+        
         # Check if location is within any safety zone
-        is_safe = False
-        closest_zone = None
-        closest_distance = float('inf')
-        closest_zone_name = "Unknown"
-        
-        for zone in safety_zones:
-            # Get zone center point or polygon
-            if "center" in zone and "radius" in zone:
-                # Circular zone
-                center_lat = zone["center"]["latitude"]
-                center_lon = zone["center"]["longitude"]
-                radius = zone["radius"]
-                
-                # Calculate distance to center
-                distance = calculate_distance(latitude, longitude, center_lat, center_lon)
-                
-                # Check if within radius
-                if distance <= radius:
-                    is_safe = True
-                    closest_zone = zone
-                    closest_distance = distance
-                    closest_zone_name = zone.get("name", "Unnamed Safety Zone")
-                    break
-                elif distance < closest_distance:
-                    closest_distance = distance
-                    closest_zone = zone
-                    closest_zone_name = zone.get("name", "Unnamed Safety Zone")
-            elif "polygon" in zone:
-                # Polygon zone
-                polygon = zone["polygon"]
-                
-                # Check if inside polygon
-                if is_inside_polygon(latitude, longitude, polygon):
-                    is_safe = True
-                    closest_zone = zone
-                    closest_distance = 0  # Inside polygon
-                    closest_zone_name = zone.get("name", "Unnamed Safety Zone")
-                    break
-                else:
-                    # Find minimum distance to polygon
-                    min_distance = float('inf')
-                    for i in range(len(polygon)):
-                        p1 = polygon[i]
-                        p2 = polygon[(i + 1) % len(polygon)]
-                        d = self._distance_to_segment(latitude, longitude, p1[0], p1[1], p2[0], p2[1])
-                        min_distance = min(min_distance, d)
-                    
-                    if min_distance < closest_distance:
-                        closest_distance = min_distance
-                        closest_zone = zone
-                        closest_zone_name = zone.get("name", "Unnamed Safety Zone")
+        is_safe, zone_index, closest_distance = zones.evaluate(float(latitude), float(longitude))
+        closest_zone_name = zones.names[zone_index] if zone_index >= 0 else "Unknown"
         
         # Store location in database if available
-        if locations_table:
-            try:
-                location_item = {
-                    "user_id": user_id,
-                    "timestamp": timestamp or datetime.datetime.utcnow().isoformat(),
-                    "latitude": float(latitude),
-                    "longitude": float(longitude),
-                    "is_safe": is_safe,
-                    "closest_zone_name": closest_zone_name,
-                    "distance_to_safety": closest_distance if not is_safe else 0,
-                    "ttl": int(time.time() + 86400 * 30)  # 30 days retention
-                }
-                locations_table.put_item(Item=location_item)
-            except Exception as e:
-                logger.error(f"Error storing location: {e}")
+        if self.location_writer.table is not None:
+            self.location_writer.put({
+                "user_id": user_id,
+                "timestamp": timestamp or datetime.datetime.utcnow().isoformat(),
+                "latitude": float(latitude),
+                "longitude": float(longitude),
+                "is_safe": is_safe,
+                "closest_zone_name": closest_zone_name,
+                "distance_to_safety": closest_distance if not is_safe and math.isfinite(closest_distance) else 0,
+                "ttl": int(time.time() + 86400 * 30)  # 30 days retention
+            })
         
         # Create safety assessment result
         result = {
@@ -269,14 +333,18 @@ class FamilyProtectionSystem:
     
     def detect_unusual_movement(self, 
                                current_location: Dict[str, float], 
-                               previous_locations: List[Dict[str, Any]],
+                               previous_locations: Optional[List[Dict[str, Any]]],
                                user_id: str) -> Dict[str, Any]:
         """
         Detect unusual movement patterns that might indicate wandering or travel
         
+        The user's trajectory state is updated with the current location, so
+        callers streaming fixes may pass previous_locations only once (or not
+        at all); history that is newer than the state reseeds it.
+        
         Parameters:
         - current_location: The current location with latitude, longitude, and timestamp
-        - previous_locations: List of previous locations with timestamps
+        - previous_locations: Optional list of previous locations with timestamps
         - user_id: Identifier of the user being monitored
         
         Returns:
@@ -290,123 +358,98 @@ class FamilyProtectionSystem:
                 "user_id": user_id,
                 "timestamp": format_timestamp(datetime.datetime.utcnow())
             }
-            
-        # Need at least one previous location for comparison
-        if not previous_locations:
-            return {
-                "is_unusual": False,
-                "user_id": user_id,
-                "timestamp": format_timestamp(datetime.datetime.utcnow()),
-                "note": "Insufficient location history for movement analysis"
-            }
-            
-        # Sort locations by timestamp
-        sorted_locations = sorted(previous_locations, 
-                                 key=lambda loc: loc.get("timestamp", "1970-01-01T00:00:00Z"))
         
-        last_location = sorted_locations[-1]
+        current_time = parse_timestamp(current_location.get("timestamp"))
+        if current_time is None:
+            current_time = time.time()
+        latitude = float(current_location["latitude"])
+        longitude = float(current_location["longitude"])
         
-        # Calculate distance and time since last recorded location
-        try:
-            distance = calculate_distance(
-                float(current_location["latitude"]), 
-                float(current_location["longitude"]),
-                float(last_location["latitude"]), 
-                float(last_location["longitude"])
-            )
-            
-            # Parse timestamps
-            current_time = None
-            last_time = None
+        # A record without a usable timestamp is taken to be 10 minutes old
+        state = self.trajectories.sync(user_id, previous_locations, default_time=current_time - 600)
+        
+        with state.lock:
+            # Need at least one earlier fix for comparison
+            if state.last_time is None:
+                state.record(latitude, longitude, current_time)
+                return {
+                    "is_unusual": False,
+                    "user_id": user_id,
+                    "timestamp": format_timestamp(datetime.datetime.utcnow()),
+                    "note": "Insufficient location history for movement analysis"
+                }
             
-            if "timestamp" in current_location:
-                try:
-                    current_time = datetime.datetime.fromisoformat(str(current_location["timestamp"]).replace('Z', '+00:00'))
-                except ValueError:
-                    current_time = datetime.datetime.utcnow()
-            else:
-                current_time = datetime.datetime.utcnow()
+            try:
+                distance, time_diff_seconds, speed_kph = state.step_to(latitude, longitude, current_time)
                 
-            if "timestamp" in last_location:
-                try:
-                    last_time = datetime.datetime.fromisoformat(str(last_location["timestamp"]).replace('Z', '+00:00'))
-                except ValueError:
-                    # Default to 10 minutes ago if invalid
-                    last_time = current_time - datetime.timedelta(minutes=10)
-            else:
-                # Default to 10 minutes ago if missing
-                last_time = current_time - datetime.timedelta(minutes=10)
+                # Check if speed exceeds threshold (unusual for someone with dementia to move so fast)
+                safe_speed_threshold_kph = self.config["safe_speed_threshold_kph"]
+                is_unusual_speed = speed_kph > safe_speed_threshold_kph
                 
-            # Calculate time difference in seconds
-            time_diff_seconds = (current_time - last_time).total_seconds()
-            
-            # Avoid division by zero
-            if time_diff_seconds < 1:
-                time_diff_seconds = 1
+                # Check for wandering pattern (repeatedly visiting the same area,
+                # counted on a 1km grid over the last few fixes)
+                recent_count = len(state.recent_cells)
+                distinct_areas = state.recent_distinct_cells
+                potential_wandering = distinct_areas < 3 and recent_count >= 5
                 
-            # Calculate speed in m/s and convert to km/h
-            speed_mps = distance / time_diff_seconds
-            speed_kph = speed_mps * 3.6
-            
-            # Check if speed exceeds threshold (unusual for someone with dementia to move so fast)
-            safe_speed_threshold_kph = self.config["safe_speed_threshold_kph"]
-            is_unusual_speed = speed_kph > safe_speed_threshold_kph
-            
-            # Check for wandering pattern (repeatedly visiting the same area)
-            recent_locations = sorted_locations[-10:]  # Last 10 locations
-            visited_areas = set()
-            for loc in recent_locations:
-                # Create a grid-based area identifier (1km grid)
-                area_id = f"{int(float(loc['latitude']) * 100) / 100},{int(float(loc['longitude']) * 100) / 100}"
-                visited_areas.add(area_id)
+                # Include this step, which is only recorded once its severity is known;
+                # fixes older than the last one are never recorded
+                average_speed = (
+                    state.speed_mean_with(speed_kph) if current_time >= state.last_time else state.speed_mean
+                )
                 
-            potential_wandering = len(visited_areas) < 3 and len(recent_locations) >= 5
-            
-            # Create assessment result
-            result = {
-                "is_unusual": is_unusual_speed or potential_wandering,
-                "user_id": user_id,
-                "timestamp": format_timestamp(current_time),
-                "assessment": {
-                    "distance_from_last_location": round(distance, 2),
-                    "time_since_last_location": round(time_diff_seconds, 2),
-                    "estimated_speed_kph": round(speed_kph, 2),
-                    "unusual_speed": is_unusual_speed,
-                    "potential_wandering": potential_wandering
-                }
-            }
-            
-            # Add alert if movement is unusual
-            if is_unusual_speed:
-                result["alert"] = {
-                    "severity": "high" if speed_kph > safe_speed_threshold_kph * 1.5 else "medium",
-                    "message": f"User {user_id} is moving at {speed_kph:.2f} km/h, which exceeds the safe threshold of {safe_speed_threshold_kph} km/h",
-                    "alert_id": generate_unique_id("mov_alert"),
-                    "alert_timestamp": datetime.datetime.utcnow().isoformat()
-                }
-            elif potential_wandering:
-                result["alert"] = {
-                    "severity": "medium",
-                    "message": f"User {user_id} shows potential wandering pattern, visiting {len(visited_areas)} distinct areas in the last {len(recent_locations)} location updates",
-                    "alert_id": generate_unique_id("wan_alert"),
-                    "alert_timestamp": datetime.datetime.utcnow().isoformat()
+                # Create assessment result
+                result = {
+                    "is_unusual": is_unusual_speed or potential_wandering,
+                    "user_id": user_id,
+                    "timestamp": format_timestamp(
+                        datetime.datetime.fromtimestamp(current_time, datetime.timezone.utc)
+                    ),
+                    "assessment": {
+                        "distance_from_last_location": round(distance, 2),
+                        "time_since_last_location": round(time_diff_seconds, 2),
+                        "estimated_speed_kph": round(speed_kph, 2),
+                        "average_speed_kph": round(average_speed, 2),
+                        "unusual_speed": is_unusual_speed,
+                        "potential_wandering": potential_wandering
+                    }
                 }
                 
-            return result
-            
-        except Exception as e:
-            logger.error(f"Error calculating movement assessment: {e}")
-            return {
-                "is_unusual": False,
-                "error": f"Error in movement analysis: {str(e)}",
-                "user_id": user_id,
-                "timestamp": format_timestamp(datetime.datetime.utcnow())
-            }
+                # Add alert if movement is unusual
+                if is_unusual_speed:
+                    result["alert"] = {
+                        "severity": "high" if speed_kph > safe_speed_threshold_kph * 1.5 else "medium",
+                        "message": f"User {user_id} is moving at {speed_kph:.2f} km/h, which exceeds the safe threshold of {safe_speed_threshold_kph} km/h",
+                        "alert_id": generate_unique_id("mov_alert"),
+                        "alert_timestamp": datetime.datetime.utcnow().isoformat()
+                    }
+                elif potential_wandering:
+                    result["alert"] = {
+                        "severity": "medium",
+                        "message": f"User {user_id} shows potential wandering pattern, visiting {distinct_areas} distinct areas in the last {recent_count} location updates",
+                        "alert_id": generate_unique_id("wan_alert"),
+                        "alert_timestamp": datetime.datetime.utcnow().isoformat()
+                    }
+                
+                severity = SEVERITY_CODES.get(result.get("alert", {}).get("severity"), 0)
+                state.record(latitude, longitude, current_time, severity)
+                
+                return result
+                
+            except Exception as e:
+                logger.error(f"Error calculating movement assessment: {e}")
+                return {
+                    "is_unusual": False,
+                    "error": f"Error in movement analysis: {str(e)}",
+                    "user_id": user_id,
+                    "timestamp": format_timestamp(datetime.datetime.utcnow())
+                }
     
     def analyze_communication(self, 
                              message: str, 
                              user_id: str,
-                             context: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
+                             context: Optional[Dict[str, Any]] = None,
+                             risk_assessment: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
         """
         Analyze communication for signs of distress or disorientation
         
@@ -414,12 +457,15 @@ class FamilyProtectionSystem:
         - message: The message text to analyze
         - user_id: Identifier of the user who sent the message
         - context: Optional context information
+        - risk_assessment: Risk analysis already done for this message (e.g.
+          by analyze_texts for a whole batch); analyzed here if omitted
         
         Returns:
         - Communication analysis result
         """
         # Use risk analyzer to assess message
-        risk_assessment = analyze_text(message, context)
+        if risk_assessment is None:
+            risk_assessment = analyze_text(message, context)
         
         # Create assessment result
         result = {
@@ -446,18 +492,20 @@ class FamilyProtectionSystem:
     
     def generate_safety_report(self, 
                               user_id: str,
-                              location_history: List[Dict[str, Any]],
-                              safety_zones: List[Dict[str, Any]],
-                              communication_history: List[Dict[str, Any]],
+                              location_history: Optional[List[Dict[str, Any]]] = None,
+                              safety_zones: Optional[List[Dict[str, Any]]] = None,
+                              communication_history: Optional[List[Dict[str, Any]]] = None,
                               timeframe_hours: int = 24) -> Dict[str, Any]:
         """
         Generate a comprehensive safety report for a user
         
         Parameters:
         - user_id: Identifier of the user to report on
-        - location_history: List of location records
-        - safety_zones: List of defined safety zones
-        - communication_history: List of communication records
+        - location_history: Optional list of location records (default: the
+          track buffered by detect_unusual_movement)
+        - safety_zones: Optional list of defined safety zones (default: the
+          user's last known zones)
+        - communication_history: Optional list of communication records
         - timeframe_hours: Hours of history to include in report
         
         Returns:
@@ -465,112 +513,50 @@ class FamilyProtectionSystem:
         """
         # Calculate timeframe start
         now = datetime.datetime.utcnow()
-        timeframe_start = now - datetime.timedelta(hours=timeframe_hours)
+        timeframe_start = time.time() - timeframe_hours * 3600
+        
+        # Location track as time-ordered columns, filtered to the timeframe
+        state = self.trajectories.peek(user_id)
+        if location_history is not None:
+            track = track_from_locations(location_history, since=timeframe_start)
+        elif state is not None:
+            with state.lock:
+                track = state.history.columns(since=timeframe_start)
+        else:
+            track = track_from_locations([])
+        locations_analyzed = len(track[0])
         
-        # Filter by timeframe
-        filtered_locations = []
-        for loc in location_history:
-            try:
-                loc_time = datetime.datetime.fromisoformat(str(loc.get("timestamp", "")).replace('Z', '+00:00'))
-                if loc_time >= timeframe_start:
-                    filtered_locations.append(loc)
-            except (ValueError, TypeError):
-                # Skip entries with invalid timestamps
-                continue
-                
         filtered_communications = []
-        for comm in communication_history:
-            try:
-                comm_time = datetime.datetime.fromisoformat(str(comm.get("timestamp", "")).replace('Z', '+00:00'))
-                if comm_time >= timeframe_start:
-                    filtered_communications.append(comm)
-            except (ValueError, TypeError):
-                # Skip entries with invalid timestamps
-                continue
+        for comm in communication_history or []:
+            comm_time = parse_timestamp(comm.get("timestamp"))
+            # Skip entries with invalid timestamps
+            if comm_time is not None and comm_time >= timeframe_start:
+                filtered_communications.append(comm)
         
         # Calculate time in/outside safety zones
-        time_in_zones = 0.0
-        time_outside_zones = 0.0
+        zones = self.get_compiled_zones(user_id, safety_zones)
+        track_summary = summarize_track(*track, zones)
+        time_in_zones = track_summary["hours_in_zones"]
+        time_outside_zones = track_summary["hours_outside_zones"]
         zone_visits = {}
-        last_loc = None
-        
-        for loc in sorted(filtered_locations, key=lambda x: x.get("timestamp", "")):
-            # Initialize counter for each zone
-            for zone in safety_zones:
-                zone_name = zone.get("name", "Unnamed Zone")
-                if zone_name not in zone_visits:
-                    zone_visits[zone_name] = 0.0
-            
-            is_inside_any_zone = False
-            inside_zone_name = "Outside All Zones"
-            
-            # Check each zone
-            for zone in safety_zones:
-                zone_name = zone.get("name", "Unnamed Zone")
-                
-                # Check if in circular zone
-                if "center" in zone and "radius" in zone:
-                    center_lat = zone["center"]["latitude"]
-                    center_lon = zone["center"]["longitude"]
-                    radius = zone["radius"]
-                    
-                    distance = calculate_distance(
-                        float(loc["latitude"]), 
-                        float(loc["longitude"]),
-                        float(center_lat), 
-                        float(center_lon)
-                    )
-                    
-                    if distance <= radius:
-                        is_inside_any_zone = True
-                        inside_zone_name = zone_name
-                        break
-                        
-                # Check if in polygon zone
-                elif "polygon" in zone:
-                    polygon = zone["polygon"]
-                    
-                    if is_inside_polygon(float(loc["latitude"]), float(loc["longitude"]), polygon):
-                        is_inside_any_zone = True
-                        inside_zone_name = zone_name
-                        break
-            
-            # Calculate duration since last location
-            if last_loc:
-                try:
-                    last_time = datetime.datetime.fromisoformat(str(last_loc.get("timestamp", "")).replace('Z', '+00:00'))
-                    current_time = datetime.datetime.fromisoformat(str(loc.get("timestamp", "")).replace('Z', '+00:00'))
-                    
-                    # Duration in hours
-                    duration = (current_time - last_time).total_seconds() / 3600
-                    
-                    # Add to appropriate counter
-                    if is_inside_any_zone:
-                        time_in_zones += duration
-                        zone_visits[inside_zone_name] += duration
-                    else:
-                        time_outside_zones += duration
-                except (ValueError, TypeError):
-                    # Skip if timestamps can't be parsed
-                    pass
-                    
-            # Update last location
-            last_loc = loc
-        
-        # Analyze alerts
-        alerts = []
-        for loc in filtered_locations:
-            if "alert" in loc:
-                alerts.append(loc["alert"])
-                
+        for zone_index, hours in track_summary["zone_hours"].items():
+            zone_name = zones.zones[zone_index].get("name", "Unnamed Zone")
+            zone_visits[zone_name] = zone_visits.get(zone_name, 0.0) + hours
+        
+        # Count alerts by severity
+        alert_counts = dict(track_summary["alert_counts"])
+        other_alerts = 0
         for comm in filtered_communications:
             if "alert" in comm:
-                alerts.append(comm["alert"])
-                
-        # Count alerts by severity
-        high_alerts = len([a for a in alerts if a.get("severity") == "high"])
-        medium_alerts = len([a for a in alerts if a.get("severity") == "medium"])
-        low_alerts = len([a for a in alerts if a.get("severity") == "low"])
+                severity = comm["alert"].get("severity")
+                if severity in alert_counts:
+                    alert_counts[severity] += 1
+                else:
+                    other_alerts += 1
+        high_alerts = alert_counts["high"]
+        medium_alerts = alert_counts["medium"]
+        low_alerts = alert_counts["low"]
+        total_alerts = high_alerts + medium_alerts + low_alerts + other_alerts
         
         # Count concerning communications
         concerning_comms = len([
@@ -598,12 +584,12 @@ class FamilyProtectionSystem:
             "summary": {
                 "safety_score": round(safety_score, 1),
                 "assessment": safety_interpretation["assessment"],
-                "locations_analyzed": len(filtered_locations),
+                "locations_analyzed": locations_analyzed,
                 "communications_analyzed": len(filtered_communications),
                 "hours_in_safety_zones": round(time_in_zones, 2),
                 "hours_outside_safety_zones": round(time_outside_zones, 2),
                 "safety_zone_visits": {k: round(v, 2) for k, v in zone_visits.items() if v > 0},
-                "total_alerts": len(alerts),
+                "total_alerts": total_alerts,
                 "high_priority_alerts": high_alerts,
                 "medium_priority_alerts": medium_alerts,
                 "low_priority_alerts": low_alerts,
@@ -612,6 +598,10 @@ class FamilyProtectionSystem:
             "recommendations": safety_interpretation["recommendations"]
         }
         
+        if state is not None:
+            with state.lock:
+                report["movement"] = state.summary()
+        
         return report
     
     def _distance_to_segment(self, lat: float, lon: float, 
@@ -784,21 +774,71 @@ class FamilyProtectionSystem:
         }
 
 
-# Create default instance
-default_system = FamilyProtectionSystem()
+# Default instance, created on first use
+_default_system = None
+
+def get_default_system() -> FamilyProtectionSystem:
+    """Get the shared FamilyProtectionSystem, creating it on first use"""
+    global _default_system
+    if _default_system is None:
+        _default_system = FamilyProtectionSystem()
+    return _default_system
+
+def __getattr__(name):
+    # Keep `default_system` and `risk_analyzer` importable without building them at import time
+    if name == "default_system":
+        return get_default_system()
+    if name == "risk_analyzer":
+        return get_risk_analyzer()
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
 
 # Convenience functions
 def check_location_safety(latitude, longitude, safety_zones, user_id, timestamp=None):
     """Convenience function to check location safety using default system"""
-    return default_system.check_location_safety(latitude, longitude, safety_zones, user_id, timestamp)
+    return get_default_system().check_location_safety(latitude, longitude, safety_zones, user_id, timestamp)
 
 def detect_unusual_movement(current_location, previous_locations, user_id):
     """Convenience function to detect unusual movement using default system"""
-    return default_system.detect_unusual_movement(current_location, previous_locations, user_id)
+    return get_default_system().detect_unusual_movement(current_location, previous_locations, user_id)
 
-def analyze_communication(message, user_id, context=None):
+def analyze_communication(message, user_id, context=None, risk_assessment=None):
     """Convenience function to analyze communication using default system"""
-    return default_system.analyze_communication(message, user_id, context)
+    return get_default_system().analyze_communication(message, user_id, context, risk_assessment)
+
+def score_communication_records(records):
+    """
+    Risk-score the communication messages in an SQS batch in one call
+    
+    Parameters:
+    - records: The event's Records
+    
+    Returns:
+    - Dictionary of messageId -> risk analysis; records that aren't valid
+      communication messages are left out (and scored, or failed, later)
+    """
+    pending = {}
+    for record in records:
+        message_id = record.get("messageId")
+        try:
+            body = json.loads(record.get("body") or "{}")
+        except (TypeError, ValueError):
+            continue
+        if message_id and isinstance(body, dict) and body.get("alert_type") == "communication":
+            pending[message_id] = body
+    if not pending:
+        return {}
+    
+    bodies = list(pending.values())
+    try:
+        results = analyze_texts(
+            [body.get("message", "") for body in bodies],
+            [body.get("context") for body in bodies]
+        )
+    except Exception as e:
+        # Each record is then scored (and can fail) on its own
+        logger.error(f"Error scoring communication batch: {str(e)}")
+        return {}
+    return dict(zip(pending, results))
 
 # Lambda handler
 def lambda_handler(event, context):
@@ -822,6 +862,12 @@ def lambda_handler(event, context):
                     timestamp = body.get("timestamp")
                     
                     result = check_location_safety(latitude, longitude, safety_zones, user_id, timestamp)
+                    if result.get("zones_unknown"):
+                        return {
+                            "statusCode": 409,
+                            "headers": {"Content-Type": "application/json"},
+                            "body": json.dumps(result)
+                        }
                     
                 elif path.endswith("/movement"):
                     # Movement analysis
@@ -842,12 +888,13 @@ def lambda_handler(event, context):
                 elif path.endswith("/report"):
                     # Generate safety report
                     user_id = body.get("user_id")
-                    location_history = body.get("location_history", [])
-                    safety_zones = body.get("safety_zones", [])
+                    # Omitted history and zones fall back to the user's tracked state
+                    location_history = body.get("location_history")
+                    safety_zones = body.get("safety_zones")
                     communication_history = body.get("communication_history", [])
                     timeframe_hours = body.get("timeframe_hours", 24)
                     
-                    result = default_system.generate_safety_report(
+                    result = get_default_system().generate_safety_report(
                         user_id, location_history, safety_zones, 
                         communication_history, timeframe_hours
                     )
@@ -873,17 +920,19 @@ def lambda_handler(event, context):
                 }
                 
         elif "Records" in event:
-            # SQS event
-            for record in event["Records"]:
-                body = json.loads(record["body"])
-                
+            # SQS event: records are processed concurrently and only the failed
+            # ones are reported back for redelivery. Communication messages are
+            # risk-scored together in one analyze_many call first.
+            assessments = score_communication_records(event["Records"])
+            
+            def process_record(body, record):
                 # Process the alert based on type
                 alert_type = body.get("alert_type")
                 
                 if alert_type == "location":
                     latitude = body.get("latitude")
                     longitude = body.get("longitude")
-                    safety_zones = body.get("safety_zones", [])
+                    safety_zones = body.get("safety_zones")
                     user_id = body.get("user_id")
                     timestamp = body.get("timestamp")
                     
@@ -903,13 +952,28 @@ def lambda_handler(event, context):
                     user_id = body.get("user_id")
                     context = body.get("context")
                     
-                    result = analyze_communication(message, user_id, context)
+                    result = analyze_communication(
+                        message, user_id, context, assessments.get(record.get("messageId"))
+                    )
                     logger.info(f"Processed communication alert: {json.dumps(result)}")
                     
                 else:
+                    # Retrying won't help an unknown type; let it be deleted
                     logger.warning(f"Unknown alert type: {alert_type}")
-                    
-            return {"statusCode": 200, "body": "Processed SQS events"}
+                    result = None
+                
+                if isinstance(result, dict) and "error" in result:
+                    return {"success": False, "error": result["error"]}
+                return result
+            
+            with get_default_system().deferred_writes():
+                batch = process_sqs_records(event["Records"], process_record)
+                
+            return {
+                "statusCode": 200,
+                "body": "Processed SQS events",
+                "batchItemFailures": batch["batchItemFailures"]
+            }
             
         else:
             # Direct invocation
@@ -945,7 +1009,7 @@ def lambda_handler(event, context):
                 communication_history = event.get("communication_history", [])
                 timeframe_hours = event.get("timeframe_hours", 24)
                 
-                result = default_system.generate_safety_report(
+                result = get_default_system().generate_safety_report(
                     user_id, location_history, safety_zones, 
                     communication_history, timeframe_hours
                 )
@@ -0,0 +1,379 @@
+# © 2025 The Christman AI Project. All rights reserved.
+#
+# This code is released as part of a trauma-informed, dignity-first AI ecosystem
+# designed to protect, empower, and elevate vulnerable populations.
+#
+# By using, modifying, or distributing this software, you agree to uphold the following:
+# 1. Truth — No deception, no manipulation.
+# 2. Dignity — Respect the autonomy and humanity of all users.
+# 3. Protection — Never use this to exploit or harm vulnerable individuals.
+# 4. Transparency — Disclose all modifications and contributions clearly.
+# 5. No Erasure — Preserve the mission and ethical origin of this work.
+#
+# This is not just code. This is redemption in code.
+# Contact: lumacognify@thechristmanaiproject.com
+# https://thechristmanaiproject.com
+"""
+AlphaWolf Geofence Geometry
+Part of The Christman AI Project - LumaCognify AI
+
+Safety zones compiled once into flat arrays (circle centers and radii,
+polygon edges and bounding boxes) so a location check is a handful of
+array operations instead of a Python loop over every edge of every zone.
+NumPy is used when available; otherwise the same compiled geometry is
+evaluated in pure Python.
+
+"HOW CAN I HELP YOU LOVE YOURSELF MORE"
+"""
+
+import math
+from typing import Dict, List, Any, Optional, Sequence, Tuple
+
+try:
+    import numpy as np
+    NUMPY_AVAILABLE = True
+except ImportError:
+    np = None
+    NUMPY_AVAILABLE = False
+
+EARTH_RADIUS_M = 6371000
+# Meters per degree of latitude (same approximation as the original edge distance)
+METERS_PER_DEGREE = 111320
+
+# Points evaluated per broadcast block in evaluate_many(), to bound memory
+EVALUATION_CHUNK = 2048
+
+
+class CompiledZones:
+    """
+    A user's safety zones in evaluation-ready form
+
+    Zone semantics match FamilyProtectionSystem's original loop: zones are
+    checked in list order and the first one containing the point wins;
+    otherwise the closest zone is reported, measured to the center of a
+    circular zone and to the nearest edge of a polygon zone.
+    """
+
+    def __init__(self, safety_zones: List[Dict[str, Any]], use_numpy: Optional[bool] = None):
+        """
+        Compile zone definitions
+
+        Parameters:
+        - safety_zones: Zone dicts with center/radius or polygon ([lat, lon] points)
+        - use_numpy: Force or disable NumPy (default: use it when installed)
+        """
+        self.use_numpy = NUMPY_AVAILABLE if use_numpy is None else (use_numpy and NUMPY_AVAILABLE)
+        self.zones: List[Dict[str, Any]] = []
+        self.names: List[str] = []
+
+        circles = []   # (zone index, lat, lon, radius)
+        polygons = []  # (zone index, [(lat, lon), ...])
+        for zone in safety_zones:
+            if "center" in zone and "radius" in zone:
+                circles.append((
+                    len(self.zones),
+                    float(zone["center"]["latitude"]),
+                    float(zone["center"]["longitude"]),
+                    float(zone["radius"])
+                ))
+            elif "polygon" in zone and zone["polygon"]:
+                polygons.append((len(self.zones), [(float(p[0]), float(p[1])) for p in zone["polygon"]]))
+            else:
+                continue
+            self.zones.append(zone)
+            self.names.append(zone.get("name", "Unnamed Safety Zone"))
+
+        self.circles = circles
+        self.polygons = polygons
+        # Per polygon: (min lat, max lat, min lon, max lon)
+        self.bounding_boxes = [
+            (min(p[0] for p in points), max(p[0] for p in points),
+             min(p[1] for p in points), max(p[1] for p in points))
+            for _, points in polygons
+        ]
+
+        # Zone order for the pure-Python path; circle centers pre-converted to radians
+        ordered = [
+            (index, "circle", (math.radians(lat), math.radians(lon), radius))
+            for index, lat, lon, radius in circles
+        ] + [
+            (index, "polygon", (points, bbox))
+            for (index, points), bbox in zip(polygons, self.bounding_boxes)
+        ]
+        self._ordered = sorted(ordered, key=lambda entry: entry[0])
+
+        if self.use_numpy:
+            self._compile_arrays()
+
+    def __len__(self) -> int:
+        return len(self.zones)
+
+    def _compile_arrays(self):
+        """Flatten circles and polygon edges into NumPy arrays."""
+        self.circle_zone = np.array([c[0] for c in self.circles], dtype=np.int64)
+        self.circle_lat = np.radians(np.array([c[1] for c in self.circles], dtype=float))
+        self.circle_lon = np.radians(np.array([c[2] for c in self.circles], dtype=float))
+        self.circle_cos_lat = np.cos(self.circle_lat)
+        self.circle_radius = np.array([c[3] for c in self.circles], dtype=float)
+
+        # Edges of every polygon back to back; edge i runs from vertex i to i+1
+        starts, ends, edge_polygon, offsets = [], [], [], []
+        for polygon_index, (_, points) in enumerate(self.polygons):
+            offsets.append(len(starts))
+            for i, point in enumerate(points):
+                starts.append(point)
+                ends.append(points[(i + 1) % len(points)])
+                edge_polygon.append(polygon_index)
+        self.polygon_zone = np.array([p[0] for p in self.polygons], dtype=np.int64)
+        self.edge_offsets = np.array(offsets, dtype=np.int64)
+        self.edge_polygon = np.array(edge_polygon, dtype=np.int64)
+        starts = np.array(starts, dtype=float).reshape(-1, 2)
+        ends = np.array(ends, dtype=float).reshape(-1, 2)
+        self.edge_lat1, self.edge_lon1 = starts[:, 0], starts[:, 1]
+        self.edge_lat2, self.edge_lon2 = ends[:, 0], ends[:, 1]
+        self.edge_dlat = self.edge_lat2 - self.edge_lat1
+        self.edge_dlon = self.edge_lon2 - self.edge_lon1
+        self.bbox = np.array(self.bounding_boxes, dtype=float).reshape(-1, 4)
+
+    # ----------------------------------------------------------
+    # Evaluation
+    # ----------------------------------------------------------
+
+    def evaluate(self, latitude: float, longitude: float) -> Tuple[bool, int, float]:
+        """
+        Evaluate one location
+
+        Parameters:
+        - latitude, longitude: The location to check
+
+        Returns:
+        - Tuple of (is_safe, zone index or -1, distance in meters)
+        """
+        if not self.zones:
+            return False, -1, float("inf")
+        if self.use_numpy:
+            inside, zone, distance = self._evaluate_block(np.array([latitude], dtype=float), np.array([longitude], dtype=float))
+            return bool(inside[0]), int(zone[0]), float(distance[0])
+        return self._evaluate_python(float(latitude), float(longitude))
+
+    def evaluate_many(
+        self, latitudes: Sequence[float], longitudes: Sequence[float]
+    ) -> List[Tuple[bool, int, float]]:
+        """
+        Evaluate many locations against the same zones
+
+        Parameters:
+        - latitudes, longitudes: Coordinates of the locations
+
+        Returns:
+        - List of (is_safe, zone index or -1, distance in meters), in input order
+        """
+        if len(latitudes) != len(longitudes):
+            raise ValueError("latitudes and longitudes must be the same length")
+        if not self.zones:
+            return [(False, -1, float("inf"))] * len(latitudes)
+        if not self.use_numpy:
+            return [self._evaluate_python(float(lat), float(lon)) for lat, lon in zip(latitudes, longitudes)]
+
+        lats = np.asarray(latitudes, dtype=float)
+        lons = np.asarray(longitudes, dtype=float)
+        results = []
+        for start in range(0, len(lats), EVALUATION_CHUNK):
+            inside, zone, distance = self._evaluate_block(
+                lats[start:start + EVALUATION_CHUNK], lons[start:start + EVALUATION_CHUNK]
+            )
+            results.extend(zip(inside.tolist(), zone.tolist(), distance.tolist()))
+        return results
+
+    def _evaluate_block(self, lats, lons):
+        """Vectorized evaluation of a block of points against every zone."""
+        n_points = len(lats)
+        n_zones = len(self.zones)
+        contains = np.zeros((n_points, n_zones), dtype=bool)
+        distances = np.full((n_points, n_zones), np.inf)
+        col_lats = lats[:, None]
+        col_lons = lons[:, None]
+
+        if len(self.circles):
+            d = _haversine(np.radians(col_lats), np.radians(col_lons), np.cos(np.radians(col_lats)),
+                           self.circle_lat, self.circle_lon, self.circle_cos_lat)
+            distances[:, self.circle_zone] = d
+            contains[:, self.circle_zone] = d <= self.circle_radius
+
+        if len(self.polygons):
+            contains[:, self.polygon_zone] = self._polygon_contains(col_lats, col_lons)
+
+            # Distance to the nearest edge, projected in a local flat frame
+            lon_scale = METERS_PER_DEGREE * np.abs(np.cos(np.radians(col_lats)))
+            seg_x = self.edge_dlon * lon_scale
+            seg_y = self.edge_dlat * METERS_PER_DEGREE
+            rel_x = (col_lons - self.edge_lon1) * lon_scale
+            rel_y = (col_lats - self.edge_lat1) * METERS_PER_DEGREE
+            seg_len_sq = seg_x * seg_x + seg_y * seg_y
+            with np.errstate(divide="ignore", invalid="ignore"):
+                t = np.where(seg_len_sq > 0, (rel_x * seg_x + rel_y * seg_y) / seg_len_sq, 0.0)
+            t = np.clip(t, 0.0, 1.0)
+            near_lat = self.edge_lat1 + t * self.edge_dlat
+            near_lon = self.edge_lon1 + t * self.edge_dlon
+            near_lat_rad = np.radians(near_lat)
+            edge_distance = _haversine(np.radians(col_lats), np.radians(col_lons), np.cos(np.radians(col_lats)),
+                                       near_lat_rad, np.radians(near_lon), np.cos(near_lat_rad))
+            polygon_distance = np.minimum.reduceat(edge_distance, self.edge_offsets, axis=1)
+            # A point inside its polygon is at distance 0
+            distances[:, self.polygon_zone] = np.where(contains[:, self.polygon_zone], 0.0, polygon_distance)
+
+        inside_any = contains.any(axis=1)
+        # First containing zone in list order, else the closest (first on ties)
+        zone = np.where(inside_any, contains.argmax(axis=1), distances.argmin(axis=1))
+        distance = distances[np.arange(n_points), zone]
+        return inside_any, zone, distance
+
+    def _polygon_contains(self, col_lats, col_lons):
+        """(points, polygons) containment matrix by ray casting.
+
+        Only points inside a polygon's bounding box are tested against its edges.
+        """
+        in_bbox = (
+            (col_lats >= self.bbox[:, 0]) & (col_lats <= self.bbox[:, 1]) &
+            (col_lons >= self.bbox[:, 2]) & (col_lons <= self.bbox[:, 3])
+        )
+        if not in_bbox.any():
+            return in_bbox
+        straddles = (self.edge_lon1 > col_lons) != (self.edge_lon2 > col_lons)
+        straddles &= in_bbox[:, self.edge_polygon]
+        with np.errstate(divide="ignore", invalid="ignore"):
+            crossing_lat = self.edge_dlat * (col_lons - self.edge_lon1) / self.edge_dlon + self.edge_lat1
+        crossings = straddles & (col_lats < crossing_lat)
+        return np.add.reduceat(crossings.astype(np.int64), self.edge_offsets, axis=1) % 2 == 1
+
+    def containing_zones(self, latitudes: Sequence[float], longitudes: Sequence[float]):
+        """
+        Index of the first zone containing each location, without distances
+
+        Cheaper than evaluate_many() when only membership matters (e.g. time
+        spent in zones over a location history).
+
+        Parameters:
+        - latitudes, longitudes: Coordinates of the locations
+
+        Returns:
+        - Zone index per location, -1 when outside every zone (a NumPy
+          int array when NumPy is in use, otherwise a list)
+        """
+        if len(latitudes) != len(longitudes):
+            raise ValueError("latitudes and longitudes must be the same length")
+        if not self.use_numpy:
+            result = []
+            for lat, lon in zip(latitudes, longitudes):
+                lat, lon = float(lat), float(lon)
+                result.append(next(
+                    (index for index, kind, geometry in self._ordered if self._contains_python(lat, lon, kind, geometry)),
+                    -1
+                ))
+            return result
+
+        lats = np.asarray(latitudes, dtype=float)
+        lons = np.asarray(longitudes, dtype=float)
+        zones = np.full(len(lats), -1, dtype=np.int64)
+        if not self.zones:
+            return zones
+        for start in range(0, len(lats), EVALUATION_CHUNK):
+            col_lats = lats[start:start + EVALUATION_CHUNK, None]
+            col_lons = lons[start:start + EVALUATION_CHUNK, None]
+            contains = np.zeros((len(col_lats), len(self.zones)), dtype=bool)
+            if len(self.circles):
+                rad_lats = np.radians(col_lats)
+                d = _haversine(rad_lats, np.radians(col_lons), np.cos(rad_lats),
+                               self.circle_lat, self.circle_lon, self.circle_cos_lat)
+                contains[:, self.circle_zone] = d <= self.circle_radius
+            if len(self.polygons):
+                contains[:, self.polygon_zone] = self._polygon_contains(col_lats, col_lons)
+            zones[start:start + len(col_lats)] = np.where(contains.any(axis=1), contains.argmax(axis=1), -1)
+        return zones
+
+    @staticmethod
+    def _contains_python(latitude: float, longitude: float, kind: str, geometry) -> bool:
+        if kind == "circle":
+            center_lat, center_lon, radius = geometry
+            lat_rad = math.radians(latitude)
+            return _haversine_scalar(
+                lat_rad, math.radians(longitude), math.cos(lat_rad), center_lat, center_lon, math.cos(center_lat)
+            ) <= radius
+        points, bbox = geometry
+        return (bbox[0] <= latitude <= bbox[1] and bbox[2] <= longitude <= bbox[3]
+                and _point_in_polygon(latitude, longitude, points))
+
+    def _evaluate_python(self, latitude: float, longitude: float) -> Tuple[bool, int, float]:
+        """Pure-Python evaluation of one point (no NumPy)."""
+        lat_rad = math.radians(latitude)
+        lon_rad = math.radians(longitude)
+        cos_lat = math.cos(lat_rad)
+
+        # Walk zones in list order so the first containing zone wins
+        best_zone, best_distance = -1, float("inf")
+        for zone_index, kind, geometry in self._ordered:
+            if kind == "circle":
+                center_lat, center_lon, radius = geometry
+                distance = _haversine_scalar(lat_rad, lon_rad, cos_lat, center_lat, center_lon, math.cos(center_lat))
+                if distance <= radius:
+                    return True, zone_index, distance
+            else:
+                points, bbox = geometry
+                if (bbox[0] <= latitude <= bbox[1] and bbox[2] <= longitude <= bbox[3]
+                        and _point_in_polygon(latitude, longitude, points)):
+                    return True, zone_index, 0.0
+                distance = _polygon_edge_distance(latitude, longitude, lat_rad, lon_rad, cos_lat, points)
+            if distance < best_distance:
+                best_zone, best_distance = zone_index, distance
+        return False, best_zone, best_distance
+
+
+# ----------------------------------------------------------
+# Geometry helpers
+# ----------------------------------------------------------
+
+def _haversine(lat1, lon1, cos_lat1, lat2, lon2, cos_lat2):
+    """Haversine distance in meters; inputs in radians (arrays broadcast)."""
+    a = np.sin((lat2 - lat1) / 2) ** 2 + cos_lat1 * cos_lat2 * np.sin((lon2 - lon1) / 2) ** 2
+    return 2 * EARTH_RADIUS_M * np.arctan2(np.sqrt(a), np.sqrt(1 - a))
+
+
+def _haversine_scalar(lat1, lon1, cos_lat1, lat2, lon2, cos_lat2) -> float:
+    a = math.sin((lat2 - lat1) / 2) ** 2 + cos_lat1 * cos_lat2 * math.sin((lon2 - lon1) / 2) ** 2
+    return 2 * EARTH_RADIUS_M * math.atan2(math.sqrt(a), math.sqrt(1 - a))
+
+
+def _point_in_polygon(lat: float, lon: float, points: List[Tuple[float, float]]) -> bool:
+    """Ray casting, same convention as utils.is_inside_polygon."""
+    inside = False
+    j = len(points) - 1
+    for i in range(len(points)):
+        lat_i, lon_i = points[i]
+        lat_j, lon_j = points[j]
+        if (lon_i > lon) != (lon_j > lon) and lat < (lat_j - lat_i) * (lon - lon_i) / (lon_j - lon_i) + lat_i:
+            inside = not inside
+        j = i
+    return inside
+
+
+def _polygon_edge_distance(lat, lon, lat_rad, lon_rad, cos_lat, points) -> float:
+    """Meters from a point to the nearest polygon edge."""
+    lon_scale = METERS_PER_DEGREE * abs(cos_lat)
+    best = float("inf")
+    for i in range(len(points)):
+        lat1, lon1 = points[i]
+        lat2, lon2 = points[(i + 1) % len(points)]
+        seg_x = (lon2 - lon1) * lon_scale
+        seg_y = (lat2 - lat1) * METERS_PER_DEGREE
+        seg_len_sq = seg_x * seg_x + seg_y * seg_y
+        t = 0.0
+        if seg_len_sq > 0:
+            t = ((lon - lon1) * lon_scale * seg_x + (lat - lat1) * METERS_PER_DEGREE * seg_y) / seg_len_sq
+            t = min(1.0, max(0.0, t))
+        near_lat = lat1 + t * (lat2 - lat1)
+        near_rad = math.radians(near_lat)
+        distance = _haversine_scalar(
+            lat_rad, lon_rad, cos_lat, near_rad, math.radians(lon1 + t * (lon2 - lon1)), math.cos(near_rad)
+        )
+        best = min(best, distance)
+    return best
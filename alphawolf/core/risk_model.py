@@ -26,9 +26,11 @@ overall safety for vulnerable users.
 
 import re
 import json
+import time
+import random
 import datetime
 import logging
-from typing import Dict, List, Tuple, Any, Optional
+from typing import Dict, List, Tuple, Any, Optional, Sequence
 import hashlib
 
 # Configure logging
@@ -85,6 +87,38 @@ RISK_TERMS = {
     ]
 }
 
+# Phrasings of secrecy that the term list alone misses
+MANIPULATION_PHRASES = [
+    "don't tell", "do not tell", "never tell",
+    "don't share", "do not share", "never share",
+    "our little secret", "just between us",
+    "promise not to", "promise you won't"
+]
+
+# Endings accepted after a risk term ("kill" also matches "kills", "killed",
+# "killing", "killer"); spelling changes are handled by _inflections
+TERM_SUFFIXES = ("s", "es", "ed", "ing", "er", "ers")
+
+# Derived and irregular forms the suffix rules can't produce
+IRREGULAR_FORMS = {
+    "die": ["dying"],
+    "shoot": ["shot"],
+    "hide": ["hid", "hidden"],
+    "suicide": ["suicidal"],
+    "violent": ["violence", "violently"],
+    "abuse": ["abusive"],
+    "harm": ["harmful"],
+    "hurt": ["hurtful"],
+    "threat": ["threaten", "threatens", "threatened", "threatening"],
+    "poison": ["poisonous"],
+    "dangerous": ["dangerously"],
+    "secret": ["secretly"],
+    "weapon": ["weaponry"],
+    "knife": ["knives"],
+}
+
+_VOWELS = set("aeiou")
+
 # Time and context factors
 TIME_RISK_FACTORS = {
     "night": {
@@ -105,9 +139,106 @@ LOCATION_RISK_FACTORS = {
     "safe_zone": 1.0
 }
 
+def _inflections(term: str) -> List[str]:
+    """
+    Surface forms matched for a risk term
+    
+    The term itself, the TERM_SUFFIXES endings, the spelling changes they
+    need ("abuse" -> "abusing", "spy" -> "spied", "cut" -> "cutting") and
+    any IRREGULAR_FORMS.
+    """
+    forms = [term] + [term + suffix for suffix in TERM_SUFFIXES]
+    last = term.rsplit(" ", 1)[-1]
+    if last.endswith("e"):
+        forms += [term[:-1] + suffix for suffix in ("ed", "ing", "er", "ers")]
+    elif len(last) > 1 and last[-1] == "y" and last[-2] not in _VOWELS:
+        forms += [term[:-1] + suffix for suffix in ("ies", "ied")]
+    elif 3 <= len(last) <= 4 and last[-1] not in _VOWELS | set("wxy") \
+            and last[-2] in _VOWELS and last[-3] not in _VOWELS:
+        # Short consonant-vowel-consonant words double the final letter
+        forms += [term + term[-1] + suffix for suffix in ("ed", "ing", "er", "ers")]
+    forms += IRREGULAR_FORMS.get(term, [])
+    return forms
+
+
+def _trie_pattern(words: List[str]) -> str:
+    """
+    Regex alternation for a word list, factored by common prefix
+    
+    "kill|knife" becomes "k(?:ill|nife)", so the regex engine tries one
+    branch per character instead of every word at every position. Longer
+    words are still preferred over their prefixes.
+    """
+    trie: Dict[str, Any] = {}
+    for word in words:
+        node = trie
+        for char in word:
+            node = node.setdefault(char, {})
+        node[""] = {}
+    
+    def build(node: Dict[str, Any]) -> str:
+        branches = [re.escape(char) + build(child) for char, child in sorted(node.items()) if char]
+        if not branches:
+            return ""
+        body = branches[0] if len(branches) == 1 else "(?:" + "|".join(branches) + ")"
+        # A word ends here: the rest is optional
+        return f"(?:{body})?" if "" in node else body
+    
+    return build(trie)
+
+
+def _compile_risk_patterns(
+    risk_terms: Dict[str, List[str]], manipulation_phrases: List[str]
+) -> Tuple["re.Pattern", Dict[str, Dict[str, Any]]]:
+    """
+    Build the single matcher used by RiskAnalyzer
+    
+    Parameters:
+    - risk_terms: Category -> terms
+    - manipulation_phrases: Phrases that signal manipulation
+    
+    Returns:
+    - Tuple of (compiled regex, surface form -> match info)
+    """
+    phrases: Dict[str, Dict[str, Any]] = {}
+    
+    def add(form: str, term: str) -> Dict[str, Any]:
+        return phrases.setdefault(form, {"term": term, "categories": [], "manipulation_phrase": False})
+    
+    for category, terms in risk_terms.items():
+        for term in terms:
+            for form in _inflections(term.lower()):
+                info = add(form, term.lower())
+                if category not in info["categories"]:
+                    info["categories"].append(category)
+    for phrase in manipulation_phrases:
+        for form in _inflections(phrase.lower()):
+            add(form, phrase.lower())["manipulation_phrase"] = True
+    
+    # Whole-word forms, longest first
+    matcher = re.compile(rf"\b({_trie_pattern(list(phrases))})\b")
+    
+    # A manipulation phrase can contain terms ("our little secret"); find them
+    # now so a match on the phrase also reports the terms inside it
+    terms = [form for form, info in phrases.items() if info["categories"]]
+    term_matcher = re.compile(rf"\b({_trie_pattern(terms)})\b")
+    for form, info in phrases.items():
+        info["inner_terms"] = [
+            (inner.group(1), inner.start(), inner.end())
+            for inner in term_matcher.finditer(form)
+            if inner.group(0) != form
+        ] if info["manipulation_phrase"] else []
+    return matcher, phrases
+
+
 class RiskAnalyzer:
     """
     The primary risk analysis engine for AlphaWolf
+    
+    Risk terms and manipulation phrases are compiled into a single regular
+    expression at init, so scoring a message is one scan over the text.
+    Terms match whole words only ("hit" no longer fires on "white"), in
+    their inflected and derived forms ("killer", "abusive").
     """
     
     def __init__(self, config: Optional[Dict[str, Any]] = None):
@@ -123,6 +254,11 @@ class RiskAnalyzer:
         self.time_sensitivity = self.config.get("time_sensitivity", True)
         self.location_sensitivity = self.config.get("location_sensitivity", True)
         
+        self._matcher, self._phrases = _compile_risk_patterns(
+            self.config.get("risk_terms", RISK_TERMS),
+            self.config.get("manipulation_phrases", MANIPULATION_PHRASES)
+        )
+        
         # Generate a unique instance ID for logging
         instance_hash = hashlib.md5(str(datetime.datetime.utcnow().timestamp()).encode()).hexdigest()[:8]
         self.instance_id = f"risk_analyzer_{instance_hash}"
@@ -140,15 +276,54 @@ class RiskAnalyzer:
         Returns:
         - Dictionary with risk analysis results
         """
-        context = context or {}
-        text_lower = text.lower()
+        return self._score(text, context or {})
+    
+    def analyze_text(self, text: str, context: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
+        """
+        Alias of analyze(), the name family_protection calls
+        """
+        return self.analyze(text, context)
+    
+    def analyze_many(
+        self,
+        texts: Sequence[str],
+        context: Optional[Dict[str, Any]] = None,
+        contexts: Optional[Sequence[Optional[Dict[str, Any]]]] = None
+    ) -> List[Dict[str, Any]]:
+        """
+        Analyze a batch of messages in one call
         
+        Parameters:
+        - texts: Messages to analyze
+        - context: Context shared by every message
+        - contexts: Per-message contexts (overrides context; same length as texts)
+        
+        Returns:
+        - List of risk analysis results, in input order
+        """
+        if contexts is not None and len(contexts) != len(texts):
+            raise ValueError("contexts must be the same length as texts")
+        
+        shared = context or {}
+        # One clock read for the whole batch when messages carry no timestamp
+        now = datetime.datetime.utcnow()
+        return [
+            self._score(text, (contexts[i] or {}) if contexts is not None else shared, now)
+            for i, text in enumerate(texts)
+        ]
+    
+    def _score(
+        self, text: str, context: Dict[str, Any], now: Optional[datetime.datetime] = None
+    ) -> Dict[str, Any]:
+        """
+        Score one message with its context
+        """
         # Start with basic text analysis
-        risk_score, categories = self._analyze_text(text_lower)
+        risk_score, categories, matches = self._analyze_text(text)
         
         # Apply contextual modifiers
         if self.time_sensitivity:
-            risk_score = self._apply_time_factors(risk_score, context.get("timestamp"))
+            risk_score = self._apply_time_factors(risk_score, context.get("timestamp"), now)
             
         if self.location_sensitivity:
             risk_score = self._apply_location_factors(risk_score, context.get("location"))
@@ -168,7 +343,8 @@ class RiskAnalyzer:
             "risk_score": round(risk_score, 2),
             "risk_level": risk_level,
             "risk_categories": categories,
-            "timestamp": datetime.datetime.utcnow().isoformat(),
+            "unsafe_matches": matches,
+            "timestamp": (now or datetime.datetime.utcnow()).isoformat(),
             "analyzer_id": self.instance_id
         }
         
@@ -178,27 +354,59 @@ class RiskAnalyzer:
             
         return result
     
-    def _analyze_text(self, text: str) -> Tuple[float, List[str]]:
+    def _analyze_text(self, text: str) -> Tuple[float, List[str], List[Dict[str, Any]]]:
         """
         Perform basic text analysis for risk factors
         
         Parameters:
-        - text: The text to analyze (already lowercase)
+        - text: The text to analyze (any case)
         
         Returns:
-        - Tuple of (risk_score, risk_categories)
+        - Tuple of (risk_score, risk_categories, unsafe_matches)
         """
-        risk_score = 0.0
+        text = text.lower()
         categories = []
-        
-        # Check for risk terms in each category
-        for category, terms in RISK_TERMS.items():
-            for term in terms:
-                if term in text:
-                    # If found, add the category with its weight
+        matches = []
+        pattern_hit = False
+        phrases = self._phrases
+        
+        for match in self._matcher.finditer(text):
+            info = phrases[match.group(1)]
+            start = match.start()
+            matched = {
+                "categories": info["categories"] or ["manipulation"],
+                "start": start,
+                "end": match.end()
+            }
+            if info["categories"]:
+                matched["term"] = info["term"]
+                for category in info["categories"]:
                     if category not in categories:
                         categories.append(category)
-                        risk_score += RISK_CATEGORIES[category]["weight"] * 0.2
+            if info["manipulation_phrase"]:
+                matched["pattern"] = info["term"]
+            matches.append(matched)
+            if info["manipulation_phrase"]:
+                pattern_hit = True
+                for form, inner_start, inner_end in info["inner_terms"]:
+                    inner = phrases[form]
+                    matches.append({
+                        "term": inner["term"],
+                        "categories": inner["categories"],
+                        "start": start + inner_start,
+                        "end": start + inner_end
+                    })
+                    for category in inner["categories"]:
+                        if category not in categories:
+                            categories.append(category)
+        
+        # Terms contribute a fifth of each matched category's weight
+        risk_score = sum(RISK_CATEGORIES[category]["weight"] * 0.2 for category in categories)
+        
+        # Check for manipulation phrases (stronger signal when no term fired)
+        if pattern_hit and "manipulation" not in categories:
+            categories.append("manipulation")
+            risk_score += RISK_CATEGORIES["manipulation"]["weight"] * 0.3
         
         # Additional heuristics
         
@@ -218,42 +426,33 @@ class RiskAnalyzer:
                     categories.append("spam")
                     risk_score += RISK_CATEGORIES["spam"]["weight"] * 0.2
         
-        # Check for manipulation patterns
-        manipulation_patterns = [
-            r"(?:don't|do not|never) tell",
-            r"(?:don't|do not|never) share",
-            r"our little secret",
-            r"just between us",
-            r"promise (not to|you won't)"
-        ]
-        
-        for pattern in manipulation_patterns:
-            if re.search(pattern, text):
-                if "manipulation" not in categories:
-                    categories.append("manipulation")
-                    risk_score += RISK_CATEGORIES["manipulation"]["weight"] * 0.3
-                break
-        
-        return risk_score, categories
+        return risk_score, categories, matches
     
-    def _apply_time_factors(self, risk_score: float, timestamp: Optional[str] = None) -> float:
+    def _apply_time_factors(
+        self,
+        risk_score: float,
+        timestamp: Optional[str] = None,
+        now: Optional[datetime.datetime] = None
+    ) -> float:
         """
         Apply time-based risk factors
         
         Parameters:
         - risk_score: The current risk score
         - timestamp: Optional timestamp string (ISO format), uses current time if None
+        - now: Current time, if the caller already has it
         
         Returns:
         - Adjusted risk score
         """
+        dt = None
         if timestamp:
             try:
                 dt = datetime.datetime.fromisoformat(timestamp)
             except (ValueError, TypeError):
-                dt = datetime.datetime.utcnow()
-        else:
-            dt = datetime.datetime.utcnow()
+                pass
+        if dt is None:
+            dt = now or datetime.datetime.utcnow()
         
         hour = dt.hour
         
@@ -333,8 +532,21 @@ class RiskAnalyzer:
         return self.medium_risk_threshold <= risk_score < self.high_risk_threshold
 
 
-# Singleton instance for easy import
-default_analyzer = RiskAnalyzer()
+# Singleton instance for easy import, created on first use
+_default_analyzer = None
+
+def get_default_analyzer() -> RiskAnalyzer:
+    """Get the shared RiskAnalyzer, creating it on first use"""
+    global _default_analyzer
+    if _default_analyzer is None:
+        _default_analyzer = RiskAnalyzer()
+    return _default_analyzer
+
+def __getattr__(name):
+    # Keep `default_analyzer` importable without compiling its patterns at import time
+    if name == "default_analyzer":
+        return get_default_analyzer()
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
 
 def analyze_text(text: str, context: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
     """
@@ -347,4 +559,171 @@ def analyze_text(text: str, context: Optional[Dict[str, Any]] = None) -> Dict[st
     Returns:
     - Risk analysis result dictionary
     """
-    return default_analyzer.analyze(text, context)
\ No newline at end of file
+    return get_default_analyzer().analyze(text, context)
+
+
+def analyze_many(
+    texts: Sequence[str], context: Optional[Dict[str, Any]] = None
+) -> List[Dict[str, Any]]:
+    """
+    Convenience function to analyze a batch of messages using the default analyzer
+    
+    Parameters:
+    - texts: Messages to analyze
+    - context: Optional context shared by every message
+    
+    Returns:
+    - List of risk analysis results, in input order
+    """
+    return get_default_analyzer().analyze_many(texts, context)
+
+
+def legacy_score_text(text: str) -> Tuple[float, List[str]]:
+    """
+    The original per-term substring scan, kept as the benchmark baseline
+    
+    Parameters:
+    - text: The text to analyze (already lowercase)
+    
+    Returns:
+    - Tuple of (risk_score, risk_categories)
+    """
+    risk_score = 0.0
+    categories = []
+    for category, terms in RISK_TERMS.items():
+        for term in terms:
+            if term in text:
+                if category not in categories:
+                    categories.append(category)
+                    risk_score += RISK_CATEGORIES[category]["weight"] * 0.2
+    if len(text) > 1000:
+        if "spam" not in categories:
+            categories.append("spam")
+            risk_score += RISK_CATEGORIES["spam"]["weight"] * 0.1
+    words = text.split()
+    if len(words) > 10:
+        if len(set(words)) / len(words) < 0.3:
+            if "spam" not in categories:
+                categories.append("spam")
+                risk_score += RISK_CATEGORIES["spam"]["weight"] * 0.2
+    manipulation_patterns = [
+        r"(?:don't|do not|never) tell",
+        r"(?:don't|do not|never) share",
+        r"our little secret",
+        r"just between us",
+        r"promise (not to|you won't)"
+    ]
+    for pattern in manipulation_patterns:
+        if re.search(pattern, text):
+            if "manipulation" not in categories:
+                categories.append("manipulation")
+                risk_score += RISK_CATEGORIES["manipulation"]["weight"] * 0.3
+            break
+    return risk_score, categories
+
+
+# Inflected and derived forms in the benchmark corpus, with their base term.
+# Some are deliberately outside what the matcher handles (e.g. "suffocation").
+BENCHMARK_INFLECTIONS = {
+    "killer": "kill", "killing": "kill", "dying": "die", "died": "die",
+    "hurting": "hurt", "hurtful": "hurt", "harmful": "harm", "cutting": "cut",
+    "hitting": "hit", "shooting": "shoot", "shot": "shoot", "guns": "gun",
+    "knives": "knife", "punched": "punch", "jumped": "jump", "attacked": "attack",
+    "attacker": "attack", "abusive": "abuse", "abuser": "abuse", "assaulted": "assault",
+    "threatened": "threat", "threatening": "threat", "poisoned": "poison",
+    "overdosing": "overdose", "drowned": "drown", "strangled": "strangle",
+    "suffocation": "suffocate", "strangulation": "strangle", "violence": "violent",
+    "suicidal": "suicide", "weapons": "weapon", "passwords": "password",
+    "secrets": "secret", "tracking": "track", "followed": "follow",
+    "watching": "watch", "recorded": "record", "spying": "spy", "cameras": "camera",
+    "hiding": "hide", "surveilled": "surveillance",
+}
+
+
+def run_benchmark(messages: int = 5000, seed: int = 7) -> Dict[str, Any]:
+    """
+    Time the legacy scan against the compiled scorer on a synthetic corpus
+    
+    Half of the inserted risk words are inflected or derived forms
+    (BENCHMARK_INFLECTIONS). Recall is the share of risky messages in which
+    every category of the inserted words' base terms was found.
+    
+    Parameters:
+    - messages: Number of messages in the corpus
+    - seed: Random seed for the corpus
+    
+    Returns:
+    - Dictionary with per-message timings, recall and how often the two agree
+    """
+    rng = random.Random(seed)
+    filler = (
+        "i went to the store with my daughter and we had lunch by the river then came "
+        "home for a nap the weather was lovely and the garden looks beautiful this week"
+    ).split()
+    base = [term for terms in RISK_TERMS.values() for term in terms] + [
+        "our little secret", "never tell", "promise you won't", "just between us"
+    ]
+    inflected = list(BENCHMARK_INFLECTIONS)
+    
+    analyzer = RiskAnalyzer({"time_sensitivity": False, "location_sensitivity": False})
+    
+    def expected_categories(word: str) -> set:
+        return set(analyzer._analyze_text(BENCHMARK_INFLECTIONS.get(word, word))[1]) - {"spam"}
+    
+    corpus = []
+    expected = []
+    for _ in range(messages):
+        words = [rng.choice(filler) for _ in range(rng.randint(5, 60))]
+        inserted = [rng.choice(rng.choice((base, inflected))) for _ in range(rng.choice((0, 0, 0, 1, 2)))]
+        for word in inserted:
+            words.insert(rng.randrange(len(words) + 1), word)
+        corpus.append(" ".join(words))
+        expected.append(set().union(*map(expected_categories, inserted)))
+    
+    started = time.perf_counter()
+    legacy = [legacy_score_text(text.lower()) for text in corpus]
+    legacy_seconds = time.perf_counter() - started
+    
+    started = time.perf_counter()
+    compiled = [analyzer._analyze_text(text) for text in corpus]
+    compiled_seconds = time.perf_counter() - started
+    
+    started = time.perf_counter()
+    analyzer.analyze_many(corpus)
+    batch_seconds = time.perf_counter() - started
+    
+    def recall(results) -> float:
+        risky = [(want, set(got[1])) for want, got in zip(expected, results) if want]
+        return sum(want <= got for want, got in risky) / len(risky)
+    
+    def extra(results) -> float:
+        return sum(
+            bool(set(got[1]) - want - {"spam"}) for want, got in zip(expected, results)
+        ) / messages
+    
+    same_categories = sum(
+        set(old[1]) == set(new[1]) for old, new in zip(legacy, compiled)
+    )
+    return {
+        "messages": messages,
+        "legacy_us": legacy_seconds / messages * 1e6,
+        "compiled_us": compiled_seconds / messages * 1e6,
+        "analyze_many_us": batch_seconds / messages * 1e6,
+        "legacy_recall": recall(legacy),
+        "compiled_recall": recall(compiled),
+        "legacy_extra": extra(legacy),
+        "compiled_extra": extra(compiled),
+        "category_agreement": same_categories / messages
+    }
+
+
+if __name__ == "__main__":
+    logging.disable(logging.WARNING)
+    results = run_benchmark()
+    print(f"messages:            {results['messages']}")
+    print(f"legacy scan:         {results['legacy_us']:.1f} us/message")
+    print(f"compiled scorer:     {results['compiled_us']:.1f} us/message")
+    print(f"analyze_many:        {results['analyze_many_us']:.1f} us/message (full results)")
+    print(f"recall:              legacy {results['legacy_recall']:.1%}, compiled {results['compiled_recall']:.1%}")
+    print(f"unexpected category: legacy {results['legacy_extra']:.1%}, compiled {results['compiled_extra']:.1%} of messages")
+    print(f"category agreement:  {results['category_agreement']:.1%}")
@@ -0,0 +1,170 @@
+# © 2025 The Christman AI Project. All rights reserved.
+#
+# This code is released as part of a trauma-informed, dignity-first AI ecosystem
+# designed to protect, empower, and elevate vulnerable populations.
+#
+# By using, modifying, or distributing this software, you agree to uphold the following:
+# 1. Truth — No deception, no manipulation.
+# 2. Dignity — Respect the autonomy and humanity of all users.
+# 3. Protection — Never use this to exploit or harm vulnerable individuals.
+# 4. Transparency — Disclose all modifications and contributions clearly.
+# 5. No Erasure — Preserve the mission and ethical origin of this work.
+#
+# This is not just code. This is redemption in code.
+# Contact: lumacognify@thechristmanaiproject.com
+# https://thechristmanaiproject.com
+"""
+AlphaWolf AWS Services
+Part of The Christman AI Project - LumaCognify AI
+
+Lazily constructed AWS clients and DynamoDB tables shared by the Lambda
+handlers. Nothing (not even boto3) is imported until a handler first
+asks for a service, so routes that don't touch AWS pay nothing for it
+on a cold start.
+
+Outside Lambda the getters return None, or in-memory stand-ins when
+ALPHAWOLF_LOCAL_AWS is set.
+
+"HOW CAN I HELP YOU LOVE YOURSELF MORE"
+"""
+
+import os
+import logging
+import threading
+from typing import Any, Callable, Dict, Optional
+
+logger = logging.getLogger(__name__)
+
+# Logical table name -> (environment variable, default table name, key attributes)
+TABLES = {
+    "interactions": ("INTERACTIONS_TABLE", "alphawolf-interactions", ("request_id", "timestamp")),
+    "locations": ("LOCATIONS_TABLE", "alphawolf-locations", ("user_id", "timestamp")),
+    "content": ("CONTENT_TABLE", "alphawolf-content", ("content_id", "category")),
+}
+
+LOCAL_QUEUE_URL = "local://alphawolf-alerts"
+
+_services: Dict[str, Any] = {}
+_lock = threading.RLock()
+
+
+def in_lambda() -> bool:
+    """Whether we are running inside AWS Lambda."""
+    return bool(os.environ.get("AWS_LAMBDA_FUNCTION_NAME"))
+
+
+def local_mode() -> bool:
+    """Whether in-memory stand-ins replace AWS (ALPHAWOLF_LOCAL_AWS, outside Lambda only)."""
+    return not in_lambda() and bool(os.environ.get("ALPHAWOLF_LOCAL_AWS"))
+
+
+def _get(key: str, factory: Callable[[], Any]) -> Any:
+    """Build a service once and reuse it for the life of the container."""
+    service = _services.get(key)
+    if service is None and key not in _services:
+        with _lock:
+            if key not in _services:
+                try:
+                    _services[key] = factory()
+                except Exception as e:
+                    logger.error(f"Error initializing {key}: {str(e)}")
+                    _services[key] = None
+            service = _services[key]
+    return service
+
+
+def _boto3():
+    if not in_lambda():
+        return None
+    try:
+        import boto3
+        return boto3
+    except ImportError:
+        return None
+
+
+def get_client(service_name: str) -> Any:
+    """
+    Get a boto3 client, created on first use
+
+    Parameters:
+    - service_name: AWS service name (e.g. "sqs", "sns")
+
+    Returns:
+    - boto3 client, an in-memory stand-in (SQS, local mode), or None
+    """
+    def create():
+        if local_mode():
+            if service_name == "sqs":
+                try:
+                    from .batch_io import InMemorySQS
+                except ImportError:
+                    from batch_io import InMemorySQS
+                return InMemorySQS()
+            return None
+        boto3 = _boto3()
+        return boto3.client(service_name) if boto3 else None
+    return _get(f"client:{service_name}", create)
+
+
+def get_dynamodb() -> Any:
+    """Get the DynamoDB service resource (None outside Lambda)."""
+    def create():
+        boto3 = _boto3()
+        return boto3.resource("dynamodb") if boto3 else None
+    return _get("dynamodb", create)
+
+
+def get_table(name: str) -> Any:
+    """
+    Get one of the application's DynamoDB tables, created on first use
+
+    Parameters:
+    - name: Logical table name (a key of TABLES)
+
+    Returns:
+    - Table resource, an in-memory stand-in (local mode), or None
+    """
+    env_var, default_name, key_names = TABLES[name]
+
+    def create():
+        if local_mode():
+            try:
+                from .batch_io import InMemoryTable
+            except ImportError:
+                from batch_io import InMemoryTable
+            return InMemoryTable(key_names=key_names)
+        dynamodb = get_dynamodb()
+        return dynamodb.Table(os.environ.get(env_var, default_name)) if dynamodb else None
+    return _get(f"table:{name}", create)
+
+
+def get_alert_queue_url() -> Optional[str]:
+    """URL of the alert queue (None when not configured)."""
+    if local_mode():
+        return LOCAL_QUEUE_URL
+    return os.environ.get("ALERT_QUEUE_URL") if in_lambda() else None
+
+
+def set_service(key: str, service: Any):
+    """
+    Replace a service (e.g. with a stand-in)
+
+    Parameters:
+    - key: "client:<service>", "dynamodb" or "table:<name>"
+    - service: The object to hand out for that key
+    """
+    with _lock:
+        _services[key] = service
+
+
+def reset():
+    """Forget every constructed service."""
+    with _lock:
+        _services.clear()
+
+
+def initialized() -> Dict[str, bool]:
+    """Which services have been constructed so far (for diagnostics)."""
+    with _lock:
+        return {key: service is not None for key, service in _services.items()}
@@ -0,0 +1,502 @@
+# © 2025 The Christman AI Project. All rights reserved.
+#
+# This code is released as part of a trauma-informed, dignity-first AI ecosystem
+# designed to protect, empower, and elevate vulnerable populations.
+#
+# By using, modifying, or distributing this software, you agree to uphold the following:
+# 1. Truth — No deception, no manipulation.
+# 2. Dignity — Respect the autonomy and humanity of all users.
+# 3. Protection — Never use this to exploit or harm vulnerable individuals.
+# 4. Transparency — Disclose all modifications and contributions clearly.
+# 5. No Erasure — Preserve the mission and ethical origin of this work.
+#
+# This is not just code. This is redemption in code.
+# Contact: lumacognify@thechristmanaiproject.com
+# https://thechristmanaiproject.com
+"""
+AlphaWolf Trajectory State
+Part of The Christman AI Project - LumaCognify AI
+
+Incremental per-user movement state for continuous GPS feeds. Each new
+fix updates the last known position, rolling speed statistics, visit
+counts and dwell times on a fixed grid, and a columnar history buffer in
+constant time, so movement checks no longer re-sort and re-parse a
+user's whole history and safety reports are computed with array
+operations over the buffered track.
+
+"HOW CAN I HELP YOU LOVE YOURSELF MORE"
+"""
+
+import datetime
+import math
+import threading
+from collections import OrderedDict, deque
+from typing import Dict, List, Any, Optional, Tuple
+
+try:
+    from .utils import calculate_distance
+except ImportError:
+    from utils import calculate_distance
+
+try:
+    import numpy as np
+    NUMPY_AVAILABLE = True
+except ImportError:
+    np = None
+    NUMPY_AVAILABLE = False
+
+# Grid cells per degree (0.01 degree cells, about 1 km), the grid the
+# wandering check has always used
+GRID_CELLS_PER_DEGREE = 100
+
+# Fixes considered by the wandering check
+RECENT_WINDOW = 10
+
+# Fixes kept per user for reports (24 hours at one fix every 30 seconds)
+DEFAULT_HISTORY_SIZE = 2880
+
+# Smoothing factor for the exponentially weighted speed average
+SPEED_EWMA_ALPHA = 0.2
+
+# Alert severities stored alongside each fix
+SEVERITY_CODES = {"low": 1, "medium": 2, "high": 3}
+
+
+def parse_timestamp(value: Any) -> Optional[float]:
+    """
+    Parse a timestamp into Unix seconds
+
+    Parameters:
+    - value: ISO 8601 string (a trailing Z is accepted), datetime, or Unix seconds
+
+    Returns:
+    - Seconds since the epoch, or None if the value can't be parsed.
+      Naive times are taken to be UTC.
+    """
+    if value is None or isinstance(value, bool):
+        return None
+    if isinstance(value, (int, float)):
+        return float(value)
+    if isinstance(value, datetime.datetime):
+        parsed = value
+    else:
+        try:
+            parsed = datetime.datetime.fromisoformat(str(value).replace('Z', '+00:00'))
+        except ValueError:
+            return None
+    if parsed.tzinfo is None:
+        parsed = parsed.replace(tzinfo=datetime.timezone.utc)
+    return parsed.timestamp()
+
+
+def grid_cell(latitude: float, longitude: float) -> Tuple[int, int]:
+    """Grid cell of a location (truncated toward zero, as the original area ids were)."""
+    return int(latitude * GRID_CELLS_PER_DEGREE), int(longitude * GRID_CELLS_PER_DEGREE)
+
+
+class TrackBuffer:
+    """
+    Bounded, time-ordered columnar history of fixes
+
+    Columns (time, latitude, longitude, alert severity) are kept in NumPy
+    arrays that grow up to the capacity and then wrap around, dropping
+    the oldest fix. Without NumPy a deque of tuples is used instead.
+    """
+
+    def __init__(self, capacity: int = DEFAULT_HISTORY_SIZE):
+        self.capacity = max(1, capacity)
+        self.size = 0
+        self._start = 0
+        if NUMPY_AVAILABLE:
+            initial = min(64, self.capacity)
+            self._times = np.empty(initial)
+            self._lats = np.empty(initial)
+            self._lons = np.empty(initial)
+            self._severity = np.zeros(initial, dtype=np.int8)
+        else:
+            self._rows = deque(maxlen=self.capacity)
+
+    def __len__(self) -> int:
+        return self.size
+
+    def append(self, timestamp: float, latitude: float, longitude: float, severity: int = 0):
+        """Add a fix (must not be older than the last one)."""
+        if not NUMPY_AVAILABLE:
+            self._rows.append((timestamp, latitude, longitude, severity))
+            self.size = len(self._rows)
+            return
+
+        allocated = len(self._times)
+        if self.size == allocated and allocated < self.capacity:
+            # Still growing, so nothing has wrapped yet (_start is 0)
+            grown = min(self.capacity, allocated * 2)
+            self._times = np.resize(self._times, grown)
+            self._lats = np.resize(self._lats, grown)
+            self._lons = np.resize(self._lons, grown)
+            self._severity = np.resize(self._severity, grown)
+            allocated = grown
+
+        if self.size < allocated:
+            index = (self._start + self.size) % allocated
+            self.size += 1
+        else:
+            # Full: overwrite the oldest fix
+            index = self._start
+            self._start = (self._start + 1) % allocated
+        self._times[index] = timestamp
+        self._lats[index] = latitude
+        self._lons[index] = longitude
+        self._severity[index] = severity
+
+    def columns(self, since: Optional[float] = None):
+        """
+        Buffered fixes in time order
+
+        Parameters:
+        - since: Only include fixes at or after this Unix time
+
+        Returns:
+        - Tuple of (times, latitudes, longitudes, severities); NumPy arrays
+          when NumPy is available, otherwise lists
+        """
+        if not NUMPY_AVAILABLE:
+            rows = [row for row in self._rows if since is None or row[0] >= since]
+            return tuple(list(column) for column in zip(*rows)) if rows else ([], [], [], [])
+
+        end = self._start + self.size
+        allocated = len(self._times)
+        if end <= allocated:
+            window = slice(self._start, end)
+            columns = [c[window] for c in (self._times, self._lats, self._lons, self._severity)]
+        else:
+            order = np.r_[self._start:allocated, 0:end - allocated]
+            columns = [c[order] for c in (self._times, self._lats, self._lons, self._severity)]
+        if since is not None:
+            first = int(np.searchsorted(columns[0], since, side="left"))
+            columns = [c[first:] for c in columns]
+        return tuple(columns)
+
+
+class TrajectoryState:
+    """
+    Movement state for one user, updated in O(1) per fix
+
+    Access is serialized through ``lock``; TrajectoryEngine hands out
+    states and callers hold the lock while assessing and recording a fix.
+    """
+
+    def __init__(self, history_size: int = DEFAULT_HISTORY_SIZE):
+        self.lock = threading.RLock()
+
+        # Last fix
+        self.last_time: Optional[float] = None
+        self.last_latitude: Optional[float] = None
+        self.last_longitude: Optional[float] = None
+        self.fix_count = 0
+
+        # Rolling speed statistics (Welford mean/variance, max, EWMA), km/h
+        self.speed_count = 0
+        self.speed_mean = 0.0
+        self._speed_m2 = 0.0
+        self.speed_max = 0.0
+        self.speed_ewma = 0.0
+
+        # Cells of the most recent fixes, with counts so distinct cells is O(1)
+        self.recent_cells = deque(maxlen=RECENT_WINDOW)
+        self._recent_counts: Dict[Tuple[int, int], int] = {}
+
+        # Whole-track grid statistics
+        self.cell_visits: Dict[Tuple[int, int], int] = {}
+        self.cell_dwell_seconds: Dict[Tuple[int, int], float] = {}
+        self.current_cell: Optional[Tuple[int, int]] = None
+        self.current_cell_since: Optional[float] = None
+
+        self.history = TrackBuffer(history_size)
+
+    @property
+    def speed_std(self) -> float:
+        """Standard deviation of observed speeds in km/h."""
+        if self.speed_count < 2:
+            return 0.0
+        return math.sqrt(self._speed_m2 / (self.speed_count - 1))
+
+    @property
+    def recent_distinct_cells(self) -> int:
+        """Distinct grid cells among the most recent fixes."""
+        return len(self._recent_counts)
+
+    def speed_mean_with(self, speed: float) -> float:
+        """Mean speed in km/h once a step at ``speed`` is recorded."""
+        return self.speed_mean + (speed - self.speed_mean) / (self.speed_count + 1)
+
+    def step_to(self, latitude: float, longitude: float, timestamp: float) -> Tuple[float, float, float]:
+        """
+        Movement from the last fix to a new one, without recording it
+
+        Returns:
+        - Tuple of (distance in meters, seconds elapsed (at least 1), speed in km/h)
+        """
+        distance = calculate_distance(latitude, longitude, self.last_latitude, self.last_longitude)
+        elapsed = max(1.0, timestamp - self.last_time)
+        return distance, elapsed, distance / elapsed * 3.6
+
+    def record(self, latitude: float, longitude: float, timestamp: float, severity: int = 0) -> bool:
+        """
+        Fold a new fix into the state
+
+        Fixes older than the last recorded one don't advance the state.
+
+        Parameters:
+        - latitude, longitude: Location of the fix
+        - timestamp: Unix time of the fix
+        - severity: Alert severity code raised for this fix (0 if none)
+
+        Returns:
+        - True if the fix was recorded
+        """
+        if self.last_time is not None and timestamp < self.last_time:
+            return False
+
+        if self.last_time is not None:
+            _, elapsed, speed = self.step_to(latitude, longitude, timestamp)
+            self.speed_count += 1
+            delta = speed - self.speed_mean
+            self.speed_mean += delta / self.speed_count
+            self._speed_m2 += delta * (speed - self.speed_mean)
+            self.speed_max = max(self.speed_max, speed)
+            self.speed_ewma = speed if self.speed_count == 1 else (
+                SPEED_EWMA_ALPHA * speed + (1 - SPEED_EWMA_ALPHA) * self.speed_ewma
+            )
+            # Time since the last fix is spent in the last fix's cell
+            self.cell_dwell_seconds[self.current_cell] = (
+                self.cell_dwell_seconds.get(self.current_cell, 0.0) + (timestamp - self.last_time)
+            )
+
+        cell = grid_cell(latitude, longitude)
+        self.cell_visits[cell] = self.cell_visits.get(cell, 0) + 1
+        if cell != self.current_cell:
+            self.current_cell = cell
+            self.current_cell_since = timestamp
+
+        if len(self.recent_cells) == self.recent_cells.maxlen:
+            oldest = self.recent_cells[0]
+            if self._recent_counts[oldest] == 1:
+                del self._recent_counts[oldest]
+            else:
+                self._recent_counts[oldest] -= 1
+        self.recent_cells.append(cell)
+        self._recent_counts[cell] = self._recent_counts.get(cell, 0) + 1
+
+        self.last_time = timestamp
+        self.last_latitude = latitude
+        self.last_longitude = longitude
+        self.fix_count += 1
+        self.history.append(timestamp, latitude, longitude, severity)
+        return True
+
+    def summary(self, top_cells: int = 3) -> Dict[str, Any]:
+        """Movement statistics for reports."""
+        dwell = sorted(self.cell_dwell_seconds.items(), key=lambda item: item[1], reverse=True)[:top_cells]
+        return {
+            "fixes_recorded": self.fix_count,
+            "average_speed_kph": round(self.speed_mean, 2),
+            "speed_std_kph": round(self.speed_std, 2),
+            "max_speed_kph": round(self.speed_max, 2),
+            "recent_speed_kph": round(self.speed_ewma, 2),
+            "distinct_areas_visited": len(self.cell_visits),
+            "longest_dwell_areas": [
+                {
+                    "area": f"{cell[0] / GRID_CELLS_PER_DEGREE},{cell[1] / GRID_CELLS_PER_DEGREE}",
+                    "visits": self.cell_visits.get(cell, 0),
+                    "hours": round(seconds / 3600, 2)
+                }
+                for cell, seconds in dwell
+            ],
+            "current_dwell_minutes": round(
+                (self.last_time - self.current_cell_since) / 60, 1
+            ) if self.last_time is not None else 0.0
+        }
+
+
+def _location_rows(locations: List[Dict[str, Any]]) -> List[Tuple[Optional[float], float, float, int]]:
+    """(time, lat, lon, severity) for each location with usable coordinates."""
+    rows = []
+    for loc in locations:
+        try:
+            latitude, longitude = float(loc["latitude"]), float(loc["longitude"])
+        except (KeyError, TypeError, ValueError):
+            continue
+        alert = loc.get("alert")
+        severity = SEVERITY_CODES.get(alert.get("severity"), 0) if isinstance(alert, dict) else 0
+        rows.append((parse_timestamp(loc.get("timestamp")), latitude, longitude, severity))
+    return rows
+
+
+def track_from_locations(locations: List[Dict[str, Any]], since: Optional[float] = None):
+    """
+    Columnar, time-ordered track from a list of location records
+
+    Records whose timestamp can't be parsed are skipped.
+
+    Returns:
+    - Tuple of (times, latitudes, longitudes, severities), as
+      TrackBuffer.columns() returns them
+    """
+    rows = sorted(
+        (row for row in _location_rows(locations)
+         if row[0] is not None and (since is None or row[0] >= since)),
+        key=lambda row: row[0]
+    )
+    if not NUMPY_AVAILABLE:
+        return tuple(list(column) for column in zip(*rows)) if rows else ([], [], [], [])
+    if not rows:
+        return np.empty(0), np.empty(0), np.empty(0), np.zeros(0, dtype=np.int8)
+    times, lats, lons, severity = zip(*rows)
+    return np.array(times), np.array(lats), np.array(lons), np.array(severity, dtype=np.int8)
+
+
+def summarize_track(times, latitudes, longitudes, severities, zones) -> Dict[str, Any]:
+    """
+    Time in and out of safety zones and alert counts over a track
+
+    The time between consecutive fixes is credited to the zone (or to
+    "outside") of the later fix.
+
+    Parameters:
+    - times, latitudes, longitudes, severities: Time-ordered track columns
+    - zones: CompiledZones to test against
+
+    Returns:
+    - Dictionary with hours_in_zones, hours_outside_zones, zone_hours
+      (zone index -> hours) and alert_counts (severity name -> count)
+    """
+    zone_count = len(zones)
+    if NUMPY_AVAILABLE and not isinstance(times, list):
+        if len(times) > 1:
+            zone_index = np.asarray(zones.containing_zones(latitudes[1:], longitudes[1:]))
+            hours = np.diff(times) / 3600
+            inside = zone_index >= 0
+            hours_in = float(hours[inside].sum())
+            hours_out = float(hours[~inside].sum())
+            per_zone = np.bincount(zone_index[inside], weights=hours[inside], minlength=zone_count)
+            zone_hours = {index: float(value) for index, value in enumerate(per_zone) if value > 0}
+        else:
+            hours_in, hours_out, zone_hours = 0.0, 0.0, {}
+        counts = np.bincount(np.asarray(severities, dtype=np.int64), minlength=len(SEVERITY_CODES) + 1)
+        alert_counts = {name: int(counts[code]) for name, code in SEVERITY_CODES.items()}
+    else:
+        hours_in, hours_out, zone_hours = 0.0, 0.0, {}
+        if len(times) > 1:
+            zone_index = zones.containing_zones(latitudes[1:], longitudes[1:])
+            for i, zone in enumerate(zone_index):
+                hours = (times[i + 1] - times[i]) / 3600
+                if zone >= 0:
+                    hours_in += hours
+                    zone_hours[zone] = zone_hours.get(zone, 0.0) + hours
+                else:
+                    hours_out += hours
+        alert_counts = {name: sum(1 for s in severities if s == code) for name, code in SEVERITY_CODES.items()}
+
+    return {
+        "hours_in_zones": hours_in,
+        "hours_outside_zones": hours_out,
+        "zone_hours": zone_hours,
+        "alert_counts": alert_counts
+    }
+
+
+class TrajectoryEngine:
+    """
+    Per-user TrajectoryState store, least recently used users evicted first
+    """
+
+    def __init__(self, max_users: int = 10000, history_size: int = DEFAULT_HISTORY_SIZE):
+        """
+        Initialize the engine
+
+        Parameters:
+        - max_users: Users kept in memory before the least recent is dropped
+        - history_size: Fixes buffered per user for reports
+        """
+        self.max_users = max_users
+        self.history_size = history_size
+        self._states: "OrderedDict[str, TrajectoryState]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return len(self._states)
+
+    def peek(self, user_id: str) -> Optional[TrajectoryState]:
+        """A user's state, if one exists, without creating it."""
+        with self._lock:
+            return self._states.get(user_id)
+
+    def get(self, user_id: str) -> TrajectoryState:
+        """A user's state, created if needed."""
+        with self._lock:
+            state = self._states.get(user_id)
+            if state is None:
+                state = TrajectoryState(self.history_size)
+                self._states[user_id] = state
+                while len(self._states) > self.max_users:
+                    self._states.popitem(last=False)
+            else:
+                self._states.move_to_end(user_id)
+            return state
+
+    def discard(self, user_id: str) -> bool:
+        """Forget a user's state."""
+        with self._lock:
+            return self._states.pop(user_id, None) is not None
+
+    def seed(self, user_id: str, locations: List[Dict[str, Any]],
+             default_time: Optional[float] = None) -> TrajectoryState:
+        """
+        Rebuild a user's state from a location history
+
+        Used when a caller sends history the engine hasn't seen (a fresh
+        Lambda container, or fixes handled by another instance).
+
+        Parameters:
+        - user_id: Identifier of the user
+        - locations: Location records with latitude, longitude and timestamp
+        - default_time: Time given to the newest record when no record has
+          a usable timestamp
+
+        Returns:
+        - The new state
+        """
+        rows = _location_rows(locations)
+        timed = sorted((row for row in rows if row[0] is not None), key=lambda row: row[0])
+        if not timed and rows and default_time is not None:
+            timed = [(default_time,) + rows[-1][1:]]
+
+        state = TrajectoryState(self.history_size)
+        for timestamp, latitude, longitude, severity in timed:
+            state.record(latitude, longitude, timestamp, severity)
+        with self._lock:
+            self._states[user_id] = state
+            self._states.move_to_end(user_id)
+            while len(self._states) > self.max_users:
+                self._states.popitem(last=False)
+        return state
+
+    def sync(self, user_id: str, locations: Optional[List[Dict[str, Any]]],
+             default_time: Optional[float] = None) -> TrajectoryState:
+        """
+        A user's state, reseeded from caller-supplied history if that history is newer
+
+        Streaming callers can omit the history once the engine has seen the
+        user; when it is sent, only its timestamps are parsed unless a reseed
+        is needed. Timestamps are compared as times, since mixed formats
+        (epoch seconds, ISO strings with offsets) don't sort as strings.
+        """
+        state = self.peek(user_id)
+        if locations:
+            times = (parse_timestamp(loc.get("timestamp")) for loc in locations if isinstance(loc, dict))
+            newest_time = max((t for t in times if t is not None), default=None)
+            if state is None or state.last_time is None or (
+                newest_time is not None and newest_time > state.last_time
+            ):
+                return self.seed(user_id, locations, default_time)
+        return state if state is not None else self.get(user_id)
@@ -403,4 +403,65 @@ def parse_duration(duration_str: str) -> Optional[datetime.timedelta]:
         return datetime.timedelta(**time_params)
     except Exception as e:
         logger.error(f"Error parsing duration {duration_str}: {e}")
-        return None
\ No newline at end of file
+        return None
+
+
+def generate_session_id() -> str:
+    """
+    Generate a new session identifier
+    
+    Returns:
+    - Session ID string
+    """
+    return generate_unique_id("session")
+
+
+def sanitize_input(text: Any, max_length: int = 5000) -> str:
+    """
+    Clean user-supplied text before analysis
+    
+    Parameters:
+    - text: Raw input (non-strings are converted)
+    - max_length: Maximum length kept
+    
+    Returns:
+    - Cleaned, length-limited text
+    """
+    if text is None:
+        return ""
+    return clean_text(str(text))[:max_length]
+
+
+def log_event(client_id: str, event: Dict[str, Any]) -> None:
+    """
+    Write a structured event record to the log
+    
+    Parameters:
+    - client_id: Client the event belongs to
+    - event: Event details (must be JSON-serializable)
+    """
+    logger.info(json.dumps({"client_id": client_id, **event}, default=str))
+
+
+def get_client_config(client_id: str) -> Dict[str, Any]:
+    """
+    Get a client's configuration
+    
+    Per-client settings can be supplied as JSON in the CLIENT_CONFIG
+    environment variable, keyed by client ID (with an optional "default"
+    entry); anything not set falls back to app notifications only.
+    
+    Parameters:
+    - client_id: Client identifier
+    
+    Returns:
+    - Client configuration dictionary
+    """
+    config = {"client_id": client_id, "preferences": {"notification_channels": ["app"]}}
+    try:
+        configured = json.loads(os.environ.get("CLIENT_CONFIG", "{}"))
+        overrides = configured.get(client_id, configured.get("default", {}))
+        return merge_dicts(config, overrides)
+    except (json.JSONDecodeError, AttributeError) as e:
+        logger.error(f"Invalid CLIENT_CONFIG: {e}")
+        return config
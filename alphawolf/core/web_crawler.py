@@ -27,12 +27,16 @@ import os
 import logging
 import datetime
 import hashlib
-import json
 import re
 import time
-from typing import Dict, List, Any, Optional, Tuple
+from typing import Dict, Iterator, List, Any, Optional, Tuple
 from urllib.parse import urlparse, urljoin
 
+try:
+    from .crawl_cache import CrawlCache, DomainTokenBucket, resolve_cache_path, HTML, CONTENT
+except ImportError:
+    from crawl_cache import CrawlCache, DomainTokenBucket, resolve_cache_path, HTML, CONTENT
+
 try:
     import trafilatura
     from trafilatura.settings import use_config
@@ -71,7 +75,10 @@ DEFAULT_CONFIG = {
     "max_content_length": 500000,  # ~500KB
     "respect_robots": True,
     "only_authoritative": True,
-    "cache_days": 7  # Cache retrieved content for this many days
+    "cache_days": 7,  # Cache retrieved content for this many days
+    "cache_max_mb": 64,  # Compressed cache size before least recently used pages are evicted
+    "crawl_burst": 1,  # Requests a domain may take back to back before the delay applies
+    "request_budget": 15.0  # Seconds one search may spend waiting out crawl delays
 }
 
 class WebCrawler:
@@ -90,11 +97,15 @@ class WebCrawler:
         self.config = {**DEFAULT_CONFIG, **(config or {})}
         self.cache_dir = cache_dir or os.path.join(os.path.dirname(__file__), "..", "data", "crawler_cache")
         
-        # Create cache directory if it doesn't exist
-        os.makedirs(self.cache_dir, exist_ok=True)
+        # Compressed single-file cache (copied to /tmp when running in Lambda)
+        self.cache = CrawlCache(
+            resolve_cache_path(self.cache_dir),
+            ttl_seconds=self.config["cache_days"] * 24 * 3600,
+            max_bytes=int(self.config["cache_max_mb"] * 1024 * 1024)
+        )
         
         # Domain-specific crawl delays to avoid overloading servers
-        self.domain_access_times = {}
+        self.rate_limiter = DomainTokenBucket(self.config["crawl_delay"], self.config["crawl_burst"])
         
         # Generate a unique instance ID for logging
         instance_hash = hashlib.md5(str(datetime.datetime.utcnow().timestamp()).encode()).hexdigest()[:8]
@@ -140,99 +151,31 @@ class WebCrawler:
             f"https://www.mayoclinic.org/search/search-results?q={topic.replace(' ', '+')}"
         ]
         
-        # Process each start URL
-        for url in start_urls:
-            if len(results) >= max_results:
-                break
-                
+        # Search pages come from the cache where possible; the rest are fetched
+        # as the crawl delay allows, within the request's time budget
+        deadline = time.monotonic() + self.config["request_budget"]
+        links = []
+        for url, html in self._iter_pages(start_urls, cache_html=True, deadline=deadline):
             try:
-                domain = urlparse(url).netloc
-                
-                # Respect crawl delay
-                self._respect_crawl_delay(domain)
-                
-                # Try to get from cache first
-                cached_content = self._get_from_cache(url)
-                if cached_content:
-                    logger.info(f"Using cached content for {url}")
-                    links = self._extract_links(cached_content, url)
-                else:
-                    # Fetch the search results page
-                    logger.info(f"Fetching search results from {url}")
-                    html = fetch_url(url, config=self.trafilatura_config)
-                    
-                    if not html:
-                        logger.warning(f"Failed to fetch {url}")
-                        continue
-                        
-                    # Extract links from search results
-                    links = self._extract_links(html, url)
-                    
-                    # Save to cache
-                    self._save_to_cache(url, html)
-                
-                # Process each link
-                for link in links[:self.config["pages_per_source"]]:
-                    if len(results) >= max_results:
-                        break
-                        
-                    try:
-                        # Respect crawl delay
-                        link_domain = urlparse(link).netloc
-                        self._respect_crawl_delay(link_domain)
-                        
-                        # Only process authoritative domains if configured
-                        if self.config["only_authoritative"] and not self._is_authoritative(link_domain):
-                            logger.info(f"Skipping non-authoritative domain: {link_domain}")
-                            continue
-                        
-                        # Try to get from cache first
-                        content_info = self._get_content_from_cache(link)
-                        
-                        if not content_info:
-                            # Fetch and extract content
-                            logger.info(f"Fetching content from {link}")
-                            html = fetch_url(link, config=self.trafilatura_config)
-                            
-                            if not html:
-                                logger.warning(f"Failed to fetch {link}")
-                                continue
-                                
-                            # Extract main content
-                            content = trafilatura.extract(html, include_comments=False, include_tables=True)
-                            
-                            if not content or len(content.strip()) < 100:
-                                logger.warning(f"No significant content extracted from {link}")
-                                continue
-                                
-                            # Extract metadata
-                            metadata = trafilatura.metadata.extract_metadata(html, url=link)
-                            
-                            # Create content info
-                            content_info = {
-                                "url": link,
-                                "title": metadata.title if metadata else self._extract_title(html),
-                                "authors": metadata.author if metadata else None,
-                                "date": metadata.date if metadata else None,
-                                "content": content,
-                                "source": link_domain,
-                                "retrieved": datetime.datetime.utcnow().isoformat()
-                            }
-                            
-                            # Save to cache
-                            self._save_content_to_cache(link, content_info)
-                            
-                        # Add to results
-                        results.append(content_info)
-                        
-                    except Exception as e:
-                        logger.error(f"Error processing link {link}: {e}")
+                for link in self._extract_links(html, url)[:self.config["pages_per_source"]]:
+                    # Only process authoritative domains if configured
+                    link_domain = urlparse(link).netloc
+                    if self.config["only_authoritative"] and not self._is_authoritative(link_domain):
+                        logger.info(f"Skipping non-authoritative domain: {link_domain}")
                         continue
-                        
+                    links.append(link)
             except Exception as e:
                 logger.error(f"Error processing start URL {url}: {e}")
                 continue
                 
+        # Links from every source are prefetched from the cache in one query,
+        # then fetched with the sources taking turns
+        for content_info in self._iter_content(links, deadline=deadline):
+            results.append(content_info)
+            # Stop before another page is fetched (or waited for)
+            if len(results) >= max_results:
+                break
+            
         # Add search metadata
         for result in results:
             result["topic"] = topic
@@ -268,110 +211,37 @@ class WebCrawler:
             f"https://www.alzheimersresearchuk.org/search?term={condition.replace(' ', '+')}"
         ]
         
-        # Process each research URL
-        for url in research_urls:
-            if len(results) >= max_results:
-                break
-                
+        # Collect article links from each research source
+        deadline = time.monotonic() + self.config["request_budget"]
+        links = []
+        for url, html in self._iter_pages(research_urls, cache_html=True, deadline=deadline):
             try:
-                domain = urlparse(url).netloc
-                
-                # Respect crawl delay
-                self._respect_crawl_delay(domain)
-                
-                # Try to get from cache first
-                cached_content = self._get_from_cache(url)
-                if cached_content:
-                    logger.info(f"Using cached content for {url}")
-                    links = self._extract_links(cached_content, url)
-                else:
-                    # Fetch the search results page
-                    logger.info(f"Fetching research results from {url}")
-                    html = fetch_url(url, config=self.trafilatura_config)
-                    
-                    if not html:
-                        logger.warning(f"Failed to fetch {url}")
-                        continue
-                        
-                    # Extract links from search results
-                    links = self._extract_links(html, url)
-                    
-                    # Save to cache
-                    self._save_to_cache(url, html)
-                
-                # Process each link
-                for link in links[:self.config["pages_per_source"]]:
-                    if len(results) >= max_results:
-                        break
-                        
-                    try:
-                        # Respect crawl delay
-                        link_domain = urlparse(link).netloc
-                        self._respect_crawl_delay(link_domain)
-                        
-                        # Try to get from cache first
-                        content_info = self._get_content_from_cache(link)
-                        
-                        if not content_info:
-                            # Fetch and extract content
-                            logger.info(f"Fetching research from {link}")
-                            html = fetch_url(link, config=self.trafilatura_config)
-                            
-                            if not html:
-                                logger.warning(f"Failed to fetch {link}")
-                                continue
-                                
-                            # Extract main content
-                            content = trafilatura.extract(html, include_comments=False, include_tables=True)
-                            
-                            if not content or len(content.strip()) < 100:
-                                logger.warning(f"No significant content extracted from {link}")
-                                continue
-                                
-                            # Extract metadata
-                            metadata = trafilatura.metadata.extract_metadata(html, url=link)
-                            
-                            # Create content info
-                            content_info = {
-                                "url": link,
-                                "title": metadata.title if metadata else self._extract_title(html),
-                                "authors": metadata.author if metadata else None,
-                                "date": metadata.date if metadata else None,
-                                "content": content,
-                                "source": link_domain,
-                                "retrieved": datetime.datetime.utcnow().isoformat(),
-                                "is_research": True
-                            }
-                            
-                            # Save to cache
-                            self._save_content_to_cache(link, content_info)
-                            
-                        # Check if research is recent enough
-                        if content_info.get("date"):
-                            try:
-                                pub_date = datetime.datetime.fromisoformat(content_info["date"].replace('Z', '+00:00'))
-                                age_days = (datetime.datetime.utcnow() - pub_date).days
-                                
-                                if age_days > max_age_days:
-                                    logger.info(f"Skipping older research: {content_info.get('title')} ({age_days} days old)")
-                                    continue
-                            except (ValueError, TypeError):
-                                # If date can't be parsed, include it anyway
-                                pass
-                        
-                        # Add to results
-                        content_info["condition"] = condition
-                        content_info["relevance_score"] = self._calculate_relevance(content_info["content"], condition)
-                        results.append(content_info)
-                        
-                    except Exception as e:
-                        logger.error(f"Error processing research link {link}: {e}")
-                        continue
-                        
+                links.extend(self._extract_links(html, url)[:self.config["pages_per_source"]])
             except Exception as e:
                 logger.error(f"Error processing research URL {url}: {e}")
                 continue
                 
+        for content_info in self._iter_content(links, is_research=True, deadline=deadline):
+            # Check if research is recent enough
+            if content_info.get("date"):
+                try:
+                    pub_date = datetime.datetime.fromisoformat(content_info["date"].replace('Z', '+00:00'))
+                    age_days = (datetime.datetime.utcnow() - pub_date).days
+                    
+                    if age_days > max_age_days:
+                        logger.info(f"Skipping older research: {content_info.get('title')} ({age_days} days old)")
+                        continue
+                except (ValueError, TypeError):
+                    # If date can't be parsed, include it anyway
+                    pass
+            
+            # Add to results
+            content_info["condition"] = condition
+            content_info["relevance_score"] = self._calculate_relevance(content_info["content"], condition)
+            results.append(content_info)
+            if len(results) >= max_results:
+                break
+            
         # Sort by date (newest first), then by relevance
         results.sort(key=lambda x: (x.get("date", ""), x.get("relevance_score", 0)), reverse=True)
         
@@ -423,30 +293,138 @@ class WebCrawler:
         logger.info(f"Extracted {len(facts)} facts from content: {content.get('title')}")
         return facts
     
-    def _respect_crawl_delay(self, domain: str) -> None:
+    def _iter_pages(self, 
+                    urls: List[str], 
+                    cache_html: bool = False, 
+                    deadline: Optional[float] = None) -> Iterator[Tuple[str, str]]:
         """
-        Respect crawl delay for domains
+        Fetch pages, with the domains taking turns under the crawl delay
+        
+        Pages whose domain is rate limited are put back and retried after the
+        other domains have had their turn. When no domain has a token, the
+        crawler sleeps until the first one frees up, as long as that is
+        before the deadline. Pages left once the deadline would be passed are
+        skipped for this request; they will be picked up (or served from the
+        cache) next time. Callers stop iterating once they have enough
+        results, so nothing is waited for beyond that.
         
         Parameters:
-        - domain: The domain to check
+        - urls: Pages to fetch, in order of preference
+        - cache_html: Serve fresh pages from the HTML cache and cache new ones
+        - deadline: time.monotonic() value after which no more waiting is
+          done (None: never wait)
+        
+        Returns:
+        - Iterator of (url, html) pairs, cached pages first
         """
-        now = time.time()
+        pending = list(dict.fromkeys(urls))
         
-        if domain in self.domain_access_times:
-            last_access_time = self.domain_access_times[domain]
-            elapsed = now - last_access_time
+        if cache_html:
+            cached = self.cache.get_many(pending, HTML)
+            for url in pending:
+                if url in cached:
+                    logger.info(f"Using cached content for {url}")
+                    yield url, cached[url]
+            pending = [url for url in pending if url not in cached]
             
-            # Use default crawl delay
-            delay = self.config["crawl_delay"]
+        while pending:
+            deferred = []
+            next_token = None
             
-            # Enforce minimum wait time
-            if elapsed < delay:
-                wait_time = delay - elapsed
-                logger.debug(f"Waiting {wait_time:.2f}s for {domain}")
-                time.sleep(wait_time)
+            for url in pending:
+                wait = self.rate_limiter.try_acquire(urlparse(url).netloc)
+                if wait > 0:
+                    deferred.append(url)
+                    next_token = wait if next_token is None else min(next_token, wait)
+                    continue
+                    
+                logger.info(f"Fetching {url}")
+                try:
+                    html = fetch_url(url, config=self.trafilatura_config)
+                except Exception as e:
+                    logger.error(f"Error fetching {url}: {e}")
+                    continue
+                    
+                if not html:
+                    logger.warning(f"Failed to fetch {url}")
+                    continue
+                    
+                if cache_html:
+                    self._save_to_cache(url, html)
+                yield url, html
                 
-        # Update access time
-        self.domain_access_times[domain] = time.time()
+            if len(deferred) == len(pending):
+                # No domain has a token: wait for the first one, if the budget allows
+                if deadline is None or time.monotonic() + next_token > deadline:
+                    logger.info(f"Crawl budget reached, leaving {len(deferred)} pages for a later request")
+                    break
+                time.sleep(next_token)
+            pending = deferred
+            
+    def _iter_content(self, 
+                      links: List[str], 
+                      is_research: bool = False, 
+                      deadline: Optional[float] = None) -> Iterator[Dict[str, Any]]:
+        """
+        Get extracted content for links, prefetching cached entries in one query
+        
+        Parameters:
+        - links: Article URLs
+        - is_research: Mark newly extracted content as research
+        - deadline: Passed to _iter_pages
+        
+        Returns:
+        - Iterator of content dictionaries, cached ones first
+        """
+        cached = self.cache.get_many(links, CONTENT)
+        for link in links:
+            if link in cached:
+                yield cached[link]
+                
+        for link, html in self._iter_pages([link for link in links if link not in cached], deadline=deadline):
+            content_info = self._extract_content(link, html, is_research)
+            if content_info:
+                self._save_content_to_cache(link, content_info)
+                yield content_info
+                
+    def _extract_content(self, url: str, html: str, is_research: bool = False) -> Optional[Dict[str, Any]]:
+        """
+        Extract the main content and metadata from a fetched page
+        
+        Parameters:
+        - url: The page URL
+        - html: The page HTML
+        - is_research: Mark the content as research
+        
+        Returns:
+        - Content dictionary, or None if the page has no significant content
+        """
+        try:
+            # Extract main content
+            content = trafilatura.extract(html, include_comments=False, include_tables=True)
+            
+            if not content or len(content.strip()) < 100:
+                logger.warning(f"No significant content extracted from {url}")
+                return None
+                
+            # Extract metadata
+            metadata = trafilatura.metadata.extract_metadata(html, default_url=url)
+            
+            content_info = {
+                "url": url,
+                "title": metadata.title if metadata else self._extract_title(html),
+                "authors": metadata.author if metadata else None,
+                "date": metadata.date if metadata else None,
+                "content": content,
+                "source": urlparse(url).netloc,
+                "retrieved": datetime.datetime.utcnow().isoformat()
+            }
+            if is_research:
+                content_info["is_research"] = True
+            return content_info
+        except Exception as e:
+            logger.error(f"Error extracting content from {url}: {e}")
+            return None
         
     def _is_authoritative(self, domain: str) -> bool:
         """
@@ -633,66 +611,6 @@ class WebCrawler:
         # Ensure confidence is between 0 and 1
         return max(0.0, min(1.0, confidence))
         
-    def _cache_path(self, url: str) -> str:
-        """
-        Generate cache file path for URL
-        
-        Parameters:
-        - url: The URL to generate cache path for
-        
-        Returns:
-        - Path to cache file
-        """
-        # Create URL hash
-        url_hash = hashlib.md5(url.encode()).hexdigest()
-        
-        return os.path.join(self.cache_dir, f"{url_hash}.html")
-        
-    def _content_cache_path(self, url: str) -> str:
-        """
-        Generate content cache file path for URL
-        
-        Parameters:
-        - url: The URL to generate cache path for
-        
-        Returns:
-        - Path to content cache file
-        """
-        # Create URL hash
-        url_hash = hashlib.md5(url.encode()).hexdigest()
-        
-        return os.path.join(self.cache_dir, f"{url_hash}.json")
-        
-    def _get_from_cache(self, url: str) -> Optional[str]:
-        """
-        Get HTML from cache if available and not expired
-        
-        Parameters:
-        - url: The URL to retrieve from cache
-        
-        Returns:
-        - Cached HTML or None if not available
-        """
-        cache_path = self._cache_path(url)
-        
-        if not os.path.exists(cache_path):
-            return None
-            
-        # Check if cache is expired
-        cache_time = os.path.getmtime(cache_path)
-        cache_age_days = (time.time() - cache_time) / (24 * 3600)
-        
-        if cache_age_days > self.config["cache_days"]:
-            logger.debug(f"Cache expired for {url}")
-            return None
-            
-        try:
-            with open(cache_path, 'r', encoding='utf-8') as f:
-                return f.read()
-        except Exception as e:
-            logger.error(f"Error reading cache for {url}: {e}")
-            return None
-            
     def _save_to_cache(self, url: str, html: str) -> None:
         """
         Save HTML to cache
@@ -701,44 +619,11 @@ class WebCrawler:
         - url: The URL to cache
         - html: The HTML content to cache
         """
-        cache_path = self._cache_path(url)
-        
         try:
-            with open(cache_path, 'w', encoding='utf-8') as f:
-                f.write(html)
+            self.cache.put(url, html, HTML)
         except Exception as e:
             logger.error(f"Error saving cache for {url}: {e}")
             
-    def _get_content_from_cache(self, url: str) -> Optional[Dict[str, Any]]:
-        """
-        Get content from cache if available and not expired
-        
-        Parameters:
-        - url: The URL to retrieve from cache
-        
-        Returns:
-        - Cached content or None if not available
-        """
-        cache_path = self._content_cache_path(url)
-        
-        if not os.path.exists(cache_path):
-            return None
-            
-        # Check if cache is expired
-        cache_time = os.path.getmtime(cache_path)
-        cache_age_days = (time.time() - cache_time) / (24 * 3600)
-        
-        if cache_age_days > self.config["cache_days"]:
-            logger.debug(f"Content cache expired for {url}")
-            return None
-            
-        try:
-            with open(cache_path, 'r', encoding='utf-8') as f:
-                return json.load(f)
-        except Exception as e:
-            logger.error(f"Error reading content cache for {url}: {e}")
-            return None
-            
     def _save_content_to_cache(self, url: str, content: Dict[str, Any]) -> None:
         """
         Save content to cache
@@ -747,27 +632,36 @@ class WebCrawler:
         - url: The URL to cache
         - content: The content to cache
         """
-        cache_path = self._content_cache_path(url)
-        
         try:
-            with open(cache_path, 'w', encoding='utf-8') as f:
-                json.dump(content, f, ensure_ascii=False, indent=2)
+            self.cache.put(url, content, CONTENT)
         except Exception as e:
             logger.error(f"Error saving content cache for {url}: {e}")
 
+# Default instance, created on first use
+_default_crawler = None
+
+def get_default_crawler() -> WebCrawler:
+    """Get the shared WebCrawler, creating it on first use"""
+    global _default_crawler
+    if _default_crawler is None:
+        _default_crawler = WebCrawler()
+    return _default_crawler
 
-# Create default instance
-default_crawler = WebCrawler()
+def __getattr__(name):
+    # Keep `default_crawler` importable without building it at import time
+    if name == "default_crawler":
+        return get_default_crawler()
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
 
 # Convenience functions
 def search_topic(topic, subtopics=None, max_results=10):
     """Convenience function to search for information on a topic"""
-    return default_crawler.search_topic(topic, subtopics, max_results)
+    return get_default_crawler().search_topic(topic, subtopics, max_results)
 
 def get_latest_research(condition, max_results=5, max_age_days=90):
     """Convenience function to get latest research on a condition"""
-    return default_crawler.get_latest_research(condition, max_results, max_age_days)
+    return get_default_crawler().get_latest_research(condition, max_results, max_age_days)
 
 def extract_facts(content, max_facts=10):
     """Convenience function to extract facts from content"""
-    return default_crawler.extract_facts(content, max_facts)
\ No newline at end of file
+    return get_default_crawler().extract_facts(content, max_facts)
\ No newline at end of file
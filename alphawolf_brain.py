@@ -16,6 +16,10 @@ import os
 import sys
 import json
 import logging
+import threading
+import time
+from collections import OrderedDict, deque
+from concurrent.futures import ThreadPoolExecutor, wait
 from datetime import datetime
 from typing import Dict, Any, Optional, List
 
@@ -58,6 +62,13 @@ This module integrates:
 Mission: "How can we help you love yourself more?"
 Because no one should lose their memories—or their dignity.
 """
+try:
+    from core.memory_engine import MemoryEngine
+    logger.info("✅ MemoryEngine imported successfully")
+except Exception as e:
+    logger.error(f"❌ Failed to import MemoryEngine: {e}")
+    MemoryEngine = None
+
 try:
     from core.conversation_engine import ConversationEngine
     logger.info("✅ ConversationEngine imported successfully")
@@ -77,6 +88,13 @@ except Exception as e:
     SelfImprovementEngine = None
     learn_from_text = lambda x: None
 
+try:
+    from core.response_cache import ResponseCache, normalize_utterance
+except Exception as e:
+    logger.error(f"❌ Failed to import ResponseCache: {e}")
+    ResponseCache = None
+    normalize_utterance = None
+
 try:
     from core.local_reasoning_engine import (
         LocalReasoningEngine,
@@ -88,6 +106,13 @@ except Exception as e:
     LocalReasoningEngine = None
     get_local_reasoning_engine = None
 
+# Phrases that always get the emergency path (and are never answered from cache)
+EMERGENCY_PHRASES = [
+    'help me', "i've fallen", 'fallen and', 'emergency', 
+    'call 911', 'call ambulance', 'cant breathe', "can't breathe",
+    'chest pain', 'very scared', 'really scared', 'im lost', "i'm lost"
+]
+
 
 class AlphaWolfBrain:
     """
@@ -101,13 +126,33 @@ class AlphaWolfBrain:
     - Self-improvement capabilities
     """
     
-    def __init__(self, memory_path: str = "./memory/alphawolf_memory.json"):
-        """Initialize the AlphaWolf brain system."""
+    # Safety alerts kept in memory; older alerts are dropped
+    MAX_SAFETY_ALERTS = 1000
+    # Sessions with a cloud answer waiting for their next turn
+    MAX_LATE_RESPONSES = 500
+
+    def __init__(
+        self,
+        memory_path: str = "./memory/alphawolf_memory.json",
+        concurrent_think: bool = True,
+        think_budget_seconds: Optional[float] = None,
+        late_response_ttl: float = 600.0,
+        warm_top_n: int = 5,
+    ):
+        """Initialize the AlphaWolf brain system.
+        
+        Args:
+            memory_path: Path of the memory store
+            concurrent_think: Run local reasoning and the conversation engine in parallel
+            think_budget_seconds: Per-turn latency budget (default: ALPHAWOLF_THINK_BUDGET or 3s)
+            late_response_ttl: Seconds a late cloud answer stays usable for the next turn
+            warm_top_n: Most repeated questions per patient to keep answers ready for
+        """
         self.memory_path = memory_path
         os.makedirs(os.path.dirname(memory_path), exist_ok=True)
         
         # Core cognitive components
-        self.memory_engine = MemoryEngine(file_path=memory_path)
+        self.memory_engine = MemoryEngine(file_path=memory_path) if MemoryEngine else None
         self.conversation_engine = ConversationEngine() if ConversationEngine else None
         self.learning_engine = None
         
@@ -123,7 +168,32 @@ class AlphaWolfBrain:
         # AlphaWolf-specific features
         self.patient_profiles = {}
         self.caregiver_mode = False
-        self.safety_alerts = []
+        self.safety_alerts = deque(maxlen=self.MAX_SAFETY_ALERTS)
+        
+        # Turn execution
+        self.concurrent_think = concurrent_think
+        self.think_budget_seconds = (
+            think_budget_seconds if think_budget_seconds is not None
+            else float(os.environ.get('ALPHAWOLF_THINK_BUDGET', '3.0'))
+        )
+        self.late_response_ttl = late_response_ttl
+        self._executor = ThreadPoolExecutor(max_workers=8, thread_name_prefix='alphawolf-think')
+        # Single worker keeps learning-engine writes in order
+        self._background = ThreadPoolExecutor(max_workers=1, thread_name_prefix='alphawolf-learn')
+        self._late_responses = OrderedDict()
+        self._late_lock = threading.Lock()
+        self._stage_stats = {}
+        self._stats_lock = threading.Lock()
+        
+        # Answers to repeated questions
+        self.response_cache = ResponseCache(
+            bypass_phrases=EMERGENCY_PHRASES,
+            intent_classifier=self._cache_intent
+        ) if ResponseCache else None
+        self.warm_top_n = warm_top_n
+        self.warm_interval_seconds = 3600
+        self.warm_budget_seconds = 30.0
+        self._warmed_at = {}
         
         # Emotional state tracking
         self.emotional_state = {
@@ -153,100 +223,196 @@ class AlphaWolfBrain:
         import random
         return random.choice(greetings)
     
-    def think(self, input_text: str, user_context: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
+    def think(
+        self,
+        input_text: str,
+        user_context: Optional[Dict[str, Any]] = None,
+        budget_seconds: Optional[float] = None,
+    ) -> Dict[str, Any]:
         """
         Process input and generate a thoughtful, caring response.
         
+        In concurrent mode (the default) local reasoning and the conversation
+        engine run side by side and the response is assembled from whatever
+        has finished when the budget runs out. A cloud answer that arrives
+        late is kept for the user's next turn.
+        
         Args:
             input_text: User's input (text, voice transcript, etc.)
-            user_context: Additional context (user_id, patient_info, location, etc.)
+            user_context: Additional context (user_id, session_id, patient_info, location, etc.)
+                session_id keys the conversation session; it defaults to user_id
+            budget_seconds: Latency budget for this turn (default: think_budget_seconds)
         
         Returns:
-            dict: Response with message, intent, emotion, and actions
+            dict: Response with message, intent, emotion, actions and per-stage
+                ``timings`` in milliseconds
         """
+        started = time.perf_counter()
         logger.info(f"🧠 AlphaWolf thinking: {input_text[:100]}...")
         
         context = user_context or {}
+        timings = {}
         
         # Check for emergency keywords (with context sensitivity)
-        emergency_phrases = [
-            'help me', "i've fallen", 'fallen and', 'emergency', 
-            'call 911', 'call ambulance', 'cant breathe', "can't breathe",
-            'chest pain', 'very scared', 'really scared', 'im lost', "i'm lost"
-        ]
-        is_emergency = any(phrase in input_text.lower() for phrase in emergency_phrases)
+        is_emergency = any(phrase in input_text.lower() for phrase in EMERGENCY_PHRASES)
         
         if is_emergency:
-            return self._handle_emergency(input_text, context)
+            response = self._handle_emergency(input_text, context)
+            return self._finish_turn(response, timings, started)
+        
+        session_key = self._session_key(context)
+        use_cache = self.response_cache is not None and not context.get('warming')
+        
+        # Repeated questions are answered from the patient's cache
+        if use_cache:
+            stage_started = time.perf_counter()
+            cached = self.response_cache.get(session_key, input_text, context)
+            timings['cache_ms'] = (time.perf_counter() - stage_started) * 1000
+            if cached is not None:
+                cached['cached'] = True
+                self._queue_learning(input_text, cached, context)
+                return self._finish_turn(cached, timings, started)
+            self._maybe_warm(session_key, context)
+        
+        late = self._pop_late_response(session_key)
+        
+        # A late answer to the question being asked again is as good as a new one
+        reuse_late = late is not None and late['input'] == self._normalize_input(input_text)
+        
+        if self.concurrent_think:
+            budget = self.think_budget_seconds if budget_seconds is None else budget_seconds
+            local_future = self._executor.submit(self._run_local_reasoning, input_text, context)
+            cloud_future = None
+            if self.conversation_engine and not reuse_late:
+                cloud_future = self._executor.submit(self._run_conversation_engine, input_text, context)
+            
+            pending = [f for f in (local_future, cloud_future) if f is not None]
+            remaining = max(0.0, budget - (time.perf_counter() - started))
+            done, not_done = wait(pending, timeout=remaining)
+            
+            local_thought = None
+            if local_future in done:
+                local_thought, stage_timings = local_future.result()
+                timings.update(stage_timings)
+            else:
+                timings['local_timed_out'] = True
+            
+            cloud_response = None
+            if cloud_future is not None:
+                if cloud_future in done:
+                    cloud_response, timings['cloud_ms'] = cloud_future.result()
+                else:
+                    # Keep the answer for the follow-up turn instead of waiting on it
+                    timings['cloud_timed_out'] = True
+                    if session_key is not None:
+                        cloud_future.add_done_callback(
+                            lambda future: self._store_late_response(session_key, input_text, future)
+                        )
+        else:
+            local_thought, stage_timings = self._run_local_reasoning(input_text, context)
+            timings.update(stage_timings)
+            cloud_response = None
+            if self.conversation_engine and not reuse_late:
+                cloud_response, timings['cloud_ms'] = self._run_conversation_engine(input_text, context)
+        
+        if reuse_late:
+            cloud_response = dict(late['response'])
+            timings['cloud_source'] = 'late_result'
+        
+        response = self._compose_response(input_text, context, local_thought, cloud_response)
+        if late is not None and not reuse_late:
+            response['followup'] = {
+                'question': late['text'],
+                'message': late['response'].get('message'),
+            }
+        response = self._finish_turn(response, timings, started)
+        
+        # Degraded answers (a stage ran out of budget) are not worth repeating
+        if use_cache and not (timings.get('cloud_timed_out') or timings.get('local_timed_out')):
+            self._cache_response(session_key, input_text, response, context)
+        return response
+    
+    def _run_local_reasoning(self, input_text: str, context: Dict[str, Any]):
+        """Memory lookup plus local reasoning. Returns (thought, timings)."""
+        timings = {}
+        if not self.local_reasoning:
+            return None, timings
         
         # STEP 1: LOCAL REASONING (Privacy-first, no cloud needed)
         local_thought = None
-        if self.local_reasoning:
-            try:
-                # Get relevant memory context
-                memory_context = memory_result.get('context', '')
-                
-                # Get emotional state if available
-                emotion = context.get('emotion', '')
-                
-                # Get visual context if available  
-                vision = context.get('vision', '')
-                
-                # Generate local reasoning (NO API CALL)
-                local_thought = self.local_reasoning.analyze(
-                    user_input=input_text,
-                    memory=memory_context,
-                    emotion=emotion,
-                    vision=vision
-                )
-                
-                logger.info(f"🧠 Local reasoning: {local_thought[:100]}...")
-                
-            except Exception as e:
-                logger.warning(f"⚠️ Local reasoning failed: {e}")
+        try:
+            # Get relevant memory context
+            memory_context = ''
+            if self.memory_engine:
+                stage_started = time.perf_counter()
+                memory_context = self.memory_engine.query(input_text).get('context', '')
+                timings['memory_ms'] = (time.perf_counter() - stage_started) * 1000
+            
+            # Get emotional state if available
+            emotion = context.get('emotion', '')
+            
+            # Get visual context if available  
+            vision = context.get('vision', '')
+            
+            # Generate local reasoning (NO API CALL)
+            stage_started = time.perf_counter()
+            local_thought = self.local_reasoning.analyze(
+                user_input=input_text,
+                memory=memory_context,
+                emotion=emotion,
+                vision=vision
+            )
+            timings['local_ms'] = (time.perf_counter() - stage_started) * 1000
+            
+            logger.info(f"🧠 Local reasoning: {local_thought[:100]}...")
+            
+        except Exception as e:
+            logger.warning(f"⚠️ Local reasoning failed: {e}")
         
+        return local_thought, timings
+    
+    def _run_conversation_engine(self, input_text: str, context: Dict[str, Any]):
+        """Conversation engine turn (may call a cloud API). Returns (response, ms)."""
         # STEP 2: OPTIONAL CLOUD ENHANCEMENT (if conversation engine available)
-        cloud_response = None
-        if self.conversation_engine:
-            try:
-                cloud_response = self.conversation_engine.process_text(
-                    input_text,
-                    user_id=context.get('user_id'),
-                    context=context
+        stage_started = time.perf_counter()
+        try:
+            cloud_response = self.conversation_engine.process_text(
+                input_text,
+                user_id=self._session_key(context),
+                context=context
+            )
+        except Exception as e:
+            logger.error(f"❌ Conversation processing error: {e}")
+            # Fall through to local-only response
+            cloud_response = None
+        return cloud_response, (time.perf_counter() - stage_started) * 1000
+    
+    def _compose_response(
+        self,
+        input_text: str,
+        context: Dict[str, Any],
+        local_thought: Optional[str],
+        cloud_response: Optional[Dict[str, Any]],
+    ) -> Dict[str, Any]:
+        """Merge local and cloud results into the final response."""
+        if cloud_response:
+            response = cloud_response
+            
+            # If we have both local and cloud reasoning, merge them
+            if local_thought:
+                response['message'] = self.local_reasoning.merge_thoughts(
+                    internal=local_thought,
+                    external=response.get('message', '')
                 )
-                
-                # If we have both local and cloud reasoning, merge them
-                if local_thought and cloud_response:
-                    merged_message = self.local_reasoning.merge_thoughts(
-                        internal=local_thought,
-                        external=cloud_response.get('message', '')
-                    )
-                    cloud_response['message'] = merged_message
-                    cloud_response['reasoning_mode'] = 'hybrid'
-                
-                response = cloud_response
-                
-                # Enhance response with AlphaWolf care features
-                response = self._enhance_with_care(response, context)
-                
-                # Log interaction for learning
-                if self.learning_engine:
-                    self.learning_engine.register_interaction(
-                        'text',
-                        {
-                            'input': input_text,
-                            'output': response.get('message'),
-                            'intent': response.get('intent'),
-                            'success': True,
-                            'confidence': response.get('confidence', 0.8)
-                        }
-                    )
-                
-                return response
-                
-            except Exception as e:
-                logger.error(f"❌ Conversation processing error: {e}")
-                # Fall through to local-only response
+                response['reasoning_mode'] = 'hybrid'
+            
+            # Enhance response with AlphaWolf care features
+            response = self._enhance_with_care(response, context)
+            
+            # Log interaction for learning, off the response path
+            self._queue_learning(input_text, response, context)
+            
+            return response
         
         # STEP 3: LOCAL-ONLY FALLBACK (if no cloud or cloud failed)
         if local_thought:
@@ -265,6 +431,180 @@ class AlphaWolfBrain:
         # STEP 4: ABSOLUTE FALLBACK (if everything failed)
         return self._fallback_response(input_text, context)
     
+    def _queue_learning(self, input_text: str, response: Dict[str, Any], context: Dict[str, Any]):
+        """Hand an interaction to the learning engine on the background worker."""
+        if not self.learning_engine or context.get('warming'):
+            return
+        self._background.submit(
+            self._register_interaction,
+            {
+                'input': input_text,
+                'output': response.get('message'),
+                'intent': response.get('intent'),
+                'success': True,
+                'confidence': response.get('confidence', 0.8),
+                'user_id': context.get('session_id', context.get('user_id')),
+                'utterance_key': normalize_utterance(input_text) if normalize_utterance else None
+            }
+        )
+    
+    def _cache_response(self, session_key: Optional[str], input_text: str, response: Dict[str, Any],
+                        context: Dict[str, Any]) -> bool:
+        """Store a finished response, minus the per-turn fields."""
+        cacheable = {k: v for k, v in response.items() if k not in ('timings', 'followup', 'cached')}
+        return self.response_cache.put(
+            session_key, input_text, cacheable, cost_ms=response['timings']['total_ms'], context=context
+        )
+    
+    def _cache_intent(self, utterance_key: str) -> Optional[str]:
+        """Intent of a normalized utterance, for the response cache key."""
+        if not self.conversation_engine:
+            return None
+        return self.conversation_engine.intent_matcher.match(utterance_key)[0]
+    
+    def _maybe_warm(self, session_key: Optional[str], context: Dict[str, Any]):
+        """Schedule warming for a patient at most once per warm interval."""
+        if session_key is None or not self.learning_engine or not self.warm_top_n:
+            return
+        now = time.monotonic()
+        with self._late_lock:
+            last = self._warmed_at.get(session_key)
+            if last is not None and now - last < self.warm_interval_seconds:
+                return
+            self._warmed_at[session_key] = now
+        self._background.submit(self.warm_cache, session_key, context)
+    
+    def warm_cache(self, session_key: str, context: Optional[Dict[str, Any]] = None, top_n: Optional[int] = None) -> int:
+        """
+        Precompute answers to a patient's most repeated questions.
+        
+        Frequencies come from the learning engine's interaction stats. Answers
+        are produced in a throwaway conversation session so the patient's own
+        history is untouched.
+        
+        Args:
+            session_key: Patient/session the answers are for
+            context: Context to answer with (patient type etc.)
+            top_n: How many questions to consider (default: warm_top_n)
+        
+        Returns:
+            int: Number of answers cached
+        """
+        if not self.response_cache or not self.learning_engine:
+            return 0
+        
+        warm_session = f"{session_key}#warm"
+        warm_context = {**(context or {}), 'session_id': warm_session, 'warming': True}
+        warmed = 0
+        try:
+            top = self.learning_engine.model_optimizer.top_utterances(session_key, top_n or self.warm_top_n)
+            for stats in top:
+                text = stats['text']
+                # Only questions that actually repeat are worth precomputing
+                if stats['count'] < 2 or self.response_cache.contains(session_key, text, warm_context):
+                    continue
+                response = self.think(text, warm_context, budget_seconds=self.warm_budget_seconds)
+                if response.get('status') == 'emergency':
+                    continue
+                if self._cache_response(session_key, text, response, warm_context):
+                    warmed += 1
+        except Exception as e:
+            logger.error(f"❌ Cache warming failed: {e}")
+        finally:
+            if self.conversation_engine:
+                self.conversation_engine.end_session(warm_session)
+        
+        if warmed:
+            logger.info(f"🔥 Warmed {warmed} cached answers for {session_key}")
+        return warmed
+    
+    def get_cache_stats(self) -> Dict[str, Any]:
+        """Response cache hit rate and latency saved."""
+        return self.response_cache.get_stats() if self.response_cache else {}
+    
+    def _register_interaction(self, data: Dict[str, Any]):
+        """Record an interaction with the learning engine (background thread)."""
+        try:
+            self.learning_engine.register_interaction('text', data)
+        except Exception as e:
+            logger.error(f"❌ Failed to register interaction: {e}")
+    
+    @staticmethod
+    def _session_key(context: Dict[str, Any]) -> Optional[str]:
+        """Conversation session key: session_id, defaulting to user_id."""
+        return context.get('session_id', context.get('user_id'))
+    
+    @staticmethod
+    def _normalize_input(text: str) -> str:
+        return ' '.join(text.lower().split())
+    
+    def _store_late_response(self, session_key: Optional[str], input_text: str, future):
+        """Keep a conversation engine result that missed its turn's budget."""
+        if session_key is None:
+            # Anonymous callers share no session, so the answer can't be routed back
+            return
+        try:
+            response, elapsed_ms = future.result()
+        except Exception as e:
+            logger.error(f"❌ Late conversation result failed: {e}")
+            return
+        if not response:
+            return
+        self._record_timing('cloud_late_ms', elapsed_ms)
+        with self._late_lock:
+            self._late_responses[session_key] = {
+                'input': self._normalize_input(input_text),
+                'text': input_text,
+                'response': response,
+                'stored_at': time.monotonic(),
+            }
+            self._late_responses.move_to_end(session_key)
+            while len(self._late_responses) > self.MAX_LATE_RESPONSES:
+                self._late_responses.popitem(last=False)
+    
+    def _pop_late_response(self, session_key: Optional[str]) -> Optional[Dict[str, Any]]:
+        """Take the pending late result for a session, if it is still fresh."""
+        if session_key is None:
+            return None
+        with self._late_lock:
+            late = self._late_responses.pop(session_key, None)
+        if late and time.monotonic() - late['stored_at'] <= self.late_response_ttl:
+            return late
+        return None
+    
+    def _finish_turn(self, response: Dict[str, Any], timings: Dict[str, Any], started: float) -> Dict[str, Any]:
+        """Attach per-stage timings to a response and fold them into the stats."""
+        timings['total_ms'] = (time.perf_counter() - started) * 1000
+        for stage, value in timings.items():
+            if stage.endswith('_ms'):
+                self._record_timing(stage, value)
+        response['timings'] = timings
+        return response
+    
+    def _record_timing(self, stage: str, elapsed_ms: float):
+        with self._stats_lock:
+            stats = self._stage_stats.setdefault(stage, {'count': 0, 'total_ms': 0.0, 'max_ms': 0.0})
+            stats['count'] += 1
+            stats['total_ms'] += elapsed_ms
+            stats['max_ms'] = max(stats['max_ms'], elapsed_ms)
+    
+    def get_think_stats(self) -> Dict[str, Dict[str, float]]:
+        """Average and worst-case milliseconds per think() stage."""
+        with self._stats_lock:
+            return {
+                stage: {
+                    'count': stats['count'],
+                    'avg_ms': stats['total_ms'] / stats['count'],
+                    'max_ms': stats['max_ms'],
+                }
+                for stage, stats in self._stage_stats.items()
+            }
+    
+    def shutdown(self):
+        """Stop the reasoning worker threads."""
+        self._executor.shutdown(wait=False, cancel_futures=True)
+        self._background.shutdown(wait=True)
+    
     def _handle_emergency(self, input_text: str, context: Dict[str, Any]) -> Dict[str, Any]:
         """Handle emergency situations with immediate response."""
         logger.warning(f"🚨 EMERGENCY detected: {input_text}")
@@ -274,6 +614,7 @@ class AlphaWolfBrain:
             'timestamp': datetime.now().isoformat(),
             'message': input_text,
             'user_id': context.get('user_id'),
+            'session_id': self._session_key(context),
             'location': context.get('location'),
             'type': 'emergency'
         }
@@ -323,7 +664,8 @@ class AlphaWolfBrain:
         """Learn from patient/caregiver interactions."""
         try:
             # Save to memory
-            self.memory_engine.save(interaction_data)
+            if self.memory_engine:
+                self.memory_engine.save(interaction_data)
             
             # Use learning engine if available
             if self.learning_engine:
@@ -366,15 +708,23 @@ class AlphaWolfBrain:
             self.learning_engine.stop_learning()
             logger.info("🛑 AlphaWolf learning systems stopped")
     
-    def get_emotional_state(self) -> Dict[str, float]:
-        """Get current emotional state."""
+    def get_emotional_state(self, user_id: Optional[str] = None) -> Dict[str, float]:
+        """Get current emotional state for a user's conversation session."""
         if self.conversation_engine:
-            return self.conversation_engine.get_emotional_state()
+            return self.conversation_engine.get_emotional_state(user_id)
         return self.emotional_state
     
-    def get_safety_alerts(self) -> List[Dict[str, Any]]:
-        """Get recent safety alerts."""
-        return self.safety_alerts[-10:]  # Last 10 alerts
+    def get_safety_alerts(self, session_id: Optional[str] = None, limit: int = 10) -> List[Dict[str, Any]]:
+        """
+        Get recent safety alerts, optionally only those raised in one session.
+        
+        session_id is the same key think() uses for conversation sessions
+        (e.g. "patient:12"), so patient and caregiver ids can't collide.
+        """
+        alerts = list(self.safety_alerts)
+        if session_id is not None:
+            alerts = [alert for alert in alerts if alert.get('session_id') == session_id]
+        return alerts[-limit:]
     
     def create_patient_profile(self, patient_id: str, profile_data: Dict[str, Any]):
         """Create or update a patient profile."""
@@ -396,7 +746,7 @@ class AlphaWolfBrain:
             state = {
                 'patient_profiles': self.patient_profiles,
                 'emotional_state': self.emotional_state,
-                'safety_alerts': self.safety_alerts[-100:],  # Keep last 100
+                'safety_alerts': list(self.safety_alerts)[-100:],  # Keep last 100
                 'last_saved': datetime.now().isoformat()
             }
             with open(state_file, 'w') as f:
@@ -414,7 +764,7 @@ class AlphaWolfBrain:
                     state = json.load(f)
                 self.patient_profiles = state.get('patient_profiles', {})
                 self.emotional_state = state.get('emotional_state', self.emotional_state)
-                self.safety_alerts = state.get('safety_alerts', [])
+                self.safety_alerts = deque(state.get('safety_alerts', []), maxlen=self.MAX_SAFETY_ALERTS)
                 logger.info(f"📂 AlphaWolf state loaded from {state_file}")
         except Exception as e:
             logger.error(f"❌ Failed to load state: {e}")
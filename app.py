@@ -27,7 +27,7 @@ import json
 import threading
 import time
 from datetime import datetime
-from flask import Flask, render_template, request, jsonify, redirect, url_for, session, flash
+from flask import Flask, render_template, request, jsonify, redirect, url_for, session, flash, Response, stream_with_context
 from werkzeug.middleware.proxy_fix import ProxyFix
 from werkzeug.security import generate_password_hash, check_password_hash
 from dotenv import load_dotenv
@@ -78,7 +78,7 @@ db.init_app(app)
 # Import services
 from services.gesture_service import GestureService
 from services.geolocation_service import GeolocationService
-from services.reminder_service import ReminderService
+from services.reminder_service import CronSchedule, ReminderService
 from services.cognitive_service import CognitiveService
 from services.caregiver_service import CaregiverService
 from services.memory_exercises import MemoryExercises
@@ -90,6 +90,8 @@ from services.learning_journey import LearningJourney
 from services.research_module import ResearchModule
 from services.tts_engine import TTSEngine
 from services.polly_tts_engine import get_polly_tts_engine
+from services.tts_cache import reminder_speech_text, run_presynthesis
+from services.speech_stream import stream_speech
 
 # Initialize AlphaWolf Brain - The core intelligence system
 from alphawolf_brain import get_alphawolf_brain, initialize_alphawolf
@@ -183,6 +185,19 @@ with app.app_context():
         db.session.commit()
         logger.info("Initialized default cognitive exercises")
 
+def speak_reminder(reminder):
+    """Say a reminder aloud when it fires; run_presynthesis warms this same text"""
+    result = tts_engine.speak_text(reminder_speech_text(reminder.title, reminder.description))
+    if result.get('success'):
+        logger.info(f"Spoke reminder {reminder.id} (cached: {result.get('cached', False)}): {result.get('url')}")
+    else:
+        logger.warning(f"Could not speak reminder {reminder.id}: {result.get('error')}")
+
+reminder_service.register_callback('on_reminder', speak_reminder)
+
+# Reminders fire from their own heap-based scheduler thread
+reminder_service.init_app(app)
+
 def run_schedule():
     """Run scheduled tasks in a continuous loop"""
     while True:
@@ -194,9 +209,6 @@ def run_scheduled_tasks():
     """Run scheduled tasks"""
     logger.info("Running scheduled tasks")
     
-    # Check for reminders
-    reminder_service.check_reminders()
-    
     # Run web crawler to update database
     try:
         from services.web_crawler import WebCrawler
@@ -208,9 +220,20 @@ def run_scheduled_tasks():
     
     # Other scheduled tasks can be added here
 
+def run_tts_presynthesis():
+    """Synthesize upcoming reminders and frequently spoken phrases before they are needed"""
+    try:
+        with app.app_context():
+            run_presynthesis(tts_engine, reminder_service)
+    except Exception as e:
+        logger.error(f"Error pre-synthesizing speech: {str(e)}")
+
 # Schedule tasks to run daily at 3 AM
 schedule.every().day.at("03:00").do(run_scheduled_tasks)
 
+# Keep the next day's reminders and common phrases in the speech cache
+schedule.every(30).minutes.do(run_tts_presynthesis)
+
 # Start the scheduler in a separate thread
 scheduler_thread = threading.Thread(target=run_schedule)
 scheduler_thread.daemon = True
@@ -400,16 +423,26 @@ def add_reminder():
     description = data.get('description')
     time = data.get('time')
     recurring = data.get('recurring', False)
+    timezone_name = data.get('timezone')
     
     if not all([patient_id, title, time]):
         return jsonify({'success': False, 'message': 'Missing required fields'}), 400
     
+    if not isinstance(time, str):
+        return jsonify({'success': False, 'message': 'Invalid reminder time: expected a string'}), 400
+    
+    try:
+        CronSchedule(time)
+    except ValueError as e:
+        return jsonify({'success': False, 'message': f'Invalid reminder time: {str(e)}'}), 400
+    
     new_reminder = models.Reminder(
         patient_id=patient_id,
         title=title,
         description=description,
         time=time,
-        recurring=recurring
+        recurring=recurring,
+        timezone_name=timezone_name
     )
     
     db.session.add(new_reminder)
@@ -429,13 +462,15 @@ def safety_zones():
     safe_zones = models.SafeZone.query.all()
     patients = models.Patient.query.all()  # In production, filter by caregiver-patient relationship
     
-    # Check if each patient is in a safe zone
+    # Check all located patients against the safe zones in one batch
+    safety_statuses = geolocation_service.check_patients_safe_zones({
+        patient.id: (patient.last_latitude, patient.last_longitude)
+        for patient in patients
+        if patient.last_latitude and patient.last_longitude
+    })
     for patient in patients:
-        if patient.last_latitude and patient.last_longitude:
-            safety_status = geolocation_service.check_safe_zones(
-                patient.id, patient.last_latitude, patient.last_longitude
-            )
-            patient.is_in_safe_zone = safety_status.get('is_safe', False)
+        if patient.id in safety_statuses:
+            patient.is_in_safe_zone = safety_statuses[patient.id].get('is_safe', False)
         else:
             patient.is_in_safe_zone = None  # No location data
     
@@ -562,7 +597,7 @@ def update_location():
         db.session.commit()
         
         # Check for wandering
-        is_wandering = wandering_prevention.check_wandering(patient, models.SafeZone.query.all())
+        is_wandering = wandering_prevention.check_wandering(patient)
         if is_wandering:
             # Create alert for caregivers
             alert = models.Alert(
@@ -1012,6 +1047,47 @@ def add_voice_sample(patient_id):
             'message': 'Failed to add voice sample'
         }), 500
 
+@app.route('/api/speech/stream', methods=['POST'])
+def speech_stream():
+    """
+    Speak a long response sentence by sentence.
+    
+    Streams newline-delimited JSON: one line per sentence, in order, with the
+    URL of its audio as soon as it is ready, then a final summary line.
+    """
+    if 'user_id' not in session:
+        return jsonify({'success': False, 'message': 'Not logged in'}), 401
+    
+    data = request.json or {}
+    text = data.get('text', '')
+    
+    if not text or not text.strip():
+        return jsonify({
+            'success': False,
+            'message': 'No text provided'
+        }), 400
+    
+    speech = stream_speech(tts_engine, text, data.get('voice_id'), data.get('context'))
+    
+    def generate():
+        failed = 0
+        try:
+            for segment in speech:
+                failed += not segment['success']
+                yield json.dumps(segment) + '\n'
+        finally:
+            # Stops synthesis if the client disconnected
+            speech.cancel()
+        first_audio = speech.first_audio_seconds
+        yield json.dumps({
+            'done': True,
+            'segments': len(speech),
+            'failed': failed,
+            'time_to_first_audio_ms': round(first_audio * 1000, 1) if first_audio is not None else None
+        }) + '\n'
+    
+    return Response(stream_with_context(generate()), mimetype='application/x-ndjson')
+
 @app.route('/api/navigation/<int:patient_id>/layouts', methods=['GET'])
 def get_navigation_layouts(patient_id):
     """Get all AR navigation layouts for a patient."""
@@ -1087,10 +1163,10 @@ def get_navigation_instructions(patient_id):
 @app.route('/learning-corner')
 def learning_corner():
     """Learning resources about dementia and Alzheimer's."""
-    from services.research_service import ResearchService
+    from services.research_service import get_research_service
     
-    # Initialize research service
-    research_service = ResearchService()
+    # Shared research service (reloaded after a crawl updates the data files)
+    research_service = get_research_service()
     
     # Get research articles
     research_articles = research_service.get_research_articles(limit=6)
@@ -1113,10 +1189,10 @@ def learning_corner():
 @app.route('/learning-corner/research/<int:article_id>')
 def research_article(article_id):
     """Display a specific research article."""
-    from services.research_service import ResearchService
+    from services.research_service import get_research_service
     
-    # Initialize research service
-    research_service = ResearchService()
+    # Shared research service (reloaded after a crawl updates the data files)
+    research_service = get_research_service()
     
     # Get the specific article
     article = research_service.get_article_by_id(article_id)
@@ -1135,10 +1211,10 @@ def research_article(article_id):
 @app.route('/learning-corner/tips')
 def daily_tips():
     """Browse all daily tips."""
-    from services.research_service import ResearchService
+    from services.research_service import get_research_service
     
-    # Initialize research service
-    research_service = ResearchService()
+    # Shared research service (reloaded after a crawl updates the data files)
+    research_service = get_research_service()
     
     # Get all tips
     tips = research_service.get_all_tips()
@@ -1445,6 +1521,8 @@ def process_voice_command():
                 'user_type': session.get('user_type'),
                 'timestamp': datetime.now().isoformat()
             }
+            if context['user_id']:
+                context['session_id'] = f"{context['user_type']}:{context['user_id']}"
             
             # Process through brain
             brain_response = alphawolf_brain.think(command, context)
@@ -1550,6 +1628,10 @@ def brain_chat():
             'user_type': session.get('user_type'),
             'timestamp': datetime.now().isoformat()
         }
+        # Patients and caregivers have separate id spaces, so key conversation
+        # sessions by both
+        if context['user_id']:
+            context['session_id'] = f"{context['user_type']}:{context['user_id']}"
         
         # Add patient info if available
         if session.get('user_type') == 'patient' and session.get('user_id'):
@@ -1565,7 +1647,10 @@ def brain_chat():
             'response': response.get('message'),
             'intent': response.get('intent'),
             'confidence': response.get('confidence'),
-            'emotional_state': alphawolf_brain.get_emotional_state()
+            'emotional_state': alphawolf_brain.get_emotional_state(context.get('session_id')),
+            'timings': response.get('timings'),
+            'cached': response.get('cached', False),
+            'followup': response.get('followup')
         })
         
     except Exception as e:
@@ -1628,6 +1713,8 @@ def brain_status():
             'emotional_state': alphawolf_brain.get_emotional_state(),
             'safety_alerts': len(alphawolf_brain.get_safety_alerts()),
             'patient_profiles': len(alphawolf_brain.patient_profiles),
+            'think_timings': alphawolf_brain.get_think_stats(),
+            'response_cache': alphawolf_brain.get_cache_stats(),
             'greeting': alphawolf_brain.generate_greeting()
         })
     except Exception as e:
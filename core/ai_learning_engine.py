@@ -173,6 +173,9 @@ class CodeAnalyzer:
 class ModelOptimizer:
     """Optimizes models based on usage patterns and interaction data."""
 
+    # Distinct utterances tracked per user; the least frequent are dropped
+    MAX_UTTERANCES_PER_USER = 200
+
     def __init__(self, data_dir: str = "data/learning"):
         self.data_dir = data_dir
         os.makedirs(self.data_dir, exist_ok=True)
@@ -246,10 +249,40 @@ class ModelOptimizer:
             if "success" in data:
                 stats["success"] += 1 if data["success"] else 0
 
+        # Track how often each user repeats the same utterance
+        if interaction_type == "text" and data.get("user_id") and data.get("input"):
+            self._record_utterance(str(data["user_id"]), data["input"], key, data.get("utterance_key"))
+
         # Save after each significant interaction
         if self.interaction_stats[section].get(key, {}).get("count", 0) % 10 == 0:
             self.save_stats()
 
+    def _record_utterance(
+        self, user_id: str, text: str, intent: Optional[str], normalized: Optional[str] = None
+    ):
+        """Count one occurrence of an utterance for a user.
+
+        ``normalized`` lets the caller group variants of the same question;
+        by default only case and whitespace are ignored.
+        """
+        utterances = self.interaction_stats.setdefault("utterances", {}).setdefault(user_id, {})
+        normalized = normalized or " ".join(text.lower().split())
+        stats = utterances.get(normalized)
+        if stats is None:
+            if len(utterances) >= self.MAX_UTTERANCES_PER_USER:
+                rarest = min(utterances, key=lambda k: (utterances[k]["count"], utterances[k]["last_used"]))
+                del utterances[rarest]
+            stats = utterances[normalized] = {"text": text, "count": 0, "intent": intent, "last_used": None}
+        stats["count"] += 1
+        stats["intent"] = intent or stats.get("intent")
+        stats["last_used"] = datetime.now().isoformat()
+
+    def top_utterances(self, user_id: str, limit: int = 10) -> List[Dict[str, Any]]:
+        """A user's most repeated utterances, most frequent first."""
+        utterances = self.interaction_stats.get("utterances", {}).get(str(user_id), {})
+        ranked = sorted(utterances.values(), key=lambda stats: stats["count"], reverse=True)
+        return ranked[:limit]
+
     def optimize_models(self):
         """Run optimization on models based on collected data."""
         # Analyze intent distribution
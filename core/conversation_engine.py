@@ -23,10 +23,15 @@ import json
 import logging
 import os
 import random
+import threading
 import time
+from collections import deque
 from datetime import datetime
 from typing import Any, Dict, List, Optional, Tuple
 
+from core.intent_matcher import IntentMatcher
+from core.session_store import ANONYMOUS_USER, SessionStore
+
 # Initialize logger
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
@@ -59,6 +64,52 @@ except ImportError:
     perplexity_client = None
 
 
+class ConversationSession:
+    """Conversation state for one user.
+
+    History is a ring buffer, so a long-running conversation holds at most
+    ``max_history_length`` turns. ``lock`` is held by the engine while it
+    processes a message for this user.
+    """
+
+    def __init__(self, max_history_length: int = 20, max_pending_questions: int = 10):
+        self.history = deque(maxlen=max_history_length)
+        self.last_emotion = "neutral"
+        self.emotional_state = {
+            "valence": 0.0,  # -1.0 to 1.0, negative to positive
+            "arousal": 0.0,  # 0.0 to 1.0, calm to excited
+            "dominance": 0.5,  # 0.0 to 1.0, submissive to dominant
+        }
+        self.current_topic = None
+        self.pending_questions = deque(maxlen=max_pending_questions)
+        self.lock = threading.RLock()
+
+    def to_dict(self) -> Dict[str, Any]:
+        """Serializable snapshot of the session."""
+        return {
+            "history": list(self.history),
+            "max_history_length": self.history.maxlen,
+            "last_emotion": self.last_emotion,
+            "emotional_state": dict(self.emotional_state),
+            "current_topic": self.current_topic,
+            "pending_questions": list(self.pending_questions),
+            "max_pending_questions": self.pending_questions.maxlen,
+        }
+
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any]) -> "ConversationSession":
+        """Rebuild a session from ``to_dict()`` output."""
+        session = cls(
+            data.get("max_history_length", 20), data.get("max_pending_questions", 10)
+        )
+        session.history.extend(data.get("history", []))
+        session.last_emotion = data.get("last_emotion", "neutral")
+        session.emotional_state.update(data.get("emotional_state", {}))
+        session.current_topic = data.get("current_topic")
+        session.pending_questions.extend(data.get("pending_questions", []))
+        return session
+
+
 class ConversationEngine:
     """Main conversation engine that processes text input, manages context, and
     generates appropriate responses.
@@ -71,31 +122,44 @@ class ConversationEngine:
     - Memory of past interactions
     """
 
-    def __init__(self, nonverbal_engine=None):
+    def __init__(
+        self,
+        nonverbal_engine=None,
+        max_sessions: int = 1000,
+        session_ttl: float = 1800.0,
+        session_spill_dir: Optional[str] = None,
+    ):
         """Initialize the conversation engine.
 
         Args:
             nonverbal_engine: NonverbalEngine instance for multimodal communication
+            max_sessions: Per-user sessions kept in memory
+            session_ttl: Seconds a session may sit idle before it is evicted
+            session_spill_dir: Where evicted sessions are written (None drops them);
+                defaults to the ALPHAWOLF_SESSION_DIR environment variable
         """
         self.nonverbal_engine = nonverbal_engine
-        self.conversation_history = []
         self.max_history_length = 20
-        self.last_emotion = "neutral"  # Add missing attribute
-        self.emotional_state = {
-            "valence": 0.0,  # -1.0 to 1.0, negative to positive
-            "arousal": 0.0,  # 0.0 to 1.0, calm to excited
-            "dominance": 0.5,  # 0.0 to 1.0, submissive to dominant
-        }
+
+        # Conversation state lives in one session per user
+        self.sessions = SessionStore(
+            factory=lambda: ConversationSession(self.max_history_length),
+            loader=ConversationSession.from_dict,
+            max_sessions=max_sessions,
+            idle_ttl=session_ttl,
+            spill_dir=session_spill_dir or os.environ.get("ALPHAWOLF_SESSION_DIR"),
+        )
 
         # Load language resources
+        self.intents_path = "data/intents.json"
+        self.intents_check_interval = 1.0  # seconds between intents file mtime checks
+        self._intents_mtime = None
+        self._intents_checked_at = 0.0
         self.intents = self._load_intents()
+        self.intent_matcher = IntentMatcher(self.intents)
         self.responses = self._load_responses()
         self.language_map = self._load_language_map()
 
-        # Advanced conversation state
-        self.current_topic = None
-        self.pending_questions = []
-
         # Adaptation metrics
         self.adaptation_stats = {
             "intent_recognition": {"successes": 0, "failures": 0},
@@ -104,10 +168,30 @@ class ConversationEngine:
 
         logger.info("Conversation engine initialized")
 
+    # The attributes below predate per-user sessions and expose the
+    # anonymous session's state
+
+    @property
+    def conversation_history(self) -> List[Dict[str, Any]]:
+        return list(self.sessions.get(ANONYMOUS_USER).history)
+
+    @property
+    def emotional_state(self) -> Dict[str, float]:
+        return self.sessions.get(ANONYMOUS_USER).emotional_state
+
+    @property
+    def last_emotion(self) -> str:
+        return self.sessions.get(ANONYMOUS_USER).last_emotion
+
+    @property
+    def current_topic(self) -> Optional[str]:
+        return self.sessions.get(ANONYMOUS_USER).current_topic
+
     def _load_intents(self) -> Dict[str, Dict[str, Any]]:
         """Load intent definitions from file or use defaults."""
         try:
-            with open("data/intents.json", "r") as f:
+            self._intents_mtime = os.path.getmtime(self.intents_path)
+            with open(self.intents_path, "r") as f:
                 return json.load(f)
         except (FileNotFoundError, json.JSONDecodeError):
             # Default intents
@@ -226,9 +310,13 @@ class ConversationEngine:
     ) -> Dict[str, Any]:
         """Process text input and generate a response.
 
+        Each user has their own history and emotional state; messages from
+        the same user are handled one at a time.
+
         Args:
             text: Input text from the user
-            user_id: Optional user identifier for personalization
+            user_id: Optional user identifier for personalization (falls back
+                to ``context["user_id"]``, then the shared anonymous session)
             context: Optional context information (location, time, etc.)
 
         Returns:
@@ -236,18 +324,30 @@ class ConversationEngine:
         """
         logger.info(f"Processing text: {text}")
 
+        if user_id is None and context:
+            user_id = context.get("user_id")
+
+        with self.sessions.session(user_id) as session:
+            return self._process_in_session(session, text, context)
+
+    def _process_in_session(
+        self,
+        session: ConversationSession,
+        text: str,
+        context: Optional[Dict[str, Any]],
+    ) -> Dict[str, Any]:
+        """Process text against one user's session (session lock held)."""
         # Clean and normalize input
         cleaned_text = text.strip().lower()
 
         # Add to conversation history
-        self.conversation_history.append(
+        session.history.append(
             {
                 "role": "user",
                 "text": cleaned_text,
                 "timestamp": datetime.now().isoformat(),
             }
         )
-        self._trim_history()
 
         # Check if Anthropic client is available
         HAS_ANTHROPIC = (
@@ -270,11 +370,14 @@ class ConversationEngine:
             intent, cleaned_text, confidence, entities, context
         )
 
+        # Store the emotion for future reference
+        session.last_emotion = emotion
+
         # Calculate emotional impact
-        self._update_emotional_state(intent, confidence)
+        self._update_emotional_state(intent, confidence, session.emotional_state)
 
         # Record the response in conversation history
-        self.conversation_history.append(
+        session.history.append(
             {
                 "role": "assistant",
                 "text": response_text,
@@ -362,44 +465,37 @@ class ConversationEngine:
             "emotion_tier": emotion_tier,
         }
 
+    def _refresh_intents(self):
+        """Recompile the intent matcher if the intents file has changed."""
+        now = time.monotonic()
+        if now - self._intents_checked_at < self.intents_check_interval:
+            return
+        self._intents_checked_at = now
+        try:
+            mtime = os.path.getmtime(self.intents_path)
+        except OSError:
+            mtime = None
+        if mtime != self._intents_mtime:
+            self._intents_mtime = mtime
+            self.intents = self._load_intents()
+            self.intent_matcher = IntentMatcher(self.intents)
+            logger.info(f"Reloaded {self.intent_matcher.automaton.pattern_count} intent patterns")
+
     def _identify_intent(self, text: str) -> Tuple[str, float, Dict[str, Any]]:
         """Identify the intent of the input text.
 
+        All intent patterns and entity values are matched in a single pass
+        over the text by the compiled IntentMatcher.
+
         Args:
             text: Input text
 
         Returns:
             tuple: (intent, confidence, entities)
         """
-        best_intent = "unknown"
-        best_confidence = 0.0
-        entities = {}
-
-        # Simple pattern matching for intents
-        for intent_name, intent_data in self.intents.items():
-            for pattern in intent_data["patterns"]:
-                if pattern in text:
-                    confidence = 0.7 + (len(pattern) / len(text)) * 0.3
-                    if confidence > best_confidence:
-                        best_intent = intent_name
-                        best_confidence = confidence
-
-        # Extract entities (simple implementation)
-        # TODO: Implement more sophisticated entity extraction
-        common_entities = {
-            "location": ["home", "school", "hospital", "outside", "inside"],
-            "time": ["morning", "afternoon", "evening", "night", "now", "later"],
-            "person": ["doctor", "nurse", "teacher", "mom", "dad", "caregiver"],
-        }
-
-        for entity_type, entity_values in common_entities.items():
-            for value in entity_values:
-                if value in text:
-                    entities[entity_type] = value
-
-        # Add randomness to simulate real-world uncertainty
-        confidence_variation = random.uniform(-0.1, 0.1)
-        best_confidence = min(0.99, max(0.2, best_confidence + confidence_variation))
+        self._refresh_intents()
+        best_intent, best_confidence, entities = self.intent_matcher.match(text)
+        best_confidence = min(0.99, max(0.2, best_confidence))
 
         return best_intent, best_confidence, entities
 
@@ -496,17 +592,17 @@ class ConversationEngine:
             except Exception as e:
                 logger.warning(f"Could not apply complexity adjustment: {str(e)}")
 
-        # Store the emotion for future reference
-        self.last_emotion = emotion
-
         return response, emotion, emotion_tier
 
-    def _update_emotional_state(self, intent: str, confidence: float):
+    def _update_emotional_state(
+        self, intent: str, confidence: float, emotional_state: Dict[str, float]
+    ):
         """Update the emotional state based on the interaction.
 
         Args:
             intent: The identified intent
             confidence: Confidence score
+            emotional_state: The session's emotional state, updated in place
         """
         # Map intents to emotional impact
         intent_valence = {
@@ -520,13 +616,13 @@ class ConversationEngine:
 
         # Update emotional state components
         valence_impact = intent_valence.get(intent, 0.0) * confidence
-        self.emotional_state["valence"] = max(
-            -1.0, min(1.0, self.emotional_state["valence"] + valence_impact)
+        emotional_state["valence"] = max(
+            -1.0, min(1.0, emotional_state["valence"] + valence_impact)
         )
 
         # Arousal increases with interaction, decays over time
-        self.emotional_state["arousal"] = max(
-            0.0, min(1.0, self.emotional_state["arousal"] + 0.1 * confidence)
+        emotional_state["arousal"] = max(
+            0.0, min(1.0, emotional_state["arousal"] + 0.1 * confidence)
         )
 
         # Dominance depends on the type of interaction
@@ -537,25 +633,43 @@ class ConversationEngine:
             # Neutral impact
             dominance_impact = 0.0
 
-        self.emotional_state["dominance"] = max(
-            0.0, min(1.0, self.emotional_state["dominance"] + dominance_impact)
+        emotional_state["dominance"] = max(
+            0.0, min(1.0, emotional_state["dominance"] + dominance_impact)
         )
 
-    def _trim_history(self):
-        """Trim conversation history to the maximum length."""
-        if len(self.conversation_history) > self.max_history_length:
-            # Keep the most recent conversations
-            self.conversation_history = self.conversation_history[
-                -self.max_history_length :
-            ]
-
-    def get_emotional_state(self) -> Dict[str, float]:
+    def get_emotional_state(self, user_id: Optional[str] = None) -> Dict[str, float]:
         """Get the current emotional state.
 
+        Args:
+            user_id: User whose session to read (default: the anonymous session)
+
         Returns:
             dict: Emotional state components
         """
-        return self.emotional_state
+        session = self.sessions.get(user_id)
+        with session.lock:
+            return dict(session.emotional_state)
+
+    def get_conversation_history(
+        self, user_id: Optional[str] = None, limit: Optional[int] = None
+    ) -> List[Dict[str, Any]]:
+        """Get a user's recent conversation turns, oldest first.
+
+        Args:
+            user_id: User whose session to read (default: the anonymous session)
+            limit: Maximum number of turns to return
+
+        Returns:
+            list: Conversation history entries
+        """
+        session = self.sessions.get(user_id)
+        with session.lock:
+            history = list(session.history)
+        return history[-limit:] if limit else history
+
+    def end_session(self, user_id: Optional[str] = None) -> bool:
+        """Forget a user's conversation state (e.g. on logout)."""
+        return self.sessions.discard(user_id)
 
     def save_models(self):
         """Save learned models and conversation patterns."""
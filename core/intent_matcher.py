@@ -0,0 +1,260 @@
+# © 2025 The Christman AI Project. All rights reserved.
+#
+# This code is released as part of a trauma-informed, dignity-first AI ecosystem
+# designed to protect, empower, and elevate vulnerable populations.
+#
+# By using, modifying, or distributing this software, you agree to uphold the
+# following core principles: Truth, Dignity, Protection, Transparency, No Erasure.
+#
+# For questions or licensing requests, contact: lumacognify@thechristmanaiproject.com
+
+"""Multi-pattern matcher for AlphaWolf intent recognition.
+
+An Aho-Corasick automaton over every intent and entity pattern, so a
+single pass over the utterance finds all substring hits no matter how
+many patterns are loaded. Matching semantics are the same as
+``pattern in text``: plain substrings, no word boundaries.
+"""
+
+import random
+import time
+from collections import deque
+from typing import Any, Dict, Hashable, Iterable, Iterator, List, Optional, Tuple
+
+# Same entity vocabulary the conversation engine has always used
+DEFAULT_ENTITIES = {
+    "location": ["home", "school", "hospital", "outside", "inside"],
+    "time": ["morning", "afternoon", "evening", "night", "now", "later"],
+    "person": ["doctor", "nurse", "teacher", "mom", "dad", "caregiver"],
+}
+
+
+class AhoCorasick:
+    """Aho-Corasick automaton mapping patterns to payloads.
+
+    Each pattern may carry several payloads (the same phrase can belong to
+    more than one intent). ``iter_matches`` yields every occurrence of every
+    pattern in one left-to-right scan.
+    """
+
+    def __init__(self, patterns: Iterable[Tuple[str, Hashable]] = ()):
+        """Build the automaton.
+
+        Args:
+            patterns: (pattern, payload) pairs; empty patterns are ignored
+        """
+        self._goto: List[Dict[str, int]] = [{}]
+        self._fail: List[int] = [0]
+        # Payloads ending at a state, and the nearest suffix state that has any
+        self._output: List[List[Hashable]] = [[]]
+        self._output_link: List[int] = [0]
+        self._lengths: List[int] = [0]
+        self.pattern_count = 0
+
+        for pattern, payload in patterns:
+            self._add(pattern, payload)
+        self._build_links()
+
+    def _add(self, pattern: str, payload: Hashable):
+        if not pattern:
+            return
+        state = 0
+        for char in pattern:
+            next_state = self._goto[state].get(char)
+            if next_state is None:
+                next_state = len(self._goto)
+                self._goto.append({})
+                self._fail.append(0)
+                self._output.append([])
+                self._output_link.append(0)
+                self._lengths.append(self._lengths[state] + 1)
+                self._goto[state][char] = next_state
+            state = next_state
+        self._output[state].append(payload)
+        self.pattern_count += 1
+
+    def _build_links(self):
+        queue = deque(self._goto[0].values())
+        while queue:
+            state = queue.popleft()
+            for char, child in self._goto[state].items():
+                queue.append(child)
+                fallback = self._fail[state]
+                while fallback and char not in self._goto[fallback]:
+                    fallback = self._fail[fallback]
+                target = self._goto[fallback].get(char, 0)
+                self._fail[child] = target if target != child else 0
+                suffix = self._fail[child]
+                self._output_link[child] = suffix if self._output[suffix] else self._output_link[suffix]
+
+    def iter_matches(self, text: str) -> Iterator[Tuple[int, int, Hashable]]:
+        """Yield (start, length, payload) for every pattern occurrence."""
+        goto, fail = self._goto, self._fail
+        output, output_link, lengths = self._output, self._output_link, self._lengths
+        state = 0
+        for index, char in enumerate(text):
+            while state and char not in goto[state]:
+                state = fail[state]
+            state = goto[state].get(char, 0)
+            hit = state if output[state] else output_link[state]
+            while hit:
+                length = lengths[hit]
+                for payload in output[hit]:
+                    yield index - length + 1, length, payload
+                hit = output_link[hit]
+
+
+class IntentMatcher:
+    """Compiled intent and entity patterns for ConversationEngine.
+
+    Scoring matches the original nested loops: confidence is
+    ``0.7 + len(pattern) / len(text) * 0.3`` for the best-scoring pattern,
+    ties go to the intent (then pattern) listed first, and for each entity
+    type the value listed last wins.
+    """
+
+    def __init__(
+        self,
+        intents: Dict[str, Dict[str, Any]],
+        entities: Optional[Dict[str, List[str]]] = None,
+    ):
+        """Compile intents and entities into one automaton.
+
+        Args:
+            intents: Intent definitions with a ``patterns`` list each
+            entities: Entity type -> values (default: DEFAULT_ENTITIES)
+        """
+        entities = DEFAULT_ENTITIES if entities is None else entities
+        self.intent_names = list(intents)
+        self.entity_types = list(entities)
+
+        # One automaton entry per distinct pattern. A phrase listed under several
+        # intents only needs the first listing, since that one wins ties anyway.
+        compiled: Dict[str, List[Any]] = {}
+        for intent_index, intent_name in enumerate(self.intent_names):
+            for pattern_index, pattern in enumerate(intents[intent_name].get("patterns", [])):
+                # Input is lowercased before matching, so patterns must be too
+                entry = compiled.setdefault(pattern.lower(), [None, []])
+                if entry[0] is None:
+                    entry[0] = (intent_index, pattern_index)
+        for type_index, entity_type in enumerate(self.entity_types):
+            for value_index, value in enumerate(entities[entity_type]):
+                compiled.setdefault(value.lower(), [None, []])[1].append((type_index, value_index, value))
+
+        self._payloads = [(entry[0], tuple(entry[1])) for entry in compiled.values()]
+        self.automaton = AhoCorasick((pattern, i) for i, pattern in enumerate(compiled))
+
+    def match(self, text: str) -> Tuple[str, float, Dict[str, Any]]:
+        """Find the best intent and the entities in one pass.
+
+        Args:
+            text: Lowercased input text
+
+        Returns:
+            tuple: (intent, confidence, entities)
+        """
+        best_key = None
+        best_length = 0
+        entity_hits: Dict[int, Tuple[int, str]] = {}
+
+        payloads = self._payloads
+        for _, length, payload_index in self.automaton.iter_matches(text):
+            intent_key, entity_values = payloads[payload_index]
+            # Longest pattern wins; among equals, the first one listed
+            if intent_key is not None and (
+                length > best_length or (length == best_length and intent_key < best_key)
+            ):
+                best_length, best_key = length, intent_key
+            for type_index, value_index, value in entity_values:
+                current = entity_hits.get(type_index)
+                if current is None or value_index > current[0]:
+                    entity_hits[type_index] = (value_index, value)
+
+        entities = {
+            self.entity_types[type_index]: entity_hits[type_index][1]
+            for type_index in sorted(entity_hits)
+        }
+        if best_key is None:
+            return "unknown", 0.0, entities
+        confidence = 0.7 + (best_length / len(text)) * 0.3
+        return self.intent_names[best_key[0]], confidence, entities
+
+
+def naive_match(
+    intents: Dict[str, Dict[str, Any]], text: str, entities: Optional[Dict[str, List[str]]] = None
+) -> Tuple[str, float, Dict[str, Any]]:
+    """Reference implementation: the original nested-loop scan, without jitter."""
+    entities = DEFAULT_ENTITIES if entities is None else entities
+    best_intent = "unknown"
+    best_confidence = 0.0
+    for intent_name, intent_data in intents.items():
+        for pattern in intent_data["patterns"]:
+            pattern = pattern.lower()
+            if pattern in text:
+                confidence = 0.7 + (len(pattern) / len(text)) * 0.3
+                if confidence > best_confidence:
+                    best_intent = intent_name
+                    best_confidence = confidence
+    found = {}
+    for entity_type, entity_values in entities.items():
+        for value in entity_values:
+            if value in text:
+                found[entity_type] = value
+    return best_intent, best_confidence, found
+
+
+def run_benchmark(
+    pattern_counts=(10, 100, 1000, 10000), utterances: int = 500, seed: int = 42
+) -> List[Dict[str, Any]]:
+    """Per-utterance latency of the nested loop vs the automaton.
+
+    Returns:
+        list: One row per pattern count with microseconds per utterance
+    """
+    rng = random.Random(seed)
+    vocabulary = [
+        "help", "need", "water", "mom", "pain", "walk", "outside", "medicine", "tired",
+        "hungry", "doctor", "nurse", "bathroom", "cold", "music", "photos", "family",
+        "remember", "where", "today", "morning", "blanket", "glasses", "phone", "home",
+    ]
+    texts = [
+        " ".join(rng.choice(vocabulary) for _ in range(rng.randint(4, 14)))
+        for _ in range(utterances)
+    ]
+
+    results = []
+    for count in pattern_counts:
+        intents: Dict[str, Dict[str, Any]] = {}
+        for i in range(count):
+            words = " ".join(rng.choice(vocabulary) for _ in range(rng.randint(1, 3)))
+            intents.setdefault(f"intent_{i % max(1, count // 5)}", {"patterns": []})["patterns"].append(words)
+
+        started = time.perf_counter()
+        matcher = IntentMatcher(intents)
+        build_seconds = time.perf_counter() - started
+
+        started = time.perf_counter()
+        naive_results = [naive_match(intents, text) for text in texts]
+        naive_seconds = time.perf_counter() - started
+
+        started = time.perf_counter()
+        matcher_results = [matcher.match(text) for text in texts]
+        matcher_seconds = time.perf_counter() - started
+
+        results.append({
+            "patterns": count,
+            "build_ms": build_seconds * 1000,
+            "naive_us": naive_seconds / utterances * 1e6,
+            "automaton_us": matcher_seconds / utterances * 1e6,
+            "agree": naive_results == matcher_results,
+        })
+    return results
+
+
+if __name__ == "__main__":
+    print(f"{'patterns':>9} {'build ms':>9} {'loop us':>10} {'automaton us':>13} agree")
+    for row in run_benchmark():
+        print(
+            f"{row['patterns']:>9} {row['build_ms']:>9.1f} {row['naive_us']:>10.1f} "
+            f"{row['automaton_us']:>13.1f} {row['agree']}"
+        )
@@ -34,8 +34,10 @@ Part of The Christman AI Project
 Powered by LumaCognify AI
 """
 
+from collections import deque
 from datetime import datetime
 import math
+import threading
 from typing import Dict, List, Optional
 
 
@@ -47,11 +49,17 @@ class LocalReasoningEngine:
     agents, allowing them to think, learn, and evolve without cloud dependency.
     """
     
-    def __init__(self):
+    def __init__(self, max_log_length: int = 500):
+        """
+        Args:
+            max_log_length: Reasoning cycles kept in the log (oldest drop off)
+        """
         self.last_reflection = ""
-        self.reasoning_log = []
+        self.reasoning_log = deque(maxlen=max_log_length)
         self.evolution_cycles = 0
         self.self_corrections = 0
+        # Shared by every request thread using the singleton
+        self._lock = threading.Lock()
         
     # ----------------------------------------------------------
     # CORE REASONING
@@ -101,16 +109,17 @@ class LocalReasoningEngine:
         final_output = " ".join(reflection) + " " + core_thought
 
         # 5️⃣  Save state for evolution
-        self.last_reflection = final_output
-        self.reasoning_log.append({
-            "time": timestamp, 
-            "input": user_input, 
-            "output": final_output,
-            "weight": weight
-        })
-        
-        # Track evolution
-        self.evolution_cycles += 1
+        with self._lock:
+            self.last_reflection = final_output
+            self.reasoning_log.append({
+                "time": timestamp, 
+                "input": user_input, 
+                "output": final_output,
+                "weight": weight
+            })
+            
+            # Track evolution
+            self.evolution_cycles += 1
 
         return final_output
 
@@ -188,7 +197,7 @@ class LocalReasoningEngine:
             }
         
         # Analyze recent reasoning patterns
-        recent = self.reasoning_log[-50:]
+        recent = self.get_reasoning_history(50)
         avg_weight = sum(r.get("weight", 0) for r in recent) / len(recent)
         
         # Identify patterns
@@ -244,12 +253,15 @@ class LocalReasoningEngine:
         Returns:
             List of recent reasoning cycles with timestamps
         """
-        return self.reasoning_log[-limit:]
+        with self._lock:
+            history = list(self.reasoning_log)
+        return history[-limit:] if limit > 0 else []
     
     def clear_history(self) -> None:
         """Clear reasoning log while preserving evolution metrics."""
-        self.reasoning_log = []
-        self.last_reflection = ""
+        with self._lock:
+            self.reasoning_log.clear()
+            self.last_reflection = ""
         # Preserve evolution_cycles and self_corrections
     
     def get_stats(self) -> Dict:
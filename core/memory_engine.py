@@ -8,52 +8,271 @@
 # following core principles: Truth, Dignity, Protection, Transparency, No Erasure.
 #
 # For questions or licensing requests, contact: lumacognify@thechristmanaiproject.com
+import bisect
 import json
 import logging
 import os
+import re
+import threading
+from collections import defaultdict
 from datetime import datetime
 from typing import Any, Dict, List, Optional
 
 logger = logging.getLogger(__name__)
 
+SEGMENT_PREFIX = "segment_"
+SEGMENT_SUFFIX = ".jsonl"
+SEGMENT_PATTERN = re.compile(r"^segment_(\d{8})\.jsonl$")
+# Written once the legacy JSON store has been fully imported
+LEGACY_IMPORTED_MARKER = "legacy_imported"
+# Present while a compaction is publishing its merged segment
+COMPACT_MANIFEST = "compact.json"
+
 
 class MemoryEngine:
-    """Handles memory persistence, retrieval, and contextual queries."""
+    """Handles memory persistence, retrieval, and contextual queries.
+
+    Entries are stored in a segmented append-only log next to ``file_path``
+    (``memory_store.json`` -> ``memory_store.log/segment_00000001.jsonl``).
+    Each ``save()`` appends a single JSON line, so the cost of a write does
+    not depend on the size of the store. Sealed segments are merged by
+    ``compact()``, which runs automatically once enough of them pile up.
+
+    An existing ``file_path`` JSON array from older releases is imported
+    into the log as segment 0, ahead of everything written since; the import
+    is retried on every start until it completes. The original file is left
+    untouched.
+    """
 
-    def __init__(self, file_path: str = "./memory/memory_store.json"):
+    def __init__(
+        self,
+        file_path: str = "./memory/memory_store.json",
+        segment_max_bytes: int = 4 * 1024 * 1024,
+        compact_after_segments: int = 8,
+        fsync: bool = False,
+    ):
         self.file_path = file_path
-        os.makedirs(os.path.dirname(self.file_path), exist_ok=True)
+        self.log_dir = os.path.splitext(file_path)[0] + ".log"
+        self.segment_max_bytes = segment_max_bytes
+        self.compact_after_segments = compact_after_segments
+        self.fsync = fsync
+        os.makedirs(os.path.dirname(self.file_path) or ".", exist_ok=True)
+
+        self._lock = threading.RLock()
         self._memory: List[Dict[str, Any]] = []
+        self._timestamps: List[str] = []
+        self._intent_index: Dict[str, List[int]] = defaultdict(list)
+        self._segment_id = 0
+        self._segment_file = None
+        self._segment_bytes = 0
         self.load_memory()
 
+    # ------------------------------------------------------------------
+    # Storage
+    # ------------------------------------------------------------------
+
+    def _segment_path(self, segment_id: int) -> str:
+        return os.path.join(self.log_dir, f"{SEGMENT_PREFIX}{segment_id:08d}{SEGMENT_SUFFIX}")
+
+    def _list_segments(self) -> List[int]:
+        if not os.path.isdir(self.log_dir):
+            return []
+        segment_ids = []
+        for name in os.listdir(self.log_dir):
+            match = SEGMENT_PATTERN.match(name)
+            if match:
+                segment_ids.append(int(match.group(1)))
+        return sorted(segment_ids)
+
+    def _write_segment_file(self, path: str, entries: List[Dict[str, Any]]):
+        with open(path, "w", encoding="utf-8") as out:
+            for entry in entries:
+                out.write(json.dumps(entry, separators=(",", ":"), default=str) + "\n")
+            out.flush()
+            os.fsync(out.fileno())
+
+    def _read_segment(self, segment_id: int) -> List[Dict[str, Any]]:
+        entries = []
+        path = self._segment_path(segment_id)
+        with open(path, "r", encoding="utf-8") as f:
+            for line_no, line in enumerate(f, 1):
+                line = line.strip()
+                if not line:
+                    continue
+                try:
+                    entries.append(json.loads(line))
+                except json.JSONDecodeError:
+                    # A torn final line after a crash is expected; skip it
+                    logger.warning(f"Skipping unreadable memory record {path}:{line_no}")
+        return entries
+
+    def _open_segment(self, segment_id: int):
+        if self._segment_file:
+            self._segment_file.close()
+        self._segment_id = segment_id
+        path = self._segment_path(segment_id)
+        self._segment_file = open(path, "a", encoding="utf-8")
+        self._segment_bytes = os.path.getsize(path)
+
+    def _append_record(self, entry: Dict[str, Any]):
+        line = json.dumps(entry, separators=(",", ":"), default=str) + "\n"
+        if self._segment_file is None or self._segment_bytes >= self.segment_max_bytes:
+            self._open_segment(self._segment_id + 1)
+            if len(self._list_segments()) > self.compact_after_segments:
+                self.compact()
+        self._segment_file.write(line)
+        self._segment_file.flush()
+        if self.fsync:
+            os.fsync(self._segment_file.fileno())
+        self._segment_bytes += len(line.encode("utf-8"))
+
+    def _index_entry(self, entry: Dict[str, Any]):
+        position = len(self._memory)
+        self._memory.append(entry)
+        self._timestamps.append(entry.get("timestamp", ""))
+        intent = entry.get("intent")
+        if intent:
+            self._intent_index[intent].append(position)
+
+    def _reset_index(self):
+        self._memory = []
+        self._timestamps = []
+        self._intent_index = defaultdict(list)
+
+    def import_legacy_store(self) -> int:
+        """Import entries from the legacy single-file JSON store into the log.
+
+        The entries are written to segment 0 in one atomic replace and the
+        import is then marked done, so an import that fails or is interrupted
+        is simply redone on the next start. Called by ``load_memory()``.
+
+        Returns:
+            int: Number of entries imported
+        """
+        marker = os.path.join(self.log_dir, LEGACY_IMPORTED_MARKER)
+        if os.path.exists(marker) or not os.path.exists(self.file_path):
+            return 0
+        with open(self.file_path, "r", encoding="utf-8") as f:
+            legacy = json.load(f)
+        if not isinstance(legacy, list):
+            logger.error(f"Legacy memory file {self.file_path} is not a list, skipping import")
+            return 0
+
+        with self._lock:
+            tmp_path = self._segment_path(0) + ".import"
+            self._write_segment_file(tmp_path, legacy)
+            os.replace(tmp_path, self._segment_path(0))
+            open(marker, "w").close()
+        logger.info(f"Imported {len(legacy)} legacy memory entries from {self.file_path}")
+        return len(legacy)
+
     def load_memory(self):
-        """Load stored memory entries from disk."""
-        if os.path.exists(self.file_path):
+        """Load stored memory entries from disk and rebuild the indexes."""
+        with self._lock:
+            self._reset_index()
+            os.makedirs(self.log_dir, exist_ok=True)
+
             try:
-                with open(self.file_path, "r", encoding="utf-8") as f:
-                    self._memory = json.load(f)
-                logger.info(f"Loaded {len(self._memory)} memory entries.")
+                self._recover_compaction()
+                try:
+                    self.import_legacy_store()
+                except Exception as e:
+                    logger.error(f"Failed to import legacy memory store, will retry on next start: {e}")
+                segment_ids = self._list_segments()
+                for segment_id in segment_ids:
+                    for entry in self._read_segment(segment_id):
+                        self._index_entry(entry)
+                # Segment 0 holds imported entries only; new ones start at 1
+                self._open_segment(max(segment_ids[-1], 1) if segment_ids else 1)
             except Exception as e:
-                logger.error(f"Failed to load memory file: {e}")
-                self._memory = []
-        else:
-            logger.info("No existing memory file found, starting fresh.")
-            self._memory = []
+                logger.error(f"Failed to load memory log: {e}")
+                self._reset_index()
+                if self._segment_file is None:
+                    self._open_segment(self._segment_id + 1)
+
+            if self._memory:
+                logger.info(f"Loaded {len(self._memory)} memory entries.")
+            else:
+                logger.info("No existing memory file found, starting fresh.")
 
     def save_memory(self):
-        """Persist memory to disk."""
+        """Flush the active log segment to disk."""
         try:
-            with open(self.file_path, "w", encoding="utf-8") as f:
-                json.dump(self._memory, f, indent=2)
-            logger.info(f"Saved {len(self._memory)} memory entries.")
+            with self._lock:
+                if self._segment_file:
+                    self._segment_file.flush()
+                    os.fsync(self._segment_file.fileno())
         except Exception as e:
             logger.error(f"Failed to save memory: {e}")
 
+    def compact(self):
+        """Merge all sealed segments into a single segment.
+
+        The active segment is left alone so writers are never blocked on a
+        rewrite of the entries they just appended. The merged segment takes
+        the lowest sealed id, keeping replay order intact.
+
+        A manifest naming the merged sources is written before the merged
+        segment replaces the first of them and removed once the rest are
+        gone; ``load_memory()`` finishes or discards a compaction that was
+        interrupted in between, so no entry is replayed twice.
+        """
+        with self._lock:
+            sealed = [s for s in self._list_segments() if s != self._segment_id]
+            if len(sealed) < 2:
+                return
+
+            target = sealed[0]
+            tmp_path = self._segment_path(target) + ".compact"
+            merged = []
+            for segment_id in sealed:
+                merged.extend(self._read_segment(segment_id))
+            self._write_segment_file(tmp_path, merged)
+
+            manifest_path = os.path.join(self.log_dir, COMPACT_MANIFEST)
+            with open(manifest_path + ".tmp", "w", encoding="utf-8") as f:
+                json.dump({"target": target, "sources": sealed}, f)
+                f.flush()
+                os.fsync(f.fileno())
+            os.replace(manifest_path + ".tmp", manifest_path)
+
+            os.replace(tmp_path, self._segment_path(target))
+            for segment_id in sealed[1:]:
+                os.remove(self._segment_path(segment_id))
+            os.remove(manifest_path)
+            logger.info(f"Compacted {len(sealed)} memory segments into {self._segment_path(target)}")
+
+    def _recover_compaction(self):
+        """Finish or roll back a compaction interrupted by a crash."""
+        manifest_path = os.path.join(self.log_dir, COMPACT_MANIFEST)
+        if not os.path.exists(manifest_path):
+            return
+        with open(manifest_path, "r", encoding="utf-8") as f:
+            manifest = json.load(f)
+        tmp_path = self._segment_path(manifest["target"]) + ".compact"
+        if os.path.exists(tmp_path):
+            # The merged segment was never published; the sources are intact
+            os.remove(tmp_path)
+        else:
+            for segment_id in manifest["sources"][1:]:
+                if os.path.exists(self._segment_path(segment_id)):
+                    os.remove(self._segment_path(segment_id))
+            logger.info(f"Finished interrupted compaction into {self._segment_path(manifest['target'])}")
+        os.remove(manifest_path)
+
+    # ------------------------------------------------------------------
+    # Public API
+    # ------------------------------------------------------------------
+
     def save(self, entry: Dict[str, Any]):
         """Save a new entry into memory."""
         entry["timestamp"] = datetime.utcnow().isoformat() + "Z"
-        self._memory.append(entry)
-        self.save_memory()
+        with self._lock:
+            try:
+                self._append_record(entry)
+            except Exception as e:
+                logger.error(f"Failed to save memory: {e}")
+            self._index_entry(entry)
         logger.debug(f"Stored new memory entry: {entry}")
 
     def query(self, text: str, intent: Optional[str] = None) -> Dict[str, Any]:
@@ -63,28 +282,45 @@ class MemoryEngine:
         """
         logger.debug(f"Querying memory for context (intent={intent}): {text}")
 
-        # For now, we’ll return the last few memory items
-        if not self._memory:
-            return {"context": "No prior context found."}
+        with self._lock:
+            # For now, we’ll return the last few memory items
+            if not self._memory:
+                return {"context": "No prior context found."}
 
-        # Optionally filter by intent
-        if intent:
-            relevant = [m for m in self._memory if m.get("intent") == intent]
-        else:
-            relevant = self._memory[-5:]  # last 5 items
+            # Optionally filter by intent
+            if intent:
+                relevant = [self._memory[i] for i in self._intent_index.get(intent, [])[-5:]]
+            else:
+                relevant = self._memory[-5:]  # last 5 items
 
         # Return summarized context
         context_snippets = [
-            f"{m.get('input', '')} → {m.get('output', '')}" for m in relevant[-5:]
+            f"{m.get('input', '')} → {m.get('output', '')}" for m in relevant
         ]
-        return {"context": "\n".join(context_snippets[-5:])}
+        return {"context": "\n".join(context_snippets)}
 
     def get_recent_events(self, limit: int = 10) -> List[Dict[str, Any]]:
         """Return the most recent memory events."""
-        return list(reversed(self._memory[-limit:]))
+        with self._lock:
+            return list(reversed(self._memory[-limit:]))
+
+    def get_events_between(
+        self, start: Optional[str] = None, end: Optional[str] = None
+    ) -> List[Dict[str, Any]]:
+        """Return events with ``start <= timestamp < end`` (ISO-8601 strings)."""
+        with self._lock:
+            lo = bisect.bisect_left(self._timestamps, start) if start else 0
+            hi = bisect.bisect_left(self._timestamps, end) if end else len(self._memory)
+            return self._memory[lo:hi]
 
     def clear(self):
         """Erase all memory (use with caution)."""
-        self._memory = []
-        self.save_memory()
+        with self._lock:
+            if self._segment_file:
+                self._segment_file.close()
+                self._segment_file = None
+            for segment_id in self._list_segments():
+                os.remove(self._segment_path(segment_id))
+            self._reset_index()
+            self._open_segment(1)
         logger.warning("All memory has been cleared.")
@@ -0,0 +1,250 @@
+# © 2025 The Christman AI Project. All rights reserved.
+#
+# This code is released as part of a trauma-informed, dignity-first AI ecosystem
+# designed to protect, empower, and elevate vulnerable populations.
+#
+# By using, modifying, or distributing this software, you agree to uphold the
+# following core principles: Truth, Dignity, Protection, Transparency, No Erasure.
+#
+# For questions or licensing requests, contact: lumacognify@thechristmanaiproject.com
+
+"""Response cache for AlphaWolf conversations.
+
+Patients living with dementia often ask the same question many times a
+day. The cache keeps finished ``think()`` responses per patient, keyed on
+a normalized form of the utterance plus its intent and the parts of the
+context that shape the answer, so a repeat is answered without running
+the reasoning pipeline (or paying for a cloud call) again.
+
+How long an answer stays valid depends on its intent, and anything that
+looks like an emergency is never cached.
+"""
+
+import copy
+import re
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Callable, Dict, Iterable, Optional, Tuple
+
+# Seconds an answer stays valid, by intent. Intents mapped to 0 are never cached.
+INTENT_TTLS = {
+    "greeting": 3600,
+    "farewell": 3600,
+    "help": 3600,
+    "request_info": 900,
+    "respond": 600,
+    "local_reasoning": 600,
+    "express_needs": 60,
+    "unknown": 0,
+    "clarification": 0,
+    "emergency_response": 0,
+}
+DEFAULT_TTL = 300
+
+# Answers that mention the clock or calendar go stale quickly
+TIME_SENSITIVE_WORDS = {
+    "time", "day", "date", "today", "tonight", "tomorrow", "yesterday",
+    "morning", "afternoon", "evening", "now", "week", "month", "year",
+}
+TIME_SENSITIVE_TTL = 60
+
+# Disfluencies that never change what is being asked
+FILLER_WORDS = {"um", "uh", "er", "erm", "hmm"}
+
+# Context fields that change the answer to the same words
+CONTEXT_FIELDS = ("patient_type", "cognitive_level", "language")
+
+CONTRACTIONS = {
+    "what's": "what is", "where's": "where is", "who's": "who is", "when's": "when is",
+    "how's": "how is", "it's": "it is", "i'm": "i am", "don't": "do not",
+    "can't": "cannot", "cant": "cannot", "isn't": "is not", "i've": "i have",
+    "im": "i am", "dont": "do not", "whats": "what is", "wheres": "where is",
+}
+
+_TOKEN_PATTERN = re.compile(r"[a-z0-9']+")
+
+
+def normalize_utterance(text: str) -> str:
+    """Canonical form of an utterance for cache keys.
+
+    Lowercases, expands common contractions and drops punctuation and
+    disfluencies, so "What's the day today?" and "um, what is the day
+    today" share a key. Word order is kept: "is the dog bigger than the
+    cat" and "is the cat bigger than the dog" are different questions.
+    """
+    words = []
+    for token in _TOKEN_PATTERN.findall(text.lower()):
+        words.extend(CONTRACTIONS.get(token, token).split())
+    return " ".join(word for word in words if word not in FILLER_WORDS)
+
+
+class ResponseCache:
+    """Thread-safe per-scope response cache with intent-based TTLs."""
+
+    def __init__(
+        self,
+        max_entries: int = 5000,
+        intent_ttls: Optional[Dict[str, float]] = None,
+        default_ttl: float = DEFAULT_TTL,
+        bypass_phrases: Iterable[str] = (),
+        intent_classifier: Optional[Callable[[str], Optional[str]]] = None,
+        context_fields: Iterable[str] = CONTEXT_FIELDS,
+    ):
+        """Initialize the cache.
+
+        Args:
+            max_entries: Entries kept across all scopes before the least recent is dropped
+            intent_ttls: Intent -> seconds (default: INTENT_TTLS)
+            default_ttl: TTL for intents not listed
+            bypass_phrases: Phrases that make an utterance uncacheable (e.g. emergencies)
+            intent_classifier: Maps a normalized utterance to its intent; part of the key
+            context_fields: Context fields that are part of the key
+        """
+        self.max_entries = max_entries
+        self.intent_ttls = INTENT_TTLS if intent_ttls is None else intent_ttls
+        self.default_ttl = default_ttl
+        self.bypass_phrases = tuple(phrase.lower() for phrase in bypass_phrases)
+        self.intent_classifier = intent_classifier
+        self.context_fields = tuple(context_fields)
+
+        self._entries: "OrderedDict[Tuple, Dict[str, Any]]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._stats = {"hits": 0, "misses": 0, "bypassed": 0, "stores": 0, "expired": 0, "saved_ms": 0.0}
+
+    def _cache_key(self, scope: Any, key: str, context: Optional[Dict[str, Any]]) -> Optional[Tuple]:
+        """(scope, intent, context values, utterance), or None if the turn has no scope.
+
+        Answers are never shared between patients, so a turn without a
+        patient/session is not cached at all.
+        """
+        if scope is None or not key:
+            return None
+        intent = self.intent_classifier(key) if self.intent_classifier else None
+        context = context or {}
+        context_key = tuple(str(context.get(field, "")) for field in self.context_fields)
+        return (str(scope), intent, context_key, key)
+
+    def should_bypass(self, text: str) -> bool:
+        """Whether an utterance must always go through the full pipeline."""
+        lowered = text.lower()
+        return any(phrase in lowered for phrase in self.bypass_phrases)
+
+    def ttl_for(self, intent: Optional[str], key: str) -> float:
+        """Seconds a response with this intent and utterance key stays valid."""
+        ttl = self.intent_ttls.get(intent, self.default_ttl)
+        if ttl and TIME_SENSITIVE_WORDS.intersection(key.split()):
+            ttl = min(ttl, TIME_SENSITIVE_TTL)
+        return ttl
+
+    def get(self, scope: Any, text: str, context: Optional[Dict[str, Any]] = None) -> Optional[Dict[str, Any]]:
+        """Cached response for an utterance, or None.
+
+        Args:
+            scope: Patient/session the answer belongs to (None: never cached)
+            text: Raw utterance
+            context: Turn context; the CONTEXT_FIELDS in it are part of the key
+
+        Returns:
+            dict: A copy of the cached response, or None on a miss or bypass
+        """
+        cache_key = None if self.should_bypass(text) else self._cache_key(scope, normalize_utterance(text), context)
+        if cache_key is None:
+            with self._lock:
+                self._stats["bypassed"] += 1
+            return None
+
+        now = time.monotonic()
+        with self._lock:
+            entry = self._entries.get(cache_key)
+            if entry is not None and entry["expires_at"] <= now:
+                del self._entries[cache_key]
+                self._stats["expired"] += 1
+                entry = None
+            if entry is None:
+                self._stats["misses"] += 1
+                return None
+            self._entries.move_to_end(cache_key)
+            entry["hits"] += 1
+            self._stats["hits"] += 1
+            self._stats["saved_ms"] += entry["cost_ms"]
+            return copy.deepcopy(entry["response"])
+
+    def contains(self, scope: Any, text: str, context: Optional[Dict[str, Any]] = None) -> bool:
+        """Whether a fresh entry exists, without counting a hit or miss."""
+        cache_key = self._cache_key(scope, normalize_utterance(text), context)
+        if cache_key is None:
+            return False
+        with self._lock:
+            entry = self._entries.get(cache_key)
+            return entry is not None and entry["expires_at"] > time.monotonic()
+
+    def put(
+        self,
+        scope: Any,
+        text: str,
+        response: Dict[str, Any],
+        cost_ms: float = 0.0,
+        context: Optional[Dict[str, Any]] = None,
+    ) -> bool:
+        """Cache a finished response.
+
+        Args:
+            scope: Patient/session the answer belongs to (None: never cached)
+            text: Raw utterance
+            response: Response returned by the pipeline
+            cost_ms: What producing the response took, credited on every hit
+            context: Turn context; the CONTEXT_FIELDS in it are part of the key
+
+        Returns:
+            bool: True if the response was cached
+        """
+        if self.should_bypass(text):
+            return False
+        key = normalize_utterance(text)
+        cache_key = self._cache_key(scope, key, context)
+        ttl = self.ttl_for(response.get("intent"), key)
+        if cache_key is None or ttl <= 0:
+            return False
+
+        entry = {
+            "response": copy.deepcopy(response),
+            "intent": response.get("intent"),
+            "cost_ms": cost_ms,
+            "expires_at": time.monotonic() + ttl,
+            "hits": 0,
+        }
+        with self._lock:
+            self._entries[cache_key] = entry
+            self._entries.move_to_end(cache_key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+            self._stats["stores"] += 1
+        return True
+
+    def invalidate(self, scope: Any = None, intent: Optional[str] = None) -> int:
+        """Drop entries for a scope and/or intent (both None clears everything)."""
+        with self._lock:
+            if scope is None and intent is None:
+                removed = len(self._entries)
+                self._entries.clear()
+                return removed
+            scope_key = None if scope is None else str(scope)
+            doomed = [
+                cache_key for cache_key, entry in self._entries.items()
+                if (scope_key is None or cache_key[0] == scope_key)
+                and (intent is None or entry["intent"] == intent)
+            ]
+            for cache_key in doomed:
+                del self._entries[cache_key]
+            return len(doomed)
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Hit rate, latency saved and entry counts."""
+        with self._lock:
+            lookups = self._stats["hits"] + self._stats["misses"]
+            return {
+                **self._stats,
+                "entries": len(self._entries),
+                "hit_rate": self._stats["hits"] / lookups if lookups else 0.0,
+            }
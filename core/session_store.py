@@ -0,0 +1,196 @@
+# © 2025 The Christman AI Project. All rights reserved.
+#
+# This code is released as part of a trauma-informed, dignity-first AI ecosystem
+# designed to protect, empower, and elevate vulnerable populations.
+#
+# By using, modifying, or distributing this software, you agree to uphold the
+# following core principles: Truth, Dignity, Protection, Transparency, No Erasure.
+#
+# For questions or licensing requests, contact: lumacognify@thechristmanaiproject.com
+
+"""Per-user session store for AlphaWolf conversation state.
+
+Sessions are kept in memory in least-recently-used order. The store is
+bounded by session count; sessions idle past their TTL, or pushed out by
+the bound, are dropped or (optionally) spilled to disk as JSON and
+reloaded transparently on the user's next request.
+"""
+
+import hashlib
+import json
+import logging
+import os
+import threading
+import time
+from collections import OrderedDict
+from contextlib import contextmanager
+from typing import Any, Callable, Dict, Iterator, Optional
+
+logger = logging.getLogger(__name__)
+
+ANONYMOUS_USER = "anonymous"
+
+
+class SessionStore:
+    """Thread-safe LRU + TTL store of per-user session objects.
+
+    Session objects must provide ``lock`` (a threading lock held while a
+    request works on the session) and, when spilling is enabled, a
+    JSON-serializable ``to_dict()``.
+    """
+
+    def __init__(
+        self,
+        factory: Callable[[], Any],
+        loader: Optional[Callable[[Dict[str, Any]], Any]] = None,
+        max_sessions: int = 1000,
+        idle_ttl: float = 1800.0,
+        spill_dir: Optional[str] = None,
+        sweep_interval: float = 60.0,
+    ):
+        """Initialize the store.
+
+        Args:
+            factory: Creates a fresh session
+            loader: Rebuilds a session from ``to_dict()`` output (required for spilling)
+            max_sessions: Sessions kept in memory before the least recent is evicted
+            idle_ttl: Seconds without access before a session is evicted
+            spill_dir: Directory for evicted sessions; None drops them instead
+            sweep_interval: Minimum seconds between idle sweeps
+        """
+        self.factory = factory
+        self.loader = loader
+        self.max_sessions = max_sessions
+        self.idle_ttl = idle_ttl
+        self.spill_dir = spill_dir if loader else None
+        self.sweep_interval = sweep_interval
+
+        self._sessions: "OrderedDict[str, Any]" = OrderedDict()
+        self._last_access: Dict[str, float] = {}
+        self._lock = threading.RLock()
+        self._last_sweep = time.monotonic()
+        self._stats = {"created": 0, "evicted": 0, "expired": 0, "spilled": 0, "restored": 0}
+
+        if self.spill_dir:
+            os.makedirs(self.spill_dir, exist_ok=True)
+
+    @staticmethod
+    def _key(user_id: Any) -> str:
+        return ANONYMOUS_USER if user_id is None else str(user_id)
+
+    def _spill_path(self, key: str) -> str:
+        # Hash the id so spill file names don't expose user identifiers
+        digest = hashlib.sha256(key.encode("utf-8")).hexdigest()[:32]
+        return os.path.join(self.spill_dir, f"{digest}.json")
+
+    def get(self, user_id: Any) -> Any:
+        """Get (creating or restoring if needed) the session for a user."""
+        key = self._key(user_id)
+        now = time.monotonic()
+        with self._lock:
+            if now - self._last_sweep >= self.sweep_interval:
+                self._sweep(now)
+
+            session = self._sessions.get(key)
+            if session is not None:
+                self._sessions.move_to_end(key)
+            else:
+                session = self._restore(key)
+                if session is None:
+                    session = self.factory()
+                    self._stats["created"] += 1
+                self._sessions[key] = session
+                while len(self._sessions) > self.max_sessions:
+                    evicted_key, evicted = self._sessions.popitem(last=False)
+                    self._last_access.pop(evicted_key, None)
+                    self._stats["evicted"] += 1
+                    self._spill(evicted_key, evicted)
+            self._last_access[key] = now
+            return session
+
+    @contextmanager
+    def session(self, user_id: Any) -> Iterator[Any]:
+        """Hold a user's session lock for the duration of a request.
+
+        Requests for different users run concurrently; requests for the same
+        user are serialized so their history and state stay consistent.
+        """
+        session = self.get(user_id)
+        with session.lock:
+            yield session
+
+    def peek(self, user_id: Any) -> Optional[Any]:
+        """The in-memory session for a user, without creating or touching it."""
+        with self._lock:
+            return self._sessions.get(self._key(user_id))
+
+    def discard(self, user_id: Any) -> bool:
+        """Forget a user's session, including any spilled copy."""
+        key = self._key(user_id)
+        with self._lock:
+            removed = self._sessions.pop(key, None) is not None
+            self._last_access.pop(key, None)
+            if self.spill_dir and os.path.exists(self._spill_path(key)):
+                os.remove(self._spill_path(key))
+                removed = True
+        return removed
+
+    def sweep(self) -> int:
+        """Evict every session idle past the TTL. Returns the number evicted."""
+        with self._lock:
+            return self._sweep(time.monotonic())
+
+    def _sweep(self, now: float) -> int:
+        self._last_sweep = now
+        cutoff = now - self.idle_ttl
+        expired = 0
+        # Oldest first; stop at the first session that is still fresh
+        while self._sessions:
+            key = next(iter(self._sessions))
+            if self._last_access.get(key, 0.0) > cutoff:
+                break
+            session = self._sessions.pop(key)
+            self._last_access.pop(key, None)
+            self._spill(key, session)
+            expired += 1
+        self._stats["expired"] += expired
+        return expired
+
+    def _spill(self, key: str, session: Any):
+        if not self.spill_dir:
+            return
+        path = self._spill_path(key)
+        try:
+            tmp_path = path + ".tmp"
+            with open(tmp_path, "w") as f:
+                json.dump({"user_id": key, "session": session.to_dict()}, f)
+            os.replace(tmp_path, path)
+            self._stats["spilled"] += 1
+        except Exception as e:
+            logger.error(f"Failed to spill session: {e}")
+
+    def _restore(self, key: str) -> Optional[Any]:
+        if not self.spill_dir:
+            return None
+        path = self._spill_path(key)
+        if not os.path.exists(path):
+            return None
+        try:
+            with open(path, "r") as f:
+                data = json.load(f)
+            os.remove(path)
+            if data.get("user_id") != key:
+                return None
+            self._stats["restored"] += 1
+            return self.loader(data["session"])
+        except Exception as e:
+            logger.error(f"Failed to restore spilled session: {e}")
+            return None
+
+    def __len__(self) -> int:
+        return len(self._sessions)
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Session counts and eviction counters."""
+        with self._lock:
+            return {**self._stats, "active": len(self._sessions), "max_sessions": self.max_sessions}
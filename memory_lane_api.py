@@ -19,13 +19,15 @@ that preserves human existence through organic memory meshing.
 # For questions or licensing requests, contact: lumacognify@thechristmanaiproject.com
 
 import os
-import json
 import logging
 from datetime import datetime
 from typing import Dict, List, Any, Optional
 from flask import Blueprint, request, jsonify, current_app
 from werkzeug.utils import secure_filename
 import base64
+import io
+from services.media_pipeline import get_media_pipeline
+from services.memory_lane_store import MEDIA_KINDS, get_memory_lane_store
 
 # Configure logging
 logging.basicConfig(level=logging.INFO)
@@ -56,65 +58,255 @@ def allowed_file(filename: str, allowed_extensions: set) -> bool:
     return '.' in filename and filename.rsplit('.', 1)[1].lower() in allowed_extensions
 
 
+def get_store():
+    """Metadata store backing every Memory Lane listing"""
+    return get_memory_lane_store(MEMORY_STORAGE)
+
+
+def get_pipeline():
+    """Upload/derivative pipeline for Memory Lane media"""
+    return get_media_pipeline(UPLOADS_PATH, get_store())
+
+
+MEDIA_EXTENSIONS = {
+    'photo': ALLOWED_IMAGE_EXTENSIONS,
+    'video': ALLOWED_VIDEO_EXTENSIONS,
+    'voice': ALLOWED_AUDIO_EXTENSIONS | {'webm'},
+}
+
+
+def build_media_memory(media_type: str, original_filename: str, metadata: Dict[str, Any]) -> Dict[str, Any]:
+    """Memory record for an uploaded file; storage fields are added by the pipeline"""
+    timestamp = datetime.now().strftime('%Y%m%d_%H%M%S')
+    memory = {
+        'id': f"{timestamp}_{original_filename}".replace('.', '_'),
+        'type': media_type,
+        'original_filename': original_filename,
+        'description': metadata.get('description', ''),
+        'album_id': metadata.get('album_id')
+    }
+    if media_type == 'voice':
+        memory.update({
+            'transcription': metadata.get('transcription', ''),
+            'duration': metadata.get('duration', 0),
+            'recorded_at': datetime.now().isoformat()
+        })
+    else:
+        people = metadata.get('people') or []
+        memory.update({
+            'date_taken': metadata.get('date_taken', ''),
+            'people': people.split(',') if isinstance(people, str) else people,
+            'location': metadata.get('location', ''),
+            'uploaded_at': datetime.now().isoformat()
+        })
+    return memory
+
+
+def paginated_listing(kinds, demo_items: Optional[List[Dict]] = None, default_per_page: Optional[int] = 10,
+                      descending: bool = False, **filters) -> Dict[str, Any]:
+    """
+    Run a filtered, paginated listing against the metadata store
+    
+    Clients may page with ``page``/``per_page`` or, for large libraries, pass
+    the ``next_cursor`` from the previous response as ``cursor``; cursor
+    paging is a keyset seek and costs the same on every page.
+    
+    Args:
+        kinds: Record kind(s) to list
+        demo_items: Items to show while nothing of this kind has been saved
+        default_per_page: Page size when none is requested (None = everything)
+        descending: Newest first
+        **filters: parent_id / category / year filters (None = no filter)
+    
+    Returns:
+        dict: items, total, page, per_page, has_more, next_cursor
+    
+    Raises:
+        ValueError: Invalid page, per_page or cursor
+    """
+    store = get_store()
+    cursor = request.args.get('cursor')
+    page = int(request.args.get('page', 1))
+    per_page = request.args.get('per_page', default_per_page)
+    per_page = int(per_page) if per_page is not None else None
+    if page < 1:
+        raise ValueError("page must be at least 1")
+    if per_page is not None and per_page < 1:
+        raise ValueError("per_page must be at least 1")
+    
+    if demo_items is not None and store.count(kinds) == 0:
+        items = [i for i in demo_items if all(
+            value is None or str(i.get(field if field != 'parent_id' else 'album_id')) == str(value)
+            for field, value in filters.items()
+        )]
+        start = (page - 1) * per_page if per_page else 0
+        end = start + per_page if per_page else len(items)
+        return {
+            'items': items[start:end],
+            'total': len(items),
+            'page': page,
+            'per_page': per_page,
+            'has_more': end < len(items),
+            'next_cursor': None
+        }
+    
+    result = store.query(
+        kinds,
+        limit=per_page,
+        cursor=cursor,
+        offset=(page - 1) * per_page if per_page else 0,
+        descending=descending,
+        **filters
+    )
+    return {
+        'items': result['items'],
+        'total': store.count(kinds, **filters),
+        'page': None if cursor else page,
+        'per_page': per_page,
+        'has_more': result['next_cursor'] is not None,
+        'next_cursor': result['next_cursor']
+    }
+
+
+# Shown until the first record of each kind is saved
+DEMO_ALBUMS = [
+    {
+        'id': '1',
+        'name': 'Family Gatherings',
+        'description': 'Special moments with loved ones over the years',
+        'category': 'Family',
+        'cover_image': '/static/img/album-placeholder.jpg',
+        'item_count': 25,
+        'last_updated': '2025-04-28',
+        'created_at': '2025-01-15'
+    },
+    {
+        'id': '2',
+        'name': 'Vacation Memories',
+        'description': 'Travels and adventures across the world',
+        'category': 'Travel',
+        'cover_image': '/static/img/album-placeholder.jpg',
+        'item_count': 18,
+        'last_updated': '2025-03-15',
+        'created_at': '2024-12-01'
+    },
+    {
+        'id': '3',
+        'name': 'Career Highlights',
+        'description': 'Professional accomplishments and milestones',
+        'category': 'Career',
+        'cover_image': '/static/img/album-placeholder.jpg',
+        'item_count': 12,
+        'last_updated': '2025-05-02',
+        'created_at': '2025-02-10'
+    }
+]
+
+DEMO_TIMELINE = [
+    {
+        'id': '1',
+        'year': '1960',
+        'month_day': 'June 15',
+        'title': 'Wedding Day',
+        'description': 'Married Elizabeth Johnson at St. Mary\'s Church. Reception held at Green Valley Country Club with 120 guests.',
+        'image': '/static/img/timeline-placeholder.jpg',
+        'tags': ['Family', 'Milestone'],
+        'category': 'Family'
+    },
+    {
+        'id': '2',
+        'year': '1965',
+        'month_day': 'March 10',
+        'title': 'Birth of First Child',
+        'description': 'Welcomed our daughter, Sarah Elizabeth, at Memorial Hospital. She weighed 7lbs 6oz.',
+        'image': '/static/img/timeline-placeholder.jpg',
+        'tags': ['Family', 'Milestone'],
+        'category': 'Family'
+    },
+    {
+        'id': '3',
+        'year': '1972',
+        'month_day': 'September 5',
+        'title': 'First Home Purchase',
+        'description': 'Purchased our first house on 123 Maple Street. Three bedrooms, two bathrooms with a beautiful backyard.',
+        'image': '/static/img/timeline-placeholder.jpg',
+        'tags': ['Family', 'Home'],
+        'category': 'Family'
+    },
+    {
+        'id': '4',
+        'year': '1980',
+        'month_day': 'July 20',
+        'title': 'Career Promotion',
+        'description': 'Promoted to Senior Engineer at Global Technologies. Celebration dinner at Harbor View Restaurant with colleagues.',
+        'image': '/static/img/timeline-placeholder.jpg',
+        'tags': ['Career', 'Milestone'],
+        'category': 'Career'
+    }
+]
+
+DEMO_PLAYLISTS = [
+    {'id': '1', 'name': '1950s Favorites', 'song_count': 15, 'description': '15 songs from your teenage years'},
+    {'id': '2', 'name': 'Wedding Songs', 'song_count': 7, 'description': '7 songs from your wedding day'},
+    {'id': '3', 'name': 'Family Road Trips', 'song_count': 23, 'description': '23 songs from family vacations'},
+    {'id': '4', 'name': 'Dancing Favorites', 'song_count': 18, 'description': '18 dance songs from throughout life'}
+]
+
+DEMO_STORIES = [
+    {
+        'id': '1',
+        'title': 'My First Day of School',
+        'type': 'audio',
+        'preview': 'I remember my first day of school so clearly. My mother had made me a new dress, blue with white polka dots...',
+        'tags': ['Childhood', '1940s', 'School'],
+        'recorded_date': '2025-04-15',
+        'category': 'Childhood'
+    },
+    {
+        'id': '2',
+        'title': 'Meeting Your Father',
+        'type': 'video',
+        'preview': 'It was at the Spring Dance of 1958. I was wearing my favorite yellow dress, and your father asked me to dance...',
+        'tags': ['Young Adult', '1950s', 'Romance'],
+        'recorded_date': '2025-05-02',
+        'category': 'Young Adult'
+    },
+    {
+        'id': '3',
+        'title': 'Grandmother\'s Secret Apple Pie Recipe',
+        'type': 'written',
+        'preview': 'My grandmother taught me this recipe when I was just 12 years old. The secret is in the cinnamon and how you slice the apples...',
+        'tags': ['Family', 'Traditions', 'Recipes'],
+        'recorded_date': '2025-03-28',
+        'category': 'Family'
+    }
+]
+
+
 # ============================================================================
 # MEMORY ALBUMS API
 # ============================================================================
 
 @memory_lane_bp.route('/albums', methods=['GET'])
 def get_albums():
-    """Get all memory albums"""
+    """Get memory albums, optionally filtered by category"""
     try:
-        albums_file = os.path.join(ALBUMS_PATH, 'albums.json')
-        
-        if os.path.exists(albums_file):
-            with open(albums_file, 'r') as f:
-                albums = json.load(f)
-        else:
-            # Return demo albums for initial setup
-            albums = [
-                {
-                    'id': '1',
-                    'name': 'Family Gatherings',
-                    'description': 'Special moments with loved ones over the years',
-                    'category': 'Family',
-                    'cover_image': '/static/img/album-placeholder.jpg',
-                    'item_count': 25,
-                    'last_updated': '2025-04-28',
-                    'created_at': '2025-01-15'
-                },
-                {
-                    'id': '2',
-                    'name': 'Vacation Memories',
-                    'description': 'Travels and adventures across the world',
-                    'category': 'Travel',
-                    'cover_image': '/static/img/album-placeholder.jpg',
-                    'item_count': 18,
-                    'last_updated': '2025-03-15',
-                    'created_at': '2024-12-01'
-                },
-                {
-                    'id': '3',
-                    'name': 'Career Highlights',
-                    'description': 'Professional accomplishments and milestones',
-                    'category': 'Career',
-                    'cover_image': '/static/img/album-placeholder.jpg',
-                    'item_count': 12,
-                    'last_updated': '2025-05-02',
-                    'created_at': '2025-02-10'
-                }
-            ]
-        
-        # Filter by category if requested
         category = request.args.get('category')
-        if category and category != 'All Albums':
-            albums = [a for a in albums if a.get('category') == category]
+        if category == 'All Albums':
+            category = None
+        
+        listing = paginated_listing('album', DEMO_ALBUMS, default_per_page=None, category=category)
         
         return jsonify({
             'success': True,
-            'albums': albums,
-            'total': len(albums)
+            'albums': listing['items'],
+            'total': listing['total'],
+            'has_more': listing['has_more'],
+            'next_cursor': listing['next_cursor']
         })
         
+    except ValueError as e:
+        return jsonify({'success': False, 'error': str(e)}), 400
     except Exception as e:
         logger.error(f"Error getting albums: {str(e)}")
         return jsonify({'success': False, 'error': str(e)}), 500
@@ -130,17 +322,11 @@ def create_album():
         if not data.get('name'):
             return jsonify({'success': False, 'error': 'Album name is required'}), 400
         
-        # Load existing albums
-        albums_file = os.path.join(ALBUMS_PATH, 'albums.json')
-        if os.path.exists(albums_file):
-            with open(albums_file, 'r') as f:
-                albums = json.load(f)
-        else:
-            albums = []
+        store = get_store()
         
         # Create new album
         new_album = {
-            'id': str(len(albums) + 1),
+            'id': store.next_id('album'),
             'name': data['name'],
             'description': data.get('description', ''),
             'category': data.get('category', 'Other'),
@@ -151,11 +337,7 @@ def create_album():
             'items': []
         }
         
-        albums.append(new_album)
-        
-        # Save albums
-        with open(albums_file, 'w') as f:
-            json.dump(albums, f, indent=2)
+        store.put('album', new_album)
         
         logger.info(f"Created new album: {new_album['name']}")
         
@@ -174,15 +356,7 @@ def create_album():
 def get_album(album_id: str):
     """Get specific album with all items"""
     try:
-        albums_file = os.path.join(ALBUMS_PATH, 'albums.json')
-        
-        if not os.path.exists(albums_file):
-            return jsonify({'success': False, 'error': 'No albums found'}), 404
-        
-        with open(albums_file, 'r') as f:
-            albums = json.load(f)
-        
-        album = next((a for a in albums if a['id'] == album_id), None)
+        album = get_store().get('album', album_id)
         
         if not album:
             return jsonify({'success': False, 'error': 'Album not found'}), 404
@@ -202,15 +376,8 @@ def update_album(album_id: str):
     """Update album details"""
     try:
         data = request.get_json()
-        albums_file = os.path.join(ALBUMS_PATH, 'albums.json')
-        
-        if not os.path.exists(albums_file):
-            return jsonify({'success': False, 'error': 'No albums found'}), 404
-        
-        with open(albums_file, 'r') as f:
-            albums = json.load(f)
-        
-        album = next((a for a in albums if a['id'] == album_id), None)
+        store = get_store()
+        album = store.get('album', album_id)
         
         if not album:
             return jsonify({'success': False, 'error': 'Album not found'}), 404
@@ -221,9 +388,7 @@ def update_album(album_id: str):
         album['category'] = data.get('category', album['category'])
         album['last_updated'] = datetime.now().strftime('%Y-%m-%d')
         
-        # Save albums
-        with open(albums_file, 'w') as f:
-            json.dump(albums, f, indent=2)
+        store.put('album', album)
         
         logger.info(f"Updated album: {album['name']}")
         
@@ -242,19 +407,8 @@ def update_album(album_id: str):
 def delete_album(album_id: str):
     """Delete album"""
     try:
-        albums_file = os.path.join(ALBUMS_PATH, 'albums.json')
-        
-        if not os.path.exists(albums_file):
-            return jsonify({'success': False, 'error': 'No albums found'}), 404
-        
-        with open(albums_file, 'r') as f:
-            albums = json.load(f)
-        
-        albums = [a for a in albums if a['id'] != album_id]
-        
-        # Save albums
-        with open(albums_file, 'w') as f:
-            json.dump(albums, f, indent=2)
+        if not get_store().delete('album', album_id):
+            return jsonify({'success': False, 'error': 'Album not found'}), 404
         
         logger.info(f"Deleted album: {album_id}")
         
@@ -287,43 +441,15 @@ def upload_photo():
         if not allowed_file(file.filename, ALLOWED_IMAGE_EXTENSIONS):
             return jsonify({'success': False, 'error': 'Invalid file type'}), 400
         
-        # Secure filename and save
+        # Stream to content-addressed storage; derivatives render in the background
         filename = secure_filename(file.filename)
-        timestamp = datetime.now().strftime('%Y%m%d_%H%M%S')
-        unique_filename = f"{timestamp}_{filename}"
-        filepath = os.path.join(UPLOADS_PATH, 'photos', unique_filename)
+        pipeline = get_pipeline()
+        stored = pipeline.ingest_stream(file.stream, filename, 'photo')
         
-        os.makedirs(os.path.dirname(filepath), exist_ok=True)
-        file.save(filepath)
+        memory = build_media_memory('photo', filename, request.form)
+        pipeline.attach_memory(stored['blob'], 'photo', memory)
         
-        # Get additional metadata
-        album_id = request.form.get('album_id')
-        description = request.form.get('description', '')
-        date_taken = request.form.get('date_taken', '')
-        people = request.form.get('people', '').split(',') if request.form.get('people') else []
-        location = request.form.get('location', '')
-        
-        # Create memory entry
-        memory = {
-            'id': unique_filename.replace('.', '_'),
-            'type': 'photo',
-            'filename': unique_filename,
-            'filepath': filepath,
-            'url': f'/uploads/memory_lane/photos/{unique_filename}',
-            'description': description,
-            'date_taken': date_taken,
-            'people': people,
-            'location': location,
-            'uploaded_at': datetime.now().isoformat(),
-            'album_id': album_id
-        }
-        
-        # Save memory metadata
-        memory_file = os.path.join(UPLOADS_PATH, 'photos', f"{memory['id']}.json")
-        with open(memory_file, 'w') as f:
-            json.dump(memory, f, indent=2)
-        
-        logger.info(f"Uploaded photo: {unique_filename}")
+        logger.info(f"Uploaded photo: {filename} ({stored['blob']['id'][:12]}, duplicate={stored['duplicate']})")
         
         return jsonify({
             'success': True,
@@ -351,43 +477,15 @@ def upload_video():
         if not allowed_file(file.filename, ALLOWED_VIDEO_EXTENSIONS):
             return jsonify({'success': False, 'error': 'Invalid file type'}), 400
         
-        # Secure filename and save
+        # Stream to content-addressed storage; derivatives render in the background
         filename = secure_filename(file.filename)
-        timestamp = datetime.now().strftime('%Y%m%d_%H%M%S')
-        unique_filename = f"{timestamp}_{filename}"
-        filepath = os.path.join(UPLOADS_PATH, 'videos', unique_filename)
+        pipeline = get_pipeline()
+        stored = pipeline.ingest_stream(file.stream, filename, 'video')
         
-        os.makedirs(os.path.dirname(filepath), exist_ok=True)
-        file.save(filepath)
+        memory = build_media_memory('video', filename, request.form)
+        pipeline.attach_memory(stored['blob'], 'video', memory)
         
-        # Get additional metadata
-        album_id = request.form.get('album_id')
-        description = request.form.get('description', '')
-        date_taken = request.form.get('date_taken', '')
-        people = request.form.get('people', '').split(',') if request.form.get('people') else []
-        location = request.form.get('location', '')
-        
-        # Create memory entry
-        memory = {
-            'id': unique_filename.replace('.', '_'),
-            'type': 'video',
-            'filename': unique_filename,
-            'filepath': filepath,
-            'url': f'/uploads/memory_lane/videos/{unique_filename}',
-            'description': description,
-            'date_taken': date_taken,
-            'people': people,
-            'location': location,
-            'uploaded_at': datetime.now().isoformat(),
-            'album_id': album_id
-        }
-        
-        # Save memory metadata
-        memory_file = os.path.join(UPLOADS_PATH, 'videos', f"{memory['id']}.json")
-        with open(memory_file, 'w') as f:
-            json.dump(memory, f, indent=2)
-        
-        logger.info(f"Uploaded video: {unique_filename}")
+        logger.info(f"Uploaded video: {filename} ({stored['blob']['id'][:12]}, duplicate={stored['duplicate']})")
         
         return jsonify({
             'success': True,
@@ -415,32 +513,12 @@ def upload_voice():
         # Generate filename
         timestamp = datetime.now().strftime('%Y%m%d_%H%M%S')
         filename = f"voice_{timestamp}.webm"
-        filepath = os.path.join(UPLOADS_PATH, 'voice', filename)
         
-        os.makedirs(os.path.dirname(filepath), exist_ok=True)
+        pipeline = get_pipeline()
+        stored = pipeline.ingest_stream(io.BytesIO(audio_data), filename, 'voice')
         
-        # Save audio file
-        with open(filepath, 'wb') as f:
-            f.write(audio_data)
-        
-        # Create memory entry
-        memory = {
-            'id': filename.replace('.', '_'),
-            'type': 'voice',
-            'filename': filename,
-            'filepath': filepath,
-            'url': f'/uploads/memory_lane/voice/{filename}',
-            'description': data.get('description', ''),
-            'transcription': data.get('transcription', ''),
-            'duration': data.get('duration', 0),
-            'recorded_at': datetime.now().isoformat(),
-            'album_id': data.get('album_id')
-        }
-        
-        # Save memory metadata
-        memory_file = os.path.join(UPLOADS_PATH, 'voice', f"{memory['id']}.json")
-        with open(memory_file, 'w') as f:
-            json.dump(memory, f, indent=2)
+        memory = build_media_memory('voice', filename, data)
+        pipeline.attach_memory(stored['blob'], 'voice', memory)
         
         logger.info(f"Uploaded voice recording: {filename}")
         
@@ -455,6 +533,126 @@ def upload_voice():
         return jsonify({'success': False, 'error': str(e)}), 500
 
 
+@memory_lane_bp.route('/uploads', methods=['POST'])
+def create_chunked_upload():
+    """
+    Start a resumable chunked upload
+    
+    JSON body: filename, media_type (photo/video/voice), total_size and the
+    same metadata fields as the single-request upload endpoints.
+    """
+    try:
+        data = request.get_json(silent=True)
+        if not isinstance(data, dict):
+            return jsonify({'success': False, 'error': 'JSON body is required'}), 400
+        
+        filename = secure_filename(data.get('filename') or '')
+        media_type = data.get('media_type')
+        if not filename:
+            return jsonify({'success': False, 'error': 'Filename is required'}), 400
+        if media_type not in MEDIA_EXTENSIONS or not allowed_file(filename, MEDIA_EXTENSIONS[media_type]):
+            return jsonify({'success': False, 'error': 'Invalid file type'}), 400
+        if not isinstance(data.get('total_size'), int) or data['total_size'] < 0:
+            return jsonify({'success': False, 'error': 'total_size is required'}), 400
+        
+        metadata = {k: v for k, v in data.items() if k not in ('filename', 'media_type', 'total_size')}
+        upload = get_pipeline().create_upload(filename, media_type, data['total_size'], metadata)
+        
+        return jsonify({
+            'success': True,
+            'upload': upload
+        })
+        
+    except Exception as e:
+        logger.error(f"Error creating upload: {str(e)}")
+        return jsonify({'success': False, 'error': str(e)}), 500
+
+
+@memory_lane_bp.route('/uploads/<upload_id>', methods=['GET'])
+def get_chunked_upload(upload_id: str):
+    """Upload progress; resume by sending the next chunk at ``received``"""
+    upload = get_pipeline().get_upload(upload_id)
+    if not upload:
+        return jsonify({'success': False, 'error': 'Upload not found'}), 404
+    return jsonify({'success': True, 'upload': upload})
+
+
+@memory_lane_bp.route('/uploads/<upload_id>', methods=['PUT', 'PATCH'])
+def upload_chunk(upload_id: str):
+    """
+    Append one chunk (raw request body) to an upload
+    
+    The chunk offset comes from ``Content-Range: bytes <start>-<end>/<total>``
+    or the ``offset`` query parameter. A mismatched offset returns 409 with
+    the offset the server expects.
+    """
+    try:
+        content_range = request.headers.get('Content-Range', '')
+        if content_range.startswith('bytes '):
+            offset = int(content_range[6:].split('-', 1)[0])
+        else:
+            offset = int(request.args.get('offset', 0))
+        
+        pipeline = get_pipeline()
+        try:
+            upload = pipeline.write_chunk(upload_id, offset, request.stream)
+        except KeyError:
+            return jsonify({'success': False, 'error': 'Upload not found'}), 404
+        except ValueError as e:
+            upload = pipeline.get_upload(upload_id)
+            return jsonify({'success': False, 'error': str(e), 'received': upload['received']}), 409
+        
+        return jsonify({
+            'success': True,
+            'received': upload['received'],
+            'total_size': upload['total_size']
+        })
+        
+    except Exception as e:
+        logger.error(f"Error writing upload chunk: {str(e)}")
+        return jsonify({'success': False, 'error': str(e)}), 500
+
+
+@memory_lane_bp.route('/uploads/<upload_id>/complete', methods=['POST'])
+def complete_chunked_upload(upload_id: str):
+    """Finish an upload and create its memory"""
+    try:
+        pipeline = get_pipeline()
+        upload = pipeline.get_upload(upload_id)
+        if not upload:
+            return jsonify({'success': False, 'error': 'Upload not found'}), 404
+        
+        try:
+            stored = pipeline.complete_upload(upload_id)
+        except (KeyError, ValueError) as e:
+            return jsonify({'success': False, 'error': str(e)}), 409
+        
+        memory = build_media_memory(upload['media_type'], upload['filename'], upload['metadata'])
+        pipeline.attach_memory(stored['blob'], upload['media_type'], memory)
+        
+        logger.info(f"Completed chunked upload {upload_id}: {upload['filename']}")
+        
+        return jsonify({
+            'success': True,
+            'memory': memory,
+            'duplicate': stored['duplicate'],
+            'job_id': memory['processing_job']
+        })
+        
+    except Exception as e:
+        logger.error(f"Error completing upload: {str(e)}")
+        return jsonify({'success': False, 'error': str(e)}), 500
+
+
+@memory_lane_bp.route('/jobs/<job_id>', methods=['GET'])
+def get_media_job(job_id: str):
+    """Status of a thumbnail/transcode job"""
+    job = get_pipeline().get_job(job_id)
+    if not job:
+        return jsonify({'success': False, 'error': 'Job not found'}), 404
+    return jsonify({'success': True, 'job': job})
+
+
 @memory_lane_bp.route('/memories', methods=['POST'])
 def create_text_memory():
     """Create text-based memory"""
@@ -487,11 +685,7 @@ def create_text_memory():
         }
         
         # Save memory
-        memory_file = os.path.join(UPLOADS_PATH, 'text_memories', f"{memory_id}.json")
-        os.makedirs(os.path.dirname(memory_file), exist_ok=True)
-        
-        with open(memory_file, 'w') as f:
-            json.dump(memory, f, indent=2)
+        get_store().put('text', memory)
         
         logger.info(f"Created text memory: {memory['title']}")
         
@@ -506,84 +700,69 @@ def create_text_memory():
         return jsonify({'success': False, 'error': str(e)}), 500
 
 
+@memory_lane_bp.route('/memories', methods=['GET'])
+def get_memories():
+    """List uploaded and written memories, newest first"""
+    try:
+        memory_type = request.args.get('type')
+        if memory_type and memory_type not in MEDIA_KINDS:
+            return jsonify({'success': False, 'error': 'Invalid memory type'}), 400
+        
+        listing = paginated_listing(
+            memory_type or MEDIA_KINDS,
+            default_per_page=24,
+            descending=True,
+            parent_id=request.args.get('album_id'),
+            year=request.args.get('year')
+        )
+        
+        return jsonify({
+            'success': True,
+            'memories': listing['items'],
+            'total': listing['total'],
+            'page': listing['page'],
+            'per_page': listing['per_page'],
+            'has_more': listing['has_more'],
+            'next_cursor': listing['next_cursor']
+        })
+        
+    except ValueError as e:
+        return jsonify({'success': False, 'error': str(e)}), 400
+    except Exception as e:
+        logger.error(f"Error getting memories: {str(e)}")
+        return jsonify({'success': False, 'error': str(e)}), 500
+
+
 # ============================================================================
 # TIMELINE API
 # ============================================================================
 
 @memory_lane_bp.route('/timeline', methods=['GET'])
 def get_timeline():
-    """Get life timeline events"""
+    """Get life timeline events, ordered by year"""
     try:
-        timeline_file = os.path.join(TIMELINE_PATH, 'timeline.json')
-        
-        if os.path.exists(timeline_file):
-            with open(timeline_file, 'r') as f:
-                events = json.load(f)
-        else:
-            # Return demo timeline for initial setup
-            events = [
-                {
-                    'id': '1',
-                    'year': '1960',
-                    'month_day': 'June 15',
-                    'title': 'Wedding Day',
-                    'description': 'Married Elizabeth Johnson at St. Mary\'s Church. Reception held at Green Valley Country Club with 120 guests.',
-                    'image': '/static/img/timeline-placeholder.jpg',
-                    'tags': ['Family', 'Milestone'],
-                    'category': 'Family'
-                },
-                {
-                    'id': '2',
-                    'year': '1965',
-                    'month_day': 'March 10',
-                    'title': 'Birth of First Child',
-                    'description': 'Welcomed our daughter, Sarah Elizabeth, at Memorial Hospital. She weighed 7lbs 6oz.',
-                    'image': '/static/img/timeline-placeholder.jpg',
-                    'tags': ['Family', 'Milestone'],
-                    'category': 'Family'
-                },
-                {
-                    'id': '3',
-                    'year': '1972',
-                    'month_day': 'September 5',
-                    'title': 'First Home Purchase',
-                    'description': 'Purchased our first house on 123 Maple Street. Three bedrooms, two bathrooms with a beautiful backyard.',
-                    'image': '/static/img/timeline-placeholder.jpg',
-                    'tags': ['Family', 'Home'],
-                    'category': 'Family'
-                },
-                {
-                    'id': '4',
-                    'year': '1980',
-                    'month_day': 'July 20',
-                    'title': 'Career Promotion',
-                    'description': 'Promoted to Senior Engineer at Global Technologies. Celebration dinner at Harbor View Restaurant with colleagues.',
-                    'image': '/static/img/timeline-placeholder.jpg',
-                    'tags': ['Career', 'Milestone'],
-                    'category': 'Career'
-                }
-            ]
-        
-        # Filter by category if requested
         category = request.args.get('category')
-        if category and category != 'All':
-            events = [e for e in events if e.get('category') == category]
+        if category == 'All':
+            category = None
         
-        # Pagination
-        page = int(request.args.get('page', 1))
-        per_page = int(request.args.get('per_page', 10))
-        start = (page - 1) * per_page
-        end = start + per_page
+        listing = paginated_listing(
+            'timeline', DEMO_TIMELINE,
+            category=category,
+            year=request.args.get('year')
+        )
         
         return jsonify({
             'success': True,
-            'events': events[start:end],
-            'total': len(events),
-            'page': page,
-            'per_page': per_page,
-            'has_more': end < len(events)
+            'events': listing['items'],
+            'total': listing['total'],
+            'page': listing['page'],
+            'per_page': listing['per_page'],
+            'has_more': listing['has_more'],
+            'next_cursor': listing['next_cursor']
         })
         
+    except ValueError as e:
+        return jsonify({'success': False, 'error': str(e)}), 400
     except Exception as e:
         logger.error(f"Error getting timeline: {str(e)}")
         return jsonify({'success': False, 'error': str(e)}), 500
@@ -598,17 +777,11 @@ def create_timeline_event():
         if not data.get('title'):
             return jsonify({'success': False, 'error': 'Title is required'}), 400
         
-        # Load existing timeline
-        timeline_file = os.path.join(TIMELINE_PATH, 'timeline.json')
-        if os.path.exists(timeline_file):
-            with open(timeline_file, 'r') as f:
-                events = json.load(f)
-        else:
-            events = []
+        store = get_store()
         
         # Create new event
         new_event = {
-            'id': str(len(events) + 1),
+            'id': store.next_id('timeline'),
             'year': data.get('year', ''),
             'month_day': data.get('month_day', ''),
             'title': data['title'],
@@ -619,14 +792,8 @@ def create_timeline_event():
             'created_at': datetime.now().isoformat()
         }
         
-        events.append(new_event)
-        
-        # Sort by year
-        events.sort(key=lambda x: x.get('year', ''), reverse=False)
-        
-        # Save timeline
-        with open(timeline_file, 'w') as f:
-            json.dump(events, f, indent=2)
+        # Listings are ordered by year in the store's index
+        store.put('timeline', new_event)
         
         logger.info(f"Created timeline event: {new_event['title']}")
         
@@ -645,15 +812,7 @@ def create_timeline_event():
 def get_timeline_event(event_id: str):
     """Get specific timeline event details"""
     try:
-        timeline_file = os.path.join(TIMELINE_PATH, 'timeline.json')
-        
-        if not os.path.exists(timeline_file):
-            return jsonify({'success': False, 'error': 'No timeline found'}), 404
-        
-        with open(timeline_file, 'r') as f:
-            events = json.load(f)
-        
-        event = next((e for e in events if e['id'] == event_id), None)
+        event = get_store().get('timeline', event_id)
         
         if not event:
             return jsonify({'success': False, 'error': 'Event not found'}), 404
@@ -676,25 +835,17 @@ def get_timeline_event(event_id: str):
 def get_playlists():
     """Get music memory playlists"""
     try:
-        playlists_file = os.path.join(MUSIC_PATH, 'playlists.json')
-        
-        if os.path.exists(playlists_file):
-            with open(playlists_file, 'r') as f:
-                playlists = json.load(f)
-        else:
-            # Demo playlists
-            playlists = [
-                {'id': '1', 'name': '1950s Favorites', 'song_count': 15, 'description': '15 songs from your teenage years'},
-                {'id': '2', 'name': 'Wedding Songs', 'song_count': 7, 'description': '7 songs from your wedding day'},
-                {'id': '3', 'name': 'Family Road Trips', 'song_count': 23, 'description': '23 songs from family vacations'},
-                {'id': '4', 'name': 'Dancing Favorites', 'song_count': 18, 'description': '18 dance songs from throughout life'}
-            ]
+        listing = paginated_listing('playlist', DEMO_PLAYLISTS, default_per_page=None)
         
         return jsonify({
             'success': True,
-            'playlists': playlists
+            'playlists': listing['items'],
+            'has_more': listing['has_more'],
+            'next_cursor': listing['next_cursor']
         })
         
+    except ValueError as e:
+        return jsonify({'success': False, 'error': str(e)}), 400
     except Exception as e:
         logger.error(f"Error getting playlists: {str(e)}")
         return jsonify({'success': False, 'error': str(e)}), 500
@@ -709,15 +860,10 @@ def create_playlist():
         if not data.get('name'):
             return jsonify({'success': False, 'error': 'Playlist name is required'}), 400
         
-        playlists_file = os.path.join(MUSIC_PATH, 'playlists.json')
-        if os.path.exists(playlists_file):
-            with open(playlists_file, 'r') as f:
-                playlists = json.load(f)
-        else:
-            playlists = []
+        store = get_store()
         
         new_playlist = {
-            'id': str(len(playlists) + 1),
+            'id': store.next_id('playlist'),
             'name': data['name'],
             'description': data.get('description', ''),
             'song_count': 0,
@@ -725,10 +871,7 @@ def create_playlist():
             'created_at': datetime.now().isoformat()
         }
         
-        playlists.append(new_playlist)
-        
-        with open(playlists_file, 'w') as f:
-            json.dump(playlists, f, indent=2)
+        store.put('playlist', new_playlist)
         
         return jsonify({
             'success': True,
@@ -747,26 +890,15 @@ def add_song_memory(song_id: str):
     try:
         data = request.get_json()
         
-        memories_file = os.path.join(MUSIC_PATH, 'song_memories.json')
-        if os.path.exists(memories_file):
-            with open(memories_file, 'r') as f:
-                memories = json.load(f)
-        else:
-            memories = {}
-        
-        if song_id not in memories:
-            memories[song_id] = []
+        store = get_store()
         
         new_memory = {
-            'id': f"{song_id}_{len(memories[song_id]) + 1}",
+            'id': f"{song_id}_{store.count('song_memory', parent_id=song_id) + 1}",
             'content': data.get('memory', ''),
             'created_at': datetime.now().isoformat()
         }
         
-        memories[song_id].append(new_memory)
-        
-        with open(memories_file, 'w') as f:
-            json.dump(memories, f, indent=2)
+        store.put('song_memory', dict(new_memory, song_id=song_id))
         
         return jsonify({
             'success': True,
@@ -785,64 +917,25 @@ def add_song_memory(song_id: str):
 
 @memory_lane_bp.route('/stories', methods=['GET'])
 def get_stories():
-    """Get all captured stories"""
+    """Get captured stories"""
     try:
-        stories_file = os.path.join(STORIES_PATH, 'stories.json')
-        
-        if os.path.exists(stories_file):
-            with open(stories_file, 'r') as f:
-                stories = json.load(f)
-        else:
-            # Demo stories
-            stories = [
-                {
-                    'id': '1',
-                    'title': 'My First Day of School',
-                    'type': 'audio',
-                    'preview': 'I remember my first day of school so clearly. My mother had made me a new dress, blue with white polka dots...',
-                    'tags': ['Childhood', '1940s', 'School'],
-                    'recorded_date': '2025-04-15',
-                    'category': 'Childhood'
-                },
-                {
-                    'id': '2',
-                    'title': 'Meeting Your Father',
-                    'type': 'video',
-                    'preview': 'It was at the Spring Dance of 1958. I was wearing my favorite yellow dress, and your father asked me to dance...',
-                    'tags': ['Young Adult', '1950s', 'Romance'],
-                    'recorded_date': '2025-05-02',
-                    'category': 'Young Adult'
-                },
-                {
-                    'id': '3',
-                    'title': 'Grandmother\'s Secret Apple Pie Recipe',
-                    'type': 'written',
-                    'preview': 'My grandmother taught me this recipe when I was just 12 years old. The secret is in the cinnamon and how you slice the apples...',
-                    'tags': ['Family', 'Traditions', 'Recipes'],
-                    'recorded_date': '2025-03-28',
-                    'category': 'Family'
-                }
-            ]
-        
-        # Filter by category
         category = request.args.get('category')
-        if category and category != 'All Stories':
-            stories = [s for s in stories if s.get('category') == category]
+        if category == 'All Stories':
+            category = None
         
-        # Pagination
-        page = int(request.args.get('page', 1))
-        per_page = int(request.args.get('per_page', 10))
-        start = (page - 1) * per_page
-        end = start + per_page
+        listing = paginated_listing('story', DEMO_STORIES, category=category)
         
         return jsonify({
             'success': True,
-            'stories': stories[start:end],
-            'total': len(stories),
-            'page': page,
-            'has_more': end < len(stories)
+            'stories': listing['items'],
+            'total': listing['total'],
+            'page': listing['page'],
+            'has_more': listing['has_more'],
+            'next_cursor': listing['next_cursor']
         })
         
+    except ValueError as e:
+        return jsonify({'success': False, 'error': str(e)}), 400
     except Exception as e:
         logger.error(f"Error getting stories: {str(e)}")
         return jsonify({'success': False, 'error': str(e)}), 500
@@ -857,15 +950,10 @@ def create_story():
         if not data.get('title'):
             return jsonify({'success': False, 'error': 'Title is required'}), 400
         
-        stories_file = os.path.join(STORIES_PATH, 'stories.json')
-        if os.path.exists(stories_file):
-            with open(stories_file, 'r') as f:
-                stories = json.load(f)
-        else:
-            stories = []
+        store = get_store()
         
         new_story = {
-            'id': str(len(stories) + 1),
+            'id': store.next_id('story'),
             'title': data['title'],
             'type': data.get('type', 'written'),
             'content': data.get('content', ''),
@@ -876,10 +964,7 @@ def create_story():
             'created_at': datetime.now().isoformat()
         }
         
-        stories.append(new_story)
-        
-        with open(stories_file, 'w') as f:
-            json.dump(stories, f, indent=2)
+        store.put('story', new_story)
         
         logger.info(f"Created story: {new_story['title']}")
         
@@ -898,15 +983,7 @@ def create_story():
 def get_story(story_id: str):
     """Get specific story with full content"""
     try:
-        stories_file = os.path.join(STORIES_PATH, 'stories.json')
-        
-        if not os.path.exists(stories_file):
-            return jsonify({'success': False, 'error': 'No stories found'}), 404
-        
-        with open(stories_file, 'r') as f:
-            stories = json.load(f)
-        
-        story = next((s for s in stories if s['id'] == story_id), None)
+        story = get_store().get('story', story_id)
         
         if not story:
             return jsonify({'success': False, 'error': 'Story not found'}), 404
@@ -926,15 +1003,8 @@ def update_story(story_id: str):
     """Update story"""
     try:
         data = request.get_json()
-        stories_file = os.path.join(STORIES_PATH, 'stories.json')
-        
-        if not os.path.exists(stories_file):
-            return jsonify({'success': False, 'error': 'No stories found'}), 404
-        
-        with open(stories_file, 'r') as f:
-            stories = json.load(f)
-        
-        story = next((s for s in stories if s['id'] == story_id), None)
+        store = get_store()
+        story = store.get('story', story_id)
         
         if not story:
             return jsonify({'success': False, 'error': 'Story not found'}), 404
@@ -945,8 +1015,7 @@ def update_story(story_id: str):
         story['tags'] = data.get('tags', story['tags'])
         story['category'] = data.get('category', story['category'])
         
-        with open(stories_file, 'w') as f:
-            json.dump(stories, f, indent=2)
+        store.put('story', story)
         
         return jsonify({
             'success': True,
@@ -1001,24 +1070,16 @@ def start_activity():
             return jsonify({'success': False, 'error': 'Activity type is required'}), 400
         
         # Track activity start
-        activities_file = os.path.join(MEMORY_STORAGE, 'activities.json')
-        if os.path.exists(activities_file):
-            with open(activities_file, 'r') as f:
-                activities = json.load(f)
-        else:
-            activities = []
+        store = get_store()
         
         activity_session = {
-            'id': f"{activity_type}_{len(activities) + 1}",
+            'id': f"{activity_type}_{store.count('activity') + 1}",
             'type': activity_type,
             'started_at': datetime.now().isoformat(),
             'status': 'active'
         }
         
-        activities.append(activity_session)
-        
-        with open(activities_file, 'w') as f:
-            json.dump(activities, f, indent=2)
+        store.put('activity', activity_session)
         
         logger.info(f"Started activity: {activity_type}")
         
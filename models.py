@@ -125,6 +125,9 @@ class Reminder(db.Model):
     time = Column(String(50), nullable=False)  # Time in format HH:MM or cron format
     recurring = Column(Boolean, default=False)
     completed = Column(Boolean, default=False)
+    timezone_name = Column(String(64))  # IANA zone, e.g. America/Chicago; server default if empty
+    next_fire_at = Column(DateTime, index=True)  # UTC, maintained by ReminderService
+    last_fired_at = Column(DateTime)
     created_at = Column(DateTime, default=lambda: datetime.now(timezone.utc))
     
     def __repr__(self):
@@ -338,4 +341,19 @@ class AuditLog(db.Model):
             'resource_type': self.resource_type,
             'ip_address': self.ip_address,
             'details': json.loads(self.details) if self.details else None
-        }
\ No newline at end of file
+        }
+
+
+class AuditChainHead(db.Model):
+    """
+    Single-row lock for the audit log hash chain. Writers update this row
+    before reading the last checksum, so concurrent writers (in any process)
+    take turns and every batch chains onto the latest committed row.
+    """
+    __tablename__ = 'audit_chain_head'
+    
+    id = Column(Integer, primary_key=True)
+    updated_at = Column(DateTime)
+    
+    def __repr__(self):
+        return f'<AuditChainHead {self.updated_at}>'
@@ -16,28 +16,113 @@
 import logging
 import os
 import json
+import sys
 import time
 import hashlib
-from typing import Dict, Any, Optional
+import threading
+from collections import OrderedDict, defaultdict
+from typing import Dict, Any, Optional, Set
 import boto3
 from botocore.exceptions import ClientError
 
+
+class TimerWheel:
+    """
+    Hashed timer wheel for cache expiry.
+    
+    Keys are dropped into the slot for their expiry second. Each tick only
+    inspects the slots that have come due since the previous tick, so expiry
+    work is proportional to what is actually expiring rather than to the
+    size of the cache. Entries further out than one rotation simply stay in
+    their slot until a later pass finds them due.
+    """
+    
+    def __init__(self, slots: int = 512, resolution: float = 1.0):
+        self.slots = slots
+        self.resolution = resolution
+        self._wheel = [set() for _ in range(slots)]
+        self._last_tick = int(time.time() / resolution)
+    
+    def _slot(self, tick: int) -> Set[str]:
+        return self._wheel[tick % self.slots]
+    
+    def schedule(self, cache_key: str, expires_at: float):
+        """Register a key to be checked when its expiry second comes due."""
+        tick = max(int(expires_at / self.resolution), self._last_tick + 1)
+        self._slot(tick).add(cache_key)
+    
+    def advance(self, now: Optional[float] = None) -> Set[str]:
+        """Return every key from the slots that came due up to ``now``."""
+        current = int((now if now is not None else time.time()) / self.resolution)
+        due = set()
+        # Never walk more than one full rotation, even after a long pause
+        first = max(self._last_tick + 1, current - self.slots + 1)
+        for tick in range(first, current + 1):
+            slot = self._slot(tick)
+            if slot:
+                due |= slot
+                slot.clear()
+        self._last_tick = max(self._last_tick, current)
+        return due
+
+
+
 class CacheService:
     """
     Service for caching frequently accessed data to improve performance.
     Implements adaptive caching with expiration based on usage patterns.
+    
+    The in-process tier is bounded by entry count and estimated bytes and
+    evicts least-recently-used items first. Expiry runs from a timer wheel
+    on a background maintenance thread, which also writes S3 last-accessed
+    metadata in batches instead of once per hit.
     """
     
-    def __init__(self):
-        """Initialize the cache service."""
+    def __init__(self, max_entries: int = 10000, max_bytes: int = 64 * 1024 * 1024,
+                 s3_touch_interval: int = 60, frequency_window: int = 300,
+                 background: bool = True):
+        """
+        Initialize the cache service.
+        
+        Args:
+            max_entries: Maximum number of items held in memory
+            max_bytes: Maximum estimated size of values held in memory
+            s3_touch_interval: Seconds between batched S3 last-accessed updates
+            frequency_window: Seconds after which access counts are halved
+            background: Start the maintenance thread immediately
+        """
         self.logger = logging.getLogger(__name__)
-        self.memory_cache: Dict[str, Dict[str, Any]] = {}
+        self.memory_cache: "OrderedDict[str, Dict[str, Any]]" = OrderedDict()
         self.ttl_default = 300  # Default TTL of 5 minutes
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.current_bytes = 0
+        
+        self._lock = threading.RLock()
+        self._timer_wheel = TimerWheel()
+        
+        # Decayed access counts, kept independently of entry lifetime so
+        # adaptive TTLs still know about keys that have expired
+        self.frequency_window = frequency_window
+        self._access_counts: Dict[str, float] = {}
+        self._last_decay = time.time()
+        
+        # Hit/miss/eviction counters per namespace
+        self._stats: Dict[str, Dict[str, int]] = defaultdict(lambda: {
+            'hits': 0,
+            'misses': 0,
+            's3_hits': 0,
+            'evictions': 0,
+            'expirations': 0
+        })
         
         # S3 configuration for persistent caching
         self.use_s3 = False
         self.s3_bucket = os.environ.get('CACHE_S3_BUCKET')
         self.s3_prefix = 'cache/'
+        self.s3_touch_interval = s3_touch_interval
+        self._pending_s3_touches: Dict[str, float] = {}
+        self._last_s3_flush = time.time()
         
         if self.s3_bucket:
             try:
@@ -48,6 +133,11 @@ class CacheService:
                 self.logger.error(f"Failed to initialize S3 client: {str(e)}")
                 self.use_s3 = False
         
+        self.maintenance_active = False
+        self.maintenance_thread = None
+        if background:
+            self.start_maintenance()
+        
         self.logger.info("Cache service initialized")
     
     def get(self, key: str, namespace: str = 'default') -> Optional[Any]:
@@ -63,20 +153,25 @@ class CacheService:
         """
         cache_key = self._make_cache_key(key, namespace)
         
-        # First check memory cache
-        if cache_key in self.memory_cache:
-            cache_item = self.memory_cache[cache_key]
+        with self._lock:
+            self._record_access(cache_key)
             
-            # Check if item is expired
-            if time.time() < cache_item.get('expires_at', 0):
-                # Update last access time
-                self.memory_cache[cache_key]['last_accessed'] = time.time()
-                self.logger.debug(f"Cache hit for {namespace}/{key}")
-                return cache_item['value']
-            else:
-                # Remove expired item
-                del self.memory_cache[cache_key]
-                self.logger.debug(f"Cache expired for {namespace}/{key}")
+            # First check memory cache
+            cache_item = self.memory_cache.get(cache_key)
+            if cache_item is not None:
+                # Check if item is expired
+                if time.time() < cache_item.get('expires_at', 0):
+                    # Update last access time and LRU position
+                    cache_item['last_accessed'] = time.time()
+                    self.memory_cache.move_to_end(cache_key)
+                    self._stats[namespace]['hits'] += 1
+                    self.logger.debug(f"Cache hit for {namespace}/{key}")
+                    return cache_item['value']
+                else:
+                    # Remove expired item
+                    self._remove(cache_key)
+                    self._stats[namespace]['expirations'] += 1
+                    self.logger.debug(f"Cache expired for {namespace}/{key}")
         
         # If not in memory, check S3 for persistent items
         if self.use_s3:
@@ -94,15 +189,13 @@ class CacheService:
                     content = response['Body'].read().decode('utf-8')
                     data = json.loads(content)
                     
-                    # Update last accessed time in S3
-                    self._update_s3_metadata(s3_key, {'last-accessed': str(time.time())})
-                    
-                    # Also cache in memory for faster access
-                    self.memory_cache[cache_key] = {
-                        'value': data,
-                        'expires_at': expires_at,
-                        'last_accessed': time.time()
-                    }
+                    with self._lock:
+                        # Defer the last-accessed update to the next batched flush
+                        self._pending_s3_touches[s3_key] = time.time()
+                        
+                        # Also cache in memory for faster access
+                        self._store(cache_key, namespace, data, expires_at, size=len(content))
+                        self._stats[namespace]['s3_hits'] += 1
                     
                     self.logger.debug(f"S3 cache hit for {namespace}/{key}")
                     return data
@@ -117,6 +210,8 @@ class CacheService:
             except Exception as e:
                 self.logger.error(f"Error retrieving from S3 cache: {str(e)}")
         
+        with self._lock:
+            self._stats[namespace]['misses'] += 1
         self.logger.debug(f"Cache miss for {namespace}/{key}")
         return None
     
@@ -139,20 +234,24 @@ class CacheService:
         cache_key = self._make_cache_key(key, namespace)
         expires_at = time.time() + ttl
         
+        # Serialize once; used for size accounting and the S3 body
+        try:
+            content = json.dumps(value)
+        except (TypeError, ValueError):
+            content = None
+        
         # Store in memory cache
-        self.memory_cache[cache_key] = {
-            'value': value,
-            'expires_at': expires_at,
-            'last_accessed': time.time()
-        }
+        with self._lock:
+            size = len(content) if content is not None else sys.getsizeof(value)
+            self._store(cache_key, namespace, value, expires_at, size=size)
         
         # If S3 enabled, also store there for persistence
         if self.use_s3:
             try:
                 s3_key = f"{self.s3_prefix}{namespace}/{cache_key}"
                 
-                # Convert to JSON string
-                content = json.dumps(value)
+                if content is None:
+                    raise TypeError(f"Value for {namespace}/{key} is not JSON serializable")
                 
                 # Set metadata
                 metadata = {
@@ -192,13 +291,15 @@ class CacheService:
         cache_key = self._make_cache_key(key, namespace)
         
         # Remove from memory cache
-        if cache_key in self.memory_cache:
-            del self.memory_cache[cache_key]
+        with self._lock:
+            self._remove(cache_key)
         
         # Remove from S3 if enabled
         if self.use_s3:
             try:
                 s3_key = f"{self.s3_prefix}{namespace}/{cache_key}"
+                with self._lock:
+                    self._pending_s3_touches.pop(s3_key, None)
                 self.s3_client.delete_object(Bucket=self.s3_bucket, Key=s3_key)
                 self.logger.debug(f"Invalidated S3 cache for {namespace}/{key}")
             except Exception as e:
@@ -219,19 +320,22 @@ class CacheService:
             bool: Success of invalidating the namespace
         """
         # Remove from memory cache
-        keys_to_delete = []
-        for cache_key in self.memory_cache:
-            if cache_key.startswith(f"{namespace}:"):
-                keys_to_delete.append(cache_key)
-        
-        for key in keys_to_delete:
-            del self.memory_cache[key]
+        with self._lock:
+            keys_to_delete = [
+                cache_key for cache_key in self.memory_cache
+                if cache_key.startswith(f"{namespace}:")
+            ]
+            for key in keys_to_delete:
+                self._remove(key)
         
         # Remove from S3 if enabled
         if self.use_s3:
             try:
                 # List objects with prefix
                 s3_prefix = f"{self.s3_prefix}{namespace}/"
+                with self._lock:
+                    for s3_key in [k for k in self._pending_s3_touches if k.startswith(s3_prefix)]:
+                        del self._pending_s3_touches[s3_key]
                 paginator = self.s3_client.get_paginator('list_objects_v2')
                 
                 # Delete all objects with prefix
@@ -250,21 +354,146 @@ class CacheService:
     
     def cleanup(self) -> None:
         """
-        Clean up expired items from memory cache.
-        This is called periodically to prevent memory leaks.
+        Expire items whose timer-wheel slot has come due.
+        This is called by the maintenance thread, but can also be run by hand.
         """
         current_time = time.time()
-        keys_to_delete = []
+        expired = 0
+        
+        with self._lock:
+            for cache_key in self._timer_wheel.advance(current_time):
+                cache_item = self.memory_cache.get(cache_key)
+                if cache_item is None:
+                    continue
+                if current_time >= cache_item['expires_at']:
+                    self._remove(cache_key)
+                    self._stats[cache_item['namespace']]['expirations'] += 1
+                    expired += 1
+                else:
+                    # Not due yet (re-set with a later expiry or beyond one rotation)
+                    self._timer_wheel.schedule(cache_key, cache_item['expires_at'])
         
-        for cache_key, cache_item in self.memory_cache.items():
-            if current_time > cache_item.get('expires_at', 0):
-                keys_to_delete.append(cache_key)
+        if expired:
+            self.logger.debug(f"Cleaned up {expired} expired cache items")
+    
+    def start_maintenance(self):
+        """Start the background expiry / S3 flush thread."""
+        if not self.maintenance_active:
+            self.maintenance_active = True
+            self.maintenance_thread = threading.Thread(target=self._maintenance_loop)
+            self.maintenance_thread.daemon = True
+            self.maintenance_thread.start()
+            return True
+        return False
+    
+    def stop_maintenance(self):
+        """Stop the background thread and flush pending S3 updates."""
+        if self.maintenance_active:
+            self.maintenance_active = False
+            if self.maintenance_thread:
+                self.maintenance_thread.join(timeout=5.0)
+            self.flush_s3_touches()
+            return True
+        return False
+    
+    def _maintenance_loop(self):
+        """Tick the timer wheel, age access counts and flush S3 touches."""
+        while self.maintenance_active:
+            try:
+                self.cleanup()
+                now = time.time()
+                if now - self._last_decay >= self.frequency_window:
+                    self._decay_access_counts()
+                if self.use_s3 and now - self._last_s3_flush >= self.s3_touch_interval:
+                    self.flush_s3_touches()
+            except Exception as e:
+                self.logger.error(f"Cache maintenance error: {str(e)}")
+            time.sleep(self._timer_wheel.resolution)
+    
+    def flush_s3_touches(self) -> int:
+        """
+        Write the deferred last-accessed metadata to S3.
+        
+        Each key is updated once per flush, however many hits it had.
         
-        for key in keys_to_delete:
-            del self.memory_cache[key]
+        Returns:
+            int: Number of objects updated
+        """
+        with self._lock:
+            pending = self._pending_s3_touches
+            self._pending_s3_touches = {}
+            self._last_s3_flush = time.time()
         
-        if keys_to_delete:
-            self.logger.debug(f"Cleaned up {len(keys_to_delete)} expired cache items")
+        updated = 0
+        for s3_key, accessed_at in pending.items():
+            if self._update_s3_metadata(s3_key, {'last-accessed': str(accessed_at)}):
+                updated += 1
+        if updated:
+            self.logger.debug(f"Flushed last-accessed metadata for {updated} S3 cache objects")
+        return updated
+    
+    def get_stats(self) -> Dict[str, Any]:
+        """
+        Get cache counters for sizing the in-memory tier.
+        
+        Returns:
+            dict: Totals plus hit/miss/eviction counters per namespace
+        """
+        with self._lock:
+            namespaces = {}
+            for namespace, counters in self._stats.items():
+                lookups = counters['hits'] + counters['s3_hits'] + counters['misses']
+                namespaces[namespace] = {
+                    **counters,
+                    'hit_rate': (counters['hits'] + counters['s3_hits']) / lookups if lookups else 0.0
+                }
+            return {
+                'entries': len(self.memory_cache),
+                'bytes': self.current_bytes,
+                'max_entries': self.max_entries,
+                'max_bytes': self.max_bytes,
+                'pending_s3_touches': len(self._pending_s3_touches),
+                'namespaces': namespaces
+            }
+    
+    def _store(self, cache_key: str, namespace: str, value: Any, expires_at: float, size: int):
+        """Insert into the memory tier and evict LRU items beyond the budget."""
+        self._remove(cache_key)
+        self.memory_cache[cache_key] = {
+            'value': value,
+            'namespace': namespace,
+            'expires_at': expires_at,
+            'last_accessed': time.time(),
+            'size': size
+        }
+        self.current_bytes += size
+        self._timer_wheel.schedule(cache_key, expires_at)
+        
+        while self.memory_cache and (
+            len(self.memory_cache) > self.max_entries or self.current_bytes > self.max_bytes
+        ):
+            evicted_key, evicted = self.memory_cache.popitem(last=False)
+            self.current_bytes -= evicted['size']
+            self._stats[evicted['namespace']]['evictions'] += 1
+    
+    def _remove(self, cache_key: str):
+        cache_item = self.memory_cache.pop(cache_key, None)
+        if cache_item is not None:
+            self.current_bytes -= cache_item['size']
+    
+    def _record_access(self, cache_key: str):
+        self._access_counts[cache_key] = self._access_counts.get(cache_key, 0.0) + 1.0
+        # Keep the frequency table proportional to the cache itself
+        if len(self._access_counts) > 4 * self.max_entries:
+            self._decay_access_counts()
+    
+    def _decay_access_counts(self):
+        """Halve all access counts and forget keys that have gone cold."""
+        with self._lock:
+            self._access_counts = {
+                k: v / 2 for k, v in self._access_counts.items() if v >= 1.0
+            }
+            self._last_decay = time.time()
     
     def _make_cache_key(self, key: str, namespace: str) -> str:
         """Create a unique cache key."""
@@ -300,6 +529,9 @@ class CacheService:
         Calculate adaptive TTL based on access frequency.
         More frequently accessed items get longer TTLs.
         
+        Frequency is the decayed number of lookups for the key over roughly
+        the last ``frequency_window`` seconds, whether or not it is cached.
+        
         Args:
             key: The cache key
             namespace: The namespace
@@ -310,20 +542,19 @@ class CacheService:
         """
         cache_key = self._make_cache_key(key, namespace)
         
-        if cache_key in self.memory_cache:
-            # If item exists, check access frequency
-            last_accessed = self.memory_cache[cache_key].get('last_accessed', 0)
-            time_since_access = time.time() - last_accessed
-            
-            if time_since_access < 60:  # Accessed within last minute
-                # Frequently accessed item, increase TTL
-                return base_ttl * 2
-            elif time_since_access < 300:  # Accessed within last 5 minutes
-                # Moderately accessed, use normal TTL
-                return base_ttl
-            else:
-                # Rarely accessed, decrease TTL
-                return max(60, base_ttl // 2)
-        
-        # Default for new items
-        return base_ttl
\ No newline at end of file
+        with self._lock:
+            accesses = self._access_counts.get(cache_key)
+        
+        if accesses is None:
+            # Default for new items
+            return base_ttl
+        
+        if accesses >= 10:
+            # Frequently accessed item, increase TTL
+            return base_ttl * 2
+        elif accesses >= 2:
+            # Moderately accessed, use normal TTL
+            return base_ttl
+        else:
+            # Rarely accessed, decrease TTL
+            return max(60, base_ttl // 2)
@@ -0,0 +1,484 @@
+# © 2025 The Christman AI Project. All rights reserved.
+#
+# This code is released as part of a trauma-informed, dignity-first AI ecosystem
+# designed to protect, empower, and elevate vulnerable populations.
+#
+# By using, modifying, or distributing this software, you agree to uphold the following:
+# 1. Truth — No deception, no manipulation.
+# 2. Dignity — Respect the autonomy and humanity of all users.
+# 3. Protection — Never use this to exploit or harm vulnerable individuals.
+# 4. Transparency — Disclose all modifications and contributions clearly.
+# 5. No Erasure — Preserve the mission and ethical origin of this work.
+#
+# This is not just code. This is redemption in code.
+# Contact: lumacognify@thechristmanaiproject.com
+# https://thechristmanaiproject.com
+
+"""
+Crawl Engine for AlphaWolf
+Part of The Christman AI Project - Powered by LumaCognify AI
+
+Concurrent, polite page fetching for the research crawler.
+
+- A bounded thread pool fetches pages. A coordinator keeps one queue per
+  domain and only dispatches a request when that domain is below its
+  concurrency limit and its minimum delay since the last request has
+  passed, so a slow site holds up only its own queue.
+- Each worker thread keeps a requests.Session, so connections are pooled
+  and kept alive across pages.
+- ETag and Last-Modified values are remembered per URL (in a small JSON
+  file) and sent back as If-None-Match / If-Modified-Since; a 304 marks
+  the page as unchanged so callers can skip it.
+- CPU-heavy parsing can be handed to a process pool (submit_extract) so
+  it doesn't serialize with fetching on the GIL.
+"""
+
+import json
+import logging
+import os
+import threading
+import time
+from collections import deque
+from concurrent.futures import FIRST_COMPLETED, Future, ProcessPoolExecutor, ThreadPoolExecutor, wait
+from datetime import datetime, timedelta
+from typing import Any, Callable, Dict, Hashable, Iterable, List, Optional, Tuple
+from urllib.parse import urlparse
+
+import requests
+from requests.adapters import HTTPAdapter
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_USER_AGENT = 'AlphaWolf-ResearchBot/1.0 (LumaCognify AI; +https://alphawolf.christmanai.org/bot.html)'
+DEFAULT_MAX_WORKERS = int(os.environ.get('CRAWL_MAX_WORKERS', '8'))
+DEFAULT_DOMAIN_CONCURRENCY = int(os.environ.get('CRAWL_DOMAIN_CONCURRENCY', '2'))
+DEFAULT_DOMAIN_DELAY = float(os.environ.get('CRAWL_DOMAIN_DELAY', '0.5'))
+DEFAULT_TIMEOUT = 10
+
+# Validators not seen for this long are forgotten
+VALIDATOR_MAX_AGE_DAYS = 90
+
+
+class FetchResult:
+    """Outcome of fetching one URL."""
+
+    __slots__ = ('url', 'status', 'text', 'not_modified', 'error', 'elapsed', 'cached')
+
+    def __init__(self, url: str, status: Optional[int] = None, text: Optional[str] = None,
+                 not_modified: bool = False, error: Optional[str] = None,
+                 elapsed: float = 0.0, cached: Optional[Dict[str, Any]] = None):
+        self.url = url
+        self.status = status
+        self.text = text
+        self.not_modified = not_modified
+        self.error = error
+        self.elapsed = elapsed
+        # What was remembered about the URL on an earlier crawl (see ValidatorStore.remember)
+        self.cached = cached or {}
+
+    @property
+    def ok(self) -> bool:
+        return self.status == 200 and self.text is not None
+
+
+class ValidatorStore:
+    """
+    Per-URL cache validators (ETag / Last-Modified) and small notes, kept
+    in a JSON file between crawls.
+    """
+
+    def __init__(self, path: Optional[str] = None):
+        self.path = path
+        self._entries: Dict[str, Dict[str, Any]] = {}
+        self._lock = threading.Lock()
+        if path and os.path.exists(path):
+            try:
+                with open(path, 'r') as f:
+                    self._entries = json.load(f)
+            except Exception as e:
+                logger.error(f"Error loading crawl validators: {str(e)}")
+
+    def get(self, url: str) -> Dict[str, Any]:
+        with self._lock:
+            return dict(self._entries.get(url, {}))
+
+    def remember(self, url: str, **values) -> None:
+        """Store values for a URL (validators, or notes such as a page's links)."""
+        with self._lock:
+            entry = self._entries.setdefault(url, {})
+            entry.update({k: v for k, v in values.items() if v is not None})
+            entry['checked'] = datetime.now().isoformat()
+
+    def forget(self, url: str) -> None:
+        """Drop everything stored for a URL, so the next crawl fetches it in full."""
+        with self._lock:
+            self._entries.pop(url, None)
+
+    def save(self) -> None:
+        """Write the store, dropping URLs not checked within VALIDATOR_MAX_AGE_DAYS."""
+        if not self.path:
+            return
+        cutoff = (datetime.now() - timedelta(days=VALIDATOR_MAX_AGE_DAYS)).isoformat()
+        with self._lock:
+            self._entries = {url: entry for url, entry in self._entries.items()
+                             if entry.get('checked', '') >= cutoff}
+            entries = dict(self._entries)
+        try:
+            temp_path = f"{self.path}.tmp"
+            with open(temp_path, 'w') as f:
+                json.dump(entries, f)
+            os.replace(temp_path, self.path)
+        except Exception as e:
+            logger.error(f"Error saving crawl validators: {str(e)}")
+
+
+class _DomainState:
+    __slots__ = ('queue', 'active', 'next_at')
+
+    def __init__(self):
+        self.queue: deque = deque()
+        self.active = 0
+        self.next_at = 0.0
+
+
+class CrawlEngine:
+    """
+    Fetches pages concurrently while limiting the load on each domain.
+
+    Use as a context manager (or call close()) to release the worker pools.
+    """
+
+    def __init__(self,
+                 max_workers: int = DEFAULT_MAX_WORKERS,
+                 per_domain_concurrency: int = DEFAULT_DOMAIN_CONCURRENCY,
+                 per_domain_delay: float = DEFAULT_DOMAIN_DELAY,
+                 timeout: float = DEFAULT_TIMEOUT,
+                 extract_workers: Optional[int] = None,
+                 validators: Optional[ValidatorStore] = None,
+                 user_agent: str = DEFAULT_USER_AGENT):
+        """
+        Args:
+            max_workers: Concurrent fetches across all domains
+            per_domain_concurrency: Concurrent fetches to any one domain
+            per_domain_delay: Minimum seconds between request starts to one domain
+            timeout: Per-request timeout in seconds
+            extract_workers: Processes for submit_extract (0 runs extraction inline;
+                default: one per CPU)
+            validators: Store of ETag/Last-Modified values for conditional GETs
+            user_agent: User-Agent header sent with every request
+        """
+        self.max_workers = max(1, max_workers)
+        self.per_domain_concurrency = max(1, per_domain_concurrency)
+        self.per_domain_delay = max(0.0, per_domain_delay)
+        self.timeout = timeout
+        self.extract_workers = extract_workers
+        self.validators = validators or ValidatorStore()
+        self.user_agent = user_agent
+        self._local = threading.local()
+        self._sessions: List[requests.Session] = []
+        self._sessions_lock = threading.Lock()
+        self._executor = ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix='crawl')
+        self._extract_pool: Optional[ProcessPoolExecutor] = None
+        self.stats = {'fetched': 0, 'not_modified': 0, 'failed': 0, 'bytes': 0}
+        self._stats_lock = threading.Lock()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    # ------------------------------------------------------------------
+    # Fetching
+    # ------------------------------------------------------------------
+
+    def _session(self) -> requests.Session:
+        session = getattr(self._local, 'session', None)
+        if session is None:
+            session = requests.Session()
+            adapter = HTTPAdapter(pool_connections=16, pool_maxsize=self.per_domain_concurrency)
+            session.mount('http://', adapter)
+            session.mount('https://', adapter)
+            session.headers['User-Agent'] = self.user_agent
+            self._local.session = session
+            with self._sessions_lock:
+                self._sessions.append(session)
+        return session
+
+    def fetch(self, url: str) -> FetchResult:
+        """
+        Fetch a URL, revalidating against what the previous crawl saw.
+
+        Returns:
+            FetchResult: not_modified is set when the server answered 304
+        """
+        cached = self.validators.get(url)
+        headers = {}
+        if cached.get('etag'):
+            headers['If-None-Match'] = cached['etag']
+        if cached.get('last_modified'):
+            headers['If-Modified-Since'] = cached['last_modified']
+
+        start = time.perf_counter()
+        try:
+            response = self._session().get(url, headers=headers, timeout=self.timeout)
+        except Exception as e:
+            self._count('failed')
+            return FetchResult(url, error=str(e), elapsed=time.perf_counter() - start, cached=cached)
+        elapsed = time.perf_counter() - start
+
+        if response.status_code == 304:
+            self._count('not_modified')
+            self.validators.remember(url)
+            return FetchResult(url, 304, not_modified=True, elapsed=elapsed, cached=cached)
+        if response.status_code != 200:
+            self._count('failed')
+            return FetchResult(url, response.status_code, error=f"status code {response.status_code}",
+                               elapsed=elapsed, cached=cached)
+
+        self.validators.remember(
+            url,
+            etag=response.headers.get('ETag'),
+            last_modified=response.headers.get('Last-Modified')
+        )
+        with self._stats_lock:
+            self.stats['fetched'] += 1
+            self.stats['bytes'] += len(response.content)
+        return FetchResult(url, 200, response.text, elapsed=elapsed, cached=cached)
+
+    def _count(self, key: str) -> None:
+        with self._stats_lock:
+            self.stats[key] += 1
+
+    def run(self,
+            seeds: Iterable[Tuple[Hashable, str]],
+            expand: Optional[Callable[[Hashable, FetchResult], Iterable[Tuple[Hashable, str]]]] = None
+            ) -> Dict[Hashable, FetchResult]:
+        """
+        Fetch seed URLs and everything expand() adds, honoring per-domain limits.
+
+        Args:
+            seeds: (key, url) pairs to fetch
+            expand: Called (in the calling thread) with each key and result as it
+                completes; returns further (key, url) pairs to fetch
+
+        Returns:
+            dict: key -> FetchResult for every URL fetched
+        """
+        domains: Dict[str, _DomainState] = {}
+        pending: Dict[Future, Tuple[Hashable, str]] = {}
+        results: Dict[Hashable, FetchResult] = {}
+
+        def enqueue(items):
+            for key, url in items:
+                domain = urlparse(url).netloc
+                domains.setdefault(domain, _DomainState()).queue.append((key, url))
+
+        enqueue(seeds)
+        while True:
+            # Dispatch every request whose domain has room and whose delay has passed
+            now = time.monotonic()
+            wake_at = None
+            for domain, state in domains.items():
+                while (state.queue and state.active < self.per_domain_concurrency
+                       and len(pending) < self.max_workers):
+                    if now < state.next_at:
+                        wake_at = state.next_at if wake_at is None else min(wake_at, state.next_at)
+                        break
+                    key, url = state.queue.popleft()
+                    state.active += 1
+                    state.next_at = now + self.per_domain_delay
+                    future = self._executor.submit(self.fetch, url)
+                    pending[future] = (key, domain)
+
+            if not pending:
+                if wake_at is None:
+                    break
+                time.sleep(max(0.0, wake_at - time.monotonic()))
+                continue
+
+            timeout = None if wake_at is None else max(0.0, wake_at - time.monotonic())
+            done, _ = wait(pending, timeout=timeout, return_when=FIRST_COMPLETED)
+            for future in done:
+                key, domain = pending.pop(future)
+                domains[domain].active -= 1
+                result = future.result()
+                results[key] = result
+                if expand:
+                    try:
+                        enqueue(expand(key, result) or ())
+                    except Exception as e:
+                        logger.error(f"Error expanding {result.url}: {str(e)}")
+        return results
+
+    # ------------------------------------------------------------------
+    # Extraction
+    # ------------------------------------------------------------------
+
+    def submit_extract(self, fn: Callable, *args) -> Future:
+        """
+        Run a parsing function in the process pool.
+
+        fn must be a module-level function (it is pickled). Falls back to
+        running inline when extract_workers is 0 or the pool can't start.
+        """
+        if self.extract_workers != 0:
+            try:
+                if self._extract_pool is None:
+                    self._extract_pool = ProcessPoolExecutor(max_workers=self.extract_workers)
+                return self._extract_pool.submit(fn, *args)
+            except Exception as e:
+                logger.warning(f"Extraction pool unavailable, extracting inline: {str(e)}")
+                self.extract_workers = 0
+        future = Future()
+        try:
+            future.set_result(fn(*args))
+        except Exception as e:
+            future.set_exception(e)
+        return future
+
+    def close(self) -> None:
+        """Shut down the worker pools and close pooled connections."""
+        self._executor.shutdown(wait=True)
+        if self._extract_pool is not None:
+            self._extract_pool.shutdown(wait=True)
+            self._extract_pool = None
+        with self._sessions_lock:
+            for session in self._sessions:
+                session.close()
+            self._sessions.clear()
+
+
+# ----------------------------------------------------------------------
+# Benchmark fixture: local sites that mimic the trusted sources
+# ----------------------------------------------------------------------
+
+def serve_fixture_sites(sites: int = 3, articles_per_site: int = 10, latency: float = 0.05,
+                        slow_site_latency: Optional[float] = None):
+    """
+    Start local HTTP servers that look like the trusted sources.
+
+    Each site has a home page linking to /news/article-N pages, answers
+    conditional GETs with 304 and sleeps `latency` seconds per request
+    (`slow_site_latency` for the first site).
+
+    Returns:
+        tuple: (list of base URLs, list of servers to shut down)
+    """
+    from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+    paragraph = ("Caregivers can support memory with steady routines, gentle reminders, "
+                 "regular exercise and good sleep. Research on diagnosis and treatment "
+                 "continues to improve daily care and safety at home. ") * 8
+
+    def make_handler(site_index, delay):
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = 'HTTP/1.1'
+
+            def log_message(self, *args):
+                pass
+
+            def do_GET(self):
+                time.sleep(delay)
+                if self.path == '/':
+                    links = ''.join(f'<li><a href="/news/article-{i}">Article {i}</a></li>'
+                                    for i in range(articles_per_site))
+                    body = f'<html><head><title>Site {site_index}</title></head><body><ul>{links}</ul></body></html>'
+                elif self.path.startswith('/news/article-'):
+                    number = self.path.rsplit('-', 1)[-1]
+                    body = (f'<html><head><title>Site {site_index} article {number}</title>'
+                            f'<meta property="og:image" content="/img/{number}.jpg"></head>'
+                            f'<body><article><h1>Site {site_index} article {number}</h1>'
+                            f'<p>{paragraph}</p><p>{paragraph}</p></article></body></html>')
+                else:
+                    self.send_response(404)
+                    self.send_header('Content-Length', '0')
+                    self.end_headers()
+                    return
+                etag = f'"{site_index}-{abs(hash(self.path))}"'
+                if self.headers.get('If-None-Match') == etag:
+                    self.send_response(304)
+                    self.send_header('ETag', etag)
+                    self.send_header('Content-Length', '0')
+                    self.end_headers()
+                    return
+                data = body.encode('utf-8')
+                self.send_response(200)
+                self.send_header('Content-Type', 'text/html; charset=utf-8')
+                self.send_header('Content-Length', str(len(data)))
+                self.send_header('ETag', etag)
+                self.end_headers()
+                self.wfile.write(data)
+        return Handler
+
+    urls, servers = [], []
+    for index in range(sites):
+        delay = slow_site_latency if (index == 0 and slow_site_latency is not None) else latency
+        server = ThreadingHTTPServer(('127.0.0.1', 0), make_handler(index, delay))
+        server.daemon_threads = True
+        threading.Thread(target=server.serve_forever, daemon=True).start()
+        servers.append(server)
+        urls.append(f"http://127.0.0.1:{server.server_address[1]}")
+    return urls, servers
+
+
+def run_benchmark(sites=3, articles_per_site=10, latency=0.05, slow_site_latency=0.2):
+    """
+    Crawl the fixture sites sequentially (one new connection per page, as
+    the crawler used to) and with the engine, then again with revalidation.
+
+    Returns:
+        dict: Pages fetched, wall time and pages/sec for each run
+    """
+    import tempfile
+    from services.web_crawler import WebCrawler, _extract_article, _extract_links
+
+    urls, servers = serve_fixture_sites(sites, articles_per_site, latency, slow_site_latency)
+    try:
+        with tempfile.TemporaryDirectory() as data_dir:
+            crawler = WebCrawler(data_dir=data_dir)
+            crawler.trusted_sources = [
+                {'name': f'Fixture {i}', 'url': url, 'article_selector': 'article', 'category': 'research'}
+                for i, url in enumerate(urls)
+            ]
+            crawler.crawl_options = {'per_domain_delay': 0.0}
+            pages = sites * (articles_per_site + 1)
+
+            # The previous approach: each page fetched over a new connection and
+            # extracted in turn
+            start = time.perf_counter()
+            for url in urls:
+                home = requests.get(url, timeout=10)
+                for link in _extract_links(home.text, url, articles_per_site):
+                    _extract_article(requests.get(link, timeout=10).text, link)
+            sequential_seconds = time.perf_counter() - start
+
+            start = time.perf_counter()
+            first = crawler.crawl_sources(limit=articles_per_site)
+            engine_seconds = time.perf_counter() - start
+
+            start = time.perf_counter()
+            second = crawler.crawl_sources(limit=articles_per_site)
+            revalidate_seconds = time.perf_counter() - start
+    finally:
+        for server in servers:
+            server.shutdown()
+            server.server_close()
+
+    return {
+        'pages': pages,
+        'sequential_fetch_seconds': sequential_seconds,
+        'sequential_pages_per_second': pages / sequential_seconds,
+        'engine_crawl_seconds': engine_seconds,
+        'engine_pages_per_second': pages / engine_seconds,
+        'engine_articles': first['articles_count'],
+        'revalidate_crawl_seconds': revalidate_seconds,
+        'revalidate_unchanged_pages': second['pages_unchanged'],
+        'revalidate_articles': second['articles_count'],
+    }
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.WARNING)
+    for key, value in run_benchmark().items():
+        print(f"{key}: {value}")
@@ -17,18 +17,64 @@
 """
 HIPAA-Compliant Encryption Service
 Provides AES-256 encryption for Protected Health Information (PHI)
+
+Small fields (names, MFA secrets, JSON blobs) use Fernet tokens. Large
+media (Memory Lane uploads, voice samples) use a framed AES-256-GCM
+stream so files are encrypted and decrypted one segment at a time:
+
+    header:  magic b'AWE1' | segment size (u32) | key id (8 bytes) | nonce prefix (8 bytes)
+    segment: ciphertext length (u32) | AES-GCM ciphertext + tag
+
+Each segment nonce is the prefix plus a 32-bit counter, and the associated
+data binds the header, the counter and a final-segment flag, so reordered,
+dropped or truncated segments fail authentication.
 """
 
 import os
 import base64
+import hashlib
+import json
 import logging
-from cryptography.fernet import Fernet
+import struct
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, Iterable, Iterator, List, Optional, Sequence, Tuple
+from cryptography.fernet import Fernet, InvalidToken, MultiFernet
 from cryptography.hazmat.primitives import hashes
+from cryptography.hazmat.primitives.ciphers.aead import AESGCM
+from cryptography.hazmat.primitives.kdf.hkdf import HKDF
 from cryptography.hazmat.primitives.kdf.pbkdf2 import PBKDF2HMAC
 from cryptography.hazmat.backends import default_backend
 
 logger = logging.getLogger(__name__)
 
+STREAM_MAGIC = b'AWE1'
+STREAM_HEADER = struct.Struct('>4sI8s8s')
+SEGMENT_LENGTH = struct.Struct('>I')
+DEFAULT_SEGMENT_SIZE = 64 * 1024
+GCM_TAG_SIZE = 16
+
+
+def _derive_stream_key(fernet_key: bytes) -> Tuple[bytes, bytes]:
+    """
+    Derive the AES-256-GCM media key from a Fernet key
+    
+    Returns:
+        tuple: (32-byte key, 8-byte key id stored in stream headers)
+    """
+    stream_key = HKDF(
+        algorithm=hashes.SHA256(),
+        length=32,
+        salt=None,
+        info=b'alphawolf-media-stream-v1',
+        backend=default_backend()
+    ).derive(base64.urlsafe_b64decode(fernet_key))
+    key_id = hashlib.sha256(stream_key).digest()[:8]
+    return stream_key, key_id
+
+
+def _segment_aad(header: bytes, counter: int, final: bool) -> bytes:
+    return header + struct.pack('>I?', counter, final)
+
 
 class PHIEncryptionService:
     """
@@ -52,8 +98,13 @@ class PHIEncryptionService:
             key_path: Path to encryption key file (default: ./keys/encryption.key)
         """
         self.key_path = key_path or os.path.join('keys', 'encryption.key')
+        # Keys retired by rotation, one per line; still accepted for decryption
+        self.previous_keys_path = self.key_path + '.previous'
         self.key = self._load_or_generate_key()
-        self.cipher = Fernet(self.key)
+        
+        self.previous_keys: List[bytes] = []
+        self._install_keys(self.key, self._load_previous_keys())
+        self.max_workers = min(8, (os.cpu_count() or 1) + 2)
         logger.info("PHI Encryption Service initialized")
     
     def _load_or_generate_key(self) -> bytes:
@@ -67,7 +118,7 @@ class PHIEncryptionService:
             bytes: Encryption key
         """
         # Check for production environment
-        if os.environ.get('FLASK_ENV') == 'production':
+        if self._is_production():
             # TODO: Integrate with AWS KMS
             # import boto3
             # kms = boto3.client('kms', region_name=os.getenv('AWS_DEFAULT_REGION'))
@@ -104,6 +155,36 @@ class PHIEncryptionService:
             logger.info(f"Generated new encryption key at {self.key_path}")
             return key
     
+    @staticmethod
+    def _is_production() -> bool:
+        return os.environ.get('FLASK_ENV') == 'production'
+    
+    def _load_previous_keys(self) -> List[bytes]:
+        """Retired keys from ENCRYPTION_PREVIOUS_KEYS (production) or the keyring file"""
+        if self._is_production():
+            keys_env = os.getenv('ENCRYPTION_PREVIOUS_KEYS', '')
+            return [k.strip().encode() for k in keys_env.split(',') if k.strip()]
+        if not os.path.exists(self.previous_keys_path):
+            return []
+        with open(self.previous_keys_path, 'rb') as f:
+            return [line.strip() for line in f if line.strip()]
+    
+    @staticmethod
+    def _write_secret(path: str, data: bytes):
+        """Replace a key file atomically, readable by the owner only"""
+        os.makedirs(os.path.dirname(path) or '.', exist_ok=True)
+        tmp_path = path + '.tmp'
+        fd = os.open(tmp_path, os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o600)
+        with os.fdopen(fd, 'wb') as f:
+            f.write(data)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_path, path)
+    
+    def _save_previous_keys(self):
+        if not self._is_production():
+            self._write_secret(self.previous_keys_path, b''.join(k + b'\n' for k in self.previous_keys))
+    
     def encrypt(self, plaintext: str) -> str:
         """
         Encrypt plaintext string to base64-encoded ciphertext
@@ -181,29 +262,387 @@ class PHIEncryptionService:
         plaintext = self.decrypt(ciphertext)
         return json.loads(plaintext) if plaintext else None
     
-    def rotate_key(self, new_key_path: str = None):
+    # ------------------------------------------------------------------
+    # Batch API
+    # ------------------------------------------------------------------
+    
+    def _map(self, func: Callable, items: Sequence) -> List:
+        """Run func over items, in a thread pool when the batch is large enough."""
+        if len(items) < 64:
+            return [func(item) for item in items]
+        chunk = max(16, len(items) // (self.max_workers * 4))
+        with ThreadPoolExecutor(max_workers=self.max_workers) as pool:
+            return list(pool.map(func, items, chunksize=chunk))
+    
+    def encrypt_many(self, plaintexts: Sequence[Optional[str]]) -> List[Optional[str]]:
+        """
+        Encrypt a list of strings
+        
+        None and empty strings map to None, as with encrypt().
+        
+        Args:
+            plaintexts: Values to encrypt
+        
+        Returns:
+            list: Ciphertexts in the same order
+        """
+        cipher = self.cipher
+        
+        def encrypt_one(plaintext):
+            if plaintext is None or plaintext == '':
+                return None
+            return cipher.encrypt(plaintext.encode('utf-8')).decode('utf-8')
+        
+        try:
+            return self._map(encrypt_one, list(plaintexts))
+        except Exception as e:
+            logger.error(f"Batch encryption of {len(plaintexts)} values failed: {e}")
+            raise
+    
+    def decrypt_many(self, ciphertexts: Sequence[Optional[str]], skip_invalid: bool = False) -> List[Optional[str]]:
+        """
+        Decrypt a list of ciphertexts
+        
+        Args:
+            ciphertexts: Values to decrypt
+            skip_invalid: Return None for tampered/undecryptable values instead of raising
+        
+        Returns:
+            list: Plaintexts in the same order
+        
+        Raises:
+            cryptography.fernet.InvalidToken: If any value fails and skip_invalid is False
+        """
+        cipher = self.cipher
+        
+        def decrypt_one(ciphertext):
+            if ciphertext is None or ciphertext == '':
+                return None
+            try:
+                return cipher.decrypt(ciphertext.encode('utf-8')).decode('utf-8')
+            except InvalidToken:
+                if skip_invalid:
+                    return InvalidToken
+                raise
+        
+        try:
+            results = self._map(decrypt_one, list(ciphertexts))
+        except Exception as e:
+            logger.error(f"Batch decryption of {len(ciphertexts)} values failed: {e}")
+            raise
+        
+        failures = sum(1 for result in results if result is InvalidToken)
+        if failures:
+            # One log line per batch rather than per value
+            logger.error(f"Batch decryption: {failures} of {len(results)} values could not be decrypted")
+            results = [None if result is InvalidToken else result for result in results]
+        return results
+    
+    def encrypt_json_many(self, items: Sequence[dict]) -> List[Optional[str]]:
+        """Encrypt a list of JSON-serializable values"""
+        return self.encrypt_many([json.dumps(item) for item in items])
+    
+    def decrypt_json_many(self, ciphertexts: Sequence[Optional[str]]) -> List[Optional[dict]]:
+        """Decrypt a list of encrypted JSON values"""
+        return [json.loads(p) if p else None for p in self.decrypt_many(ciphertexts)]
+    
+    # ------------------------------------------------------------------
+    # Streaming media encryption
+    # ------------------------------------------------------------------
+    
+    def encrypt_stream(self, src, dst, segment_size: int = DEFAULT_SEGMENT_SIZE) -> int:
+        """
+        Encrypt a binary stream segment by segment (AES-256-GCM)
+        
+        Only one segment is held in memory at a time, so this is suitable
+        for large videos and voice recordings.
+        
+        Args:
+            src: Readable binary file object (e.g. an upload's ``stream``)
+            dst: Writable binary file object
+            segment_size: Plaintext bytes per segment
+        
+        Returns:
+            int: Number of plaintext bytes encrypted
+        """
+        header = STREAM_HEADER.pack(STREAM_MAGIC, segment_size, self._stream_key_id, os.urandom(8))
+        nonce_prefix = header[-8:]
+        aesgcm = AESGCM(self._stream_keys[self._stream_key_id])
+        dst.write(header)
+        
+        total = 0
+        counter = 0
+        current = src.read(segment_size)
+        while True:
+            following = src.read(segment_size) if current else b''
+            final = not following
+            ciphertext = aesgcm.encrypt(
+                nonce_prefix + struct.pack('>I', counter),
+                current,
+                _segment_aad(header, counter, final)
+            )
+            dst.write(SEGMENT_LENGTH.pack(len(ciphertext)))
+            dst.write(ciphertext)
+            total += len(current)
+            if final:
+                break
+            counter += 1
+            if counter >= 2 ** 32:
+                raise ValueError("Stream too long for a single nonce prefix")
+            current = following
+        return total
+    
+    def iter_decrypt_stream(self, src) -> Iterator[bytes]:
+        """
+        Decrypt a framed stream, yielding plaintext one segment at a time
+        
+        Args:
+            src: Readable binary file object written by encrypt_stream
+        
+        Yields:
+            bytes: Plaintext segments
+        
+        Raises:
+            cryptography.exceptions.InvalidTag: If any segment was altered
+            ValueError: If the stream is malformed, truncated or uses an unknown key
+        """
+        header = src.read(STREAM_HEADER.size)
+        if len(header) != STREAM_HEADER.size:
+            raise ValueError("Encrypted stream header is truncated")
+        magic, segment_size, key_id, nonce_prefix = STREAM_HEADER.unpack(header)
+        if magic != STREAM_MAGIC:
+            raise ValueError("Not an AlphaWolf encrypted stream")
+        if key_id not in self._stream_keys:
+            raise ValueError("Encrypted stream uses an unknown key")
+        aesgcm = AESGCM(self._stream_keys[key_id])
+        
+        counter = 0
+        length_bytes = src.read(SEGMENT_LENGTH.size)
+        while length_bytes:
+            if len(length_bytes) != SEGMENT_LENGTH.size:
+                raise ValueError("Encrypted stream is truncated")
+            (length,) = SEGMENT_LENGTH.unpack(length_bytes)
+            if length > segment_size + GCM_TAG_SIZE:
+                raise ValueError("Encrypted segment exceeds declared segment size")
+            ciphertext = src.read(length)
+            if len(ciphertext) != length:
+                raise ValueError("Encrypted stream is truncated")
+            length_bytes = src.read(SEGMENT_LENGTH.size)
+            final = not length_bytes
+            yield aesgcm.decrypt(
+                nonce_prefix + struct.pack('>I', counter),
+                ciphertext,
+                _segment_aad(header, counter, final)
+            )
+            counter += 1
+    
+    def decrypt_stream(self, src, dst) -> int:
+        """
+        Decrypt a framed stream into a writable file object
+        
+        Returns:
+            int: Number of plaintext bytes written
+        """
+        total = 0
+        for chunk in self.iter_decrypt_stream(src):
+            dst.write(chunk)
+            total += len(chunk)
+        return total
+    
+    def encrypt_file(self, input_path: str, output_path: str, segment_size: int = DEFAULT_SEGMENT_SIZE) -> int:
+        """Encrypt a file on disk into the framed stream format"""
+        tmp_path = output_path + '.part'
+        with open(input_path, 'rb') as src, open(tmp_path, 'wb') as dst:
+            total = self.encrypt_stream(src, dst, segment_size)
+        os.replace(tmp_path, output_path)
+        return total
+    
+    def decrypt_file(self, input_path: str, output_path: str) -> int:
+        """Decrypt a framed stream file to disk"""
+        tmp_path = output_path + '.part'
+        try:
+            with open(input_path, 'rb') as src, open(tmp_path, 'wb') as dst:
+                total = self.decrypt_stream(src, dst)
+        except Exception:
+            # Never leave partially decrypted PHI behind
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+            raise
+        os.replace(tmp_path, output_path)
+        return total
+    
+    # ------------------------------------------------------------------
+    # Key rotation
+    # ------------------------------------------------------------------
+    
+    def _install_keys(self, primary: bytes, previous: Iterable[bytes]):
+        """Encrypt with primary; keep accepting previous keys for decryption."""
+        self.key = primary
+        self.previous_keys = [k for k in previous if k != primary]
+        keys = [primary] + self.previous_keys
+        self.cipher = MultiFernet([Fernet(k) for k in keys]) if self.previous_keys else Fernet(primary)
+        self._stream_keys = {}
+        for k in keys:
+            stream_key, key_id = _derive_stream_key(k)
+            self._stream_keys[key_id] = stream_key
+        self._stream_key_id = _derive_stream_key(primary)[1]
+    
+    def add_previous_keys(self, *keys: bytes):
+        """Accept additional retired keys for decryption"""
+        self._install_keys(self.key, self.previous_keys + list(keys))
+        self._save_previous_keys()
+    
+    def rotate_key(self, new_key_path: str = None, activate: bool = False):
         """
         Rotate encryption key (for security best practices)
         
         Args:
-            new_key_path: Path to new encryption key
+            new_key_path: Where to write the new key when not activating
+                (default: <key_path>.new)
+            activate: Encrypt with the new key immediately, keeping the old
+                key for decryption until re-encryption has finished. The
+                keyring is saved first, so a restart mid-rotation can still
+                decrypt rows in either key
+        
+        Returns:
+            str: Path of the new key file
         
         Note:
             This requires re-encrypting all existing PHI data
-            Use migration script: scripts/rotate_encryption_key.py
+            Use re_encrypt_batches() / re_encrypt_column() once activated
         """
+        if activate and self._is_production():
+            raise RuntimeError(
+                "Keys come from the environment in production: deploy the new key as "
+                "ENCRYPTION_KEY and the current one in ENCRYPTION_PREVIOUS_KEYS instead"
+            )
+        
         logger.warning("Key rotation initiated - ensure all PHI is re-encrypted")
         new_key = Fernet.generate_key()
         
-        new_key_path = new_key_path or self.key_path + '.new'
-        with open(new_key_path, 'wb') as f:
-            f.write(new_key)
-        os.chmod(new_key_path, 0o600)
+        if activate:
+            # Retire the old key on disk before replacing it, so no crash
+            # point leaves a key that encrypted data unrecorded
+            previous = [self.key] + self.previous_keys
+            self._write_secret(self.previous_keys_path, b''.join(k + b'\n' for k in previous))
+            self._write_secret(self.key_path, new_key)
+            self._install_keys(new_key, previous)
+            logger.info(f"New encryption key active at {self.key_path}; previous key retained for decryption")
+            return self.key_path
         
+        new_key_path = new_key_path or self.key_path + '.new'
+        self._write_secret(new_key_path, new_key)
         logger.info(f"New encryption key generated at {new_key_path}")
         logger.warning("IMPORTANT: Run migration script to re-encrypt all PHI with new key")
-        
         return new_key_path
+    
+    def re_encrypt_batches(
+        self,
+        fetch_batch: Callable[[Optional[object], int], List[Tuple[object, Optional[str]]]],
+        store_batch: Callable[[List[Tuple[object, str]]], None],
+        batch_size: int = 500,
+        checkpoint_path: Optional[str] = None
+    ) -> dict:
+        """
+        Re-encrypt stored values under the current primary key, resumably
+        
+        Works through the data in keyset order one batch at a time. After each
+        batch is stored, the last key is written to ``checkpoint_path`` so an
+        interrupted rotation picks up where it stopped.
+        
+        Args:
+            fetch_batch: fetch_batch(after_key, limit) -> [(key, ciphertext), ...]
+                ordered by key; after_key is None for the first batch
+            store_batch: store_batch([(key, new_ciphertext), ...]) persists a batch
+            batch_size: Rows per batch
+            checkpoint_path: Optional file recording the last completed key
+        
+        Returns:
+            dict: Counts of rotated, skipped (empty) and failed values
+        """
+        after_key = None
+        key_id = self._stream_key_id.hex()
+        if checkpoint_path and os.path.exists(checkpoint_path):
+            with open(checkpoint_path, 'r') as f:
+                checkpoint = json.load(f)
+            if checkpoint.get('key_id', key_id) == key_id:
+                after_key = checkpoint.get('after_key')
+                logger.info(f"Resuming re-encryption after key {after_key}")
+            else:
+                logger.info("Checkpoint is from an earlier rotation; starting over")
+        
+        cipher = self.cipher if isinstance(self.cipher, MultiFernet) else MultiFernet([self.cipher])
+        
+        def rotate_one(ciphertext):
+            if not ciphertext:
+                return None
+            try:
+                return cipher.rotate(ciphertext.encode('utf-8')).decode('utf-8')
+            except InvalidToken:
+                return InvalidToken
+        
+        totals = {'rotated': 0, 'skipped': 0, 'failed': 0, 'batches': 0}
+        while True:
+            batch = fetch_batch(after_key, batch_size)
+            if not batch:
+                break
+            
+            rotated = self._map(rotate_one, [ciphertext for _, ciphertext in batch])
+            updates = []
+            for (key, _), new_ciphertext in zip(batch, rotated):
+                if new_ciphertext is None:
+                    totals['skipped'] += 1
+                elif new_ciphertext is InvalidToken:
+                    totals['failed'] += 1
+                else:
+                    updates.append((key, new_ciphertext))
+            
+            if updates:
+                store_batch(updates)
+            totals['rotated'] += len(updates)
+            totals['batches'] += 1
+            after_key = batch[-1][0]
+            
+            if checkpoint_path:
+                tmp_path = checkpoint_path + '.tmp'
+                with open(tmp_path, 'w') as f:
+                    json.dump({'after_key': after_key, 'key_id': key_id, **totals}, f)
+                    f.flush()
+                    os.fsync(f.fileno())
+                os.replace(tmp_path, checkpoint_path)
+        
+        if totals['failed']:
+            logger.error(f"Re-encryption: {totals['failed']} values could not be decrypted with known keys")
+        logger.info(f"Re-encryption complete: {totals}")
+        return totals
+    
+    def re_encrypt_column(self, session, model, column_name: str, batch_size: int = 500,
+                          checkpoint_path: Optional[str] = None) -> dict:
+        """
+        Re-encrypt one encrypted column of a SQLAlchemy model in id order
+        
+        Each batch is committed on its own, so progress survives interruption.
+        
+        Example:
+            >>> service.rotate_key(activate=True)
+            >>> service.re_encrypt_column(db.session, User, 'mfa_secret',
+            ...                           checkpoint_path='keys/rotate_user_mfa.json')
+        """
+        column = getattr(model, column_name)
+        
+        def fetch_batch(after_id, limit):
+            query = session.query(model.id, column).filter(column.isnot(None))
+            if after_id is not None:
+                query = query.filter(model.id > after_id)
+            return [tuple(row) for row in query.order_by(model.id.asc()).limit(limit)]
+        
+        def store_batch(updates):
+            session.bulk_update_mappings(model, [
+                {'id': row_id, column_name: ciphertext} for row_id, ciphertext in updates
+            ])
+            session.commit()
+        
+        return self.re_encrypt_batches(fetch_batch, store_batch, batch_size, checkpoint_path)
 
 
 # Global singleton instance
@@ -0,0 +1,373 @@
+# © 2025 The Christman AI Project. All rights reserved.
+#
+# This code is released as part of a trauma-informed, dignity-first AI ecosystem
+# designed to protect, empower, and elevate vulnerable populations.
+#
+# By using, modifying, or distributing this software, you agree to uphold the following:
+# 1. Truth — No deception, no manipulation.
+# 2. Dignity — Respect the autonomy and humanity of all users.
+# 3. Protection — Never use this to exploit or harm vulnerable individuals.
+# 4. Transparency — Disclose all modifications and contributions clearly.
+# 5. No Erasure — Preserve the mission and ethical origin of this work.
+#
+# This is not just code. This is redemption in code.
+# Contact: lumacognify@thechristmanaiproject.com
+# https://thechristmanaiproject.com
+
+"""
+Geofence Engine for AlphaWolf
+Part of The Christman AI Project - Powered by LumaCognify AI
+
+Keeps safe zones in a precomputed grid index and evaluates them with a
+vectorized haversine. Exact geodesic distances are only computed for zones
+whose haversine distance lands close to the zone boundary, where the
+spherical approximation could flip the inside/outside decision.
+"""
+
+import logging
+import math
+import threading
+import time
+from collections import defaultdict
+from typing import Any, Callable, Dict, Iterable, List, Optional, Sequence, Tuple
+
+import numpy as np
+from geopy.distance import geodesic
+
+logger = logging.getLogger(__name__)
+
+EARTH_RADIUS_M = 6371008.8
+METERS_PER_DEGREE_LAT = 111320.0
+
+# Haversine on a sphere differs from the WGS-84 geodesic by at most ~0.5%
+BOUNDARY_TOLERANCE_RATIO = 0.005
+BOUNDARY_TOLERANCE_M = 1.0
+
+
+class ZoneSnapshot:
+    """Detached, read-only copy of a SafeZone row."""
+
+    __slots__ = ('id', 'name', 'latitude', 'longitude', 'radius')
+
+    def __init__(self, id, name, latitude, longitude, radius):
+        self.id = id
+        self.name = name
+        self.latitude = float(latitude)
+        self.longitude = float(longitude)
+        self.radius = float(radius)
+
+    @classmethod
+    def from_zone(cls, zone):
+        return cls(zone.id, zone.name, zone.latitude, zone.longitude, zone.radius)
+
+    def to_dict(self):
+        return {
+            'id': self.id,
+            'name': self.name,
+            'latitude': self.latitude,
+            'longitude': self.longitude,
+            'radius': self.radius
+        }
+
+
+def haversine_matrix(lats, lons, zone_lats, zone_lons):
+    """
+    Great-circle distances in meters between N points and M zone centers.
+
+    Returns:
+        numpy.ndarray: Array of shape (N, M)
+    """
+    lat1 = np.radians(np.asarray(lats, dtype=np.float64))[:, None]
+    lon1 = np.radians(np.asarray(lons, dtype=np.float64))[:, None]
+    lat2 = np.radians(np.asarray(zone_lats, dtype=np.float64))[None, :]
+    lon2 = np.radians(np.asarray(zone_lons, dtype=np.float64))[None, :]
+
+    dlat = lat2 - lat1
+    dlon = lon2 - lon1
+    a = np.sin(dlat / 2) ** 2 + np.cos(lat1) * np.cos(lat2) * np.sin(dlon / 2) ** 2
+    return 2 * EARTH_RADIUS_M * np.arcsin(np.sqrt(np.clip(a, 0.0, 1.0)))
+
+
+class GeofenceEngine:
+    """In-memory spatial index of safe zones with batched evaluation."""
+
+    def __init__(self, loader: Optional[Callable[[], Iterable[Any]]] = None,
+                 cell_size_deg: float = 0.01, max_cells_per_zone: int = 10000,
+                 refresh_interval: float = 60.0):
+        """
+        Args:
+            loader: Callable returning zone objects (id, name, latitude,
+                longitude, radius). Called lazily whenever the index is stale.
+            cell_size_deg: Grid cell size in degrees (0.01 is roughly 1.1 km)
+            max_cells_per_zone: Zones covering more cells than this are kept in
+                a list that is checked for every point instead of being bucketed
+            refresh_interval: Seconds before the index is reloaded even without
+                an explicit invalidation (covers edits made by other workers)
+        """
+        self.logger = logging.getLogger(__name__)
+        self.loader = loader
+        self.cell_size_deg = cell_size_deg
+        self.max_cells_per_zone = max_cells_per_zone
+        self.refresh_interval = refresh_interval
+
+        self._lock = threading.RLock()
+        self._valid = False
+        self._loaded_at = 0.0
+        self._zones: List[ZoneSnapshot] = []
+        self._lats = np.empty(0)
+        self._lons = np.empty(0)
+        self._radii = np.empty(0)
+        self._grid: Dict[Tuple[int, int], List[int]] = {}
+        self._oversized: List[int] = []
+
+    @classmethod
+    def from_zones(cls, zones: Iterable[Any], **kwargs) -> 'GeofenceEngine':
+        """Build an engine over a fixed list of zones (no reloading)."""
+        engine = cls(**kwargs)
+        engine.refresh_interval = float('inf')
+        engine.build(zones)
+        return engine
+
+    # ------------------------------------------------------------------
+    # Index maintenance
+    # ------------------------------------------------------------------
+
+    def invalidate(self):
+        """Mark the cached index stale; it is rebuilt on next use."""
+        with self._lock:
+            self._valid = False
+
+    def build(self, zones: Iterable[Any]):
+        """Compile zones into coordinate arrays and grid buckets."""
+        snapshots = [z if isinstance(z, ZoneSnapshot) else ZoneSnapshot.from_zone(z) for z in zones]
+        grid = defaultdict(list)
+        oversized = []
+
+        for idx, zone in enumerate(snapshots):
+            cells = self._cells_for_circle(zone.latitude, zone.longitude, zone.radius)
+            if cells is None:
+                oversized.append(idx)
+                continue
+            for cell in cells:
+                grid[cell].append(idx)
+
+        with self._lock:
+            self._zones = snapshots
+            self._lats = np.array([z.latitude for z in snapshots], dtype=np.float64)
+            self._lons = np.array([z.longitude for z in snapshots], dtype=np.float64)
+            self._radii = np.array([z.radius for z in snapshots], dtype=np.float64)
+            self._grid = dict(grid)
+            self._oversized = oversized
+            self._valid = True
+            self._loaded_at = time.monotonic()
+
+        self.logger.info(f"Geofence index built: {len(snapshots)} zones, {len(grid)} grid cells")
+
+    def _ensure_index(self):
+        if self.loader is None:
+            return
+        with self._lock:
+            stale = time.monotonic() - self._loaded_at > self.refresh_interval
+            if self._valid and not stale:
+                return
+            self.build(self.loader())
+
+    def _cell(self, latitude: float, longitude: float) -> Tuple[int, int]:
+        return (math.floor(latitude / self.cell_size_deg),
+                math.floor(longitude / self.cell_size_deg))
+
+    def _cells_for_circle(self, latitude, longitude, radius):
+        # Pad by the boundary tolerance so near-edge points still find the zone
+        reach = radius * (1 + BOUNDARY_TOLERANCE_RATIO) + BOUNDARY_TOLERANCE_M
+        dlat = reach / METERS_PER_DEGREE_LAT
+        poleward = min(abs(latitude) + dlat, 90.0)
+        cos_lat = max(math.cos(math.radians(poleward)), 1e-6)
+        dlon = reach / (METERS_PER_DEGREE_LAT * cos_lat)
+
+        lat_lo, lon_lo = self._cell(latitude - dlat, longitude - dlon)
+        lat_hi, lon_hi = self._cell(latitude + dlat, longitude + dlon)
+        if (lat_hi - lat_lo + 1) * (lon_hi - lon_lo + 1) > self.max_cells_per_zone:
+            return None
+        return [(i, j) for i in range(lat_lo, lat_hi + 1) for j in range(lon_lo, lon_hi + 1)]
+
+    def get_zones(self) -> List[ZoneSnapshot]:
+        """Return the cached zone snapshots."""
+        self._ensure_index()
+        with self._lock:
+            return list(self._zones)
+
+    # ------------------------------------------------------------------
+    # Evaluation
+    # ------------------------------------------------------------------
+
+    def _exact_inside(self, latitude, longitude, zone_idx, approx):
+        """Resolve inside/outside, refining with geodesic near the boundary."""
+        radius = self._radii[zone_idx]
+        if abs(approx - radius) > approx * BOUNDARY_TOLERANCE_RATIO + BOUNDARY_TOLERANCE_M:
+            return bool(approx <= radius), float(approx)
+        zone = self._zones[zone_idx]
+        exact = geodesic((latitude, longitude), (zone.latitude, zone.longitude)).meters
+        return bool(exact <= radius), exact
+
+    def is_inside_any(self, latitude: float, longitude: float) -> bool:
+        """Fast containment check using only the zones bucketed near the point."""
+        self._ensure_index()
+        with self._lock:
+            candidates = self._grid.get(self._cell(latitude, longitude), []) + self._oversized
+            if not candidates:
+                return False
+            idx = np.array(candidates)
+            approx = haversine_matrix([latitude], [longitude], self._lats[idx], self._lons[idx])[0]
+            order = np.argsort(approx - self._radii[idx])
+            for k in order:
+                inside, _ = self._exact_inside(latitude, longitude, idx[k], approx[k])
+                if inside:
+                    return True
+            return False
+
+    def check_points(self, points: Sequence[Tuple[float, float]]) -> List[Dict[str, Any]]:
+        """
+        Evaluate N points against every zone in one vectorized pass.
+
+        Args:
+            points: Sequence of (latitude, longitude)
+
+        Returns:
+            list: One status per point with is_safe, inside_zones,
+                closest_zone and distance_to_closest (meters)
+        """
+        self._ensure_index()
+        with self._lock:
+            if not points:
+                return []
+            if not self._zones:
+                return [{
+                    'is_safe': False,
+                    'closest_zone': None,
+                    'distance_to_closest': float('inf'),
+                    'inside_zones': []
+                } for _ in points]
+
+            coords = np.asarray(points, dtype=np.float64)
+            distances = haversine_matrix(coords[:, 0], coords[:, 1], self._lats, self._lons)
+            margin = distances - self._radii[None, :]
+            tolerance = distances * BOUNDARY_TOLERANCE_RATIO + BOUNDARY_TOLERANCE_M
+            near_boundary = np.abs(margin) <= tolerance
+            clearly_inside = margin < -tolerance
+
+            results = []
+            for i, (latitude, longitude) in enumerate(coords):
+                row = distances[i].copy()
+                inside_mask = clearly_inside[i].copy()
+                for j in np.nonzero(near_boundary[i])[0]:
+                    inside, row[j] = self._exact_inside(latitude, longitude, j, distances[i, j])
+                    inside_mask[j] = inside
+
+                closest = int(np.argmin(row))
+                closest_zone = self._zones[closest]
+                inside_zones = [{
+                    'id': self._zones[j].id,
+                    'name': self._zones[j].name,
+                    'distance': float(row[j])
+                } for j in np.nonzero(inside_mask)[0]]
+
+                results.append({
+                    'is_safe': bool(inside_zones),
+                    'closest_zone': closest_zone.to_dict(),
+                    'distance_to_closest': float(row[closest]),
+                    'inside_zones': inside_zones
+                })
+            return results
+
+    def distances_to_zones(self, latitude: float, longitude: float) -> List[Dict[str, Any]]:
+        """
+        Distance from a point to every zone center, closest first.
+
+        Returns:
+            list: Dicts with zone (ZoneSnapshot), distance (meters) and inside
+        """
+        self._ensure_index()
+        with self._lock:
+            if not self._zones:
+                return []
+            row = haversine_matrix([latitude], [longitude], self._lats, self._lons)[0]
+            result = []
+            for j, approx in enumerate(row):
+                inside, distance = self._exact_inside(latitude, longitude, j, approx)
+                result.append({'zone': self._zones[j], 'distance': distance, 'inside': inside})
+            result.sort(key=lambda x: x['distance'])
+            return result
+
+    def check_point(self, latitude: float, longitude: float) -> Dict[str, Any]:
+        """Evaluate a single point; see check_points."""
+        return self.check_points([(latitude, longitude)])[0]
+
+
+# Global instance shared by the geolocation and wandering services
+_geofence_engine = None
+
+
+def get_geofence_engine() -> GeofenceEngine:
+    """Get or create the shared geofence engine backed by the SafeZone table."""
+    global _geofence_engine
+    if _geofence_engine is None:
+        def load_safe_zones():
+            from models import SafeZone
+            return SafeZone.query.all()
+        _geofence_engine = GeofenceEngine(loader=load_safe_zones)
+    return _geofence_engine
+
+
+def run_benchmark(num_patients=500, num_zones=200, seed=42):
+    """
+    Compare the per-zone geodesic loop against the batched engine.
+
+    Returns:
+        dict: Timings in seconds and agreement between the two methods
+    """
+    rng = np.random.default_rng(seed)
+    center_lat, center_lon = 40.7128, -74.0060
+    zones = [
+        ZoneSnapshot(i, f"Zone {i}",
+                     center_lat + rng.uniform(-0.2, 0.2),
+                     center_lon + rng.uniform(-0.2, 0.2),
+                     rng.uniform(50, 800))
+        for i in range(num_zones)
+    ]
+    points = [(center_lat + rng.uniform(-0.2, 0.2), center_lon + rng.uniform(-0.2, 0.2))
+              for _ in range(num_patients)]
+
+    start = time.perf_counter()
+    baseline = []
+    for point in points:
+        baseline.append(any(
+            geodesic(point, (zone.latitude, zone.longitude)).meters <= zone.radius
+            for zone in zones
+        ))
+    loop_seconds = time.perf_counter() - start
+
+    engine = GeofenceEngine.from_zones(zones)
+
+    start = time.perf_counter()
+    batched = [status['is_safe'] for status in engine.check_points(points)]
+    batch_seconds = time.perf_counter() - start
+
+    start = time.perf_counter()
+    indexed = [engine.is_inside_any(lat, lon) for lat, lon in points]
+    indexed_seconds = time.perf_counter() - start
+
+    return {
+        'patients': num_patients,
+        'zones': num_zones,
+        'geodesic_loop_seconds': loop_seconds,
+        'batched_seconds': batch_seconds,
+        'indexed_lookup_seconds': indexed_seconds,
+        'batched_matches_loop': batched == baseline,
+        'indexed_matches_loop': indexed == baseline
+    }
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO)
+    for key, value in run_benchmark().items():
+        print(f"{key}: {value}")
@@ -22,6 +22,8 @@ from datetime import datetime, timedelta
 from geopy.distance import geodesic
 from flask import current_app
 from models import SafeZone, Alert, db
+from services.geofence_engine import get_geofence_engine
+from services.location_history_store import LocationHistoryStore
 
 logger = logging.getLogger(__name__)
 
@@ -32,8 +34,11 @@ class GeolocationService:
         self.logger = logging.getLogger(__name__)
         self.location_history_dir = os.path.join('data', 'location_history')
         
-        # Ensure location history directory exists
-        os.makedirs(self.location_history_dir, exist_ok=True)
+        # Per-patient ring buffers (legacy JSON histories are migrated on first access)
+        self.location_history = LocationHistoryStore(self.location_history_dir, capacity=1000)
+        
+        # Cached spatial index of safe zones (rebuilt after zone edits)
+        self.geofence = get_geofence_engine()
         
         # Default alert thresholds
         self.alert_thresholds = {
@@ -141,61 +146,22 @@ class GeolocationService:
             dict: Safety status with zones and distances
         """
         try:
-            # Get all safe zones from database
-            safe_zones = SafeZone.query.all()
+            status = self.geofence.check_point(latitude, longitude)
             
-            if not safe_zones:
+            if status['closest_zone'] is None:
                 self.logger.warning("No safe zones defined in the system")
-                return {
-                    'is_safe': False,
-                    'closest_zone': None,
-                    'distance_to_closest': float('inf'),
-                    'inside_zones': [],
-                    'timestamp': datetime.utcnow().isoformat()
-                }
+                status['timestamp'] = datetime.utcnow().isoformat()
+                return status
             
-            # Check each zone
-            inside_zones = []
-            closest_zone = None
-            min_distance = float('inf')
-            
-            for zone in safe_zones:
-                distance = self._calculate_distance(
-                    zone.latitude, zone.longitude, latitude, longitude
-                )
-                
-                if distance < min_distance:
-                    min_distance = distance
-                    closest_zone = {
-                        'id': zone.id,
-                        'name': zone.name,
-                        'latitude': zone.latitude,
-                        'longitude': zone.longitude,
-                        'radius': zone.radius
-                    }
-                
-                # Check if inside zone (distance less than radius)
-                if distance <= zone.radius:
-                    inside_zones.append({
-                        'id': zone.id,
-                        'name': zone.name,
-                        'distance': distance
-                    })
-            
-            # Determine if location is safe (inside any zone)
-            is_safe = len(inside_zones) > 0
+            is_safe = status['is_safe']
+            min_distance = status['distance_to_closest']
             
             # Create alert if outside all safe zones and distance is significant
             if not is_safe and min_distance > self.alert_thresholds['distance_threshold']:
                 self._create_wandering_alert(patient_id, latitude, longitude, min_distance)
             
-            return {
-                'is_safe': is_safe,
-                'closest_zone': closest_zone,
-                'distance_to_closest': min_distance,
-                'inside_zones': inside_zones,
-                'timestamp': datetime.utcnow().isoformat()
-            }
+            status['timestamp'] = datetime.utcnow().isoformat()
+            return status
         except Exception as e:
             self.logger.error(f"Error checking safe zones: {str(e)}")
             return {
@@ -204,6 +170,35 @@ class GeolocationService:
                 'timestamp': datetime.utcnow().isoformat()
             }
     
+    def check_patients_safe_zones(self, patient_locations, create_alerts=True):
+        """
+        Check many patients against all safe zones in one batched call.
+        
+        Args:
+            patient_locations: Dict of patient_id -> (latitude, longitude)
+            create_alerts: Whether to raise wandering alerts like check_safe_zones
+            
+        Returns:
+            dict: patient_id -> safety status (same shape as check_safe_zones)
+        """
+        try:
+            patient_ids = list(patient_locations.keys())
+            points = [patient_locations[pid] for pid in patient_ids]
+            statuses = self.geofence.check_points(points)
+            timestamp = datetime.utcnow().isoformat()
+            
+            results = {}
+            for patient_id, (latitude, longitude), status in zip(patient_ids, points, statuses):
+                status['timestamp'] = timestamp
+                if (create_alerts and status['closest_zone'] is not None and not status['is_safe']
+                        and status['distance_to_closest'] > self.alert_thresholds['distance_threshold']):
+                    self._create_wandering_alert(patient_id, latitude, longitude, status['distance_to_closest'])
+                results[patient_id] = status
+            return results
+        except Exception as e:
+            self.logger.error(f"Error checking safe zones in batch: {str(e)}")
+            return {}
+    
     def add_safe_zone(self, name, latitude, longitude, radius):
         """
         Add a new safe zone.
@@ -228,6 +223,7 @@ class GeolocationService:
             # Save to database
             db.session.add(new_zone)
             db.session.commit()
+            self.geofence.invalidate()
             
             self.logger.info(f"Added new safe zone '{name}' with radius {radius}m")
             
@@ -280,6 +276,7 @@ class GeolocationService:
             
             # Save to database
             db.session.commit()
+            self.geofence.invalidate()
             
             self.logger.info(f"Updated safe zone {zone_id}")
             
@@ -319,6 +316,7 @@ class GeolocationService:
             # Delete from database
             db.session.delete(zone)
             db.session.commit()
+            self.geofence.invalidate()
             
             self.logger.info(f"Deleted safe zone {zone_id}")
             
@@ -373,18 +371,7 @@ class GeolocationService:
             list: Location history
         """
         try:
-            # Get history file path
-            history_file = os.path.join(self.location_history_dir, f"{patient_id}.json")
-            
-            if not os.path.exists(history_file):
-                return []
-            
-            # Read history from file
-            with open(history_file, 'r') as f:
-                history = json.load(f)
-            
-            # Return most recent entries up to limit
-            return history[-limit:] if limit > 0 else history
+            return self.location_history.get_history(patient_id, limit)
         except Exception as e:
             self.logger.error(f"Error getting location history: {str(e)}")
             return []
@@ -392,36 +379,7 @@ class GeolocationService:
     def _log_location(self, patient_id, latitude, longitude, timestamp):
         """Log a location update to the patient's history file."""
         try:
-            # Create location entry
-            location = {
-                'timestamp': timestamp,
-                'latitude': latitude,
-                'longitude': longitude
-            }
-            
-            # Get history file path
-            history_file = os.path.join(self.location_history_dir, f"{patient_id}.json")
-            
-            # Load existing history or create new
-            if os.path.exists(history_file):
-                with open(history_file, 'r') as f:
-                    try:
-                        history = json.load(f)
-                    except json.JSONDecodeError:
-                        history = []
-            else:
-                history = []
-            
-            # Add new location
-            history.append(location)
-            
-            # Limit history size (keep last 1000 entries)
-            if len(history) > 1000:
-                history = history[-1000:]
-            
-            # Save updated history
-            with open(history_file, 'w') as f:
-                json.dump(history, f)
+            self.location_history.append(patient_id, latitude, longitude, timestamp)
         except Exception as e:
             self.logger.error(f"Error logging location: {str(e)}")
     
@@ -17,17 +17,110 @@
 """
 HIPAA-Compliant Audit Logging Service
 Logs all PHI access, security events, and administrative actions
+
+Audit entries are written behind the request: each log call appends the
+entry to an fsync'd local spill file and places it on a bounded queue. A
+background writer drains the queue and bulk-inserts batches in a single
+transaction on its own session, so callers never pay for (or trigger) a
+commit. Each process spills to its own file; entries that were spilled but
+not committed before a crash are replayed the next time a writer starts,
+including files left behind by worker processes that have exited.
+
+Checksums form a hash chain in id order: each row's checksum covers its
+own fields plus the previous row's checksum, so any contiguous id range
+can be verified and a deleted or edited row breaks every later link.
 """
 
+import atexit
+import csv
+import glob
+import io
 import json
 import logging
 import hashlib
-from datetime import datetime
-from typing import Dict, Optional, Any
-from flask import request, session
+import os
+import queue
+import threading
+import time
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime, timedelta
+from typing import Dict, Iterator, List, Optional, Any
+from flask import request, session, current_app, has_app_context
+
+try:
+    import fcntl
+except ImportError:  # Windows: spill files of exited processes aren't adopted
+    fcntl = None
 
 logger = logging.getLogger(__name__)
 
+# Columns covered by the chained checksum, in canonical order
+CHECKSUM_FIELDS = (
+    'timestamp', 'event_type', 'action', 'outcome', 'user_id', 'patient_id',
+    'resource_type', 'ip_address', 'user_agent', 'session_id', 'details'
+)
+
+# HIPAA disclosure accounting covers the six years before the request
+RETENTION_DAYS = 6 * 365 + 2
+
+DISCLOSURE_COLUMNS = (
+    'id', 'timestamp', 'user_id', 'action', 'resource_type', 'outcome', 'ip_address'
+)
+
+
+def _canonical_record(record: Dict[str, Any]) -> str:
+    """Serialize the checksummed columns of a row or pending entry."""
+    values = {}
+    for field in CHECKSUM_FIELDS:
+        value = record.get(field)
+        if isinstance(value, datetime):
+            value = value.replace(tzinfo=None).isoformat()
+        values[field] = value
+    return json.dumps(values, sort_keys=True, default=str)
+
+
+def chain_checksum(previous_checksum: Optional[str], record: Dict[str, Any]) -> str:
+    """
+    Link a record to its predecessor in the hash chain
+    
+    Args:
+        previous_checksum: Checksum of the preceding row (None for the first row)
+        record: Column values for this row
+    
+    Returns:
+        str: Hex checksum
+    """
+    payload = (previous_checksum or '') + _canonical_record(record)
+    return hashlib.sha256(payload.encode()).hexdigest()
+
+
+def _legacy_checksum(record: Dict[str, Any]) -> str:
+    """Checksum as computed before the hash chain (PHI_ACCESS rows only)."""
+    data = dict(record)
+    data['details'] = json.loads(record['details']) if record.get('details') else {}
+    data_string = json.dumps(data, sort_keys=True, default=str)
+    return hashlib.sha256(data_string.encode()).hexdigest()
+
+
+def _first_broken(links: List[tuple]) -> Optional[int]:
+    """
+    Check a chunk of chain links; runs in a worker process.
+    
+    Args:
+        links: (id, previous_checksum, record, stored_checksum) tuples
+    
+    Returns:
+        int: id of the first row that fails, or None if all pass
+    """
+    for row_id, previous_checksum, record, stored_checksum in links:
+        if chain_checksum(previous_checksum, record) == stored_checksum:
+            continue
+        if _legacy_checksum(record) == stored_checksum:
+            continue
+        return row_id
+    return None
+
 
 class HIPAAAuditLogger:
     """
@@ -37,24 +130,40 @@ class HIPAAAuditLogger:
     
     Features:
     - Comprehensive PHI access tracking
-    - Tamper-evident logs (checksums)
+    - Tamper-evident logs (SHA-256 hash chain)
     - Security event logging
     - 6-year retention compliance
     - Automatic log rotation
+    - Write-behind batching with crash-safe local spill file
     """
     
-    def __init__(self, db_session=None):
+    def __init__(
+        self,
+        db_session=None,
+        async_writes: bool = True,
+        batch_size: int = 200,
+        flush_interval: float = 0.5,
+        max_queue: int = 10000,
+        spill_path: str = os.path.join('logs', 'audit_spill.jsonl'),
+        app=None
+    ):
         """
         Initialize HIPAA audit logger
         
         Args:
             db_session: SQLAlchemy database session (optional, uses models.db if not provided)
+            async_writes: Queue entries for the background writer (False writes inline)
+            batch_size: Maximum entries inserted per transaction
+            flush_interval: Seconds the writer waits to fill a batch
+            max_queue: Queue bound; callers block (backpressure) when it is full
+            spill_path: Local JSONL file holding entries not yet committed; each
+                process writes <name>.<pid>.jsonl next to it
+            app: Flask app for the writer's app context (captured lazily if omitted)
         """
         self.db_session = db_session
         self.logger = logging.getLogger('hipaa_audit')
         
         # Configure file handler for audit logs (in addition to database)
-        import os
         from logging.handlers import RotatingFileHandler
         
         log_dir = 'logs'
@@ -72,6 +181,40 @@ class HIPAAAuditLogger:
         self.logger.addHandler(handler)
         self.logger.setLevel(logging.INFO)
         
+        # Write-behind pipeline
+        self.async_writes = async_writes
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.app = app
+        self._queue: "queue.Queue[Dict[str, Any]]" = queue.Queue(maxsize=max_queue)
+        self._retry: List[Dict[str, Any]] = []
+        self._writer_thread = None
+        self._writer_active = False
+        self._idle = threading.Event()
+        self._idle.set()
+        
+        # Spill file: every entry is durable locally before it is queued.
+        # Sequence numbers and the checkpoint belong to one process, so every
+        # process gets its own file
+        self.spill_base = spill_path
+        os.makedirs(os.path.dirname(spill_path) or '.', exist_ok=True)
+        self._spill_lock = threading.Lock()
+        self._spill_file = None
+        self._open_spill()
+        
+        self._metrics = {
+            'enqueued': 0,
+            'written': 0,
+            'batches': 0,
+            'failed_batches': 0,
+            'recovered': 0,
+            'blocked_puts': 0,
+            'blocked_seconds': 0.0,
+            'max_queue_depth': 0,
+            'last_batch_size': 0,
+            'last_flush_ms': 0.0
+        }
+        
         logger.info("HIPAA Audit Logger initialized")
     
     def _get_db_session(self):
@@ -87,6 +230,8 @@ class HIPAAAuditLogger:
         """
         Create SHA-256 checksum for tamper detection
         
+        Legacy per-row scheme, kept to verify rows written before the hash chain.
+        
         Args:
             data: Log entry data
         
@@ -96,6 +241,371 @@ class HIPAAAuditLogger:
         data_string = json.dumps(data, sort_keys=True, default=str)
         return hashlib.sha256(data_string.encode()).hexdigest()
     
+    def _chain_checksum(self, previous_checksum: Optional[str], record: Dict[str, Any]) -> str:
+        """Link a record to its predecessor in the hash chain"""
+        return chain_checksum(previous_checksum, record)
+    
+    @staticmethod
+    def _row_record(log_entry) -> Dict[str, Any]:
+        """Column values of an AuditLog row, as used for checksums."""
+        return {field: getattr(log_entry, field) for field in CHECKSUM_FIELDS}
+    
+    @staticmethod
+    def _request_context(include_session: bool = True):
+        """Client IP, user agent and session id when called inside a request."""
+        ip_address = None
+        user_agent = None
+        session_id = None
+        try:
+            ip_address = request.remote_addr
+            user_agent = request.headers.get('User-Agent', '')[:500]  # Limit length
+            if include_session:
+                session_id = session.get('session_id', '')
+        except RuntimeError:
+            # Outside request context (e.g., background task)
+            pass
+        return ip_address, user_agent, session_id
+    
+    # ------------------------------------------------------------------
+    # Write-behind pipeline
+    # ------------------------------------------------------------------
+    
+    def _open_spill(self):
+        """Open (and lock) this process's spill file and load its checkpoint."""
+        if self._spill_file is not None:
+            # Inherited across fork; the parent still owns it
+            self._spill_file.close()
+        root, ext = os.path.splitext(self.spill_base)
+        self._spill_pid = os.getpid()
+        self.spill_path = f"{root}.{self._spill_pid}{ext}"
+        self.checkpoint_path = self.spill_path + '.ckpt'
+        self._spill_file = open(self.spill_path, 'a', encoding='utf-8')
+        if fcntl is not None:
+            # Held until the process exits, which marks the file as in use
+            fcntl.flock(self._spill_file.fileno(), fcntl.LOCK_EX)
+        self._committed_seq = self._read_checkpoint()
+        self._last_seq = max(self._committed_seq, self._max_spilled_seq())
+        # Entries up to this seq were spilled by a previous process with this pid
+        self._recovery_seq = self._last_seq
+    
+    def _check_fork(self):
+        """Give a forked worker its own spill file and writer."""
+        if self._spill_pid == os.getpid():
+            return
+        with self._spill_lock:
+            if self._spill_pid == os.getpid():
+                return
+            self._open_spill()
+            # The parent's writer thread doesn't exist in the child
+            self._queue = queue.Queue(maxsize=self._queue.maxsize)
+            self._retry = []
+            self._writer_thread = None
+            self._writer_active = False
+            self._idle.set()
+    
+    def _read_checkpoint(self, path: Optional[str] = None) -> int:
+        try:
+            with open(path or self.checkpoint_path, 'r') as f:
+                return int(f.read().strip() or 0)
+        except (OSError, ValueError):
+            return 0
+    
+    def _write_checkpoint(self, seq: int):
+        tmp_path = self.checkpoint_path + '.tmp'
+        with open(tmp_path, 'w') as f:
+            f.write(str(seq))
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_path, self.checkpoint_path)
+    
+    def _read_spill(self, path: Optional[str] = None) -> List[Dict[str, Any]]:
+        entries = []
+        path = path or self.spill_path
+        if not os.path.exists(path):
+            return entries
+        with open(path, 'r', encoding='utf-8') as f:
+            for line in f:
+                try:
+                    entry = json.loads(line)
+                except json.JSONDecodeError:
+                    # Torn final line from a crash mid-write
+                    continue
+                entry['timestamp'] = datetime.fromisoformat(entry['timestamp'])
+                entries.append(entry)
+        return entries
+    
+    def _max_spilled_seq(self) -> int:
+        return max((entry['seq'] for entry in self._read_spill()), default=0)
+    
+    def _spill(self, record: Dict[str, Any]):
+        """Assign a sequence number and append the entry durably to the spill file."""
+        with self._spill_lock:
+            self._last_seq += 1
+            record['seq'] = self._last_seq
+            line = json.dumps({**record, 'timestamp': record['timestamp'].isoformat()}, default=str)
+            self._spill_file.write(line + '\n')
+            self._spill_file.flush()
+            os.fsync(self._spill_file.fileno())
+    
+    def _submit(self, record: Dict[str, Any]):
+        """Hand a record to the writer (or write it inline when async is off)."""
+        if not self.async_writes:
+            self._write_batch([record])
+            return
+        
+        self._check_fork()
+        self._spill(record)
+        self._ensure_writer()
+        
+        self._idle.clear()
+        try:
+            self._queue.put_nowait(record)
+        except queue.Full:
+            # Backpressure: block the caller until the writer catches up
+            started = time.monotonic()
+            self._queue.put(record)
+            self._metrics['blocked_puts'] += 1
+            self._metrics['blocked_seconds'] += time.monotonic() - started
+        
+        self._metrics['enqueued'] += 1
+        self._metrics['max_queue_depth'] = max(self._metrics['max_queue_depth'], self._queue.qsize())
+    
+    def _ensure_writer(self):
+        if self._writer_active:
+            return
+        if self.app is None and has_app_context():
+            self.app = current_app._get_current_object()
+        self.start_writer()
+    
+    def start_writer(self, app=None):
+        """Start the background writer thread (replays any uncommitted spill first)."""
+        if app is not None:
+            self.app = app
+        if self._writer_active:
+            return False
+        self._writer_active = True
+        if self._recovery_seq > self._committed_seq:
+            # flush() should wait for the replay of a previous run's spill
+            self._idle.clear()
+        self._writer_thread = threading.Thread(target=self._writer_loop, name='hipaa-audit-writer')
+        self._writer_thread.daemon = True
+        self._writer_thread.start()
+        atexit.register(self.stop_writer)
+        return True
+    
+    def stop_writer(self, timeout: float = 10.0):
+        """Drain the queue and stop the background writer."""
+        if not self._writer_active:
+            return False
+        self._writer_active = False
+        if self._writer_thread:
+            self._writer_thread.join(timeout=timeout)
+        return True
+    
+    def flush(self, timeout: float = 10.0) -> bool:
+        """
+        Block until every queued entry has been committed
+        
+        Returns:
+            bool: True if the queue drained within the timeout
+        """
+        if not self._writer_active:
+            return self._queue.empty() and not self._retry
+        return self._idle.wait(timeout)
+    
+    def get_metrics(self) -> Dict[str, Any]:
+        """Backpressure and throughput counters for the audit pipeline"""
+        return {
+            **self._metrics,
+            'queue_depth': self._queue.qsize(),
+            'queue_capacity': self._queue.maxsize,
+            'pending_retry': len(self._retry),
+            'uncommitted_spilled': self._last_seq - self._committed_seq,
+            'writer_active': self._writer_active
+        }
+    
+    def _run_in_app_context(self, func, *args):
+        if self.db_session is None and self.app is not None and not has_app_context():
+            with self.app.app_context():
+                return func(*args)
+        return func(*args)
+    
+    def _writer_loop(self):
+        try:
+            self._run_in_app_context(self._recover_spill)
+        except Exception as e:
+            logger.error(f"Failed to recover audit spill file: {e}")
+        
+        while self._writer_active or not self._queue.empty() or self._retry:
+            batch = self._retry
+            self._retry = []
+            try:
+                if not batch:
+                    batch.append(self._queue.get(timeout=self.flush_interval))
+                while len(batch) < self.batch_size:
+                    batch.append(self._queue.get_nowait())
+            except queue.Empty:
+                pass
+            
+            if not batch:
+                self._idle.set()
+                continue
+            
+            try:
+                self._run_in_app_context(self._write_batch, batch)
+            except Exception as e:
+                logger.error(f"Audit batch of {len(batch)} failed, will retry: {e}")
+                self._metrics['failed_batches'] += 1
+                self._retry = batch
+                if not self._writer_active:
+                    # Shutting down: entries stay in the spill file for replay
+                    break
+                time.sleep(min(5.0, self.flush_interval * 4))
+                continue
+            
+            if self._queue.empty() and not self._retry:
+                self._idle.set()
+    
+    def _write_batch(self, batch: List[Dict[str, Any]]):
+        """Chain and bulk-insert one batch in a single transaction."""
+        from models import AuditLog, AuditChainHead
+        from sqlalchemy import insert, update
+        
+        started = time.monotonic()
+        db = self._get_db_session()
+        try:
+            # Take the chain lock before reading the head: the row update
+            # blocks other writers (in any process) until this transaction
+            # ends, so the head read below is always the latest committed row
+            now = datetime.utcnow()
+            locked = db.execute(
+                update(AuditChainHead).where(AuditChainHead.id == 1).values(updated_at=now)
+            ).rowcount
+            if not locked:
+                # First batch ever; a concurrent first insert fails on the
+                # primary key and that batch is retried
+                db.add(AuditChainHead(id=1, updated_at=now))
+                db.flush()
+            
+            previous = db.query(AuditLog.checksum).order_by(
+                AuditLog.id.desc()
+            ).limit(1).scalar()
+            
+            rows = []
+            for record in batch:
+                row = {field: record.get(field) for field in CHECKSUM_FIELDS}
+                row['checksum'] = self._chain_checksum(previous, row)
+                previous = row['checksum']
+                rows.append(row)
+            
+            db.execute(insert(AuditLog), rows)
+            db.commit()
+        except Exception:
+            db.rollback()
+            raise
+        
+        self._metrics['written'] += len(batch)
+        self._metrics['batches'] += 1
+        self._metrics['last_batch_size'] = len(batch)
+        self._metrics['last_flush_ms'] = (time.monotonic() - started) * 1000
+        
+        last_seq = max((record.get('seq', 0) for record in batch), default=0)
+        if last_seq:
+            self._mark_committed(last_seq)
+    
+    def _mark_committed(self, seq: int):
+        """Advance the spill checkpoint and truncate the spill once fully committed."""
+        with self._spill_lock:
+            self._committed_seq = max(self._committed_seq, seq)
+            self._write_checkpoint(self._committed_seq)
+            if self._committed_seq >= self._last_seq:
+                self._spill_file.truncate(0)
+                self._spill_file.seek(0)
+    
+    def _already_committed(self, db, entry: Dict[str, Any]) -> bool:
+        """Whether a spilled entry reached the database before its checkpoint was written."""
+        from models import AuditLog
+        
+        return db.query(AuditLog.id).filter(
+            AuditLog.timestamp == entry['timestamp'],
+            AuditLog.event_type == entry['event_type'],
+            AuditLog.action == entry['action'],
+            AuditLog.user_id == entry['user_id']
+        ).first() is not None
+    
+    def _orphaned_spills(self) -> List[str]:
+        """Spill files of other processes (and the pre-per-process shared file)."""
+        root, ext = os.path.splitext(self.spill_base)
+        paths = glob.glob(f"{glob.escape(root)}.*{ext}") + [self.spill_base]
+        return [
+            path for path in paths
+            if path != self.spill_path and os.path.exists(path)
+        ]
+    
+    def _adopt_spill(self, db, path: str) -> List[Dict[str, Any]]:
+        """
+        Move the uncommitted entries of an exited process's spill file into ours.
+        
+        Returns:
+            list: The adopted entries (with sequence numbers in our spill)
+        """
+        with open(path, 'a+', encoding='utf-8') as f:
+            try:
+                fcntl.flock(f.fileno(), fcntl.LOCK_EX | fcntl.LOCK_NB)
+            except OSError:
+                return []  # The owning process is still running
+            try:
+                if os.fstat(f.fileno()).st_ino != os.stat(path).st_ino:
+                    return []  # Adopted and removed by another process meanwhile
+            except OSError:
+                return []
+            
+            committed = self._read_checkpoint(path + '.ckpt')
+            adopted = []
+            for entry in self._read_spill(path):
+                if entry.get('seq', 0) <= committed or self._already_committed(db, entry):
+                    continue
+                entry.pop('seq', None)
+                self._spill(entry)
+                adopted.append(entry)
+            
+            # Our spill now holds the entries durably
+            os.remove(path)
+            try:
+                os.remove(path + '.ckpt')
+            except OSError:
+                pass
+        return adopted
+    
+    def _recover_spill(self):
+        """Re-queue spilled entries that never reached the database."""
+        pending = [
+            entry for entry in self._read_spill()
+            if self._committed_seq < entry['seq'] <= self._recovery_seq
+        ]
+        
+        db = self._get_db_session()
+        recovered = [entry for entry in pending if not self._already_committed(db, entry)]
+        if fcntl is not None:
+            for path in self._orphaned_spills():
+                recovered.extend(self._adopt_spill(db, path))
+        db.rollback()
+        
+        if not recovered and not pending:
+            return
+        
+        self._retry = recovered + self._retry
+        self._metrics['recovered'] += len(recovered)
+        if recovered:
+            self._idle.clear()
+        else:
+            self._mark_committed(pending[-1]['seq'])
+        logger.warning(f"Recovered {len(recovered)} uncommitted audit entries from {self.spill_path}")
+    
+    # ------------------------------------------------------------------
+    # Logging API
+    # ------------------------------------------------------------------
+    
     def log_phi_access(
         self,
         user_id: Optional[int],
@@ -125,21 +635,9 @@ class HIPAAAuditLogger:
             ...     outcome='SUCCESS'
             ... )
         """
+        audit_data = None
         try:
-            from models import AuditLog
-            
-            # Get request context
-            ip_address = None
-            user_agent = None
-            session_id = None
-            
-            try:
-                ip_address = request.remote_addr
-                user_agent = request.headers.get('User-Agent', '')[:500]  # Limit length
-                session_id = session.get('session_id', '')
-            except RuntimeError:
-                # Outside request context (e.g., background task)
-                pass
+            ip_address, user_agent, session_id = self._request_context()
             
             # Create audit entry
             audit_data = {
@@ -153,31 +651,10 @@ class HIPAAAuditLogger:
                 'ip_address': ip_address,
                 'user_agent': user_agent,
                 'session_id': session_id,
-                'details': details or {}
+                'details': json.dumps(details) if details else None
             }
             
-            # Generate checksum for integrity
-            checksum = self._create_checksum(audit_data)
-            
-            # Save to database
-            audit_log = AuditLog(
-                timestamp=audit_data['timestamp'],
-                event_type=audit_data['event_type'],
-                action=action,
-                outcome=outcome,
-                user_id=user_id,
-                patient_id=patient_id,
-                resource_type=resource,
-                ip_address=ip_address,
-                user_agent=user_agent,
-                session_id=session_id,
-                details=json.dumps(details) if details else None,
-                checksum=checksum
-            )
-            
-            db = self._get_db_session()
-            db.add(audit_log)
-            db.commit()
+            self._submit(audit_data)
             
             # Also log to file for redundancy
             self.logger.info(
@@ -214,47 +691,22 @@ class HIPAAAuditLogger:
             ...     details={'username': 'jdoe', 'reason': 'invalid_password'}
             ... )
         """
+        security_data = None
         try:
-            from models import AuditLog
-            
-            # Get request context
-            ip_address = None
-            user_agent = None
-            
-            try:
-                ip_address = request.remote_addr
-                user_agent = request.headers.get('User-Agent', '')[:500]
-            except RuntimeError:
-                pass
+            ip_address, user_agent, _ = self._request_context(include_session=False)
             
             security_data = {
                 'timestamp': datetime.utcnow(),
                 'event_type': event_type,
-                'severity': severity,
+                'action': 'SECURITY_EVENT',
+                'outcome': severity,
                 'user_id': user_id,
                 'ip_address': ip_address,
                 'user_agent': user_agent,
-                'details': details
+                'details': json.dumps(details)
             }
             
-            checksum = self._create_checksum(security_data)
-            
-            # Save to database
-            audit_log = AuditLog(
-                timestamp=security_data['timestamp'],
-                event_type=event_type,
-                action='SECURITY_EVENT',
-                outcome=severity,
-                user_id=user_id,
-                ip_address=ip_address,
-                user_agent=user_agent,
-                details=json.dumps(details),
-                checksum=checksum
-            )
-            
-            db = self._get_db_session()
-            db.add(audit_log)
-            db.commit()
+            self._submit(security_data)
             
             # Log to file
             log_method = {
@@ -289,41 +741,20 @@ class HIPAAAuditLogger:
             details: Action details
         """
         try:
-            from models import AuditLog
-            
-            ip_address = None
-            try:
-                ip_address = request.remote_addr
-            except RuntimeError:
-                pass
+            ip_address, _, _ = self._request_context(include_session=False)
             
             admin_data = {
                 'timestamp': datetime.utcnow(),
                 'event_type': 'ADMIN_ACTION',
                 'action': action,
-                'admin_user_id': admin_user_id,
-                'target_user_id': target_user_id,
+                'outcome': 'SUCCESS',
+                'user_id': admin_user_id,
+                'patient_id': target_user_id,  # Reuse patient_id field for target
                 'ip_address': ip_address,
-                'details': details
+                'details': json.dumps(details)
             }
             
-            checksum = self._create_checksum(admin_data)
-            
-            audit_log = AuditLog(
-                timestamp=admin_data['timestamp'],
-                event_type='ADMIN_ACTION',
-                action=action,
-                outcome='SUCCESS',
-                user_id=admin_user_id,
-                patient_id=target_user_id,  # Reuse patient_id field for target
-                ip_address=ip_address,
-                details=json.dumps(details),
-                checksum=checksum
-            )
-            
-            db = self._get_db_session()
-            db.add(audit_log)
-            db.commit()
+            self._submit(admin_data)
             
             self.logger.info(
                 f"ADMIN_ACTION | Admin:{admin_user_id} | Action:{action} | "
@@ -333,10 +764,20 @@ class HIPAAAuditLogger:
         except Exception as e:
             logger.error(f"Failed to log admin action: {e}")
     
+    # ------------------------------------------------------------------
+    # Integrity verification
+    # ------------------------------------------------------------------
+    
+    def _verify_row(self, log_entry, previous_checksum: Optional[str]) -> bool:
+        link = (log_entry.id, previous_checksum, self._row_record(log_entry), log_entry.checksum)
+        return _first_broken([link]) is None
+    
     def verify_log_integrity(self, audit_log_id: int) -> bool:
         """
         Verify that an audit log entry has not been tampered with
         
+        Checks the row's chained checksum against its predecessor's.
+        
         Args:
             audit_log_id: ID of audit log to verify
         
@@ -352,24 +793,11 @@ class HIPAAAuditLogger:
             if not log_entry:
                 return False
             
-            # Reconstruct data for checksum
-            data = {
-                'timestamp': log_entry.timestamp,
-                'event_type': log_entry.event_type,
-                'action': log_entry.action,
-                'outcome': log_entry.outcome,
-                'user_id': log_entry.user_id,
-                'patient_id': log_entry.patient_id,
-                'resource_type': log_entry.resource_type,
-                'ip_address': log_entry.ip_address,
-                'user_agent': log_entry.user_agent,
-                'session_id': log_entry.session_id,
-                'details': json.loads(log_entry.details) if log_entry.details else {}
-            }
-            
-            calculated_checksum = self._create_checksum(data)
+            previous_checksum = db.query(AuditLog.checksum).filter(
+                AuditLog.id < audit_log_id
+            ).order_by(AuditLog.id.desc()).limit(1).scalar()
             
-            is_valid = calculated_checksum == log_entry.checksum
+            is_valid = self._verify_row(log_entry, previous_checksum)
             
             if not is_valid:
                 self.logger.critical(
@@ -383,6 +811,163 @@ class HIPAAAuditLogger:
             logger.error(f"Failed to verify log integrity: {e}")
             return False
     
+    def verify_log_range(
+        self,
+        start_id: Optional[int] = None,
+        end_id: Optional[int] = None,
+        chunk_size: int = 5000,
+        workers: Optional[int] = None
+    ) -> Dict[str, Any]:
+        """
+        Verify the hash chain over a contiguous id range
+        
+        Rows are streamed in id order with ``yield_per`` so memory stays
+        bounded by a few chunks regardless of table size. Every link carries
+        the stored checksum of its predecessor, so chunks are independent
+        and are recomputed in a process pool.
+        
+        Args:
+            start_id: First id to check (default: first row)
+            end_id: Last id to check, inclusive (default: last row)
+            chunk_size: Rows per fetch and per worker task
+            workers: Worker processes (default: CPU count; 0 or 1 verifies inline)
+        
+        Returns:
+            dict: valid flag, rows checked and the first broken id (if any)
+        """
+        try:
+            from models import AuditLog
+            
+            db = self._get_db_session()
+            previous_checksum = None
+            columns = [getattr(AuditLog, field) for field in CHECKSUM_FIELDS]
+            query = db.query(AuditLog.id, AuditLog.checksum, *columns)
+            if start_id is not None:
+                previous_checksum = db.query(AuditLog.checksum).filter(
+                    AuditLog.id < start_id
+                ).order_by(AuditLog.id.desc()).limit(1).scalar()
+                query = query.filter(AuditLog.id >= start_id)
+            if end_id is not None:
+                query = query.filter(AuditLog.id <= end_id)
+            
+            def chunks():
+                nonlocal previous_checksum
+                chunk = []
+                for row in query.order_by(AuditLog.id.asc()).yield_per(chunk_size):
+                    record = dict(zip(CHECKSUM_FIELDS, row[2:]))
+                    chunk.append((row.id, previous_checksum, record, row.checksum))
+                    previous_checksum = row.checksum
+                    if len(chunk) >= chunk_size:
+                        yield chunk
+                        chunk = []
+                if chunk:
+                    yield chunk
+            
+            workers = os.cpu_count() if workers is None else workers
+            checked = 0
+            first_broken_id = None
+            
+            if workers and workers > 1:
+                with ProcessPoolExecutor(max_workers=workers) as pool:
+                    in_flight = deque()
+                    source = chunks()
+                    for chunk in source:
+                        in_flight.append((len(chunk), pool.submit(_first_broken, chunk)))
+                        # Keep at most two chunks per worker buffered
+                        if len(in_flight) < workers * 2:
+                            continue
+                        size, future = in_flight.popleft()
+                        first_broken_id = future.result()
+                        checked += size
+                        if first_broken_id is not None:
+                            break
+                    while first_broken_id is None and in_flight:
+                        size, future = in_flight.popleft()
+                        first_broken_id = future.result()
+                        checked += size
+                    for _, future in in_flight:
+                        future.cancel()
+            else:
+                for chunk in chunks():
+                    checked += len(chunk)
+                    first_broken_id = _first_broken(chunk)
+                    if first_broken_id is not None:
+                        break
+            
+            if first_broken_id is not None:
+                self.logger.critical(
+                    f"INTEGRITY_VIOLATION | Log ID:{first_broken_id} | "
+                    f"Hash chain broken!"
+                )
+                return {'valid': False, 'checked': checked, 'first_broken_id': first_broken_id}
+            
+            return {'valid': True, 'checked': checked, 'first_broken_id': None}
+            
+        except Exception as e:
+            logger.error(f"Failed to verify log range: {e}")
+            return {'valid': False, 'checked': 0, 'first_broken_id': None, 'error': str(e)}
+    
+    def export_disclosure_accounting(
+        self,
+        patient_id: int,
+        fmt: str = 'csv',
+        start: Optional[datetime] = None,
+        end: Optional[datetime] = None,
+        chunk_size: int = 1000
+    ) -> Iterator[str]:
+        """
+        Stream a patient's accounting of disclosures as CSV or JSONL
+        
+        Covers the full HIPAA retention window by default. Rows are fetched
+        with ``yield_per`` and emitted one line at a time, so the generator
+        can be handed straight to a streaming Flask ``Response`` without
+        holding the report in memory.
+        
+        Args:
+            patient_id: Patient ID
+            fmt: 'csv' (with header row) or 'jsonl'
+            start: Earliest timestamp (default: RETENTION_DAYS ago)
+            end: Latest timestamp, exclusive (default: now)
+            chunk_size: Rows per database fetch
+        
+        Yields:
+            str: One CSV or JSON line, newline terminated
+        """
+        from models import AuditLog
+        
+        if fmt not in ('csv', 'jsonl'):
+            raise ValueError(f"Unsupported disclosure format: {fmt}")
+        
+        start = start or datetime.utcnow() - timedelta(days=RETENTION_DAYS)
+        
+        db = self._get_db_session()
+        query = db.query(*[getattr(AuditLog, column) for column in DISCLOSURE_COLUMNS]).filter(
+            AuditLog.patient_id == patient_id,
+            AuditLog.timestamp >= start,
+            AuditLog.event_type == 'PHI_ACCESS'
+        )
+        if end is not None:
+            query = query.filter(AuditLog.timestamp < end)
+        
+        buffer = io.StringIO()
+        writer = csv.writer(buffer)
+        if fmt == 'csv':
+            writer.writerow(DISCLOSURE_COLUMNS)
+            yield buffer.getvalue()
+        
+        for row in query.order_by(AuditLog.timestamp.asc(), AuditLog.id.asc()).yield_per(chunk_size):
+            values = dict(zip(DISCLOSURE_COLUMNS, row))
+            values['timestamp'] = values['timestamp'].isoformat() if values['timestamp'] else None
+            if fmt == 'jsonl':
+                yield json.dumps(values) + '\n'
+            else:
+                buffer.seek(0)
+                buffer.truncate(0)
+                writer.writerow([values[column] for column in DISCLOSURE_COLUMNS])
+                yield buffer.getvalue()
+        
+        self.logger.info(f"DISCLOSURE_REPORT | Patient:{patient_id} | Since:{start.isoformat()} | Format:{fmt}")
+    
     def get_patient_access_history(
         self,
         patient_id: int,
@@ -394,7 +979,8 @@ class HIPAAAuditLogger:
         
         Args:
             patient_id: Patient ID
-            days: Number of days to look back (default: 30, HIPAA requires 6 years)
+            days: Number of days to look back (default: 30; use
+                export_disclosure_accounting for the full 6-year report)
             limit: Maximum number of records to return
         
         Returns:
@@ -402,7 +988,6 @@ class HIPAAAuditLogger:
         """
         try:
             from models import AuditLog
-            from datetime import timedelta
             
             db = self._get_db_session()
             cutoff_date = datetime.utcnow() - timedelta(days=days)
@@ -0,0 +1,259 @@
+# © 2025 The Christman AI Project. All rights reserved.
+#
+# This code is released as part of a trauma-informed, dignity-first AI ecosystem
+# designed to protect, empower, and elevate vulnerable populations.
+#
+# By using, modifying, or distributing this software, you agree to uphold the following:
+# 1. Truth — No deception, no manipulation.
+# 2. Dignity — Respect the autonomy and humanity of all users.
+# 3. Protection — Never use this to exploit or harm vulnerable individuals.
+# 4. Transparency — Disclose all modifications and contributions clearly.
+# 5. No Erasure — Preserve the mission and ethical origin of this work.
+#
+# This is not just code. This is redemption in code.
+# Contact: lumacognify@thechristmanaiproject.com
+# https://thechristmanaiproject.com
+
+"""
+Location History Store for AlphaWolf
+Part of The Christman AI Project - Powered by LumaCognify AI
+
+Fixed-size binary ring buffer per patient, memory-mapped so that logging a
+GPS fix is a single 24-byte record write instead of a JSON rewrite.
+
+File layout (little-endian):
+    header  (32 bytes): magic b'AWLH', version u4, capacity u8, written u8, reserved u8
+    records (24 bytes each): latitude f8, longitude f8, timestamp i8 (UTC epoch microseconds)
+"""
+
+import json
+import logging
+import os
+import threading
+from collections import OrderedDict
+from datetime import datetime, timedelta, timezone
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+MAGIC = b'AWLH'
+VERSION = 1
+HEADER_DTYPE = np.dtype([
+    ('magic', 'S4'),
+    ('version', '<u4'),
+    ('capacity', '<u8'),
+    ('written', '<u8'),
+    ('reserved', '<u8'),
+])
+RECORD_DTYPE = np.dtype([
+    ('latitude', '<f8'),
+    ('longitude', '<f8'),
+    ('timestamp', '<i8'),
+])
+HEADER_SIZE = HEADER_DTYPE.itemsize
+
+_EPOCH = datetime(1970, 1, 1)
+
+
+def _to_epoch_us(timestamp):
+    """Convert an ISO string or datetime to UTC epoch microseconds."""
+    if timestamp is None:
+        timestamp = datetime.utcnow()
+    elif isinstance(timestamp, str):
+        timestamp = datetime.fromisoformat(timestamp.replace('Z', '+00:00'))
+    if timestamp.tzinfo is not None:
+        timestamp = timestamp.astimezone(timezone.utc).replace(tzinfo=None)
+    delta = timestamp - _EPOCH
+    return (delta.days * 86400 + delta.seconds) * 1_000_000 + delta.microseconds
+
+
+def _from_epoch_us(value):
+    return (_EPOCH + timedelta(microseconds=int(value))).isoformat()
+
+
+class _RingBuffer:
+    """One patient's memory-mapped ring buffer."""
+
+    def __init__(self, path, capacity):
+        self.path = path
+        if not os.path.exists(path):
+            header = np.zeros(1, dtype=HEADER_DTYPE)
+            header['magic'] = MAGIC
+            header['version'] = VERSION
+            header['capacity'] = capacity
+            with open(path, 'wb') as f:
+                f.write(header.tobytes())
+                f.truncate(HEADER_SIZE + capacity * RECORD_DTYPE.itemsize)
+
+        self._map = np.memmap(path, dtype=np.uint8, mode='r+')
+        self.header = self._map[:HEADER_SIZE].view(HEADER_DTYPE)
+        if self.header['magic'][0] != MAGIC:
+            raise ValueError(f"{path} is not a location history file")
+        self.capacity = int(self.header['capacity'][0])
+        self.records = self._map[HEADER_SIZE:HEADER_SIZE + self.capacity * RECORD_DTYPE.itemsize].view(RECORD_DTYPE)
+
+    @property
+    def written(self):
+        return int(self.header['written'][0])
+
+    def append(self, latitude, longitude, timestamp_us):
+        slot = self.written % self.capacity
+        self.records[slot] = (latitude, longitude, timestamp_us)
+        self.header['written'][0] = self.written + 1
+
+    def tail(self, limit):
+        """
+        Most recent records, oldest first.
+
+        Returns a view into the mapping when the requested range does not
+        wrap around the end of the buffer; otherwise the two halves are
+        concatenated into a new array.
+        """
+        count = min(self.written, self.capacity)
+        if limit is None or limit <= 0 or limit > count:
+            limit = count
+        if limit == 0:
+            return self.records[:0]
+        start = (self.written - limit) % self.capacity
+        end = self.written % self.capacity
+        if start < end:
+            return self.records[start:end]
+        if end == 0:
+            return self.records[start:]
+        return np.concatenate((self.records[start:], self.records[:end]))
+
+    def flush(self):
+        self._map.flush()
+
+    def close(self):
+        self._map.flush()
+        del self._map
+
+
+class LocationHistoryStore:
+    """Per-patient ring buffers of location fixes under a single directory."""
+
+    def __init__(self, directory, capacity=1000, max_open=256):
+        """
+        Args:
+            directory: Directory holding ``<patient_id>.loc`` files
+            capacity: Records kept per patient (older fixes are overwritten)
+            max_open: Number of patient files kept mapped at once
+        """
+        self.directory = directory
+        self.capacity = capacity
+        self.max_open = max_open
+        self._buffers = OrderedDict()
+        self._lock = threading.Lock()
+        os.makedirs(directory, exist_ok=True)
+
+    def _path(self, patient_id):
+        return os.path.join(self.directory, f"{patient_id}.loc")
+
+    def _legacy_path(self, patient_id):
+        return os.path.join(self.directory, f"{patient_id}.json")
+
+    def _buffer(self, patient_id, create=True):
+        key = str(patient_id)
+        buffer = self._buffers.get(key)
+        if buffer is not None:
+            self._buffers.move_to_end(key)
+            return buffer
+
+        path = self._path(key)
+        if not os.path.exists(path):
+            if not create and not os.path.exists(self._legacy_path(key)):
+                return None
+            buffer = _RingBuffer(path, self.capacity)
+            self._import_legacy(key, buffer)
+        else:
+            buffer = _RingBuffer(path, self.capacity)
+
+        self._buffers[key] = buffer
+        if len(self._buffers) > self.max_open:
+            _, evicted = self._buffers.popitem(last=False)
+            evicted.close()
+        return buffer
+
+    def _import_legacy(self, patient_id, buffer):
+        """Copy an old JSON history into a fresh ring buffer and retire the file."""
+        legacy_path = self._legacy_path(patient_id)
+        if not os.path.exists(legacy_path):
+            return 0
+        try:
+            with open(legacy_path, 'r') as f:
+                history = json.load(f)
+        except (OSError, json.JSONDecodeError) as e:
+            logger.error(f"Could not read legacy location history {legacy_path}: {str(e)}")
+            return 0
+
+        imported = 0
+        for entry in history[-buffer.capacity:]:
+            try:
+                buffer.append(entry['latitude'], entry['longitude'], _to_epoch_us(entry.get('timestamp')))
+                imported += 1
+            except (KeyError, TypeError, ValueError):
+                continue
+        buffer.flush()
+        os.replace(legacy_path, legacy_path + '.migrated')
+        logger.info(f"Migrated {imported} location fixes for patient {patient_id}")
+        return imported
+
+    def append(self, patient_id, latitude, longitude, timestamp=None):
+        """Record one location fix (O(1))."""
+        timestamp_us = _to_epoch_us(timestamp)
+        with self._lock:
+            self._buffer(patient_id).append(float(latitude), float(longitude), timestamp_us)
+
+    def tail(self, patient_id, limit=100):
+        """
+        Most recent fixes as a NumPy structured array (latitude, longitude,
+        timestamp in epoch microseconds), oldest first.
+        """
+        with self._lock:
+            buffer = self._buffer(patient_id, create=False)
+            if buffer is None:
+                return np.empty(0, dtype=RECORD_DTYPE)
+            return buffer.tail(limit)
+
+    def get_history(self, patient_id, limit=100):
+        """Most recent fixes as dicts, matching the legacy JSON history format."""
+        records = self.tail(patient_id, limit)
+        return [{
+            'timestamp': _from_epoch_us(record['timestamp']),
+            'latitude': float(record['latitude']),
+            'longitude': float(record['longitude'])
+        } for record in records]
+
+    def migrate_all(self):
+        """
+        Convert every legacy ``<patient_id>.json`` history in the directory.
+
+        Returns:
+            dict: patient_id -> number of fixes migrated
+        """
+        migrated = {}
+        for name in os.listdir(self.directory):
+            if not name.endswith('.json'):
+                continue
+            patient_id = name[:-len('.json')]
+            with self._lock:
+                if os.path.exists(self._path(patient_id)):
+                    continue
+                buffer = _RingBuffer(self._path(patient_id), self.capacity)
+                migrated[patient_id] = self._import_legacy(patient_id, buffer)
+                buffer.close()
+        return migrated
+
+    def flush(self):
+        """Flush all open mappings to disk."""
+        with self._lock:
+            for buffer in self._buffers.values():
+                buffer.flush()
+
+    def close(self):
+        with self._lock:
+            for buffer in self._buffers.values():
+                buffer.close()
+            self._buffers.clear()
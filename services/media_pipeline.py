@@ -0,0 +1,509 @@
+# © 2025 The Christman AI Project. All rights reserved.
+#
+# This code is released as part of a trauma-informed, dignity-first AI ecosystem
+# designed to protect, empower, and elevate vulnerable populations.
+#
+# By using, modifying, or distributing this software, you agree to uphold the following:
+# 1. Truth — No deception, no manipulation.
+# 2. Dignity — Respect the autonomy and humanity of all users.
+# 3. Protection — Never use this to exploit or harm vulnerable individuals.
+# 4. Transparency — Disclose all modifications and contributions clearly.
+# 5. No Erasure — Preserve the mission and ethical origin of this work.
+#
+# This is not just code. This is redemption in code.
+# Contact: lumacognify@thechristmanaiproject.com
+# https://thechristmanaiproject.com
+
+"""
+Media Pipeline for AlphaWolf Memory Lane
+Part of The Christman AI Project - Powered by LumaCognify AI
+
+Resumable chunked uploads that stream straight to disk, content-addressed
+storage so identical media is only kept once, and a background process pool
+that renders derivatives (thumbnails, web-sized images, normalized audio,
+video posters and 720p transcodes).
+
+Media is stored as ``uploads/<media dir>/<sha256>.<ext>`` and derivatives
+under ``uploads/derivatives/<sha256>/``. Blob and job records live in the
+Memory Lane metadata store (kinds ``blob`` and ``media_job``).
+"""
+
+import hashlib
+import logging
+import os
+import shutil
+import subprocess
+import threading
+import uuid
+import wave
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime
+from typing import Any, BinaryIO, Dict, List, Optional
+
+logger = logging.getLogger(__name__)
+
+COPY_BUFFER_SIZE = 1024 * 1024
+DEFAULT_CHUNK_SIZE = 8 * 1024 * 1024
+
+# media type -> directory under uploads/
+MEDIA_DIRS = {
+    'photo': 'photos',
+    'video': 'videos',
+    'voice': 'voice',
+}
+
+IMAGE_RENDITIONS = {
+    'thumbnail': 320,
+    'web': 1600,
+}
+
+
+# ----------------------------------------------------------------------
+# Derivative renderers (run in worker processes; must stay module-level)
+# ----------------------------------------------------------------------
+
+def _render_image(source_path: str, output_dir: str) -> Dict[str, Any]:
+    from PIL import Image, ImageOps
+
+    derivatives = {}
+    with Image.open(source_path) as original:
+        # Respect camera orientation before resizing
+        image = ImageOps.exif_transpose(original)
+        if image.mode not in ('RGB', 'L'):
+            image = image.convert('RGB')
+        for name, max_side in IMAGE_RENDITIONS.items():
+            rendition = image.copy()
+            rendition.thumbnail((max_side, max_side), Image.LANCZOS)
+            path = os.path.join(output_dir, f"{name}.jpg")
+            rendition.save(path, 'JPEG', quality=82 if name == 'web' else 75, optimize=True, progressive=True)
+            derivatives[name] = {'path': path, 'width': rendition.width, 'height': rendition.height}
+    return derivatives
+
+
+def _normalize_wav(source_path: str, output_path: str, target_peak: float = 0.89):
+    """Peak-normalize 16-bit PCM WAV without external tools."""
+    import numpy as np
+
+    with wave.open(source_path, 'rb') as reader:
+        params = reader.getparams()
+        if params.sampwidth != 2:
+            raise ValueError("Only 16-bit PCM WAV can be normalized without ffmpeg")
+        samples = np.frombuffer(reader.readframes(params.nframes), dtype='<i2')
+    peak = int(np.abs(samples.astype(np.int32)).max()) if samples.size else 0
+    if peak:
+        gain = target_peak * 32767 / peak
+        samples = np.clip(samples.astype(np.float64) * gain, -32768, 32767).astype('<i2')
+    with wave.open(output_path, 'wb') as writer:
+        writer.setparams(params)
+        writer.writeframes(samples.tobytes())
+
+
+def _run_ffmpeg(args: List[str]):
+    subprocess.run(
+        ['ffmpeg', '-y', '-loglevel', 'error'] + args,
+        check=True, stdout=subprocess.DEVNULL, stderr=subprocess.PIPE, timeout=1800
+    )
+
+
+def _render_audio(source_path: str, output_dir: str) -> Dict[str, Any]:
+    if shutil.which('ffmpeg'):
+        path = os.path.join(output_dir, 'normalized.m4a')
+        _run_ffmpeg(['-i', source_path, '-af', 'loudnorm=I=-16:TP=-1.5:LRA=11', '-c:a', 'aac', '-b:a', '128k', path])
+        return {'normalized': {'path': path}}
+    if source_path.lower().endswith('.wav'):
+        path = os.path.join(output_dir, 'normalized.wav')
+        _normalize_wav(source_path, path)
+        return {'normalized': {'path': path}}
+    return {'skipped': 'ffmpeg not available'}
+
+
+def _render_video(source_path: str, output_dir: str) -> Dict[str, Any]:
+    if not shutil.which('ffmpeg'):
+        return {'skipped': 'ffmpeg not available'}
+    poster = os.path.join(output_dir, 'poster.jpg')
+    _run_ffmpeg(['-ss', '1', '-i', source_path, '-frames:v', '1', '-vf', 'scale=640:-2', poster])
+    derivatives = {'poster': {'path': poster}}
+    derivatives.update({
+        name: info for name, info in _render_image(poster, output_dir).items()
+        if name == 'thumbnail'
+    })
+    web = os.path.join(output_dir, 'web.mp4')
+    _run_ffmpeg([
+        '-i', source_path, '-vf', "scale='min(1280,iw)':-2", '-c:v', 'libx264', '-preset', 'veryfast',
+        '-crf', '26', '-c:a', 'aac', '-b:a', '128k', '-movflags', '+faststart', web
+    ])
+    derivatives['web'] = {'path': web}
+    return derivatives
+
+
+def render_derivatives(media_type: str, source_path: str, output_dir: str) -> Dict[str, Any]:
+    """
+    Render all derivatives for one media file (worker process entry point)
+
+    Args:
+        media_type: photo, video or voice
+        source_path: Stored original
+        output_dir: Directory for the derivatives
+
+    Returns:
+        dict: derivative name -> {'path': ..., ...}
+    """
+    os.makedirs(output_dir, exist_ok=True)
+    if media_type == 'photo':
+        return _render_image(source_path, output_dir)
+    if media_type == 'video':
+        return _render_video(source_path, output_dir)
+    if media_type == 'voice':
+        return _render_audio(source_path, output_dir)
+    return {}
+
+
+class MediaPipeline:
+    """Chunked uploads, content-addressed storage and derivative jobs."""
+
+    def __init__(self, uploads_path: str, store, url_prefix: str = '/uploads/memory_lane',
+                 max_workers: Optional[int] = None, chunk_size: int = DEFAULT_CHUNK_SIZE):
+        """
+        Args:
+            uploads_path: Memory Lane uploads directory
+            store: MemoryLaneStore holding memory, blob and job records
+            url_prefix: Public URL prefix for ``uploads_path``
+            max_workers: Derivative worker processes (default: CPU count, max 4)
+            chunk_size: Chunk size suggested to clients
+        """
+        self.uploads_path = uploads_path
+        self.store = store
+        self.url_prefix = url_prefix.rstrip('/')
+        self.chunk_size = chunk_size
+        self.max_workers = max_workers or min(4, os.cpu_count() or 1)
+        self.incoming_path = os.path.join(uploads_path, '.incoming')
+        self.derivatives_path = os.path.join(uploads_path, 'derivatives')
+        os.makedirs(self.incoming_path, exist_ok=True)
+
+        self._executor = None
+        # Guards shared records (blobs, jobs); never held during upload I/O.
+        # Re-entrant: a job that finishes instantly runs its callback on the submitting thread
+        self._lock = threading.RLock()
+        # upload_id -> lock serializing chunks of one upload
+        self._upload_locks: Dict[str, threading.Lock] = {}
+        # upload_id -> (bytes hashed so far, running sha256) for sessions touched by this process
+        self._hashers: Dict[str, Any] = {}
+
+    # ------------------------------------------------------------------
+    # Paths
+    # ------------------------------------------------------------------
+
+    def _part_path(self, upload_id: str) -> str:
+        return os.path.join(self.incoming_path, f"{upload_id}.part")
+
+    def _url(self, path: str) -> str:
+        relative = os.path.relpath(path, self.uploads_path).replace(os.sep, '/')
+        return f"{self.url_prefix}/{relative}"
+
+    # ------------------------------------------------------------------
+    # Chunked uploads
+    # ------------------------------------------------------------------
+
+    def create_upload(self, filename: str, media_type: str, total_size: int,
+                      metadata: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
+        """
+        Start a resumable upload session
+
+        Returns:
+            dict: Upload session (id, received, chunk_size, ...)
+        """
+        if media_type not in MEDIA_DIRS:
+            raise ValueError(f"Unsupported media type: {media_type}")
+        if total_size < 0:
+            raise ValueError("total_size must be non-negative")
+
+        session = {
+            'id': uuid.uuid4().hex,
+            'filename': filename,
+            'media_type': media_type,
+            'total_size': int(total_size),
+            'received': 0,
+            'chunk_size': self.chunk_size,
+            'metadata': metadata or {},
+            'status': 'uploading',
+            'created_at': datetime.now().isoformat()
+        }
+        open(self._part_path(session['id']), 'wb').close()
+        self.store.put('upload', session)
+        return session
+
+    def get_upload(self, upload_id: str) -> Optional[Dict[str, Any]]:
+        """Upload session; ``received`` is the offset to resume from."""
+        return self.store.get('upload', upload_id)
+
+    def _upload_lock(self, upload_id: str) -> threading.Lock:
+        with self._lock:
+            lock = self._upload_locks.get(upload_id)
+            if lock is None:
+                lock = self._upload_locks[upload_id] = threading.Lock()
+            return lock
+
+    def _hasher_for(self, upload_id: str, received: int):
+        """
+        Copy of the running hash for a session, rebuilt from the part file after a restart
+
+        The cached hash is only replaced once a chunk has been fully written,
+        so a failed chunk never leaves its bytes in it.
+        """
+        state = self._hashers.get(upload_id)
+        if state is not None and state[0] == received:
+            return state[1].copy()
+        hasher = hashlib.sha256()
+        with open(self._part_path(upload_id), 'rb') as f:
+            remaining = received
+            while remaining:
+                block = f.read(min(COPY_BUFFER_SIZE, remaining))
+                if not block:
+                    break
+                hasher.update(block)
+                remaining -= len(block)
+        return hasher
+
+    def write_chunk(self, upload_id: str, offset: int, stream: BinaryIO) -> Dict[str, Any]:
+        """
+        Append a chunk to an upload session
+
+        The chunk must start at the session's ``received`` offset; a client
+        resuming after a dropped connection asks for the session first and
+        continues from there.
+
+        Raises:
+            KeyError: Unknown upload
+            ValueError: Offset mismatch, or more data than announced
+        """
+        # Only chunks of the same upload wait for each other
+        with self._upload_lock(upload_id):
+            session = self.get_upload(upload_id)
+            if session is None or session['status'] != 'uploading':
+                raise KeyError(upload_id)
+            if offset != session['received']:
+                raise ValueError(f"Expected offset {session['received']}, got {offset}")
+
+            hasher = self._hasher_for(upload_id, offset)
+            written = 0
+            try:
+                with open(self._part_path(upload_id), 'r+b') as part:
+                    part.seek(offset)
+                    part.truncate()
+                    while True:
+                        block = stream.read(COPY_BUFFER_SIZE)
+                        if not block:
+                            break
+                        written += len(block)
+                        if offset + written > session['total_size']:
+                            part.truncate(offset)
+                            raise ValueError("Chunk exceeds announced upload size")
+                        part.write(block)
+                        hasher.update(block)
+            except Exception:
+                # The part file may hold some of this chunk; rehash from it on resume
+                self._hashers.pop(upload_id, None)
+                raise
+
+            session['received'] = offset + written
+            self._hashers[upload_id] = (session['received'], hasher)
+            self.store.put('upload', session)
+            return session
+
+    def complete_upload(self, upload_id: str) -> Dict[str, Any]:
+        """
+        Finish an upload: store it by content hash and queue derivatives
+
+        Returns:
+            dict: blob record and whether it duplicated existing media
+        """
+        with self._upload_lock(upload_id):
+            session = self.get_upload(upload_id)
+            if session is None or session['status'] != 'uploading':
+                raise KeyError(upload_id)
+            if session['received'] != session['total_size']:
+                raise ValueError(f"Upload incomplete: {session['received']} of {session['total_size']} bytes")
+
+            # May re-read the part file after a restart; done outside the global lock
+            content_hash = self._hasher_for(upload_id, session['received']).hexdigest()
+            self._hashers.pop(upload_id, None)
+            with self._lock:
+                result = self._store_blob(self._part_path(upload_id), content_hash,
+                                          session['media_type'], session['filename'], session['total_size'])
+            session['status'] = 'complete'
+            session['content_hash'] = content_hash
+            self.store.put('upload', session)
+
+        with self._lock:
+            self._upload_locks.pop(upload_id, None)
+        return result
+
+    def ingest_stream(self, stream: BinaryIO, filename: str, media_type: str) -> Dict[str, Any]:
+        """
+        Single-request upload: stream to disk while hashing, then store
+
+        Returns:
+            dict: Same as complete_upload
+        """
+        if media_type not in MEDIA_DIRS:
+            raise ValueError(f"Unsupported media type: {media_type}")
+        temp_path = self._part_path(uuid.uuid4().hex)
+        hasher = hashlib.sha256()
+        size = 0
+        try:
+            with open(temp_path, 'wb') as f:
+                while True:
+                    block = stream.read(COPY_BUFFER_SIZE)
+                    if not block:
+                        break
+                    f.write(block)
+                    hasher.update(block)
+                    size += len(block)
+            with self._lock:
+                return self._store_blob(temp_path, hasher.hexdigest(), media_type, filename, size)
+        finally:
+            if os.path.exists(temp_path):
+                os.remove(temp_path)
+
+    def _store_blob(self, temp_path: str, content_hash: str, media_type: str,
+                    filename: str, size: int) -> Dict[str, Any]:
+        """Move a finished file into content-addressed storage (caller holds the lock)."""
+        blob = self.store.get('blob', content_hash)
+        if blob is not None and os.path.exists(blob['filepath']):
+            os.remove(temp_path)
+            return {'blob': blob, 'duplicate': True}
+
+        extension = os.path.splitext(filename)[1].lower() or '.bin'
+        stored_name = f"{content_hash}{extension}"
+        filepath = os.path.join(self.uploads_path, MEDIA_DIRS[media_type], stored_name)
+        os.makedirs(os.path.dirname(filepath), exist_ok=True)
+        os.replace(temp_path, filepath)
+
+        blob = {
+            'id': content_hash,
+            'media_type': media_type,
+            'filename': stored_name,
+            'filepath': filepath,
+            'url': self._url(filepath),
+            'size': size,
+            'memory_ids': [],
+            'derivatives': {},
+            'stored_at': datetime.now().isoformat(),
+            'job_id': uuid.uuid4().hex
+        }
+        self.store.put('blob', blob)
+        self._submit_job(blob)
+        return {'blob': blob, 'duplicate': False}
+
+    def attach_memory(self, blob: Dict[str, Any], memory_kind: str, memory: Dict[str, Any]) -> Dict[str, Any]:
+        """
+        Link a memory record to a stored blob and save it
+
+        Derivatives already rendered are copied onto the memory; ones still
+        pending are filled in when the job finishes.
+        """
+        with self._lock:
+            blob = self.store.get('blob', blob['id']) or blob
+            memory.update({
+                'content_hash': blob['id'],
+                'filename': blob['filename'],
+                'filepath': blob['filepath'],
+                'url': blob['url'],
+                'derivatives': blob.get('derivatives', {}),
+                'processing_job': blob.get('job_id'),
+            })
+            reference = [memory_kind, memory['id']]
+            if reference not in blob['memory_ids']:
+                blob['memory_ids'].append(reference)
+            self.store.put('blob', blob)
+            self.store.put(memory_kind, memory)
+        return memory
+
+    # ------------------------------------------------------------------
+    # Derivative jobs
+    # ------------------------------------------------------------------
+
+    def _get_executor(self) -> ProcessPoolExecutor:
+        if self._executor is None:
+            self._executor = ProcessPoolExecutor(max_workers=self.max_workers)
+        return self._executor
+
+    def _submit_job(self, blob: Dict[str, Any]):
+        job = {
+            'id': blob['job_id'],
+            'content_hash': blob['id'],
+            'media_type': blob['media_type'],
+            'status': 'queued',
+            'created_at': datetime.now().isoformat()
+        }
+        self.store.put('media_job', job)
+
+        output_dir = os.path.join(self.derivatives_path, blob['id'])
+        try:
+            future = self._get_executor().submit(render_derivatives, blob['media_type'], blob['filepath'], output_dir)
+        except Exception as e:
+            logger.error(f"Could not queue derivative job for {blob['id']}: {str(e)}")
+            job.update({'status': 'failed', 'error': str(e)})
+            self.store.put('media_job', job)
+            return
+
+        future.add_done_callback(lambda f, job_id=job['id']: self._finish_job(job_id, f))
+
+    def _finish_job(self, job_id: str, future):
+        """Record derivative results on the job, the blob and every linked memory."""
+        try:
+            job = self.store.get('media_job', job_id)
+            try:
+                derivatives = future.result()
+            except Exception as e:
+                logger.error(f"Derivative job {job_id} failed: {str(e)}")
+                job.update({'status': 'failed', 'error': str(e), 'finished_at': datetime.now().isoformat()})
+                self.store.put('media_job', job)
+                return
+
+            for info in derivatives.values():
+                if isinstance(info, dict) and 'path' in info:
+                    info['url'] = self._url(info['path'])
+
+            with self._lock:
+                blob = self.store.get('blob', job['content_hash'])
+                blob['derivatives'] = derivatives
+                self.store.put('blob', blob)
+                for memory_kind, memory_id in blob['memory_ids']:
+                    memory = self.store.get(memory_kind, memory_id)
+                    if memory is not None:
+                        memory['derivatives'] = derivatives
+                        self.store.put(memory_kind, memory)
+
+            job.update({
+                'status': 'skipped' if 'skipped' in derivatives else 'complete',
+                'derivatives': derivatives,
+                'finished_at': datetime.now().isoformat()
+            })
+            self.store.put('media_job', job)
+        except Exception as e:
+            logger.error(f"Error recording derivative job {job_id}: {str(e)}")
+
+    def get_job(self, job_id: str) -> Optional[Dict[str, Any]]:
+        """Derivative job status: queued, complete, skipped or failed."""
+        return self.store.get('media_job', job_id)
+
+    def shutdown(self, wait: bool = True):
+        if self._executor is not None:
+            self._executor.shutdown(wait=wait)
+            self._executor = None
+
+
+# Global instance used by the Memory Lane blueprint
+_media_pipeline = None
+_media_pipeline_lock = threading.Lock()
+
+
+def get_media_pipeline(uploads_path: str, store) -> MediaPipeline:
+    """Get or create the shared media pipeline."""
+    global _media_pipeline
+    if _media_pipeline is None:
+        with _media_pipeline_lock:
+            if _media_pipeline is None:
+                _media_pipeline = MediaPipeline(uploads_path, store)
+    return _media_pipeline
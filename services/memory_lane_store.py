@@ -0,0 +1,456 @@
+# © 2025 The Christman AI Project. All rights reserved.
+#
+# This code is released as part of a trauma-informed, dignity-first AI ecosystem
+# designed to protect, empower, and elevate vulnerable populations.
+#
+# By using, modifying, or distributing this software, you agree to uphold the following:
+# 1. Truth — No deception, no manipulation.
+# 2. Dignity — Respect the autonomy and humanity of all users.
+# 3. Protection — Never use this to exploit or harm vulnerable individuals.
+# 4. Transparency — Disclose all modifications and contributions clearly.
+# 5. No Erasure — Preserve the mission and ethical origin of this work.
+#
+# This is not just code. This is redemption in code.
+# Contact: lumacognify@thechristmanaiproject.com
+# https://thechristmanaiproject.com
+
+"""
+Memory Lane Metadata Store for AlphaWolf
+Part of The Christman AI Project - Powered by LumaCognify AI
+
+SQLite-backed index for Memory Lane albums, timeline events, stories,
+playlists and uploaded memories. Every record keeps its original JSON
+document; the columns next to it exist only so that filtering and keyset
+pagination run as indexed queries instead of loading whole files.
+
+Ordering is (sort_key, seq): seq is the insertion order, and sort_key is
+the field a listing is ordered by (zero-padded year for timeline events,
+upload time for media, empty for insertion-ordered kinds such as albums).
+"""
+
+import base64
+import json
+import logging
+import os
+import sqlite3
+import threading
+from typing import Any, Dict, Iterable, List, Optional, Sequence, Tuple, Union
+
+logger = logging.getLogger(__name__)
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS records (
+    seq INTEGER PRIMARY KEY AUTOINCREMENT,
+    kind TEXT NOT NULL,
+    id TEXT NOT NULL,
+    parent_id TEXT,
+    category TEXT,
+    year TEXT,
+    sort_key TEXT NOT NULL DEFAULT '',
+    data TEXT NOT NULL,
+    UNIQUE (kind, id)
+);
+CREATE INDEX IF NOT EXISTS idx_records_kind_sort ON records (kind, sort_key, seq);
+CREATE INDEX IF NOT EXISTS idx_records_parent ON records (kind, parent_id, sort_key, seq);
+CREATE INDEX IF NOT EXISTS idx_records_category ON records (kind, category, sort_key, seq);
+CREATE INDEX IF NOT EXISTS idx_records_year ON records (kind, year, sort_key, seq);
+CREATE TABLE IF NOT EXISTS meta (
+    key TEXT PRIMARY KEY,
+    value TEXT
+);
+"""
+
+# Media kinds stored from uploads; parent_id is the album the memory belongs to
+MEDIA_KINDS = ('photo', 'video', 'voice', 'text')
+
+# Width timeline years are zero-padded to in sort_key
+YEAR_SORT_WIDTH = 6
+
+# Bumped when sort_key derivation changes; existing rows are re-keyed on open
+SORT_KEY_VERSION = '2'
+
+# Legacy list files: kind -> (path relative to the storage root)
+LEGACY_LIST_FILES = {
+    'album': os.path.join('albums', 'albums.json'),
+    'timeline': os.path.join('timeline', 'timeline.json'),
+    'story': os.path.join('stories', 'stories.json'),
+    'playlist': os.path.join('music', 'playlists.json'),
+    'activity': 'activities.json',
+}
+
+# Legacy per-upload sidecar directories under uploads/: directory -> kind
+LEGACY_SIDECAR_DIRS = {
+    'photos': 'photo',
+    'videos': 'video',
+    'voice': 'voice',
+    'text_memories': 'text',
+}
+
+
+def encode_cursor(sort_key: str, seq: int) -> str:
+    """Opaque pagination cursor for the row (sort_key, seq)."""
+    raw = json.dumps([sort_key, seq], separators=(',', ':')).encode('utf-8')
+    return base64.urlsafe_b64encode(raw).decode('ascii').rstrip('=')
+
+
+def decode_cursor(cursor: str) -> Tuple[str, int]:
+    """Inverse of encode_cursor; raises ValueError on malformed input."""
+    try:
+        padded = cursor + '=' * (-len(cursor) % 4)
+        sort_key, seq = json.loads(base64.urlsafe_b64decode(padded.encode('ascii')))
+        return str(sort_key), int(seq)
+    except Exception:
+        raise ValueError("Invalid pagination cursor")
+
+
+def _year_sort_key(year: Any) -> str:
+    """Sort key for a year that orders numerically ('987' before '1950')."""
+    year = str(year).strip() if year is not None else ''
+    return year.zfill(YEAR_SORT_WIDTH) if year else ''
+
+
+def _index_fields(kind: str, record: Dict[str, Any]) -> Dict[str, Optional[str]]:
+    """Derive the indexed columns for a record of the given kind."""
+    if kind in MEDIA_KINDS:
+        uploaded_at = record.get('uploaded_at') or record.get('recorded_at') or record.get('created_at') or ''
+        date = record.get('date_taken') or record.get('date') or ''
+        return {
+            'parent_id': record.get('album_id'),
+            'category': record.get('type', kind),
+            'year': date[:4] or None,
+            'sort_key': uploaded_at,
+        }
+    if kind == 'timeline':
+        return {
+            'parent_id': None,
+            'category': record.get('category'),
+            'year': str(record.get('year', '')) or None,
+            'sort_key': _year_sort_key(record.get('year')),
+        }
+    if kind == 'song_memory':
+        return {
+            'parent_id': record.get('song_id'),
+            'category': None,
+            'year': None,
+            'sort_key': '',
+        }
+    return {
+        'parent_id': record.get('album_id'),
+        'category': record.get('category'),
+        'year': None,
+        'sort_key': '',
+    }
+
+
+class MemoryLaneStore:
+    """Indexed metadata store for the Memory Lane blueprint."""
+
+    def __init__(self, db_path: str, storage_root: Optional[str] = None, import_legacy: bool = True):
+        """
+        Args:
+            db_path: SQLite database file
+            storage_root: Memory Lane data directory holding the legacy JSON files
+            import_legacy: Import legacy JSON and sidecar files the first time
+                the database is opened
+        """
+        self.db_path = db_path
+        self.storage_root = storage_root or os.path.dirname(db_path)
+        self._local = threading.local()
+        self._write_lock = threading.Lock()
+
+        os.makedirs(os.path.dirname(db_path) or '.', exist_ok=True)
+        conn = self._conn()
+        conn.executescript(SCHEMA)
+        conn.commit()
+
+        if import_legacy and self.get_meta('legacy_imported') is None:
+            self.import_legacy()
+        if self.get_meta('sort_key_version') != SORT_KEY_VERSION:
+            self.rebuild_sort_keys()
+
+    def _conn(self) -> sqlite3.Connection:
+        """One connection per thread; WAL lets readers run alongside a writer."""
+        conn = getattr(self._local, 'conn', None)
+        if conn is None:
+            conn = sqlite3.connect(self.db_path, timeout=30)
+            conn.row_factory = sqlite3.Row
+            conn.execute('PRAGMA journal_mode=WAL')
+            conn.execute('PRAGMA synchronous=NORMAL')
+            self._local.conn = conn
+        return conn
+
+    # ------------------------------------------------------------------
+    # Writes
+    # ------------------------------------------------------------------
+
+    def put(self, kind: str, record: Dict[str, Any]) -> Dict[str, Any]:
+        """Insert or replace a record; existing records keep their position."""
+        self.put_many(kind, [record])
+        return record
+
+    def put_many(self, kind: str, records: Iterable[Dict[str, Any]]) -> int:
+        """Insert or replace many records of one kind in a single transaction."""
+        rows = []
+        for record in records:
+            fields = _index_fields(kind, record)
+            rows.append((
+                kind, str(record['id']), fields['parent_id'], fields['category'],
+                fields['year'], fields['sort_key'], json.dumps(record)
+            ))
+        if not rows:
+            return 0
+        with self._write_lock:
+            conn = self._conn()
+            with conn:
+                conn.executemany(
+                    """
+                    INSERT INTO records (kind, id, parent_id, category, year, sort_key, data)
+                    VALUES (?, ?, ?, ?, ?, ?, ?)
+                    ON CONFLICT (kind, id) DO UPDATE SET
+                        parent_id = excluded.parent_id,
+                        category = excluded.category,
+                        year = excluded.year,
+                        sort_key = excluded.sort_key,
+                        data = excluded.data
+                    """,
+                    rows
+                )
+        return len(rows)
+
+    def delete(self, kind: str, record_id: str) -> bool:
+        """Delete a record. Returns True if it existed."""
+        with self._write_lock:
+            conn = self._conn()
+            with conn:
+                cursor = conn.execute('DELETE FROM records WHERE kind = ? AND id = ?', (kind, str(record_id)))
+        return cursor.rowcount > 0
+
+    def next_id(self, kind: str) -> str:
+        """Next numeric id for kinds that use '1', '2', ... identifiers."""
+        row = self._conn().execute(
+            "SELECT MAX(CAST(id AS INTEGER)) FROM records WHERE kind = ? AND id GLOB '[0-9]*'",
+            (kind,)
+        ).fetchone()
+        return str((row[0] or 0) + 1)
+
+    # ------------------------------------------------------------------
+    # Reads
+    # ------------------------------------------------------------------
+
+    def get(self, kind: str, record_id: str) -> Optional[Dict[str, Any]]:
+        """Fetch one record by id."""
+        row = self._conn().execute(
+            'SELECT data FROM records WHERE kind = ? AND id = ?', (kind, str(record_id))
+        ).fetchone()
+        return json.loads(row['data']) if row else None
+
+    def _where(self, kinds: Sequence[str], parent_id=None, category=None, year=None):
+        clauses = [f"kind IN ({','.join('?' * len(kinds))})"]
+        params: List[Any] = list(kinds)
+        if parent_id is not None:
+            clauses.append('parent_id = ?')
+            params.append(str(parent_id))
+        if category is not None:
+            clauses.append('category = ?')
+            params.append(category)
+        if year is not None:
+            clauses.append('year = ?')
+            params.append(str(year))
+        return clauses, params
+
+    def query(
+        self,
+        kinds: Union[str, Sequence[str]],
+        parent_id: Optional[str] = None,
+        category: Optional[str] = None,
+        year: Optional[str] = None,
+        limit: Optional[int] = None,
+        cursor: Optional[str] = None,
+        offset: int = 0,
+        descending: bool = False
+    ) -> Dict[str, Any]:
+        """
+        List records with filtering done in SQL.
+
+        Args:
+            kinds: Record kind, or several kinds to list together
+            parent_id: Album id (or song id for song memories)
+            category: Exact category match
+            year: Exact year match
+            limit: Page size; None returns everything
+            cursor: Cursor from a previous page's ``next_cursor`` (keyset pagination)
+            offset: Row offset, for callers still paging by page number
+            descending: Newest sort_key first
+
+        Returns:
+            dict: items, next_cursor (None on the last page)
+
+        Raises:
+            ValueError: Invalid cursor, or a limit below 1
+        """
+        if limit is not None and limit < 1:
+            raise ValueError("limit must be at least 1")
+        if isinstance(kinds, str):
+            kinds = (kinds,)
+        clauses, params = self._where(kinds, parent_id, category, year)
+
+        if cursor:
+            sort_key, seq = decode_cursor(cursor)
+            clauses.append('(sort_key, seq) < (?, ?)' if descending else '(sort_key, seq) > (?, ?)')
+            params.extend([sort_key, seq])
+
+        direction = 'DESC' if descending else 'ASC'
+        sql = (
+            f"SELECT seq, sort_key, data FROM records WHERE {' AND '.join(clauses)} "
+            f"ORDER BY sort_key {direction}, seq {direction}"
+        )
+        if limit is not None:
+            # One extra row tells us whether another page exists
+            sql += ' LIMIT ? OFFSET ?'
+            params.extend([limit + 1, 0 if cursor else max(0, offset)])
+
+        rows = self._conn().execute(sql, params).fetchall()
+        next_cursor = None
+        if limit is not None and len(rows) > limit:
+            rows = rows[:limit]
+            next_cursor = encode_cursor(rows[-1]['sort_key'], rows[-1]['seq'])
+
+        return {
+            'items': [json.loads(row['data']) for row in rows],
+            'next_cursor': next_cursor
+        }
+
+    def count(self, kinds: Union[str, Sequence[str]], parent_id=None, category=None, year=None) -> int:
+        """Number of records matching the same filters as query()."""
+        if isinstance(kinds, str):
+            kinds = (kinds,)
+        clauses, params = self._where(kinds, parent_id, category, year)
+        row = self._conn().execute(
+            f"SELECT COUNT(*) FROM records WHERE {' AND '.join(clauses)}", params
+        ).fetchone()
+        return row[0]
+
+    def counts_by_kind(self) -> Dict[str, int]:
+        """Record counts for every kind."""
+        rows = self._conn().execute('SELECT kind, COUNT(*) AS n FROM records GROUP BY kind').fetchall()
+        return {row['kind']: row['n'] for row in rows}
+
+    # ------------------------------------------------------------------
+    # Meta and legacy import
+    # ------------------------------------------------------------------
+
+    def get_meta(self, key: str) -> Optional[str]:
+        row = self._conn().execute('SELECT value FROM meta WHERE key = ?', (key,)).fetchone()
+        return row['value'] if row else None
+
+    def set_meta(self, key: str, value: str):
+        with self._write_lock:
+            conn = self._conn()
+            with conn:
+                conn.execute(
+                    'INSERT INTO meta (key, value) VALUES (?, ?) '
+                    'ON CONFLICT (key) DO UPDATE SET value = excluded.value',
+                    (key, value)
+                )
+
+    def rebuild_sort_keys(self) -> int:
+        """
+        Recompute the indexed columns of every record, keeping its position.
+
+        Returns:
+            int: Number of records updated
+        """
+        updated = 0
+        for kind in (row['kind'] for row in self._conn().execute('SELECT DISTINCT kind FROM records').fetchall()):
+            updated += self.put_many(kind, self.query(kind)['items'])
+        self.set_meta('sort_key_version', SORT_KEY_VERSION)
+        return updated
+
+    def _load_json(self, path: str):
+        try:
+            with open(path, 'r') as f:
+                return json.load(f)
+        except (OSError, json.JSONDecodeError) as e:
+            logger.error(f"Could not read legacy Memory Lane file {path}: {str(e)}")
+            return None
+
+    def import_legacy(self) -> Dict[str, int]:
+        """
+        One-shot import of the legacy JSON list files and upload sidecars.
+
+        The legacy files are left in place; a marker in the meta table stops
+        the import from running again.
+
+        Returns:
+            dict: kind -> number of records imported
+        """
+        imported: Dict[str, int] = {}
+
+        for kind, relative_path in LEGACY_LIST_FILES.items():
+            path = os.path.join(self.storage_root, relative_path)
+            if not os.path.exists(path):
+                continue
+            records = self._load_json(path)
+            if isinstance(records, list):
+                imported[kind] = self.put_many(kind, [r for r in records if isinstance(r, dict) and 'id' in r])
+
+        song_memories_path = os.path.join(self.storage_root, 'music', 'song_memories.json')
+        if os.path.exists(song_memories_path):
+            song_memories = self._load_json(song_memories_path) or {}
+            records = []
+            for song_id, memories in song_memories.items():
+                for memory in memories:
+                    records.append(dict(memory, song_id=song_id))
+            imported['song_memory'] = self.put_many('song_memory', records)
+
+        uploads_path = os.path.join(self.storage_root, 'uploads')
+        for directory, kind in LEGACY_SIDECAR_DIRS.items():
+            sidecar_dir = os.path.join(uploads_path, directory)
+            if not os.path.isdir(sidecar_dir):
+                continue
+            records = []
+            for name in sorted(os.listdir(sidecar_dir)):
+                if not name.endswith('.json'):
+                    continue
+                record = self._load_json(os.path.join(sidecar_dir, name))
+                if isinstance(record, dict) and 'id' in record:
+                    records.append(record)
+            # Keep upload order so seq matches the original timeline of uploads
+            records.sort(key=lambda r: r.get('uploaded_at') or r.get('recorded_at') or r.get('created_at') or '')
+            imported[kind] = self.put_many(kind, records)
+
+        self.set_meta('legacy_imported', json.dumps(imported))
+        if any(imported.values()):
+            logger.info(f"Imported legacy Memory Lane metadata: {imported}")
+        return imported
+
+    def close(self):
+        conn = getattr(self._local, 'conn', None)
+        if conn is not None:
+            conn.close()
+            self._local.conn = None
+
+
+# Global instance used by the Memory Lane blueprint
+_memory_lane_store = None
+_memory_lane_store_lock = threading.Lock()
+
+
+def get_memory_lane_store(storage_root: str = 'data/memory_lane') -> MemoryLaneStore:
+    """Get or create the shared Memory Lane metadata store."""
+    global _memory_lane_store
+    if _memory_lane_store is None:
+        with _memory_lane_store_lock:
+            if _memory_lane_store is None:
+                _memory_lane_store = MemoryLaneStore(
+                    os.path.join(storage_root, 'memory_lane.db'),
+                    storage_root=storage_root
+                )
+    return _memory_lane_store
+
+
+if __name__ == "__main__":
+    import sys
+    root = sys.argv[1] if len(sys.argv) > 1 else 'data/memory_lane'
+    store = MemoryLaneStore(os.path.join(root, 'memory_lane.db'), storage_root=root, import_legacy=False)
+    print(json.dumps(store.import_legacy(), indent=2))
@@ -0,0 +1,618 @@
+# © 2025 The Christman AI Project. All rights reserved.
+#
+# This code is released as part of a trauma-informed, dignity-first AI ecosystem
+# designed to protect, empower, and elevate vulnerable populations.
+#
+# By using, modifying, or distributing this software, you agree to uphold the following:
+# 1. Truth — No deception, no manipulation.
+# 2. Dignity — Respect the autonomy and humanity of all users.
+# 3. Protection — Never use this to exploit or harm vulnerable individuals.
+# 4. Transparency — Disclose all modifications and contributions clearly.
+# 5. No Erasure — Preserve the mission and ethical origin of this work.
+#
+# This is not just code. This is redemption in code.
+# Contact: lumacognify@thechristmanaiproject.com
+# https://thechristmanaiproject.com
+
+"""
+Notification Delivery for AlphaWolf
+Part of The Christman AI Project - Powered by LumaCognify AI
+
+Fan-out delivery of real-time notifications to WebSocket connections.
+
+Every connection has a small bounded queue. Publishing a notification
+serializes it once and appends it to each target queue without blocking;
+a shared thread pool drains the queues, with at most one worker per
+connection so messages to a device stay in order and one slow socket only
+ever ties up one worker.
+
+- Coalescing: a queued message with the same coalesce key as a new one is
+  replaced in place, so a burst of alerts about the same patient reaches
+  a lagging device as the latest alert only.
+- Slow consumers: a full queue drops its oldest message. A connection that
+  keeps overflowing without draining, or whose sends keep failing, is
+  disconnected.
+- Transports are pluggable: LoggingTransport (no delivery, the previous
+  behavior), ApiGatewayTransport (post_to_connection in production) and
+  LocalWebSocketTransport (a small local WebSocket server for testing).
+"""
+
+import base64
+import hashlib
+import json
+import logging
+import os
+import socket
+import struct
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from itertools import count
+from typing import Any, Callable, Dict, Iterable, Optional
+from urllib.parse import parse_qsl, urlparse
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_MAX_WORKERS = int(os.environ.get('NOTIFICATION_MAX_WORKERS', '32'))
+DEFAULT_QUEUE_SIZE = int(os.environ.get('NOTIFICATION_QUEUE_SIZE', '64'))
+DEFAULT_SEND_TIMEOUT = float(os.environ.get('NOTIFICATION_SEND_TIMEOUT', '5'))
+
+# Messages one worker sends to a connection before yielding to other connections
+DRAIN_BATCH = 16
+
+
+class ConnectionGone(Exception):
+    """The transport reports that the connection no longer exists."""
+
+
+# ----------------------------------------------------------------------
+# Transports
+# ----------------------------------------------------------------------
+
+class NotificationTransport:
+    """
+    Delivers serialized notifications to a single connection.
+
+    send() may block; it is always called from a delivery worker. Raise
+    ConnectionGone when the connection no longer exists, and any other
+    exception for a failed delivery.
+    """
+
+    def attach(self, service: Any) -> None:
+        """Called once with the notification service that owns the transport."""
+
+    def send(self, connection_id: str, payload: bytes) -> None:
+        raise NotImplementedError
+
+    def close(self) -> None:
+        """Release transport resources."""
+
+
+class LoggingTransport(NotificationTransport):
+    """Logs each delivery instead of sending it (local development)."""
+
+    def send(self, connection_id: str, payload: bytes) -> None:
+        logger.debug(f"Would send {len(payload)} bytes to connection {connection_id}")
+
+
+class ApiGatewayTransport(NotificationTransport):
+    """
+    Delivers through the API Gateway WebSocket management API.
+
+    The client's connection pool is sized to the delivery worker count so
+    concurrent posts don't queue for an HTTP connection.
+    """
+
+    def __init__(self, endpoint_url: str, max_connections: int = DEFAULT_MAX_WORKERS,
+                 send_timeout: float = DEFAULT_SEND_TIMEOUT):
+        import boto3
+        from botocore.config import Config
+
+        self.client = boto3.client(
+            'apigatewaymanagementapi',
+            endpoint_url=endpoint_url,
+            config=Config(
+                max_pool_connections=max_connections,
+                connect_timeout=send_timeout,
+                read_timeout=send_timeout,
+                retries={'max_attempts': 2}
+            )
+        )
+        self._gone = self.client.exceptions.GoneException
+
+    def send(self, connection_id: str, payload: bytes) -> None:
+        try:
+            self.client.post_to_connection(ConnectionId=connection_id, Data=payload)
+        except self._gone:
+            raise ConnectionGone(connection_id)
+
+
+class LocalWebSocketTransport(NotificationTransport):
+    """
+    Minimal WebSocket server (RFC 6455 text frames) for local testing.
+
+    Clients connect to ``ws://host:port/?connection_id=<id>&type=caregiver&id=<user id>``;
+    every query parameter except connection_id becomes the connection's
+    user data. Connections are registered with the attached service on
+    connect, incoming JSON messages go to handle_incoming_message, and the
+    connection is unregistered when the socket closes.
+    """
+
+    _GUID = '258EAFA5-E914-47DA-95CA-C5AB0DC85B11'
+
+    def __init__(self, host: str = '127.0.0.1', port: int = 0,
+                 send_timeout: float = DEFAULT_SEND_TIMEOUT):
+        self.send_timeout = send_timeout
+        self.service = None
+        self._sockets: Dict[str, socket.socket] = {}
+        self._send_locks: Dict[str, threading.Lock] = {}
+        self._lock = threading.Lock()
+        self._ids = count(1)
+        self._listener = socket.create_server((host, port))
+        self.host, self.port = self._listener.getsockname()[:2]
+        self._running = True
+        threading.Thread(target=self._accept_loop, name='ws-accept', daemon=True).start()
+
+    @property
+    def url(self) -> str:
+        return f"ws://{self.host}:{self.port}/"
+
+    def attach(self, service: Any) -> None:
+        self.service = service
+
+    def send(self, connection_id: str, payload: bytes) -> None:
+        with self._lock:
+            sock = self._sockets.get(connection_id)
+            send_lock = self._send_locks.get(connection_id)
+        if sock is None:
+            raise ConnectionGone(connection_id)
+        try:
+            with send_lock:
+                sock.sendall(_encode_frame(0x1, payload))
+        except socket.timeout:
+            # A partly written frame leaves the stream unusable; the reader
+            # thread unregisters the connection once the socket is closed
+            _close_socket(sock)
+            raise
+        except OSError:
+            raise ConnectionGone(connection_id)
+
+    def close(self) -> None:
+        self._running = False
+        try:
+            self._listener.close()
+        except OSError:
+            pass
+        with self._lock:
+            sockets = list(self._sockets.values())
+        for sock in sockets:
+            _close_socket(sock)
+
+    def _accept_loop(self) -> None:
+        while self._running:
+            try:
+                sock, _ = self._listener.accept()
+            except OSError:
+                return
+            threading.Thread(target=self._serve, args=(sock,), name='ws-client', daemon=True).start()
+
+    def _serve(self, sock: socket.socket) -> None:
+        connection_id = None
+        try:
+            params = self._handshake(sock)
+            if params is None:
+                return
+            connection_id = params.pop('connection_id', None) or f"local-{next(self._ids)}"
+            sock.settimeout(self.send_timeout)
+            with self._lock:
+                self._sockets[connection_id] = sock
+                self._send_locks[connection_id] = threading.Lock()
+            if self.service:
+                self.service.register_connection(connection_id, params)
+            self._read_loop(connection_id, sock)
+        except OSError:
+            pass
+        finally:
+            if connection_id is not None:
+                with self._lock:
+                    self._sockets.pop(connection_id, None)
+                    self._send_locks.pop(connection_id, None)
+                if self.service:
+                    self.service.unregister_connection(connection_id)
+            _close_socket(sock)
+
+    def _handshake(self, sock: socket.socket) -> Optional[Dict[str, str]]:
+        request = b''
+        while b'\r\n\r\n' not in request:
+            chunk = sock.recv(4096)
+            if not chunk or len(request) > 65536:
+                return None
+            request += chunk
+        lines = request.split(b'\r\n\r\n', 1)[0].decode('latin-1').split('\r\n')
+        path = lines[0].split(' ')[1] if len(lines[0].split(' ')) > 1 else '/'
+        headers = {}
+        for line in lines[1:]:
+            name, _, value = line.partition(':')
+            headers[name.strip().lower()] = value.strip()
+        key = headers.get('sec-websocket-key')
+        if not key:
+            sock.sendall(b'HTTP/1.1 400 Bad Request\r\nContent-Length: 0\r\n\r\n')
+            return None
+        accept = base64.b64encode(hashlib.sha1((key + self._GUID).encode()).digest()).decode()
+        sock.sendall((
+            'HTTP/1.1 101 Switching Protocols\r\n'
+            'Upgrade: websocket\r\n'
+            'Connection: Upgrade\r\n'
+            f'Sec-WebSocket-Accept: {accept}\r\n\r\n'
+        ).encode())
+        return dict(parse_qsl(urlparse(path).query))
+
+    def _recv_exact(self, sock: socket.socket, size: int) -> Optional[bytes]:
+        data = bytearray()
+        while len(data) < size:
+            try:
+                chunk = sock.recv(size - len(data))
+            except socket.timeout:
+                # Idle clients are fine; the timeout is there to bound sends
+                if not self._running:
+                    return None
+                continue
+            if not chunk:
+                return None
+            data += chunk
+        return bytes(data)
+
+    def _read_loop(self, connection_id: str, sock: socket.socket) -> None:
+        while self._running:
+            opcode, data = _read_frame(lambda size: self._recv_exact(sock, size))
+            if opcode is None or opcode == 0x8:
+                return
+            if opcode == 0x9:
+                with self._send_locks[connection_id]:
+                    sock.sendall(_encode_frame(0xA, data))
+            elif opcode == 0x1 and self.service:
+                try:
+                    message = json.loads(data.decode('utf-8'))
+                except ValueError:
+                    continue
+                if isinstance(message, dict):
+                    self.service.handle_incoming_message(connection_id, message)
+
+
+def _close_socket(sock: socket.socket) -> None:
+    # shutdown() wakes a reader blocked in recv(); close() alone may not
+    try:
+        sock.shutdown(socket.SHUT_RDWR)
+    except OSError:
+        pass
+    try:
+        sock.close()
+    except OSError:
+        pass
+
+
+def _encode_frame(opcode: int, payload: bytes) -> bytes:
+    length = len(payload)
+    if length < 126:
+        header = struct.pack('!BB', 0x80 | opcode, length)
+    elif length < 65536:
+        header = struct.pack('!BBH', 0x80 | opcode, 126, length)
+    else:
+        header = struct.pack('!BBQ', 0x80 | opcode, 127, length)
+    return header + payload
+
+
+def _read_frame(read: Callable[[int], Optional[bytes]]):
+    """Read one client frame; returns (None, b'') when the stream ends."""
+    header = read(2)
+    if header is None:
+        return None, b''
+    opcode = header[0] & 0x0F
+    masked = header[1] & 0x80
+    length = header[1] & 0x7F
+    if length == 126:
+        extended = read(2)
+        length = struct.unpack('!H', extended)[0] if extended else 0
+    elif length == 127:
+        extended = read(8)
+        length = struct.unpack('!Q', extended)[0] if extended else 0
+    mask = read(4) if masked else None
+    data = read(length) if length else b''
+    if data is None or (masked and mask is None):
+        return None, b''
+    if mask:
+        data = bytes(b ^ mask[i % 4] for i, b in enumerate(data))
+    return opcode, data
+
+
+def transport_from_environment() -> NotificationTransport:
+    """
+    Pick the transport from NOTIFICATION_WEBSOCKET_ENDPOINT (the API Gateway
+    connection management URL); without it deliveries are only logged.
+    """
+    endpoint = os.environ.get('NOTIFICATION_WEBSOCKET_ENDPOINT')
+    if endpoint:
+        try:
+            return ApiGatewayTransport(endpoint)
+        except Exception as e:
+            logger.error(f"Failed to initialize API Gateway transport: {str(e)}")
+    return LoggingTransport()
+
+
+# ----------------------------------------------------------------------
+# Fan-out engine
+# ----------------------------------------------------------------------
+
+class _Channel:
+    """Pending messages for one connection."""
+
+    __slots__ = ('connection_id', 'pending', 'lock', 'scheduled', 'closed',
+                 'overflows', 'failures')
+
+    def __init__(self, connection_id: str):
+        self.connection_id = connection_id
+        # coalesce key -> payload, oldest first
+        self.pending: 'OrderedDict[Any, bytes]' = OrderedDict()
+        self.lock = threading.Lock()
+        self.scheduled = False
+        self.closed = False
+        self.overflows = 0
+        self.failures = 0
+
+
+class FanoutDelivery:
+    """
+    Concurrent delivery of notifications to many connections.
+
+    publish() never blocks on the network; it queues the payload per
+    connection and returns. Workers from a shared pool drain the queues.
+    """
+
+    def __init__(self,
+                 transport: NotificationTransport,
+                 max_workers: int = DEFAULT_MAX_WORKERS,
+                 queue_size: int = DEFAULT_QUEUE_SIZE,
+                 max_overflows: Optional[int] = None,
+                 max_failures: int = 3,
+                 on_disconnect: Optional[Callable[[str, str], None]] = None):
+        """
+        Args:
+            transport: Transport that performs the sends
+            max_workers: Size of the delivery thread pool
+            queue_size: Messages kept per connection; the oldest is dropped when full
+            max_overflows: Messages dropped while one send was in progress after
+                which a connection is disconnected as too slow (default: queue_size)
+            max_failures: Consecutive failed sends after which a connection is disconnected
+            on_disconnect: Called with (connection_id, reason) when the engine
+                gives up on a connection ('gone', 'slow' or 'failing')
+        """
+        self.transport = transport
+        self.queue_size = max(1, queue_size)
+        self.max_overflows = max_overflows if max_overflows is not None else self.queue_size
+        self.max_failures = max_failures
+        self.on_disconnect = on_disconnect
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix='notify')
+        self._channels: Dict[str, _Channel] = {}
+        self._lock = threading.Lock()
+        self._idle = threading.Condition(self._lock)
+        self._active = 0
+        self._sequence = count()
+        self._shutdown = False
+        self.stats = {
+            'published': 0, 'delivered': 0, 'coalesced': 0, 'dropped': 0,
+            'failed': 0, 'disconnected': 0
+        }
+        self._stats_lock = threading.Lock()
+
+    def _count(self, key: str, amount: int = 1) -> None:
+        with self._stats_lock:
+            self.stats[key] += amount
+
+    def publish(self, connection_ids: Iterable[str], payload: bytes,
+                coalesce_key: Optional[str] = None) -> int:
+        """
+        Queue a payload for each connection.
+
+        Args:
+            connection_ids: Target connections
+            payload: Serialized notification (shared, not copied, per connection)
+            coalesce_key: Messages with the same key replace one another
+                while still queued
+
+        Returns:
+            int: Number of connections the payload was queued for
+        """
+        queued = coalesced = dropped = 0
+        to_schedule = []
+        with self._lock:
+            if self._shutdown:
+                return 0
+            for connection_id in connection_ids:
+                channel = self._channels.get(connection_id)
+                if channel is None:
+                    channel = self._channels[connection_id] = _Channel(connection_id)
+                key = coalesce_key if coalesce_key is not None else next(self._sequence)
+                with channel.lock:
+                    if channel.closed:
+                        continue
+                    if key in channel.pending:
+                        channel.pending[key] = payload
+                        coalesced += 1
+                    else:
+                        if len(channel.pending) >= self.queue_size:
+                            channel.pending.popitem(last=False)
+                            channel.overflows += 1
+                            dropped += 1
+                        channel.pending[key] = payload
+                    queued += 1
+                    if not channel.scheduled:
+                        channel.scheduled = True
+                        self._active += 1
+                        to_schedule.append(channel)
+        for channel in to_schedule:
+            self._executor.submit(self._drain, channel)
+        with self._stats_lock:
+            self.stats['published'] += queued
+            self.stats['coalesced'] += coalesced
+            self.stats['dropped'] += dropped
+        return queued
+
+    def discard(self, connection_id: str) -> None:
+        """Forget a connection and anything still queued for it."""
+        with self._lock:
+            channel = self._channels.pop(connection_id, None)
+        if channel is not None:
+            with channel.lock:
+                channel.closed = True
+                channel.pending.clear()
+
+    def _drain(self, channel: _Channel) -> None:
+        sent = 0
+        while True:
+            with channel.lock:
+                if channel.closed or not channel.pending:
+                    channel.scheduled = False
+                    break
+                if sent >= DRAIN_BATCH:
+                    # Yield the worker so other connections get a turn
+                    self._executor.submit(self._drain, channel)
+                    return
+                _, payload = channel.pending.popitem(last=False)
+            sent += 1
+            try:
+                self.transport.send(channel.connection_id, payload)
+            except ConnectionGone:
+                self._disconnect(channel, 'gone')
+                continue
+            except Exception as e:
+                self._count('failed')
+                channel.failures += 1
+                logger.warning(f"Delivery to {channel.connection_id} failed: {str(e)}")
+                if channel.failures >= self.max_failures:
+                    self._disconnect(channel, 'failing')
+                continue
+            channel.failures = 0
+            self._count('delivered')
+            with channel.lock:
+                # Messages were dropped while this send was in progress
+                too_slow = channel.overflows >= self.max_overflows
+                channel.overflows = 0
+            if too_slow:
+                self._disconnect(channel, 'slow')
+        with self._lock:
+            self._active -= 1
+            if self._active == 0:
+                self._idle.notify_all()
+
+    def _disconnect(self, channel: _Channel, reason: str) -> None:
+        with self._lock:
+            if self._channels.get(channel.connection_id) is channel:
+                del self._channels[channel.connection_id]
+        with channel.lock:
+            if channel.closed:
+                return
+            channel.closed = True
+            self._count('dropped', len(channel.pending))
+            channel.pending.clear()
+        self._count('disconnected')
+        logger.info(f"Dropping connection {channel.connection_id} ({reason})")
+        if self.on_disconnect:
+            try:
+                self.on_disconnect(channel.connection_id, reason)
+            except Exception as e:
+                logger.error(f"Error in disconnect callback: {str(e)}")
+
+    def queued(self, connection_id: str) -> int:
+        """Number of messages waiting for a connection."""
+        with self._lock:
+            channel = self._channels.get(connection_id)
+        return len(channel.pending) if channel else 0
+
+    def flush(self, timeout: Optional[float] = None) -> bool:
+        """
+        Wait until every queue has drained.
+
+        Returns:
+            bool: False if the timeout expired first
+        """
+        with self._lock:
+            return self._idle.wait_for(lambda: self._active == 0, timeout)
+
+    def shutdown(self, wait: bool = True) -> None:
+        """Stop accepting messages and, if wait, finish what is queued."""
+        with self._lock:
+            self._shutdown = True
+        if wait:
+            self.flush()
+        self._executor.shutdown(wait=wait)
+
+
+# ----------------------------------------------------------------------
+# Benchmark
+# ----------------------------------------------------------------------
+
+class _SimulatedTransport(NotificationTransport):
+    """Sleeps per send: a fixed latency, longer for the listed slow connections."""
+
+    def __init__(self, latency: float, slow: Dict[str, float]):
+        self.latency = latency
+        self.slow = slow
+        self.delivered_at: Dict[str, float] = {}
+
+    def send(self, connection_id: str, payload: bytes) -> None:
+        time.sleep(self.slow.get(connection_id, self.latency))
+        self.delivered_at[connection_id] = time.perf_counter()
+
+
+def run_benchmark(connections=500, latency=0.002, slow_connections=5, slow_latency=0.5,
+                  max_workers=DEFAULT_MAX_WORKERS):
+    """
+    Deliver one alert to many caregiver devices, a few of them slow.
+
+    Compares a sequential per-connection loop with the fan-out engine and
+    reports when the typical (fast) device has the alert.
+
+    Returns:
+        dict: Timings in seconds
+    """
+    ids = [f"conn-{i}" for i in range(connections)]
+    slow = {connection_id: slow_latency for connection_id in ids[:slow_connections]}
+    transport = _SimulatedTransport(latency, slow)
+    payload = json.dumps({'type': 'alert', 'alert_type': 'wandering', 'patient_id': 'p1'}).encode()
+
+    # Sequential: the fast devices wait behind the slow ones at the front
+    start = time.perf_counter()
+    fast_done = None
+    for connection_id in ids:
+        transport.send(connection_id, payload)
+        if connection_id == ids[-1]:
+            fast_done = time.perf_counter() - start
+    sequential_seconds = time.perf_counter() - start
+
+    engine = FanoutDelivery(transport, max_workers=max_workers)
+    transport.delivered_at.clear()
+    start = time.perf_counter()
+    engine.publish(ids, payload, coalesce_key='alert:wandering:p1')
+    publish_seconds = time.perf_counter() - start
+    engine.flush()
+    fanout_seconds = time.perf_counter() - start
+    engine.shutdown()
+    fast_times = sorted(transport.delivered_at[c] - start for c in ids[slow_connections:])
+
+    return {
+        'connections': connections,
+        'slow_connections': slow_connections,
+        'sequential_all_delivered_seconds': sequential_seconds,
+        'sequential_last_fast_device_seconds': fast_done,
+        'fanout_publish_seconds': publish_seconds,
+        'fanout_all_delivered_seconds': fanout_seconds,
+        'fanout_fast_devices_p50_seconds': fast_times[len(fast_times) // 2],
+        'fanout_fast_devices_p99_seconds': fast_times[int(len(fast_times) * 0.99) - 1],
+    }
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO)
+    for key, value in run_benchmark().items():
+        print(f"{key}: {value}")
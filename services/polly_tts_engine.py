@@ -25,48 +25,66 @@ Provides high-quality, natural-sounding neural voices
 # Everett N. Christman
 # 📧 lumacognify@thechristmanaiproject.com
 # 🌐 https://thechristmanaiproject.com
+import io
 import logging
 import os
-import hashlib
+import time
 import boto3
 from datetime import datetime
 from botocore.exceptions import ClientError
 
+from services.tts_cache import TTSCache, strip_ssml
+
 logger = logging.getLogger(__name__)
 
+# One silent MPEG-1 Layer III frame (128 kbps, 44.1 kHz, mono), about 26 ms of audio
+SILENT_MP3_FRAME = b'\xff\xfb\x90\xc4' + bytes(413)
+
+
+class StubPollyClient:
+    """
+    Local stand-in for the boto3 Polly client, for tests and benchmarks.
+    Returns silent MP3 audio roughly as long as the text would take to say,
+    after a delay that grows with the text length like Polly's does.
+    """
+    
+    def __init__(self, base_latency=0.0, per_char_latency=0.0):
+        self.base_latency = base_latency
+        self.per_char_latency = per_char_latency
+        self.calls = []
+    
+    def synthesize_speech(self, Text, OutputFormat='mp3', **kwargs):
+        spoken = strip_ssml(Text)
+        self.calls.append(dict(kwargs, Text=Text, OutputFormat=OutputFormat))
+        time.sleep(self.base_latency + self.per_char_latency * len(spoken))
+        # About 15 characters per second of speech
+        frames = max(1, int(len(spoken) / 15 / 0.026))
+        return {
+            'AudioStream': io.BytesIO(SILENT_MP3_FRAME * frames),
+            'ContentType': 'audio/mpeg'
+        }
+
+
 class PollyTTSEngine:
     """
     Amazon Polly Text-to-Speech engine with neural voices.
     Derek spent 3,000+ hours perfecting voice quality for AlphaVox.
     """
     
-    def __init__(self):
-        """Initialize Polly TTS Engine with AWS credentials from environment."""
+    def __init__(self, polly_client=None):
+        """
+        Initialize Polly TTS Engine with AWS credentials from environment.
+        
+        Args:
+            polly_client: Client to use instead of boto3's (e.g. StubPollyClient);
+                POLLY_STUB=1 in the environment uses the stub
+        """
+        self.logger = logger
         self.polly_client = None
-        self.audio_cache = {}
         self.cache_dir = 'static/audio/polly_cache'
-        os.makedirs(self.cache_dir, exist_ok=True)
+        self.audio_cache = TTSCache(self.cache_dir, '/static/audio/polly_cache')
         self._available = False
         
-        # Initialize AWS Polly client
-        try:
-            self.polly_client = boto3.client(
-                'polly',
-                aws_access_key_id=os.getenv('AWS_ACCESS_KEY_ID'),
-                aws_secret_access_key=os.getenv('AWS_SECRET_ACCESS_KEY'),
-                region_name=os.getenv('AWS_DEFAULT_REGION', 'us-east-1')
-            )
-            self._available = True
-            logging.info("✅ Amazon Polly Neural TTS initialized successfully")
-        except Exception as e:
-            logging.error(f"❌ Failed to initialize Amazon Polly: {e}")
-            self.polly_client = None
-            self._available = False
-    
-    def is_available(self):
-        """Check if Polly TTS is available."""
-        return self._available
-        
         # Premium Neural Voices (Derek's favorites - 3,000+ hours of testing)
         self.neural_voices = {
             # Female voices
@@ -127,7 +145,35 @@ class PollyTTSEngine:
         # Default voice (Derek's recommendation after 3,000+ hours)
         self.default_voice = 'joanna'
         
-        self.logger.info("🎤 Polly TTS Engine initialized")
+        if polly_client is None and os.getenv('POLLY_STUB', '').lower() in ('1', 'true', 'yes'):
+            polly_client = StubPollyClient()
+        if polly_client is not None:
+            self.polly_client = polly_client
+            self._available = True
+            return
+        
+        # Initialize AWS Polly client
+        try:
+            self.polly_client = boto3.client(
+                'polly',
+                aws_access_key_id=os.getenv('AWS_ACCESS_KEY_ID'),
+                aws_secret_access_key=os.getenv('AWS_SECRET_ACCESS_KEY'),
+                region_name=os.getenv('AWS_DEFAULT_REGION', 'us-east-1')
+            )
+            self._available = True
+            logging.info("✅ Amazon Polly Neural TTS initialized successfully")
+        except Exception as e:
+            logging.error(f"❌ Failed to initialize Amazon Polly: {e}")
+            self.polly_client = None
+            self._available = False
+    
+    @property
+    def polly_available(self):
+        return self._available
+    
+    def is_available(self):
+        """Check if Polly TTS is available."""
+        return self._available
     
     def synthesize(self, text, voice_id=None, **kwargs):
         """
@@ -146,14 +192,15 @@ class PollyTTSEngine:
         
         return self.generate_speech(text, voice_id, cache=kwargs.get('cache', True))
     
-    def generate_speech(self, text, voice_id=None, cache=True):
+    def generate_speech(self, text, voice_id=None, cache=True, track=True):
         """
         Generate speech using Amazon Polly Neural voices.
         
         Args:
-            text: Text to convert to speech
+            text: Text (or SSML wrapped in <speak>) to convert to speech
             voice_id: Voice ID (default: joanna)
-            cache: Whether to cache the result
+            cache: Whether to use a cached result (new audio is always cached)
+            track: Count the request towards the phrase's frequency (off for pre-synthesis)
             
         Returns:
             dict: Result with file path or error
@@ -180,58 +227,34 @@ class PollyTTSEngine:
             
             voice = self.neural_voices.get(voice_id)
             if not voice:
-                voice = self.neural_voices[self.default_voice]
                 self.logger.warning(f"Voice {voice_id} not found, using default: {self.default_voice}")
+                voice_id = self.default_voice
+                voice = self.neural_voices[voice_id]
             
-            # Generate cache key
-            cache_key = hashlib.md5((text + voice_id).encode()).hexdigest()
-            cache_path = os.path.join(self.cache_dir, f"{cache_key}.mp3")
+            text_type = 'ssml' if text.lstrip().startswith('<speak>') else 'text'
             
-            # Check cache
-            if cache and os.path.exists(cache_path):
-                return {
-                    'success': True,
-                    'path': cache_path,
-                    'url': f'/static/audio/polly_cache/{cache_key}.mp3',
-                    'cached': True,
-                    'voice': voice_id,
-                    'engine': 'neural',
-                    'timestamp': datetime.utcnow().isoformat()
-                }
-            
-            # Generate speech with Polly
-            try:
+            def synthesize(path):
                 response = self.polly_client.synthesize_speech(
                     Text=text,
+                    TextType=text_type,
                     OutputFormat='mp3',
                     VoiceId=voice['voice_id'],
                     Engine=voice['engine'],  # 'neural' for high quality
                     LanguageCode=voice['language_code']
                 )
+                if 'AudioStream' not in response:
+                    raise ValueError('No audio stream in Polly response')
                 
                 # Save audio stream to file
-                if 'AudioStream' in response:
-                    with open(cache_path, 'wb') as file:
-                        file.write(response['AudioStream'].read())
-                    
-                    return {
-                        'success': True,
-                        'path': cache_path,
-                        'url': f'/static/audio/polly_cache/{cache_key}.mp3',
-                        'cached': False,
-                        'voice': voice_id,
-                        'engine': 'neural',
-                        'description': voice['description'],
-                        'timestamp': datetime.utcnow().isoformat()
-                    }
-                else:
-                    return {
-                        'success': False,
-                        'error': 'No audio stream in Polly response',
-                        'text': text,
-                        'timestamp': datetime.utcnow().isoformat()
-                    }
+                with open(path, 'wb') as file:
+                    file.write(response['AudioStream'].read())
             
+            # Concurrent requests for the same phrase share one Polly call
+            try:
+                entry = self.audio_cache.fetch(
+                    text, f"polly:{voice['voice_id']}:{voice['engine']}", synthesize,
+                    refresh=not cache, track=track, voice_id=voice_id
+                )
             except ClientError as e:
                 error_code = e.response['Error']['Code']
                 if error_code == 'InvalidSsml':
@@ -244,6 +267,19 @@ class PollyTTSEngine:
                     }
                 else:
                     raise
+            
+            result = {
+                'success': True,
+                'path': entry['path'],
+                'url': entry['url'],
+                'cached': entry['cached'],
+                'voice': voice_id,
+                'engine': 'neural',
+                'timestamp': datetime.utcnow().isoformat()
+            }
+            if not entry['cached']:
+                result['description'] = voice['description']
+            return result
         
         except Exception as e:
             self.logger.error(f"Error generating Polly speech: {str(e)}")
@@ -360,6 +396,22 @@ class PollyTTSEngine:
         test_text = f"Hello! I'm {voice_id}, one of AlphaWolf's neural voices. Derek spent over 3,000 hours perfecting our voice system."
         
         return self.generate_speech(test_text, voice_id, cache=False)
+    
+    def cleanup_cache(self, max_age_days=30):
+        """Remove cached audio not played for max_age_days (the size budget is enforced automatically)."""
+        try:
+            count = self.audio_cache.evict(max_age=max_age_days * 86400)
+            self.logger.info(f"Cleaned up {count} old cache files")
+            return {
+                'success': True,
+                'files_removed': count
+            }
+        except Exception as e:
+            self.logger.error(f"Error cleaning up cache: {str(e)}")
+            return {
+                'success': False,
+                'error': str(e)
+            }
 
 
 # Singleton instance
@@ -18,31 +18,57 @@ import json
 import time
 import os
 import uuid
-from typing import Dict, List, Any, Optional, Callable
+from typing import Dict, List, Any, Optional, Callable, Set
 import threading
 import boto3
 from botocore.exceptions import ClientError
 
+from services.notification_delivery import (
+    FanoutDelivery,
+    NotificationTransport,
+    transport_from_environment
+)
+
+# Groups every service has, even when empty
+BUILTIN_GROUPS = ('all', 'caregivers', 'patients')
+
 class RealtimeNotificationService:
     """
     Service for sending real-time notifications to caregivers and patients.
     Uses AWS SNS for pub/sub messaging and supports WebSocket integration.
+    
+    Notifications are handed to a FanoutDelivery engine, which sends them to
+    each connection concurrently through the configured transport.
     """
     
-    def __init__(self):
-        """Initialize the real-time notification service."""
+    def __init__(self, transport: Optional[NotificationTransport] = None, **delivery_options):
+        """
+        Initialize the real-time notification service.
+        
+        Args:
+            transport: How notifications reach connections (default: API Gateway
+                when NOTIFICATION_WEBSOCKET_ENDPOINT is set, otherwise logging only)
+            **delivery_options: Passed to FanoutDelivery (max_workers, queue_size, ...)
+        """
         self.logger = logging.getLogger(__name__)
         
         # Active WebSocket connections
         self.connections: Dict[str, Dict[str, Any]] = {}
         self.connection_lock = threading.Lock()
         
-        # Connection groups for targeting specific users or roles
-        self.connection_groups: Dict[str, List[str]] = {
-            "all": [],
-            "caregivers": [],
-            "patients": []
-        }
+        # Connection groups for targeting specific users or roles, and the
+        # groups each connection belongs to (so unregistering doesn't scan them all)
+        self.connection_groups: Dict[str, Set[str]] = {name: set() for name in BUILTIN_GROUPS}
+        self.connection_memberships: Dict[str, Set[str]] = {}
+        
+        # Delivery to connections
+        self.transport = transport or transport_from_environment()
+        self.delivery = FanoutDelivery(
+            self.transport,
+            on_disconnect=self._on_delivery_disconnect,
+            **delivery_options
+        )
+        self.transport.attach(self)
         
         # AWS SNS configuration
         self.use_sns = False
@@ -72,34 +98,27 @@ class RealtimeNotificationService:
             connection_id: Unique WebSocket connection ID
             user_data: User data including type, id, etc.
         """
+        user_type = user_data.get('type', '').lower()
+        groups = {'all'}
+        if user_type in ('caregiver', 'caregivers'):
+            groups.add('caregivers')
+        elif user_type in ('patient', 'patients'):
+            groups.add('patients')
+        user_id = user_data.get('id')
+        if user_id:
+            groups.add(f"user_{user_id}")
+        
         with self.connection_lock:
+            # Re-registering replaces the previous group memberships
+            self._remove_from_groups(connection_id)
             self.connections[connection_id] = {
                 'user_data': user_data,
                 'connected_at': time.time(),
                 'last_activity': time.time()
             }
-            
-            # Add to 'all' group
-            if connection_id not in self.connection_groups['all']:
-                self.connection_groups['all'].append(connection_id)
-            
-            # Add to type-specific group
-            user_type = user_data.get('type', '').lower()
-            if user_type in ('caregiver', 'caregivers'):
-                if connection_id not in self.connection_groups['caregivers']:
-                    self.connection_groups['caregivers'].append(connection_id)
-            elif user_type in ('patient', 'patients'):
-                if connection_id not in self.connection_groups['patients']:
-                    self.connection_groups['patients'].append(connection_id)
-            
-            # Add to user-specific group
-            user_id = user_data.get('id')
-            if user_id:
-                group_name = f"user_{user_id}"
-                if group_name not in self.connection_groups:
-                    self.connection_groups[group_name] = []
-                if connection_id not in self.connection_groups[group_name]:
-                    self.connection_groups[group_name].append(connection_id)
+            for group_name in groups:
+                self.connection_groups.setdefault(group_name, set()).add(connection_id)
+            self.connection_memberships[connection_id] = groups
         
         self.logger.info(f"WebSocket connection registered: {connection_id} ({user_type})")
     
@@ -111,16 +130,29 @@ class RealtimeNotificationService:
             connection_id: Connection ID to unregister
         """
         with self.connection_lock:
-            if connection_id in self.connections:
-                del self.connections[connection_id]
-            
-            # Remove from all groups
-            for group_name, connections in self.connection_groups.items():
-                if connection_id in connections:
-                    self.connection_groups[group_name].remove(connection_id)
+            self.connections.pop(connection_id, None)
+            self._remove_from_groups(connection_id)
+        
+        # Drop anything still queued for it
+        self.delivery.discard(connection_id)
         
         self.logger.info(f"WebSocket connection unregistered: {connection_id}")
     
+    def _remove_from_groups(self, connection_id: str) -> None:
+        """Remove a connection from its groups (caller holds connection_lock)."""
+        for group_name in self.connection_memberships.pop(connection_id, ()):
+            members = self.connection_groups.get(group_name)
+            if members is None:
+                continue
+            members.discard(connection_id)
+            if not members and group_name not in BUILTIN_GROUPS:
+                del self.connection_groups[group_name]
+    
+    def _on_delivery_disconnect(self, connection_id: str, reason: str) -> None:
+        """Forget connections the delivery engine gave up on (gone, slow or failing)."""
+        self.logger.warning(f"Dropping WebSocket connection {connection_id}: {reason}")
+        self.unregister_connection(connection_id)
+    
     def update_connection_activity(self, connection_id: str) -> None:
         """
         Update last activity timestamp for a connection.
@@ -175,44 +207,70 @@ class RealtimeNotificationService:
                 self.logger.error(f"Error publishing to SNS: {str(e)}")
                 # Fall back to direct WebSocket delivery
         
-        # Get target connection IDs
-        target_connections = []
-        
-        with self.connection_lock:
-            if not target or target == 'all':
-                # Send to all connections
-                target_connections = list(self.connections.keys())
-            elif target in self.connection_groups:
-                # Send to a specific group
-                target_connections = self.connection_groups[target]
-            elif target in self.connections:
-                # Send to a specific connection
-                target_connections = [target]
-            else:
-                # Try to parse as user ID
-                user_group = f"user_{target}"
-                if user_group in self.connection_groups:
-                    target_connections = self.connection_groups[user_group]
-        
-        # Send the notification to each target connection
-        # Note: In a real implementation, this would use API Gateway WebSocket API
-        # to send messages to each connection. For now, we'll just log the intent.
-        for conn_id in target_connections:
-            if conn_id in self.connections:
-                self.logger.debug(f"Would send notification to connection {conn_id}: {notification['id']}")
-                # In a real implementation:
-                # api_gateway.post_to_connection(
-                #     ConnectionId=conn_id,
-                #     Data=json.dumps(notification)
-                # )
+        target_connections = self.resolve_target(target)
         
+        # Serialized once; the delivery engine queues it for every connection
+        # and sends concurrently, so one slow device doesn't hold up the rest
         if target_connections:
-            self.logger.info(f"Notification {notification['id']} sent to {len(target_connections)} connections")
+            payload = json.dumps(notification).encode('utf-8')
+            self.delivery.publish(target_connections, payload, self._coalesce_key(notification))
+            self.logger.info(f"Notification {notification['id']} queued for {len(target_connections)} connections")
             return True
         else:
             self.logger.warning(f"No connections found for target: {target}")
             return False
     
+    def resolve_target(self, target: Optional[str] = None) -> List[str]:
+        """
+        Get the connection IDs a target refers to (see send_notification).
+        
+        Args:
+            target: None/'all', a group name, a connection ID or a user ID
+            
+        Returns:
+            List of connection IDs
+        """
+        with self.connection_lock:
+            if not target or target == 'all':
+                return list(self.connections)
+            if target in self.connection_groups:
+                return list(self.connection_groups[target])
+            if target in self.connections:
+                return [target]
+            return list(self.connection_groups.get(f"user_{target}", ()))
+    
+    @staticmethod
+    def _coalesce_key(notification: Dict[str, Any]) -> Optional[str]:
+        """
+        Key under which queued copies of a notification replace each other.
+        
+        Alerts coalesce per alert type and patient, so a device that is
+        behind receives only the latest of a burst. Other notifications
+        coalesce only when they carry an explicit 'coalesce_key'.
+        """
+        if 'coalesce_key' in notification:
+            return notification['coalesce_key']
+        if notification.get('type') == 'alert' and notification.get('patient_id'):
+            return f"alert:{notification.get('alert_type')}:{notification['patient_id']}"
+        return None
+    
+    def flush(self, timeout: Optional[float] = None) -> bool:
+        """
+        Wait until queued notifications have been delivered.
+        
+        Args:
+            timeout: Maximum seconds to wait (None waits indefinitely)
+            
+        Returns:
+            bool: False if the timeout expired first
+        """
+        return self.delivery.flush(timeout)
+    
+    def close(self) -> None:
+        """Deliver what is queued, then stop the delivery workers and transport."""
+        self.delivery.shutdown(wait=True)
+        self.transport.close()
+    
     def register_message_handler(self, message_type: str, handler: Callable[[Dict[str, Any]], None]) -> None:
         """
         Register a handler for a specific message type.
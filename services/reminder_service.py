@@ -13,204 +13,548 @@
 # This is not just code. This is redemption in code.
 # Contact: lumacognify@thechristmanaiproject.com
 # https://thechristmanaiproject.com
+import heapq
 import logging
-import schedule
-import time
-from datetime import datetime, timedelta
+import os
 import threading
+import time
+from datetime import datetime, timedelta, timezone
+from zoneinfo import ZoneInfo, ZoneInfoNotFoundError
 
 logger = logging.getLogger(__name__)
 
+CRON_ALIASES = {
+    '@yearly': '0 0 1 1 *',
+    '@annually': '0 0 1 1 *',
+    '@monthly': '0 0 1 * *',
+    '@weekly': '0 0 * * 0',
+    '@daily': '0 0 * * *',
+    '@midnight': '0 0 * * *',
+    '@hourly': '0 * * * *',
+}
+MONTH_NAMES = {name: i for i, name in enumerate(
+    ['jan', 'feb', 'mar', 'apr', 'may', 'jun', 'jul', 'aug', 'sep', 'oct', 'nov', 'dec'], start=1)}
+WEEKDAY_NAMES = {name: i for i, name in enumerate(['sun', 'mon', 'tue', 'wed', 'thu', 'fri', 'sat'])}
+
+
+class CronSchedule:
+    """
+    Five-field cron expression (minute hour day-of-month month day-of-week).
+
+    Supports '*', lists, ranges, steps, month/weekday names and the @daily
+    style aliases. Like standard cron, when both day fields are restricted a
+    day matches if either one does. Plain "HH:MM" is accepted as a daily time.
+    """
+
+    FIELDS = (
+        ('minute', 0, 59, None),
+        ('hour', 0, 23, None),
+        ('day', 1, 31, None),
+        ('month', 1, 12, MONTH_NAMES),
+        ('weekday', 0, 7, WEEKDAY_NAMES),
+    )
+
+    def __init__(self, expression):
+        self.expression = expression.strip()
+        text = CRON_ALIASES.get(self.expression.lower(), self.expression)
+
+        if ':' in text and ' ' not in text:
+            hour, minute = text.split(':', 1)
+            text = f"{int(minute)} {int(hour)} * * *"
+
+        parts = text.split()
+        if len(parts) != 5:
+            raise ValueError(f"Expected HH:MM or a 5-field cron expression, got '{expression}'")
+
+        values = [self._parse_field(part, *spec) for part, spec in zip(parts, self.FIELDS)]
+        self.minutes, self.hours, self.days, self.months, weekdays = values
+        # Cron allows 7 for Sunday
+        self.weekdays = {0 if d == 7 else d for d in weekdays}
+        self.day_restricted = parts[2] != '*'
+        self.weekday_restricted = parts[4] != '*'
+        self._sorted_minutes = sorted(self.minutes)
+        self._sorted_hours = sorted(self.hours)
+
+    @staticmethod
+    def _parse_field(part, name, low, high, names):
+        values = set()
+        for item in part.lower().split(','):
+            step = 1
+            if '/' in item:
+                item, step_text = item.split('/', 1)
+                step = int(step_text)
+                if step <= 0:
+                    raise ValueError(f"Invalid step in cron {name} field: '{part}'")
+            if item == '*':
+                start, end = low, high
+            elif '-' in item:
+                start_text, end_text = item.split('-', 1)
+                start = names.get(start_text, None) if names else None
+                end = names.get(end_text, None) if names else None
+                start = int(start_text) if start is None else start
+                end = int(end_text) if end is None else end
+            else:
+                start = names.get(item) if names else None
+                start = int(item) if start is None else start
+                end = high if step > 1 else start
+            if not (low <= start <= high and low <= end <= high and start <= end):
+                raise ValueError(f"Cron {name} field out of range: '{part}'")
+            values.update(range(start, end + 1, step))
+        return values
+
+    def _day_matches(self, day):
+        cron_weekday = (day.weekday() + 1) % 7
+        if self.day_restricted and self.weekday_restricted:
+            return day.day in self.days or cron_weekday in self.weekdays
+        if self.day_restricted:
+            return day.day in self.days
+        if self.weekday_restricted:
+            return cron_weekday in self.weekdays
+        return True
+
+    def next_after(self, after):
+        """
+        First matching wall-clock minute strictly after ``after`` (naive).
+
+        Returns:
+            datetime or None if nothing matches within five years
+        """
+        start = after.replace(second=0, microsecond=0) + timedelta(minutes=1)
+        day = start.date()
+        for _ in range(366 * 5):
+            if day.month in self.months and self._day_matches(day):
+                same_day = day == start.date()
+                for hour in self._sorted_hours:
+                    if same_day and hour < start.hour:
+                        continue
+                    for minute in self._sorted_minutes:
+                        if same_day and hour == start.hour and minute < start.minute:
+                            continue
+                        return datetime(day.year, day.month, day.day, hour, minute)
+            day += timedelta(days=1)
+        return None
+
+
 class ReminderService:
-    """Service for managing patient reminders and notifications."""
-    
-    def __init__(self):
+    """
+    Service for managing patient reminders and notifications.
+
+    Each reminder stores its next fire time (UTC) in an indexed column. A
+    background thread loads only the reminders due within the next window
+    into a min-heap keyed on fire time, sleeps until the earliest one, and
+    advances recurring reminders to their next occurrence after firing.
+    Reminders that came due while the process was down are fired late
+    (within ``catch_up_seconds``) instead of being skipped. Each worker
+    process runs its own scheduler; an occurrence is claimed with a
+    conditional update before it fires, so it fires once per deployment.
+    """
+
+    def __init__(self, window_seconds=300, catch_up_seconds=12 * 3600, default_timezone=None):
+        """
+        Args:
+            window_seconds: How far ahead each indexed query loads due reminders
+            catch_up_seconds: Missed reminders older than this are skipped, not fired
+            default_timezone: IANA zone for reminders without one
+                (default: REMINDER_TIMEZONE env var, else server local time)
+        """
         self.logger = logging.getLogger(__name__)
-        self.reminders = {}  # Dict of active reminders by ID
+        self.window_seconds = window_seconds
+        self.catch_up_seconds = catch_up_seconds
+        self.default_timezone = default_timezone or os.environ.get('REMINDER_TIMEZONE')
         self.callbacks = {
             'on_reminder': []  # Callbacks to execute when reminder is triggered
         }
+
+        # Min-heap of (fire_at epoch, reminder_id); _scheduled holds the live
+        # fire time per reminder so rescheduled or removed entries are skipped
+        self._heap = []
+        self._scheduled = {}
+        self._loaded_until = 0.0
+        self._lock = threading.RLock()
+        self._wakeup = threading.Event()
+
+        self.app = None
+        self.scheduler_active = False
+        self.scheduler_thread = None
         self.logger.info("Reminder service initialized")
-        
+
+    # ------------------------------------------------------------------
+    # Time handling
+    # ------------------------------------------------------------------
+
+    def get_timezone(self, reminder=None):
+        """Zone a reminder's wall-clock times are interpreted in (None = server local)."""
+        name = getattr(reminder, 'timezone_name', None) or self.default_timezone
+        if not name:
+            return None
+        try:
+            return ZoneInfo(name)
+        except (ZoneInfoNotFoundError, ValueError):
+            self.logger.warning(f"Unknown timezone '{name}', using server local time")
+            return None
+
+    @staticmethod
+    def _to_utc_naive(local_dt, tz):
+        aware = local_dt.replace(tzinfo=tz) if tz else local_dt.astimezone()
+        return aware.astimezone(timezone.utc).replace(tzinfo=None)
+
+    @staticmethod
+    def _to_local(utc_naive, tz):
+        aware = utc_naive.replace(tzinfo=timezone.utc)
+        return aware.astimezone(tz) if tz else aware.astimezone()
+
+    def compute_next_fire(self, reminder, after=None):
+        """
+        Next time a reminder should fire, strictly after ``after``.
+
+        Args:
+            reminder: Reminder with time (HH:MM or cron) and optional timezone_name
+            after: UTC naive datetime (default: now)
+
+        Returns:
+            datetime: UTC naive fire time, or None if the schedule never matches
+
+        Raises:
+            ValueError: If the time format is invalid
+        """
+        tz = self.get_timezone(reminder)
+        after = after or datetime.utcnow()
+        local_after = self._to_local(after, tz).replace(tzinfo=None)
+        local_next = CronSchedule(reminder.time).next_after(local_after)
+        if local_next is None:
+            return None
+        return self._to_utc_naive(local_next, tz)
+
+    # ------------------------------------------------------------------
+    # Schema and startup
+    # ------------------------------------------------------------------
+
+    def ensure_schema(self):
+        """
+        Add the scheduling columns to an existing reminders table and fill in
+        next fire times for reminders created before they existed.
+        Must run inside an app context.
+        """
+        from extensions import db
+        from sqlalchemy import inspect, text
+        import models
+
+        columns = {c['name'] for c in inspect(db.engine).get_columns('reminders')}
+        added = []
+        for name, ddl in (
+            ('timezone_name', 'VARCHAR(64)'),
+            ('next_fire_at', 'DATETIME'),
+            ('last_fired_at', 'DATETIME'),
+        ):
+            if name not in columns:
+                db.session.execute(text(f"ALTER TABLE reminders ADD COLUMN {name} {ddl}"))
+                added.append(name)
+        if 'next_fire_at' in added:
+            db.session.execute(text(
+                "CREATE INDEX IF NOT EXISTS ix_reminders_next_fire_at ON reminders (next_fire_at)"
+            ))
+        db.session.commit()
+        if added:
+            self.logger.info(f"Added reminder scheduling columns: {', '.join(added)}")
+
+        backfilled = 0
+        pending = models.Reminder.query.filter(
+            models.Reminder.completed == False,  # noqa: E712
+            models.Reminder.next_fire_at.is_(None)
+        ).all()
+        for reminder in pending:
+            try:
+                reminder.next_fire_at = self.compute_next_fire(reminder)
+                backfilled += 1
+            except ValueError as e:
+                self.logger.error(f"Reminder {reminder.id} has an invalid time '{reminder.time}': {str(e)}")
+        db.session.commit()
+        if backfilled:
+            self.logger.info(f"Scheduled {backfilled} existing reminders")
+
+    def init_app(self, app):
+        """Prepare the reminders table and start the scheduler thread."""
+        self.app = app
+        with app.app_context():
+            self.ensure_schema()
+        self.start_scheduler()
+
+    def start_scheduler(self, app=None):
+        """Start the background scheduler thread."""
+        if app is not None:
+            self.app = app
+        if self.scheduler_active:
+            return False
+        self.scheduler_active = True
+        self.scheduler_thread = threading.Thread(target=self._scheduler_loop, name='reminder-scheduler')
+        self.scheduler_thread.daemon = True
+        self.scheduler_thread.start()
+        self.logger.info("Reminder scheduler started")
+        return True
+
+    def stop_scheduler(self, timeout=5.0):
+        """Stop the background scheduler thread."""
+        if not self.scheduler_active:
+            return False
+        self.scheduler_active = False
+        self._wakeup.set()
+        if self.scheduler_thread:
+            self.scheduler_thread.join(timeout=timeout)
+        self.logger.info("Reminder scheduler stopped")
+        return True
+
+    # ------------------------------------------------------------------
+    # Heap management
+    # ------------------------------------------------------------------
+
+    def _push(self, reminder_id, fire_at):
+        """Track a fire time (UTC naive) if it falls inside the loaded window."""
+        epoch = fire_at.replace(tzinfo=timezone.utc).timestamp()
+        with self._lock:
+            if epoch > self._loaded_until:
+                # A later window query will pick it up
+                self._scheduled.pop(reminder_id, None)
+                return False
+            if self._scheduled.get(reminder_id) == epoch:
+                return False
+            self._scheduled[reminder_id] = epoch
+            heapq.heappush(self._heap, (epoch, reminder_id))
+        return True
+
+    def _load_window(self, now):
+        """Load reminders due before now + window with one indexed query."""
+        import models
+
+        horizon = now + self.window_seconds
+        horizon_dt = datetime.fromtimestamp(horizon, tz=timezone.utc).replace(tzinfo=None)
+        rows = models.Reminder.query.with_entities(
+            models.Reminder.id, models.Reminder.next_fire_at
+        ).filter(
+            models.Reminder.completed == False,  # noqa: E712
+            models.Reminder.next_fire_at.isnot(None),
+            models.Reminder.next_fire_at <= horizon_dt
+        ).all()
+
+        with self._lock:
+            self._loaded_until = max(self._loaded_until, horizon)
+            for reminder_id, fire_at in rows:
+                self._push(reminder_id, fire_at)
+        return len(rows)
+
+    def _pop_due(self, now):
+        due = {}
+        with self._lock:
+            while self._heap and self._heap[0][0] <= now:
+                epoch, reminder_id = heapq.heappop(self._heap)
+                if self._scheduled.get(reminder_id) == epoch:
+                    del self._scheduled[reminder_id]
+                    due[reminder_id] = epoch
+        return due
+
+    def _fire_due(self, now):
+        """Fire every reminder due at ``now`` and advance it in the database."""
+        from extensions import db
+        from sqlalchemy import update
+        import models
+
+        due = self._pop_due(now)
+        if not due:
+            return 0
+
+        fired = 0
+        now_dt = datetime.fromtimestamp(now, tz=timezone.utc).replace(tzinfo=None)
+        ids = list(due)
+        for start in range(0, len(ids), 500):
+            reminders = models.Reminder.query.filter(models.Reminder.id.in_(ids[start:start + 500])).all()
+            for reminder in reminders:
+                if reminder.completed or reminder.next_fire_at is None:
+                    continue
+                scheduled_at = reminder.next_fire_at
+                scheduled_epoch = scheduled_at.replace(tzinfo=timezone.utc).timestamp()
+                if abs(scheduled_epoch - due[reminder.id]) > 1:
+                    # Rescheduled since it was loaded; follow the database
+                    self._push(reminder.id, scheduled_at)
+                    continue
+
+                late_seconds = now - scheduled_epoch
+                trigger = late_seconds <= self.catch_up_seconds
+
+                next_fire_at = None
+                if reminder.recurring:
+                    # Missed occurrences collapse into the single catch-up below
+                    try:
+                        next_fire_at = self.compute_next_fire(reminder, after=now_dt)
+                    except ValueError as e:
+                        self.logger.error(f"Cannot reschedule reminder {reminder.id}: {str(e)}")
+
+                # Every worker process runs a scheduler; advancing the row only
+                # if it still holds this occurrence lets exactly one of them fire it
+                values = {
+                    'next_fire_at': next_fire_at,
+                    'completed': not reminder.recurring
+                }
+                if trigger:
+                    values['last_fired_at'] = now_dt
+                claimed = db.session.execute(
+                    update(models.Reminder).where(
+                        models.Reminder.id == reminder.id,
+                        models.Reminder.next_fire_at == scheduled_at
+                    ).values(**values)
+                ).rowcount == 1
+                db.session.commit()
+                if not claimed:
+                    continue
+
+                if next_fire_at is not None:
+                    self._push(reminder.id, next_fire_at)
+                if trigger:
+                    self._trigger_reminder(reminder, late_seconds)
+                    fired += 1
+                else:
+                    self.logger.warning(
+                        f"Skipping reminder {reminder.id} ({reminder.title}): missed by {int(late_seconds)}s"
+                    )
+
+        if fired:
+            self.logger.info(f"Triggered {fired} reminders")
+        return fired
+
+    def _scheduler_loop(self):
+        from extensions import db
+
+        with self.app.app_context():
+            next_load = 0.0
+            while self.scheduler_active:
+                now = time.time()
+                try:
+                    if now >= next_load:
+                        self._load_window(now)
+                        # Reload at half-window so consecutive windows overlap
+                        next_load = now + self.window_seconds / 2
+                    self._fire_due(time.time())
+                except Exception as e:
+                    self.logger.error(f"Error in reminder scheduler: {str(e)}")
+                    db.session.rollback()
+                finally:
+                    db.session.remove()
+
+                with self._lock:
+                    next_fire = self._heap[0][0] if self._heap else next_load
+                timeout = max(0.0, min(next_fire, next_load) - time.time())
+                self._wakeup.wait(timeout)
+                self._wakeup.clear()
+
+    # ------------------------------------------------------------------
+    # Public API
+    # ------------------------------------------------------------------
+
     def check_reminders(self):
         """
-        Check all reminders and trigger notifications for any that are due.
-        This method is called by the scheduler.
+        Fire every reminder that is due now, including any missed ones.
+        Runs one scheduler pass; must be called inside an app context.
         """
         try:
-            from app import db
-            import models
-            
-            self.logger.info("Checking reminders...")
-            current_time = datetime.now().strftime("%H:%M")
-            # Get all reminders that are due now
-            reminders = models.Reminder.query.filter_by(completed=False).all()
-            
-            reminded_count = 0
-            for reminder in reminders:
-                reminder_time = reminder.time
-                # Check if reminder time matches current time (HH:MM)
-                if reminder_time == current_time:
-                    reminded_count += 1
-                    self.logger.info(f"Triggering reminder: {reminder.title} for patient {reminder.patient_id}")
-                    
-                    # Trigger callbacks for this reminder
-                    for callback in self.callbacks['on_reminder']:
-                        callback(reminder)
-                    
-                    # If not recurring, mark as completed
-                    if not reminder.recurring:
-                        reminder.completed = True
-                        db.session.commit()
-            
-            if reminded_count > 0:
-                self.logger.info(f"Triggered {reminded_count} reminders")
-            else:
-                self.logger.debug("No reminders due at this time")
-                
+            now = time.time()
+            self._load_window(now)
+            return self._fire_due(now)
         except Exception as e:
             self.logger.error(f"Error checking reminders: {str(e)}")
-    
+            return 0
+
     def add_reminder(self, reminder):
         """
         Add a new reminder to the service.
-        
+
         Args:
             reminder: Reminder object with id, patient_id, title, description, time, recurring
-            
+
         Returns:
             bool: Success of adding the reminder
         """
-        try:
-            reminder_id = reminder.id
-            self.reminders[reminder_id] = reminder
-            self.schedule_reminder(reminder)
-            self.logger.info(f"Added reminder {reminder_id}: {reminder.title}")
+        if self.schedule_reminder(reminder):
+            self.logger.info(f"Added reminder {reminder.id}: {reminder.title}")
             return True
-        except Exception as e:
-            self.logger.error(f"Error adding reminder: {str(e)}")
-            return False
-    
+        return False
+
     def remove_reminder(self, reminder_id):
         """
         Remove a reminder from the service.
-        
+
         Args:
             reminder_id: ID of the reminder to remove
-            
+
         Returns:
             bool: Success of removing the reminder
         """
-        if reminder_id in self.reminders:
-            # Clear the job from the scheduler
-            schedule.clear(f"reminder_{reminder_id}")
-            # Remove from our tracking
-            del self.reminders[reminder_id]
+        with self._lock:
+            # The heap entry stays behind and is skipped when popped
+            removed = self._scheduled.pop(reminder_id, None) is not None
+        if removed:
             self.logger.info(f"Removed reminder {reminder_id}")
             return True
-        
+
         self.logger.warning(f"Reminder {reminder_id} not found for removal")
         return False
-    
+
     def schedule_reminder(self, reminder):
         """
-        Schedule a reminder with the scheduler.
-        
+        Compute and store a reminder's next fire time and wake the scheduler.
+
         Args:
-            reminder: Reminder object with id, time, recurring fields
-            
+            reminder: Persisted Reminder object with id, time, recurring fields
+
         Returns:
             bool: Success of scheduling
         """
         try:
-            reminder_id = reminder.id
-            reminder_time = reminder.time
-            
-            # Clear any existing job for this reminder
-            schedule.clear(f"reminder_{reminder_id}")
-            
-            # Parse time format
-            if ":" in reminder_time:  # HH:MM format
-                hour, minute = reminder_time.split(":")
-                
-                # Schedule based on recurring flag
-                if reminder.recurring:
-                    # Schedule daily at this time
-                    schedule.every().day.at(reminder_time).do(
-                        self._trigger_reminder, 
-                        reminder_id=reminder_id
-                    ).tag(f"reminder_{reminder_id}")
-                    self.logger.info(f"Scheduled recurring reminder {reminder_id} daily at {reminder_time}")
-                else:
-                    # Schedule once at this time
-                    # If time is in the past for today, schedule for tomorrow
-                    now = datetime.now()
-                    target_time = now.replace(hour=int(hour), minute=int(minute), second=0, microsecond=0)
-                    
-                    if target_time < now:
-                        target_time += timedelta(days=1)
-                    
-                    # Calculate seconds until reminder
-                    delay_seconds = (target_time - now).total_seconds()
-                    
-                    # Schedule once after the delay
-                    schedule.every(delay_seconds).seconds.do(
-                        self._trigger_reminder_once, 
-                        reminder_id=reminder_id
-                    ).tag(f"reminder_{reminder_id}")
-                    
-                    self.logger.info(f"Scheduled one-time reminder {reminder_id} at {target_time}")
-            else:
-                self.logger.error(f"Unsupported time format for reminder {reminder_id}: {reminder_time}")
+            from extensions import db
+
+            reminder.next_fire_at = self.compute_next_fire(reminder)
+            db.session.commit()
+
+            if reminder.next_fire_at is None:
+                self.logger.warning(f"Reminder {reminder.id} schedule '{reminder.time}' never fires")
                 return False
-            
+
+            if self._push(reminder.id, reminder.next_fire_at):
+                self._wakeup.set()
+            self.logger.info(f"Scheduled reminder {reminder.id} for {reminder.next_fire_at.isoformat()}Z")
             return True
+        except ValueError as e:
+            self.logger.error(f"Unsupported time format for reminder {reminder.id}: {str(e)}")
+            return False
         except Exception as e:
             self.logger.error(f"Error scheduling reminder: {str(e)}")
             return False
-    
-    def _trigger_reminder(self, reminder_id):
+
+    def _trigger_reminder(self, reminder, late_seconds=0):
         """
-        Trigger a reminder and execute callbacks.
-        
+        Execute callbacks for a reminder.
+
         Args:
-            reminder_id: ID of the reminder being triggered
+            reminder: Reminder being triggered
+            late_seconds: How long after its scheduled time it is firing
         """
-        if reminder_id in self.reminders:
-            reminder = self.reminders[reminder_id]
-            self.logger.info(f"Triggering reminder {reminder_id}: {reminder.title}")
-            
-            # Execute all registered callbacks
-            for callback in self.callbacks['on_reminder']:
-                try:
-                    callback(reminder)
-                except Exception as e:
-                    self.logger.error(f"Error in reminder callback: {str(e)}")
+        if late_seconds > 60:
+            self.logger.info(f"Triggering missed reminder {reminder.id}: {reminder.title} ({int(late_seconds)}s late)")
         else:
-            self.logger.warning(f"Attempt to trigger unknown reminder {reminder_id}")
-    
-    def _trigger_reminder_once(self, reminder_id):
-        """
-        Trigger a one-time reminder, execute callbacks, and clear the job.
-        
-        Args:
-            reminder_id: ID of the reminder being triggered
-        """
-        self._trigger_reminder(reminder_id)
-        
-        # Clear this job as it's one-time only
-        schedule.clear(f"reminder_{reminder_id}")
-        
-        return schedule.CancelJob
-    
+            self.logger.info(f"Triggering reminder {reminder.id}: {reminder.title} for patient {reminder.patient_id}")
+
+        # Execute all registered callbacks
+        for callback in self.callbacks['on_reminder']:
+            try:
+                callback(reminder)
+            except Exception as e:
+                self.logger.error(f"Error in reminder callback: {str(e)}")
+
     def register_callback(self, event, callback):
         """
         Register a callback function for reminder events.
-        
+
         Args:
             event: Event type ('on_reminder')
             callback: Function to call with reminder object
-            
+
         Returns:
             bool: Success of registering callback
         """
@@ -218,51 +562,51 @@ class ReminderService:
             self.callbacks[event].append(callback)
             self.logger.info(f"Registered callback for {event} events")
             return True
-        
+
         self.logger.error(f"Unknown event type: {event}")
         return False
-    
+
     def get_upcoming_reminders(self, patient_id, hours=24):
         """
         Get upcoming reminders for a patient within the specified time window.
-        
+
         Args:
             patient_id: ID of the patient
             hours: Number of hours to look ahead
-            
+
         Returns:
-            list: Upcoming reminders for the patient
+            list: Upcoming occurrences, in each reminder's local time
         """
+        import models
+
         upcoming = []
-        now = datetime.now()
-        cutoff = now + timedelta(hours=hours)
-        
-        for reminder_id, reminder in self.reminders.items():
-            if reminder.patient_id != patient_id:
-                continue
-                
+        cutoff = datetime.utcnow() + timedelta(hours=hours)
+        reminders = models.Reminder.query.filter(
+            models.Reminder.patient_id == patient_id,
+            models.Reminder.completed == False,  # noqa: E712
+            models.Reminder.next_fire_at.isnot(None),
+            models.Reminder.next_fire_at <= cutoff
+        ).all()
+
+        for reminder in reminders:
+            tz = self.get_timezone(reminder)
+            occurrence = reminder.next_fire_at
             try:
-                # Parse the reminder time
-                if ":" in reminder.time:
-                    hour, minute = map(int, reminder.time.split(":"))
-                    reminder_time = now.replace(hour=hour, minute=minute, second=0, microsecond=0)
-                    
-                    # If the time is in the past for today, use tomorrow
-                    if reminder_time < now:
-                        reminder_time += timedelta(days=1)
-                    
-                    # Include if within the window
-                    if reminder_time <= cutoff:
-                        upcoming.append({
-                            'id': reminder.id,
-                            'title': reminder.title,
-                            'description': reminder.description,
-                            'time': reminder_time.strftime('%Y-%m-%d %H:%M'),
-                            'recurring': reminder.recurring
-                        })
+                while occurrence is not None and occurrence <= cutoff:
+                    upcoming.append({
+                        'id': reminder.id,
+                        'title': reminder.title,
+                        'description': reminder.description,
+                        'time': self._to_local(occurrence, tz).strftime('%Y-%m-%d %H:%M'),
+                        'fire_at': occurrence.isoformat() + 'Z',
+                        'recurring': reminder.recurring
+                    })
+                    if not reminder.recurring:
+                        break
+                    occurrence = self.compute_next_fire(reminder, after=occurrence)
             except Exception as e:
                 self.logger.error(f"Error parsing reminder time: {str(e)}")
-        
+
         # Sort by time
-        upcoming.sort(key=lambda x: x['time'])
+        upcoming.sort(key=lambda x: x['fire_at'])
         return upcoming
@@ -20,6 +20,8 @@ from datetime import datetime
 import os
 import re
 
+from services.search_index import SearchIndex, file_signature
+
 logger = logging.getLogger(__name__)
 
 class ResearchModule:
@@ -32,6 +34,7 @@ class ResearchModule:
         self.knowledge_base_path = os.path.join('data', 'knowledge_base.json')
         self.topics_path = os.path.join('data', 'topics.json')
         self.facts_path = os.path.join('data', 'facts.json')
+        self.index_path = os.path.join('data', 'knowledge_index.db')
         
         self.knowledge_base = {}
         self.topics = {}
@@ -69,6 +72,10 @@ class ResearchModule:
         if not self.facts:
             self._initialize_default_facts()
         
+        # Full-text index over topics and facts
+        self.index = None
+        self._load_index()
+        
         self.logger.info("Research Module initialized")
     
     def get_therapy_content(self, therapy_type, difficulty='medium', personalization=None):
@@ -172,6 +179,44 @@ class ResearchModule:
         Returns:
             list: Matching knowledge items
         """
+        if not self.index:
+            return self._scan_knowledge_base(query, limit)
+        
+        try:
+            results = []
+            
+            for doc_id, kind, score in self.index.search(query, limit):
+                if kind == 'topic':
+                    topic_id = doc_id[len('topic:'):]
+                    topic_data = self.topics.get(topic_id)
+                    if topic_data is None:
+                        continue
+                    results.append({
+                        'type': 'topic',
+                        'id': topic_id,
+                        'name': topic_data.get('name', ''),
+                        'description': topic_data.get('description', ''),
+                        'relevance': round(score, 4)
+                    })
+                else:
+                    position = int(doc_id[len('fact:'):])
+                    if position >= len(self.facts):
+                        continue
+                    fact = self.facts[position]
+                    results.append({
+                        'type': 'fact',
+                        'category': fact.get('category', ''),
+                        'text': fact.get('text', ''),
+                        'relevance': round(score, 4)
+                    })
+            
+            return results
+        except Exception as e:
+            self.logger.error(f"Error searching knowledge base: {str(e)}")
+            return self._scan_knowledge_base(query, limit)
+    
+    def _scan_knowledge_base(self, query, limit):
+        """Term-overlap search over every topic and fact, used when the index is unavailable."""
         try:
             results = []
             
@@ -247,6 +292,7 @@ class ResearchModule:
             
             # Save topics
             self._save_topics()
+            self._index_documents([self._topic_document(topic_id, new_topic)])
             
             self.logger.info(f"Added new topic: {topic_id}")
             return True
@@ -280,6 +326,7 @@ class ResearchModule:
             
             # Save facts
             self._save_facts()
+            self._index_documents([self._fact_document(len(self.facts) - 1, new_fact)])
             
             self.logger.info(f"Added new fact in category: {category}")
             return True
@@ -319,6 +366,40 @@ class ResearchModule:
         
         return categories
     
+    def _topic_document(self, topic_id, topic_data):
+        return (f"topic:{topic_id}", 'topic', topic_data.get('name', ''), topic_data.get('description', ''))
+    
+    def _fact_document(self, position, fact):
+        return (f"fact:{position}", 'fact', '', fact.get('text', ''))
+    
+    def _index_signature(self):
+        return file_signature(self.topics_path, self.facts_path)
+    
+    def _load_index(self):
+        """Open the knowledge index, rebuilding it if topics or facts changed without it."""
+        try:
+            self.index = SearchIndex(self.index_path)
+            if self.index.get_meta('source_signature') != self._index_signature():
+                self.index.clear()
+                self._index_documents(
+                    [self._topic_document(topic_id, topic) for topic_id, topic in self.topics.items()] +
+                    [self._fact_document(position, fact) for position, fact in enumerate(self.facts)]
+                )
+                self.logger.info(f"Rebuilt knowledge index with {len(self.topics)} topics and {len(self.facts)} facts")
+        except Exception as e:
+            self.logger.error(f"Error loading knowledge index: {str(e)}")
+            self.index = None
+    
+    def _index_documents(self, documents):
+        """Add documents to the knowledge index and record which topic/fact files it now matches."""
+        if not self.index:
+            return
+        try:
+            self.index.add_many(documents)
+            self.index.set_meta('source_signature', self._index_signature())
+        except Exception as e:
+            self.logger.error(f"Error updating knowledge index: {str(e)}")
+    
     def _personalize_content(self, content, personalization):
         """Personalize content with patient-specific information."""
         # Deep copy content to avoid modifying original
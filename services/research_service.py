@@ -17,8 +17,18 @@ import json
 import logging
 import os
 import random
+import threading
 from datetime import datetime
 
+from services.search_index import SearchIndex, RELATED_LIMIT, file_signature, index_articles
+
+# Source files, relative to the working directory like the rest of data/
+ARTICLES_PATH = os.path.join('data', 'research_articles.json')
+TIPS_PATH = os.path.join('data', 'daily_tips.json')
+RESOURCES_PATH = os.path.join('data', 'resources.json')
+INSIGHTS_PATH = os.path.join('data', 'expert_insights.json')
+INDEX_PATH = os.path.join('data', 'research_index.db')
+
 class ResearchService:
     """Service for providing research articles, daily tips, and other learning resources."""
     
@@ -30,20 +40,27 @@ class ResearchService:
         self.resources = {}
         self.expert_insights = []
         
+        # Which versions of the data files this instance was loaded from
+        self.source_signature = file_signature(ARTICLES_PATH, TIPS_PATH, RESOURCES_PATH, INSIGHTS_PATH)
+        
         # Load data
         self._load_articles()
         self._load_tips()
         self._load_resources()
         self._load_expert_insights()
         
+        # id -> article, and the search index with its related-articles table
+        self.articles_by_id = {str(article.get('id')): article for article in self.articles}
+        self.index = None
+        self._load_index()
+        
         self.logger.info("Research service initialized")
     
     def _load_articles(self):
         """Load research articles from JSON file."""
         try:
-            articles_path = os.path.join('data', 'research_articles.json')
-            if os.path.exists(articles_path):
-                with open(articles_path, 'r') as f:
+            if os.path.exists(ARTICLES_PATH):
+                with open(ARTICLES_PATH, 'r') as f:
                     self.articles = json.load(f)
                 self.logger.info(f"Loaded {len(self.articles)} articles")
             else:
@@ -57,9 +74,8 @@ class ResearchService:
     def _load_tips(self):
         """Load daily tips from JSON file."""
         try:
-            tips_path = os.path.join('data', 'daily_tips.json')
-            if os.path.exists(tips_path):
-                with open(tips_path, 'r') as f:
+            if os.path.exists(TIPS_PATH):
+                with open(TIPS_PATH, 'r') as f:
                     self.tips = json.load(f)
                 self.logger.info(f"Loaded {len(self.tips)} tips")
             else:
@@ -73,9 +89,8 @@ class ResearchService:
     def _load_resources(self):
         """Load resources from JSON file."""
         try:
-            resources_path = os.path.join('data', 'resources.json')
-            if os.path.exists(resources_path):
-                with open(resources_path, 'r') as f:
+            if os.path.exists(RESOURCES_PATH):
+                with open(RESOURCES_PATH, 'r') as f:
                     self.resources = json.load(f)
                 self.logger.info(f"Loaded resources with {len(self.resources.keys())} categories")
             else:
@@ -89,9 +104,8 @@ class ResearchService:
     def _load_expert_insights(self):
         """Load expert insights from JSON file."""
         try:
-            insights_path = os.path.join('data', 'expert_insights.json')
-            if os.path.exists(insights_path):
-                with open(insights_path, 'r') as f:
+            if os.path.exists(INSIGHTS_PATH):
+                with open(INSIGHTS_PATH, 'r') as f:
                     self.expert_insights = json.load(f)
                 self.logger.info(f"Loaded {len(self.expert_insights)} expert insights")
             else:
@@ -102,6 +116,25 @@ class ResearchService:
             self.logger.error(f"Error loading expert insights: {str(e)}")
             self.expert_insights = self._generate_sample_expert_insights()
     
+    def _load_index(self):
+        """Open the article search index, rebuilding it if the articles file changed without it."""
+        try:
+            self.index = SearchIndex(INDEX_PATH)
+            # Sample articles are never treated as an up-to-date index of a real file
+            signature = file_signature(ARTICLES_PATH) if os.path.exists(ARTICLES_PATH) else 'sample'
+            if self.index.get_meta('source_signature') != signature:
+                index_articles(self.index, self.articles, signature=signature)
+                self.logger.info(f"Rebuilt research index with {len(self.articles)} articles")
+        except Exception as e:
+            self.logger.error(f"Error loading research index: {str(e)}")
+            self.index = None
+    
+    def close(self):
+        """Close the search index."""
+        if self.index:
+            self.index.close()
+            self.index = None
+    
     def get_research_articles(self, limit=None, topic=None):
         """Get research articles, optionally filtered by topic and limited to a specific number."""
         filtered_articles = self.articles
@@ -116,10 +149,18 @@ class ResearchService:
     
     def get_article_by_id(self, article_id):
         """Get a specific article by its ID."""
-        for article in self.articles:
-            if article.get('id') == article_id:
-                return article
-        return None
+        return self.articles_by_id.get(str(article_id))
+    
+    def search_articles(self, query, limit=10):
+        """Full-text search over article titles, summaries and text, best match first."""
+        if not self.index:
+            return []
+        try:
+            hits = self.index.search(query, limit, kind='article')
+        except Exception as e:
+            self.logger.error(f"Error searching articles: {str(e)}")
+            return []
+        return [self.articles_by_id[doc_id] for doc_id, _, _ in hits if doc_id in self.articles_by_id]
     
     def get_related_articles(self, article_id, limit=3):
         """Get articles related to the given article."""
@@ -131,13 +172,21 @@ class ResearchService:
         article_topics = set(article.get('topics', []))
         if not article_topics:
             # If no topics, just return random articles excluding the current one
-            other_articles = [a for a in self.articles if a.get('id') != article_id]
+            other_articles = [a for a in self.articles if a.get('id') != article.get('id')]
             return random.sample(other_articles, min(limit, len(other_articles)))
         
+        # Precomputed when the articles were indexed
+        if self.index and limit <= RELATED_LIMIT:
+            try:
+                related_ids = self.index.get_related(str(article.get('id')), limit)
+                return [self.articles_by_id[i] for i in related_ids if i in self.articles_by_id]
+            except Exception as e:
+                self.logger.error(f"Error reading related articles: {str(e)}")
+        
         # Calculate relevance score for each article based on topic overlap
         scored_articles = []
         for a in self.articles:
-            if a.get('id') == article_id:
+            if a.get('id') == article.get('id'):
                 continue
             
             a_topics = set(a.get('topics', []))
@@ -480,4 +529,22 @@ class ResearchService:
                 'date': 'April 22, 2025',
                 'image_url': 'https://source.unsplash.com/random/150x150/?social,worker'
             }
-        ]
\ No newline at end of file
+        ]
+
+
+# Shared instance, reloaded when the crawler rewrites the data files
+_research_service = None
+_research_service_lock = threading.Lock()
+
+
+def get_research_service():
+    """Get the shared ResearchService, reloading it if any of its data files changed."""
+    global _research_service
+    signature = file_signature(ARTICLES_PATH, TIPS_PATH, RESOURCES_PATH, INSIGHTS_PATH)
+    if _research_service is None or _research_service.source_signature != signature:
+        with _research_service_lock:
+            if _research_service is None or _research_service.source_signature != signature:
+                previous, _research_service = _research_service, ResearchService()
+                if previous is not None:
+                    previous.close()
+    return _research_service
@@ -0,0 +1,524 @@
+# © 2025 The Christman AI Project. All rights reserved.
+#
+# This code is released as part of a trauma-informed, dignity-first AI ecosystem
+# designed to protect, empower, and elevate vulnerable populations.
+#
+# By using, modifying, or distributing this software, you agree to uphold the following:
+# 1. Truth — No deception, no manipulation.
+# 2. Dignity — Respect the autonomy and humanity of all users.
+# 3. Protection — Never use this to exploit or harm vulnerable individuals.
+# 4. Transparency — Disclose all modifications and contributions clearly.
+# 5. No Erasure — Preserve the mission and ethical origin of this work.
+#
+# This is not just code. This is redemption in code.
+# Contact: lumacognify@thechristmanaiproject.com
+# https://thechristmanaiproject.com
+"""
+Full-Text Search Index for AlphaWolf
+Part of The Christman AI Project - Powered by LumaCognify AI
+
+Persistent inverted index (SQLite FTS5, ranked with BM25) for the research
+knowledge base and the crawled research articles. Documents are indexed one
+by one as they are added, so the index is only rebuilt from scratch when
+its source file was changed behind its back; a signature of the source
+file stored in the meta table tells the two cases apart.
+
+The index also holds a precomputed related-documents table, which the
+crawler refreshes after each crawl so article pages don't compare topic
+sets against every article on each request.
+"""
+
+import heapq
+import json
+import logging
+import os
+import random
+import re
+import sqlite3
+import statistics
+import tempfile
+import threading
+import time
+from typing import Any, Dict, Iterable, List, Optional, Sequence, Tuple
+
+logger = logging.getLogger(__name__)
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS documents (
+    rowid INTEGER PRIMARY KEY,
+    doc_id TEXT NOT NULL UNIQUE,
+    kind TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_documents_kind ON documents (kind);
+CREATE VIRTUAL TABLE IF NOT EXISTS documents_fts USING fts5(
+    title, body, tokenize = 'porter unicode61'
+);
+CREATE VIRTUAL TABLE IF NOT EXISTS documents_vocab USING fts5vocab(documents_fts, row);
+CREATE TABLE IF NOT EXISTS related (
+    doc_id TEXT NOT NULL,
+    rank INTEGER NOT NULL,
+    related_id TEXT NOT NULL,
+    PRIMARY KEY (doc_id, rank)
+);
+CREATE TABLE IF NOT EXISTS meta (
+    key TEXT PRIMARY KEY,
+    value TEXT
+);
+"""
+
+# BM25 column weights: (title, body)
+TITLE_WEIGHT = 2.0
+BODY_WEIGHT = 1.0
+
+# Related articles kept per article
+RELATED_LIMIT = 10
+
+# Query terms found in more than this share of documents are dropped when the
+# query has rarer terms; their BM25 weight is close to zero but scoring them
+# means visiting most of the index
+COMMON_TERM_FRACTION = 0.5
+
+_TAG_RE = re.compile(r'<[^>]+>')
+_TERM_RE = re.compile(r'\w+')
+
+
+def query_terms(text: str) -> List[str]:
+    """Distinct lower-cased word terms of a query, in order."""
+    return list(dict.fromkeys(_TERM_RE.findall(text.lower())))
+
+
+def file_signature(*paths: str) -> str:
+    """Size and modification time of the given files; changes whenever one of them is rewritten."""
+    parts = []
+    for path in paths:
+        try:
+            stat = os.stat(path)
+            parts.append([path, stat.st_size, stat.st_mtime_ns])
+        except OSError:
+            parts.append([path, None, None])
+    return json.dumps(parts)
+
+
+class SearchIndex:
+    """BM25 full-text index over (doc_id, kind, title, body) documents."""
+
+    def __init__(self, db_path: str):
+        """
+        Args:
+            db_path: SQLite database file
+        """
+        self.db_path = db_path
+        self._local = threading.local()
+        self._write_lock = threading.Lock()
+        # Every thread's connection, so close() can release them all
+        self._connections: List[sqlite3.Connection] = []
+        self._connections_lock = threading.Lock()
+
+        os.makedirs(os.path.dirname(db_path) or '.', exist_ok=True)
+        conn = self._conn()
+        conn.executescript(SCHEMA)
+        conn.commit()
+
+    def _conn(self) -> sqlite3.Connection:
+        """One connection per thread; WAL lets readers run alongside a writer."""
+        conn = getattr(self._local, 'conn', None)
+        if conn is None:
+            # Only ever used by its own thread; close() may run on another
+            conn = sqlite3.connect(self.db_path, timeout=30, check_same_thread=False)
+            conn.execute('PRAGMA journal_mode=WAL')
+            conn.execute('PRAGMA synchronous=NORMAL')
+            self._local.conn = conn
+            with self._connections_lock:
+                self._connections.append(conn)
+        return conn
+
+    # ------------------------------------------------------------------
+    # Writes
+    # ------------------------------------------------------------------
+
+    def add(self, doc_id: str, kind: str, title: str, body: str):
+        """Index a document, replacing any earlier version with the same id."""
+        self.add_many([(doc_id, kind, title, body)])
+
+    def add_many(self, documents: Iterable[Tuple[str, str, str, str]]) -> int:
+        """
+        Index many (doc_id, kind, title, body) documents in a single transaction.
+
+        Returns:
+            int: Number of documents indexed
+        """
+        count = 0
+        with self._write_lock:
+            conn = self._conn()
+            with conn:
+                for doc_id, kind, title, body in documents:
+                    row = conn.execute('SELECT rowid FROM documents WHERE doc_id = ?', (doc_id,)).fetchone()
+                    if row:
+                        rowid = row[0]
+                        conn.execute('UPDATE documents SET kind = ? WHERE rowid = ?', (kind, rowid))
+                        conn.execute('DELETE FROM documents_fts WHERE rowid = ?', (rowid,))
+                    else:
+                        rowid = conn.execute(
+                            'INSERT INTO documents (doc_id, kind) VALUES (?, ?)', (doc_id, kind)
+                        ).lastrowid
+                    conn.execute(
+                        'INSERT INTO documents_fts (rowid, title, body) VALUES (?, ?, ?)',
+                        (rowid, title or '', body or '')
+                    )
+                    count += 1
+        return count
+
+    def remove(self, doc_id: str) -> bool:
+        """Remove a document. Returns True if it was indexed."""
+        with self._write_lock:
+            conn = self._conn()
+            with conn:
+                row = conn.execute('SELECT rowid FROM documents WHERE doc_id = ?', (doc_id,)).fetchone()
+                if not row:
+                    return False
+                conn.execute('DELETE FROM documents_fts WHERE rowid = ?', (row[0],))
+                conn.execute('DELETE FROM documents WHERE rowid = ?', (row[0],))
+                conn.execute('DELETE FROM related WHERE doc_id = ?', (doc_id,))
+        return True
+
+    def clear(self):
+        """Remove every document and the related table."""
+        with self._write_lock:
+            conn = self._conn()
+            with conn:
+                conn.execute('DELETE FROM documents_fts')
+                conn.execute('DELETE FROM documents')
+                conn.execute('DELETE FROM related')
+
+    def set_related(self, related: Dict[str, Sequence[str]]):
+        """Replace the related-documents table (doc_id -> related ids, best first)."""
+        rows = [
+            (doc_id, rank, related_id)
+            for doc_id, related_ids in related.items()
+            for rank, related_id in enumerate(related_ids)
+        ]
+        with self._write_lock:
+            conn = self._conn()
+            with conn:
+                conn.execute('DELETE FROM related')
+                conn.executemany('INSERT INTO related (doc_id, rank, related_id) VALUES (?, ?, ?)', rows)
+
+    # ------------------------------------------------------------------
+    # Reads
+    # ------------------------------------------------------------------
+
+    def search(self, query: str, limit: int = 10, kind: Optional[str] = None) -> List[Tuple[str, str, float]]:
+        """
+        Rank documents against a query with BM25.
+
+        Any query term may match (terms are ORed), and documents matching
+        more, rarer terms rank higher; title matches count double.
+
+        Args:
+            query: Free-text query
+            limit: Maximum number of results
+            kind: Only return documents of this kind
+
+        Returns:
+            list: (doc_id, kind, score) tuples, best first; higher scores are better
+        """
+        terms = self._selective_terms(query_terms(query))
+        if not terms:
+            return []
+        match = ' OR '.join(f'"{term}"' for term in terms)
+        # Rank inside FTS5 first and join only the rows that are returned;
+        # a kind filter has to see every match, so it ranks after the join
+        if kind:
+            sql = (
+                'SELECT d.doc_id, d.kind, bm25(documents_fts, ?, ?) AS score '
+                'FROM documents_fts JOIN documents d ON d.rowid = documents_fts.rowid '
+                'WHERE documents_fts MATCH ? AND d.kind = ? ORDER BY score LIMIT ?'
+            )
+            params = (TITLE_WEIGHT, BODY_WEIGHT, match, kind, limit)
+        else:
+            sql = (
+                'SELECT d.doc_id, d.kind, hits.score FROM ('
+                'SELECT rowid, bm25(documents_fts, ?, ?) AS score FROM documents_fts '
+                'WHERE documents_fts MATCH ? ORDER BY score LIMIT ?'
+                ') AS hits JOIN documents d ON d.rowid = hits.rowid ORDER BY hits.score'
+            )
+            params = (TITLE_WEIGHT, BODY_WEIGHT, match, limit)
+        # FTS5's bm25() is negated so that ascending order is best first
+        return [(doc_id, doc_kind, -score) for doc_id, doc_kind, score in self._conn().execute(sql, params)]
+
+    def _selective_terms(self, terms: List[str]) -> List[str]:
+        """Drop very common terms from a query that also has rarer ones."""
+        if len(terms) < 2:
+            return terms
+        conn = self._conn()
+        total = conn.execute('SELECT COUNT(*) FROM documents').fetchone()[0]
+        placeholders = ','.join('?' * len(terms))
+        # The vocabulary holds stemmed terms, so inflected query words aren't
+        # found here and are simply kept
+        frequencies = dict(conn.execute(
+            f'SELECT term, doc FROM documents_vocab WHERE term IN ({placeholders})', terms
+        ).fetchall())
+        selective = [term for term in terms if frequencies.get(term, 0) <= COMMON_TERM_FRACTION * total]
+        return selective or terms
+
+    def get_related(self, doc_id: str, limit: int = RELATED_LIMIT) -> List[str]:
+        """Precomputed related document ids, best first."""
+        rows = self._conn().execute(
+            'SELECT related_id FROM related WHERE doc_id = ? ORDER BY rank LIMIT ?', (doc_id, limit)
+        ).fetchall()
+        return [row[0] for row in rows]
+
+    def count(self, kind: Optional[str] = None) -> int:
+        """Number of indexed documents, optionally of one kind."""
+        if kind:
+            return self._conn().execute('SELECT COUNT(*) FROM documents WHERE kind = ?', (kind,)).fetchone()[0]
+        return self._conn().execute('SELECT COUNT(*) FROM documents').fetchone()[0]
+
+    # ------------------------------------------------------------------
+    # Meta
+    # ------------------------------------------------------------------
+
+    def get_meta(self, key: str) -> Optional[str]:
+        row = self._conn().execute('SELECT value FROM meta WHERE key = ?', (key,)).fetchone()
+        return row[0] if row else None
+
+    def set_meta(self, key: str, value: str):
+        with self._write_lock:
+            conn = self._conn()
+            with conn:
+                conn.execute(
+                    'INSERT INTO meta (key, value) VALUES (?, ?) '
+                    'ON CONFLICT (key) DO UPDATE SET value = excluded.value',
+                    (key, value)
+                )
+
+    def close(self):
+        """Close the connections of every thread that used this index."""
+        with self._connections_lock:
+            connections, self._connections = self._connections, []
+        for conn in connections:
+            conn.close()
+        self._local = threading.local()
+
+
+# ----------------------------------------------------------------------
+# Research articles
+# ----------------------------------------------------------------------
+
+def article_document(article: Dict[str, Any]) -> Tuple[str, str, str, str]:
+    """Index document for a research article: title, then summary, abstract, findings, topics and text."""
+    parts = [
+        article.get('summary') or '',
+        article.get('abstract') or '',
+        ' '.join(article.get('key_findings') or []),
+        ' '.join(article.get('topics') or []),
+        _TAG_RE.sub(' ', article.get('content') or ''),
+    ]
+    return str(article.get('id')), 'article', article.get('title') or '', '\n'.join(parts)
+
+
+def compute_related_articles(articles: List[Dict[str, Any]], limit: int = RELATED_LIMIT) -> Dict[str, List[str]]:
+    """
+    Related articles for every article, by topic overlap.
+
+    Ranks the same way as comparing each article against all others (most
+    shared topics first, then article order), but compares distinct topic
+    sets instead of articles, of which there are only a handful.
+
+    Args:
+        articles: Articles in display order
+        limit: Related articles kept per article
+
+    Returns:
+        dict: str(article id) -> related article ids (as str), best first
+    """
+    # Distinct topic set -> positions of the articles that have it
+    groups: Dict[frozenset, List[int]] = {}
+    for position, article in enumerate(articles):
+        topics = frozenset(article.get('topics') or [])
+        if topics:
+            groups.setdefault(topics, []).append(position)
+
+    related = {}
+    for topics, members in groups.items():
+        # Other topic sets by overlap; a stable merge of their members keeps article order on ties
+        by_overlap: Dict[int, List[List[int]]] = {}
+        for other_topics, other_members in groups.items():
+            by_overlap.setdefault(len(topics & other_topics), []).append(other_members)
+        levels = [by_overlap[overlap] for overlap in sorted(by_overlap, reverse=True)]
+
+        for position in members:
+            chosen = []
+            for level in levels:
+                for other in heapq.merge(*level):
+                    if other != position:
+                        chosen.append(str(articles[other].get('id')))
+                        if len(chosen) >= limit:
+                            break
+                if len(chosen) >= limit:
+                    break
+            related[str(articles[position].get('id'))] = chosen
+    return related
+
+
+def index_articles(index: SearchIndex,
+                   articles: List[Dict[str, Any]],
+                   new_articles: Optional[List[Dict[str, Any]]] = None,
+                   signature: Optional[str] = None):
+    """
+    Bring the articles index up to date and refresh the related-articles table.
+
+    Args:
+        index: The articles index
+        articles: Every article
+        new_articles: Articles added since the index was last updated; when
+            omitted the index is rebuilt from all articles
+        signature: Source signature to record for the indexed articles file
+    """
+    if new_articles is None:
+        index.clear()
+        index.add_many(article_document(article) for article in articles)
+    else:
+        index.add_many(article_document(article) for article in new_articles)
+    index.set_related(compute_related_articles(articles))
+    if signature is not None:
+        index.set_meta('source_signature', signature)
+
+
+# ----------------------------------------------------------------------
+# Benchmark
+# ----------------------------------------------------------------------
+
+_BENCH_TOPICS = ['Research', 'Prevention', 'Diagnosis', 'Treatment', 'Care', 'Nutrition', 'Exercise',
+                 'Sleep', 'Memory', 'Communication', 'Behavior', 'Medication', 'Therapy',
+                 'Caregiving', 'Safety', 'Technology', 'Lifestyle']
+_BENCH_WORDS = ('memory sleep diet exercise caregiver dementia alzheimer brain protein amyloid tau '
+                'music therapy routine agitation wandering medication trial study patients risk '
+                'blood test early detection social activity stress anxiety mood hydration home '
+                'safety lighting communication language cognitive decline aging family support').split()
+
+
+def _synthetic_articles(count: int, rng: random.Random) -> List[Dict[str, Any]]:
+    # Zipf-like word choice over a mixed vocabulary: domain words plus a long tail
+    vocabulary = _BENCH_WORDS + [f'term{i}' for i in range(20000)]
+    weights = [1.0 / (rank + 1) for rank in range(len(vocabulary))]
+    articles = []
+    for i in range(count):
+        words = rng.choices(vocabulary, weights, k=120)
+        articles.append({
+            'id': i + 1,
+            'title': ' '.join(words[:8]),
+            'summary': ' '.join(words[8:30]),
+            'content': '<p>' + ' '.join(words[30:]) + '</p>',
+            'topics': rng.sample(_BENCH_TOPICS, rng.randint(1, 3)),
+        })
+    return articles
+
+
+def _scan_search(articles: List[Dict[str, Any]], query: str, limit: int) -> List[Dict[str, Any]]:
+    """The previous approach: tokenize every document per query and score by term overlap."""
+    terms = set(re.findall(r'\w+', query.lower()))
+    scored = []
+    for article in articles:
+        text = f"{article['title']} {article['summary']} {article['content']}".lower()
+        overlap = len(terms & set(re.findall(r'\w+', text)))
+        if overlap:
+            scored.append((overlap / len(terms), article))
+    scored.sort(key=lambda item: item[0], reverse=True)
+    return [article for _, article in scored[:limit]]
+
+
+def _scan_related(articles: List[Dict[str, Any]], article_id: int, limit: int) -> List[Dict[str, Any]]:
+    """The previous approach: find the article, then compare topic sets against every article."""
+    article = next((a for a in articles if a.get('id') == article_id), None)
+    topics = set(article.get('topics', []))
+    scored = [(a, len(topics & set(a['topics']))) for a in articles if a.get('id') != article_id and a['topics']]
+    scored.sort(key=lambda item: item[1], reverse=True)
+    return [a for a, _ in scored[:limit]]
+
+
+def _latency(function, arguments: List[Any]) -> Dict[str, float]:
+    samples = []
+    for argument in arguments:
+        started = time.perf_counter()
+        function(argument)
+        samples.append((time.perf_counter() - started) * 1000)
+    samples.sort()
+    return {
+        'p50_ms': statistics.median(samples),
+        'p99_ms': samples[min(len(samples) - 1, int(round(0.99 * (len(samples) - 1))))],
+    }
+
+
+def run_benchmark(sizes: Sequence[int] = (10000, 100000), queries: int = 200,
+                  scan_queries: int = 10, seed: int = 7) -> List[Dict[str, Any]]:
+    """
+    Compare the index with the linear scans it replaces.
+
+    Args:
+        sizes: Article counts to test
+        queries: Queries (and article lookups) timed against the index
+        scan_queries: Queries timed against the linear scans (they are slow)
+        seed: Random seed for the synthetic articles and queries
+
+    Returns:
+        list: One result dict per size
+    """
+    results = []
+    for size in sizes:
+        rng = random.Random(seed)
+        articles = _synthetic_articles(size, rng)
+        by_id = {str(article['id']): article for article in articles}
+        # Common-word queries match most articles; specific ones add a rarer term
+        common_queries = [' '.join(rng.sample(_BENCH_WORDS, rng.randint(2, 4))) for _ in range(queries)]
+        specific_queries = [f"{' '.join(rng.sample(_BENCH_WORDS, rng.randint(1, 2)))} term{rng.randint(50, 5000)}"
+                            for _ in range(queries)]
+        lookup_ids = [rng.randint(1, size) for _ in range(queries)]
+
+        with tempfile.TemporaryDirectory() as directory:
+            index = SearchIndex(os.path.join(directory, 'research_index.db'))
+
+            started = time.perf_counter()
+            index_articles(index, articles)
+            build_seconds = time.perf_counter() - started
+
+            # One crawl's worth of new articles, added incrementally
+            extra = _synthetic_articles(50, random.Random(seed + 1))
+            for offset, article in enumerate(extra):
+                article['id'] = size + offset + 1
+            started = time.perf_counter()
+            index_articles(index, articles + extra, new_articles=extra)
+            incremental_seconds = time.perf_counter() - started
+            by_id.update((str(article['id']), article) for article in extra)
+
+            result = {
+                'documents': size,
+                'build_seconds': build_seconds,
+                'incremental_50_seconds': incremental_seconds,
+                'index_mb': os.path.getsize(index.db_path) / (1024 * 1024),
+                'search_common': _latency(lambda q: index.search(q, 10), common_queries),
+                'search_common_scan': _latency(lambda q: _scan_search(articles, q, 10), common_queries[:scan_queries]),
+                'search_specific': _latency(lambda q: index.search(q, 10), specific_queries),
+                'search_specific_scan': _latency(lambda q: _scan_search(articles, q, 10),
+                                                 specific_queries[:scan_queries]),
+                'lookup': _latency(lambda i: by_id.get(str(i)), lookup_ids),
+                'lookup_scan': _latency(lambda i: next((a for a in articles if a['id'] == i), None),
+                                        lookup_ids[:scan_queries]),
+                'related': _latency(lambda i: [by_id[r] for r in index.get_related(str(i), 3)], lookup_ids),
+                'related_scan': _latency(lambda i: _scan_related(articles, i, 3), lookup_ids[:scan_queries]),
+            }
+            index.close()
+        results.append(result)
+    return results
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.WARNING)
+    print("Research search: BM25 index vs linear scan (latencies in ms, p50 / p99)")
+    for result in run_benchmark():
+        print(f"\n{result['documents']} articles: index built in {result['build_seconds']:.1f}s "
+              f"({result['index_mb']:.1f} MB), 50 new articles added in {result['incremental_50_seconds']:.2f}s")
+        for name in ('search_common', 'search_specific', 'lookup', 'related'):
+            index_latency, scan_latency = result[name], result[f'{name}_scan']
+            print(f"  {name:<16} index {index_latency['p50_ms']:>8.3f} / {index_latency['p99_ms']:>8.3f}"
+                  f"    scan {scan_latency['p50_ms']:>9.3f} / {scan_latency['p99_ms']:>9.3f}")
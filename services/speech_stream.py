@@ -0,0 +1,323 @@
+# © 2025 The Christman AI Project. All rights reserved.
+#
+# This code is released as part of a trauma-informed, dignity-first AI ecosystem
+# designed to protect, empower, and elevate vulnerable populations.
+#
+# By using, modifying, or distributing this software, you agree to uphold the following:
+# 1. Truth — No deception, no manipulation.
+# 2. Dignity — Respect the autonomy and humanity of all users.
+# 3. Protection — Never use this to exploit or harm vulnerable individuals.
+# 4. Transparency — Disclose all modifications and contributions clearly.
+# 5. No Erasure — Preserve the mission and ethical origin of this work.
+#
+# This is not just code. This is redemption in code.
+# Contact: lumacognify@thechristmanaiproject.com
+# https://thechristmanaiproject.com
+"""
+Streaming Speech Synthesis for AlphaWolf
+Part of The Christman AI Project - Powered by LumaCognify AI
+
+Long responses (brain replies, story recall passages) are split into
+sentences that are synthesized concurrently and played in order, so the
+patient hears the first sentence while the rest are still being generated.
+Each sentence is a separate entry in the TTS cache, so sentences shared
+between responses are only synthesized once.
+"""
+
+import logging
+import os
+import re
+import threading
+import time
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Any, Dict, Iterator, List, Optional
+
+logger = logging.getLogger(__name__)
+
+# Sentences synthesized at once for one stream; the rest wait their turn so
+# concurrent streams all get their first sentence quickly
+STREAM_PARALLEL = 3
+
+# Longest chunk sent to the engine; longer sentences are split at commas
+MAX_CHUNK_CHARS = 250
+
+# Words ending in a period that don't end a sentence
+ABBREVIATIONS = {'mr', 'mrs', 'ms', 'dr', 'st', 'jr', 'sr', 'vs', 'etc', 'e.g', 'i.e', 'a.m', 'p.m'}
+
+# Capitalized words that start a new sentence rather than continue a name
+# after an initial ("Take Vitamin D. It helps." vs "J. Smith")
+SENTENCE_STARTERS = {
+    'I', 'A', 'An', 'The', 'It', 'Its', 'He', 'She', 'We', 'They', 'You', 'This', 'That',
+    'These', 'Those', 'Then', 'There', 'Here', 'And', 'But', 'So', 'Or', 'If', 'When',
+    'What', 'Where', 'Who', 'Why', 'How', 'My', 'Your', 'Our', 'Their', 'His', 'Her',
+    'Please', 'Now', 'Yes', 'No', 'Do', 'Let', 'After', 'Before', 'Remember', 'Take'
+}
+
+# Pause added between sentences for patients who need time to follow along;
+# the same pause the engines' _adapt_text puts between sentences of one request
+SENTENCE_PAUSE = '<break time="1s"/>'
+
+_SENTENCE_BREAK_RE = re.compile(r'(?:(?<=[.!?])|(?<=[.!?]["\')\]]))\s+')
+_SENTENCE_END_RE = re.compile(r'[.!?]["\')\]]?$')
+_CLAUSE_BREAK_RE = re.compile(r'(?<=[,;:])\s+')
+_INITIAL_RE = re.compile(r'(?:^|\s)[A-Z]\.$')
+
+_executor = None
+_executor_lock = threading.Lock()
+
+
+def _get_executor():
+    global _executor
+    if _executor is None:
+        with _executor_lock:
+            if _executor is None:
+                workers = int(os.environ.get('TTS_STREAM_WORKERS', 8))
+                _executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix='tts-stream')
+    return _executor
+
+
+def _split_long(chunk: str, max_chars: int) -> List[str]:
+    """Split a chunk longer than max_chars at clause boundaries, then at spaces."""
+    if len(chunk) <= max_chars:
+        return [chunk]
+    pieces = []
+    current = ''
+    for clause in _CLAUSE_BREAK_RE.split(chunk):
+        words = [clause] if len(clause) <= max_chars else clause.split(' ')
+        for word in words:
+            candidate = f'{current} {word}' if current else word
+            if len(candidate) <= max_chars or not current:
+                current = candidate
+            else:
+                pieces.append(current)
+                current = word
+    if current:
+        pieces.append(current)
+    return pieces
+
+
+def _continues_name(sentence: str, piece: str) -> bool:
+    """Whether sentence ends in an abbreviation or initial that piece continues, not a full stop."""
+    if not sentence.endswith('.'):
+        return False
+    if sentence.rsplit(' ', 1)[-1].rstrip('.').lower() in ABBREVIATIONS:
+        return True
+    # An initial: a single uppercase letter followed by a capitalized name
+    next_word = piece.split(' ', 1)[0]
+    return bool(_INITIAL_RE.search(sentence)) and next_word[:1].isupper() and next_word not in SENTENCE_STARTERS
+
+
+def split_sentences(text: str, max_chars: int = MAX_CHUNK_CHARS) -> List[str]:
+    """
+    Split text into sentence-sized chunks for synthesis.
+
+    SSML is returned as a single chunk, since splitting it would break the markup.
+
+    Args:
+        text: Plain text to split
+        max_chars: Longest chunk; longer sentences are split at commas and spaces
+
+    Returns:
+        list: Chunks in reading order
+    """
+    text = ' '.join(text.split())
+    if not text:
+        return []
+    if text.startswith('<speak>'):
+        return [text]
+
+    sentences = []
+    for piece in _SENTENCE_BREAK_RE.split(text):
+        if sentences and _continues_name(sentences[-1], piece):
+            # "Dr. Smith", "J. Smith": not the end of a sentence
+            sentences[-1] = f'{sentences[-1]} {piece}'
+        else:
+            sentences.append(piece)
+
+    chunks = []
+    for sentence in sentences:
+        chunks.extend(_split_long(sentence, max_chars))
+    return chunks
+
+
+class SpeechStream:
+    """
+    Sentence-by-sentence synthesis of one response.
+
+    Synthesis starts when the stream is created; iterating yields each
+    segment in order as soon as it (and everything before it) is ready.
+    When the context asks for pauses (cognitive_level 'low'), every segment
+    that ends a sentence, except the last, ends with SENTENCE_PAUSE.
+    """
+
+    def __init__(self, engine, text: str, voice_id: Optional[str] = None,
+                 context: Optional[Dict[str, Any]] = None, parallel: int = STREAM_PARALLEL):
+        """
+        Args:
+            engine: PollyTTSEngine or TTSEngine
+            text: Text to speak
+            voice_id: Voice ID (default: the engine's, or chosen from the context)
+            context: Optional context passed to the engine's speak_text
+            parallel: Sentences synthesized at once for this stream
+        """
+        self.engine = engine
+        self.voice_id = voice_id
+        self.context = context
+        self.chunks = split_sentences(text)
+        self.pauses = bool(context) and context.get('cognitive_level') == 'low'
+        self.started = time.perf_counter()
+        self.first_audio_seconds = None
+        self._segments = [Future() for _ in self.chunks]
+        self._next = 0
+        self._cancelled = False
+        self._lock = threading.Lock()
+
+        for _ in range(min(parallel, len(self.chunks))):
+            self._submit_next()
+
+    def _submit_next(self):
+        with self._lock:
+            if self._cancelled or self._next >= len(self.chunks):
+                return
+            index = self._next
+            self._next += 1
+        _get_executor().submit(self._synthesize, index)
+
+    def _synthesize(self, index):
+        text = self.chunks[index]
+        if self.pauses and index < len(self.chunks) - 1 and _SENTENCE_END_RE.search(text):
+            # No space before the break, so _adapt_text doesn't add a second one
+            text += SENTENCE_PAUSE
+        try:
+            result = self.engine.speak_text(text, self.voice_id, self.context)
+        except Exception as e:
+            result = {'success': False, 'error': str(e)}
+        result['ready_seconds'] = time.perf_counter() - self.started
+        self._segments[index].set_result(result)
+        self._submit_next()
+
+    def __len__(self):
+        return len(self.chunks)
+
+    def __iter__(self) -> Iterator[Dict[str, Any]]:
+        """
+        Yields:
+            dict: index, text, success, url, cached and ready_ms (since the
+                stream started) for each segment, or error if it failed
+        """
+        for index, future in enumerate(self._segments):
+            result = future.result()
+            segment = {
+                'index': index,
+                'text': self.chunks[index],
+                'success': result.get('success', False),
+                'ready_ms': round(result['ready_seconds'] * 1000, 1)
+            }
+            if segment['success']:
+                segment['url'] = result.get('url')
+                segment['cached'] = result.get('cached', False)
+                if self.first_audio_seconds is None:
+                    self.first_audio_seconds = time.perf_counter() - self.started
+            else:
+                segment['error'] = result.get('error', 'Speech synthesis failed')
+            yield segment
+
+    def playlist(self) -> List[Dict[str, Any]]:
+        """Wait for every segment and return them in order."""
+        return list(self)
+
+    def cancel(self):
+        """Stop synthesizing sentences that haven't started (e.g. the client went away)."""
+        with self._lock:
+            self._cancelled = True
+            skipped = range(self._next, len(self.chunks))
+            self._next = len(self.chunks)
+        elapsed = time.perf_counter() - self.started
+        for index in skipped:
+            self._segments[index].set_result({'success': False, 'error': 'Cancelled', 'ready_seconds': elapsed})
+
+
+def stream_speech(engine, text: str, voice_id: Optional[str] = None,
+                  context: Optional[Dict[str, Any]] = None) -> SpeechStream:
+    """Start synthesizing text sentence by sentence."""
+    return SpeechStream(engine, text, voice_id, context)
+
+
+# ----------------------------------------------------------------------
+# Benchmark
+# ----------------------------------------------------------------------
+
+def run_benchmark(base_latency: float = 0.15, per_char_latency: float = 0.004) -> List[Dict[str, Any]]:
+    """
+    Compare time-to-first-audio of whole-response and streamed synthesis.
+
+    Uses StubPollyClient with Polly-like latency and a temporary cache.
+
+    Args:
+        base_latency: Seconds per synthesis request
+        per_char_latency: Additional seconds per character
+
+    Returns:
+        list: One result dict per text
+    """
+    import tempfile
+    from services.polly_tts_engine import PollyTTSEngine, StubPollyClient
+    from services.tts_cache import TTSCache
+
+    texts = {
+        'story (medium)': "Sarah went on vacation to the beach. She stayed for five days. While there, she swam "
+                          "in the ocean and collected seashells. The weather was sunny every day except Tuesday, "
+                          "when it rained.",
+        'story (hard)': "Robert and Elizabeth celebrated their 50th wedding anniversary last weekend. Their three "
+                        "children organized a surprise party at the Italian restaurant where they had their first "
+                        "date. Over 40 guests attended, including their 7 grandchildren. They received many gifts, "
+                        "but their favorite was a photo album filled with pictures from their life together. The "
+                        "celebration ended with a slow dance to their wedding song.",
+        'brain response': "Good morning, Dr. Harris asked me to remind you about today's appointment. It is at "
+                          "2 p.m. at the clinic on Main St. and your daughter will drive you there. Before you "
+                          "leave, please take your blue pill with a glass of water. Remember to bring your "
+                          "glasses, your wallet, and the list of questions we wrote down yesterday. If you feel "
+                          "unsure about anything, just ask me and I will help you.",
+    }
+
+    results = []
+    with tempfile.TemporaryDirectory() as cache_dir:
+        engine = PollyTTSEngine(polly_client=StubPollyClient(base_latency, per_char_latency))
+        engine.audio_cache = TTSCache(cache_dir, '/static/audio/polly_cache')
+
+        for name, text in texts.items():
+            started = time.perf_counter()
+            whole = engine.generate_speech(text, cache=False)
+            whole_seconds = time.perf_counter() - started
+            assert whole['success'], whole
+
+            # Cold: every sentence is new
+            engine.audio_cache.evict(max_age=0)
+            cold = stream_speech(engine, text)
+            cold.playlist()
+            cold_total = time.perf_counter() - cold.started
+
+            # Warm: every sentence is cached
+            warm = stream_speech(engine, text)
+            warm.playlist()
+
+            results.append({
+                'text': name,
+                'chars': len(text),
+                'segments': len(cold),
+                'whole_first_audio_ms': whole_seconds * 1000,
+                'stream_first_audio_ms': cold.first_audio_seconds * 1000,
+                'stream_total_ms': cold_total * 1000,
+                'warm_first_audio_ms': warm.first_audio_seconds * 1000
+            })
+        engine.audio_cache.close()
+    return results
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.WARNING)
+    print("Time to first audio: whole response vs sentence streaming (stub Polly, ms)")
+    for result in run_benchmark():
+        print(f"  {result['text']:<16} {result['chars']:>4} chars, {result['segments']} segments: "
+              f"whole {result['whole_first_audio_ms']:>7.1f}   streamed {result['stream_first_audio_ms']:>7.1f} "
+              f"(all segments {result['stream_total_ms']:>7.1f})   cached {result['warm_first_audio_ms']:>5.1f}")
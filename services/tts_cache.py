@@ -0,0 +1,471 @@
+# © 2025 The Christman AI Project. All rights reserved.
+#
+# This code is released as part of a trauma-informed, dignity-first AI ecosystem
+# designed to protect, empower, and elevate vulnerable populations.
+#
+# By using, modifying, or distributing this software, you agree to uphold the following:
+# 1. Truth — No deception, no manipulation.
+# 2. Dignity — Respect the autonomy and humanity of all users.
+# 3. Protection — Never use this to exploit or harm vulnerable individuals.
+# 4. Transparency — Disclose all modifications and contributions clearly.
+# 5. No Erasure — Preserve the mission and ethical origin of this work.
+#
+# This is not just code. This is redemption in code.
+# Contact: lumacognify@thechristmanaiproject.com
+# https://thechristmanaiproject.com
+"""
+TTS Audio Cache for AlphaWolf
+Part of The Christman AI Project - Powered by LumaCognify AI
+
+On-disk cache of synthesized speech shared by the Polly and gTTS engines.
+
+- Keys are built from normalized text (whitespace, case and SSML tag
+  spelling don't matter), so the same phrase is only synthesized once.
+- Concurrent requests for a phrase that is being synthesized wait for
+  that synthesis instead of starting their own (single flight).
+- The cache has a byte budget; a background thread evicts the least
+  recently used files when it is exceeded.
+- Request counts per phrase are kept so frequently spoken phrases can be
+  synthesized again ahead of time after they were evicted.
+
+run_presynthesis warms the cache with each patient's upcoming reminders and
+the most requested phrases, so they play without waiting for synthesis.
+"""
+
+import json
+import logging
+import os
+import re
+import hashlib
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import Future, ThreadPoolExecutor
+from datetime import datetime
+from typing import Any, Callable, Dict, Iterable, List, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+# Default byte budget per cache directory
+DEFAULT_MAX_MB = 256
+
+# Eviction trims the cache to this share of its budget, so it doesn't run on every write
+EVICT_TO_FRACTION = 0.9
+
+# Phrase request counts kept (the most requested ones)
+MAX_TRACKED_PHRASES = 2000
+
+_TAG_RE = re.compile(r'<[^>]+>')
+_SPACE_RE = re.compile(r'\s+')
+
+
+def _canonical_tag(match):
+    inner = _SPACE_RE.sub(' ', match.group(0)[1:-1]).strip().replace("'", '"')
+    inner = re.sub(r'\s*=\s*', '=', inner)
+    inner = re.sub(r'\s*/$', '/', inner)
+    return f'<{inner}>'
+
+
+def normalize_text(text: str) -> str:
+    """
+    Canonical form of a phrase for cache keys.
+
+    Collapses whitespace, ignores case, spells SSML tags one way (quotes,
+    spacing) and drops a <speak> wrapper around text without other markup.
+    """
+    text = _TAG_RE.sub(_canonical_tag, text)
+    text = _SPACE_RE.sub(' ', text).strip().lower()
+    wrapped = re.fullmatch(r'<speak>(.*)</speak>', text, re.DOTALL)
+    if wrapped and '<' not in wrapped.group(1):
+        text = wrapped.group(1).strip()
+    return text
+
+
+def strip_ssml(text: str) -> str:
+    """Plain text of a phrase that may contain SSML markup."""
+    return _SPACE_RE.sub(' ', _TAG_RE.sub(' ', text)).strip()
+
+
+def cache_key(text: str, voice: str) -> str:
+    """Cache key for a phrase spoken with a voice."""
+    return hashlib.md5(f"{voice}\x00{normalize_text(text)}".encode()).hexdigest()
+
+
+class TTSCache:
+    """Size-bounded, single-flight cache of synthesized audio files."""
+
+    def __init__(self, cache_dir: str, url_prefix: str, max_bytes: Optional[int] = None,
+                 extension: str = 'mp3', evict_interval: float = 60.0, wait_timeout: float = 60.0):
+        """
+        Args:
+            cache_dir: Directory holding the audio files
+            url_prefix: URL the directory is served under (e.g. /static/audio/polly_cache)
+            max_bytes: Byte budget (default: TTS_CACHE_MAX_MB env var, else 256 MB)
+            extension: Audio file extension
+            evict_interval: Seconds between background checks of the budget
+            wait_timeout: How long a request waits for another request's synthesis
+        """
+        self.cache_dir = cache_dir
+        self.url_prefix = url_prefix.rstrip('/')
+        if max_bytes is None:
+            max_bytes = int(float(os.environ.get('TTS_CACHE_MAX_MB', DEFAULT_MAX_MB)) * 1024 * 1024)
+        self.max_bytes = max_bytes
+        self.extension = extension
+        self.evict_interval = evict_interval
+        self.wait_timeout = wait_timeout
+        self.phrases_path = os.path.join(cache_dir, 'phrases.json')
+
+        self._lock = threading.Lock()
+        self._entries: 'OrderedDict[str, int]' = OrderedDict()  # key -> bytes, least recently used first
+        self._total_bytes = 0
+        self._inflight: Dict[str, Future] = {}
+        self._phrases: Dict[str, Dict[str, Any]] = {}
+        self._phrases_dirty = False
+        self._evict_wakeup = threading.Event()
+        self._evictor = None
+        self._closed = False
+        self.stats = {'hits': 0, 'misses': 0, 'coalesced': 0, 'evicted': 0, 'failed': 0}
+
+        os.makedirs(cache_dir, exist_ok=True)
+        self._load()
+
+    # ------------------------------------------------------------------
+    # Index
+    # ------------------------------------------------------------------
+
+    def _load(self):
+        """Index the files already on disk, oldest access first, and read the phrase counts."""
+        files = []
+        suffix = f'.{self.extension}'
+        for name in os.listdir(self.cache_dir):
+            path = os.path.join(self.cache_dir, name)
+            if name.endswith('.part'):
+                # Left behind by a synthesis that was interrupted
+                try:
+                    os.remove(path)
+                except OSError:
+                    pass
+                continue
+            if not name.endswith(suffix):
+                continue
+            try:
+                stat = os.stat(path)
+            except OSError:
+                continue
+            files.append((stat.st_mtime, name[:-len(suffix)], stat.st_size))
+        for _, key, size in sorted(files):
+            self._entries[key] = size
+            self._total_bytes += size
+
+        if os.path.exists(self.phrases_path):
+            try:
+                with open(self.phrases_path, 'r') as f:
+                    self._phrases = json.load(f)
+            except Exception as e:
+                logger.error(f"Error loading TTS phrase counts: {str(e)}")
+
+    def path_for(self, key: str) -> str:
+        return os.path.join(self.cache_dir, f'{key}.{self.extension}')
+
+    def url_for(self, key: str) -> str:
+        return f'{self.url_prefix}/{key}.{self.extension}'
+
+    def contains(self, text: str, voice: str) -> bool:
+        """Whether a phrase is already cached."""
+        with self._lock:
+            return cache_key(text, voice) in self._entries
+
+    # ------------------------------------------------------------------
+    # Lookup and synthesis
+    # ------------------------------------------------------------------
+
+    def fetch(self, text: str, voice: str, synthesize: Callable[[str], None],
+              refresh: bool = False, track: bool = True, voice_id: Optional[str] = None) -> Dict[str, Any]:
+        """
+        Get the audio for a phrase, synthesizing it at most once at a time.
+
+        Args:
+            text: Phrase as it will be synthesized
+            voice: Everything besides the text that changes the audio (voice, engine, rate)
+            synthesize: Called with a file path to write the audio to
+            refresh: Synthesize again even if the phrase is cached
+            track: Count this request towards the phrase's frequency
+            voice_id: Engine voice ID recorded with the phrase for pre-synthesis (default: voice)
+
+        Returns:
+            dict: key, path, url, cached (no synthesis was needed for this
+                request) and coalesced (waited for another request's synthesis)
+
+        Raises:
+            Whatever synthesize raised, in every request waiting on it
+        """
+        key = cache_key(text, voice)
+        path = self.path_for(key)
+        self._ensure_evictor()
+
+        with self._lock:
+            if track:
+                self._record_request(key, text, voice_id or voice)
+            future = self._inflight.get(key)
+            if future is None and not refresh and key in self._entries:
+                if os.path.exists(path):
+                    self._entries.move_to_end(key)
+                    self.stats['hits'] += 1
+                    hit = True
+                else:
+                    # Removed from disk behind our back
+                    self._total_bytes -= self._entries.pop(key)
+                    hit = False
+            else:
+                hit = False
+            leader = not hit and future is None
+            if leader:
+                future = Future()
+                self._inflight[key] = future
+                self.stats['misses'] += 1
+            elif not hit:
+                self.stats['coalesced'] += 1
+
+        if hit:
+            try:
+                # mtime is the access time that survives a restart
+                os.utime(path)
+            except OSError:
+                pass
+            return {'key': key, 'path': path, 'url': self.url_for(key), 'cached': True, 'coalesced': False}
+
+        if not leader:
+            future.result(timeout=self.wait_timeout)
+            return {'key': key, 'path': path, 'url': self.url_for(key), 'cached': True, 'coalesced': True}
+
+        partial = f'{path}.{threading.get_ident()}.part'
+        try:
+            synthesize(partial)
+            os.replace(partial, path)
+            size = os.path.getsize(path)
+        except BaseException as e:
+            with self._lock:
+                self._inflight.pop(key, None)
+                self.stats['failed'] += 1
+            future.set_exception(e)
+            try:
+                os.remove(partial)
+            except OSError:
+                pass
+            raise
+
+        with self._lock:
+            self._total_bytes += size - self._entries.pop(key, 0)
+            self._entries[key] = size
+            self._inflight.pop(key, None)
+            over_budget = self._total_bytes > self.max_bytes
+        future.set_result(path)
+        if over_budget:
+            self._evict_wakeup.set()
+        return {'key': key, 'path': path, 'url': self.url_for(key), 'cached': False, 'coalesced': False}
+
+    # ------------------------------------------------------------------
+    # Phrase frequency
+    # ------------------------------------------------------------------
+
+    def _record_request(self, key, text, voice):
+        phrase = self._phrases.get(key)
+        if phrase is None:
+            phrase = self._phrases[key] = {'text': text, 'voice': voice, 'requests': 0}
+        phrase['requests'] += 1
+        phrase['last_requested'] = time.time()
+        self._phrases_dirty = True
+
+    def frequent_phrases(self, limit: int = 50, min_requests: int = 3) -> List[Tuple[str, str]]:
+        """
+        Most requested phrases.
+
+        Returns:
+            list: (text, voice) pairs, most requested first
+        """
+        with self._lock:
+            phrases = [p for p in self._phrases.values() if p['requests'] >= min_requests]
+        phrases.sort(key=lambda p: p['requests'], reverse=True)
+        return [(p['text'], p['voice']) for p in phrases[:limit]]
+
+    def save_phrases(self):
+        """Write the phrase counts, keeping the most requested ones."""
+        with self._lock:
+            if not self._phrases_dirty:
+                return
+            if len(self._phrases) > MAX_TRACKED_PHRASES:
+                keep = sorted(self._phrases.items(), key=lambda item: item[1]['requests'], reverse=True)
+                self._phrases = dict(keep[:MAX_TRACKED_PHRASES])
+            snapshot = json.dumps(self._phrases)
+            self._phrases_dirty = False
+        try:
+            temp_path = f'{self.phrases_path}.tmp'
+            with open(temp_path, 'w') as f:
+                f.write(snapshot)
+            os.replace(temp_path, self.phrases_path)
+        except Exception as e:
+            logger.error(f"Error saving TTS phrase counts: {str(e)}")
+
+    # ------------------------------------------------------------------
+    # Eviction
+    # ------------------------------------------------------------------
+
+    def _ensure_evictor(self):
+        if self._evictor is None and not self._closed:
+            with self._lock:
+                if self._evictor is None:
+                    self._evictor = threading.Thread(target=self._evict_loop, name='tts-cache-evictor', daemon=True)
+                    self._evictor.start()
+
+    def _evict_loop(self):
+        while not self._closed:
+            self._evict_wakeup.wait(self.evict_interval)
+            self._evict_wakeup.clear()
+            if self._closed:
+                break
+            try:
+                self.evict()
+                self.save_phrases()
+            except Exception as e:
+                logger.error(f"Error in TTS cache eviction: {str(e)}")
+
+    def evict(self, max_age: Optional[float] = None) -> int:
+        """
+        Delete least recently used files until the cache is back under budget.
+
+        Args:
+            max_age: Also delete files not used for this many seconds
+
+        Returns:
+            int: Number of files deleted
+        """
+        removed = 0
+        with self._lock:
+            victims = []
+            if max_age is not None:
+                cutoff = time.time() - max_age
+                for key in list(self._entries):
+                    try:
+                        if os.path.getmtime(self.path_for(key)) < cutoff:
+                            victims.append(key)
+                    except OSError:
+                        victims.append(key)
+            if self._total_bytes > self.max_bytes:
+                target = self.max_bytes * EVICT_TO_FRACTION
+                total = self._total_bytes - sum(self._entries[key] for key in victims)
+                chosen = set(victims)
+                for key, size in self._entries.items():
+                    if total <= target:
+                        break
+                    if key in chosen or key in self._inflight:
+                        continue
+                    victims.append(key)
+                    total -= size
+            # Files are deleted under the lock, so a phrase being synthesized
+            # again can't have its new file removed
+            for key in victims:
+                self._total_bytes -= self._entries.pop(key)
+                try:
+                    os.remove(self.path_for(key))
+                    removed += 1
+                except OSError:
+                    pass
+            self.stats['evicted'] += removed
+        if removed:
+            logger.info(f"Evicted {removed} TTS cache files ({self._total_bytes} bytes remain)")
+        return removed
+
+    def info(self) -> Dict[str, Any]:
+        """Size and hit statistics (for diagnostics)."""
+        with self._lock:
+            return dict(self.stats, files=len(self._entries), bytes=self._total_bytes,
+                        max_bytes=self.max_bytes, in_flight=len(self._inflight))
+
+    def close(self):
+        """Stop the eviction thread and save the phrase counts."""
+        self._closed = True
+        self._evict_wakeup.set()
+        self.save_phrases()
+
+
+# ----------------------------------------------------------------------
+# Pre-synthesis
+# ----------------------------------------------------------------------
+
+def reminder_speech_text(title: str, description: Optional[str] = None) -> str:
+    """What is said when a reminder fires."""
+    text = f"Reminder: {title.strip().rstrip('.')}."
+    if description and description.strip():
+        text += f" {description.strip()}"
+    return text
+
+
+def presynthesize(engine, phrases: Iterable[Tuple[str, Optional[str]]], max_workers: int = 4) -> Dict[str, int]:
+    """
+    Synthesize phrases ahead of time.
+
+    Args:
+        engine: PollyTTSEngine or TTSEngine
+        phrases: (text, voice_id) pairs; a voice_id of None uses the engine's default
+        max_workers: Concurrent synthesis requests
+
+    Returns:
+        dict: Counts of phrases synthesized, already cached and failed
+    """
+    counts = {'synthesized': 0, 'cached': 0, 'failed': 0}
+    unique = list(dict.fromkeys(phrases))
+    if not unique:
+        return counts
+
+    def warm(phrase):
+        text, voice_id = phrase
+        if voice_id is None:
+            return engine.generate_speech(text, track=False)
+        return engine.generate_speech(text, voice_id, track=False)
+
+    with ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix='tts-presynthesis') as pool:
+        for result in pool.map(warm, unique):
+            if not result.get('success'):
+                counts['failed'] += 1
+            elif result.get('cached'):
+                counts['cached'] += 1
+            else:
+                counts['synthesized'] += 1
+    return counts
+
+
+def run_presynthesis(engine, reminder_service, hours: int = 24, frequent: int = 50) -> Dict[str, int]:
+    """
+    Warm the cache with every patient's upcoming reminders and the most requested phrases.
+
+    Must run inside a Flask application context (reminders are read from the database).
+
+    Args:
+        engine: PollyTTSEngine or TTSEngine
+        reminder_service: ReminderService
+        hours: How far ahead to look for reminders
+        frequent: Number of most requested phrases to keep warm
+
+    Returns:
+        dict: Counts of phrases synthesized, already cached and failed
+    """
+    import models
+    from datetime import timedelta
+
+    phrases = []
+    cutoff = datetime.utcnow() + timedelta(hours=hours)
+    patient_ids = [row[0] for row in models.db.session.query(models.Reminder.patient_id).filter(
+        models.Reminder.completed == False,  # noqa: E712
+        models.Reminder.next_fire_at.isnot(None),
+        models.Reminder.next_fire_at <= cutoff
+    ).distinct()]
+    for patient_id in patient_ids:
+        for reminder in reminder_service.get_upcoming_reminders(patient_id, hours=hours):
+            phrases.append((reminder_speech_text(reminder['title'], reminder.get('description')), None))
+
+    phrases.extend(engine.audio_cache.frequent_phrases(frequent))
+
+    started = time.perf_counter()
+    counts = presynthesize(engine, phrases)
+    logger.info(f"Pre-synthesized speech for {len(patient_ids)} patients in {time.perf_counter() - started:.1f}s: {counts}")
+    return counts
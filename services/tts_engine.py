@@ -3,10 +3,10 @@ Lightweight gTTS-based TTS engine (fallback)
 """
 import logging
 import os
-import hashlib
-import time
 from datetime import datetime
 
+from services.tts_cache import TTSCache, strip_ssml
+
 logger = logging.getLogger(__name__)
 
 # © 2025 The Christman AI Project. All rights reserved.
@@ -26,8 +26,8 @@ class TTSEngine:
         self.logger = logging.getLogger(__name__)
         self.cache_dir = os.path.join('static', 'audio', 'tts_cache')
         
-        # Create cache directory if it doesn't exist
-        os.makedirs(self.cache_dir, exist_ok=True)
+        # Size-bounded audio cache (creates the directory)
+        self.audio_cache = TTSCache(self.cache_dir, '/static/audio/tts_cache')
         
         # Voice configuration
         self.voices = {
@@ -75,14 +75,15 @@ class TTSEngine:
         """
         return self.generate_speech(text, voice_id, cache=kwargs.get('cache', True))
     
-    def generate_speech(self, text, voice_id='female_default', cache=True):
+    def generate_speech(self, text, voice_id='female_default', cache=True, track=True):
         """
         Generate speech audio from text.
         
         Args:
-            text: Text to convert to speech
+            text: Text to convert to speech (SSML markup is dropped, gTTS can't use it)
             voice_id: ID of voice to use
-            cache: Whether to cache the result
+            cache: Whether to use a cached result (new audio is always cached)
+            track: Count the request towards the phrase's frequency (off for pre-synthesis)
             
         Returns:
             dict: Result with file path or error
@@ -99,37 +100,7 @@ class TTSEngine:
             # Get voice configuration
             voice = self.voices.get(voice_id, self.voices['female_default'])
             
-            # Generate cache key based on text and voice
-            cache_key = hashlib.md5((text + str(voice)).encode()).hexdigest()
-            cache_path = os.path.join(self.cache_dir, f"{cache_key}.mp3")
-            
-            # Check cache if enabled
-            if cache and os.path.exists(cache_path):
-                return {
-                    'success': True,
-                    'path': cache_path,
-                    'cached': True,
-                    'timestamp': datetime.utcnow().isoformat()
-                }
-            
-            # Generate speech
-            if self.gtts_available:
-                from gtts import gTTS
-                
-                # Create gTTS object with the text and desired parameters
-                tts = gTTS(text=text, lang=voice['language'], slow=(voice['rate'] < 0.9))
-                
-                # Save to file
-                tts.save(cache_path)
-                
-                return {
-                    'success': True,
-                    'path': cache_path,
-                    'cached': False,
-                    'voice': voice_id,
-                    'timestamp': datetime.utcnow().isoformat()
-                }
-            else:
+            if not self.gtts_available:
                 # Fallback if gTTS is not available
                 return {
                     'success': False,
@@ -137,6 +108,33 @@ class TTSEngine:
                     'text': text,  # Return text for display
                     'timestamp': datetime.utcnow().isoformat()
                 }
+            
+            spoken = strip_ssml(text)
+            slow = voice['rate'] < 0.9
+            
+            def synthesize(path):
+                from gtts import gTTS
+                
+                # Create gTTS object with the text and desired parameters
+                tts = gTTS(text=spoken, lang=voice['language'], slow=slow)
+                tts.save(path)
+            
+            # gTTS only varies by language and speed, so voices that share them share audio
+            entry = self.audio_cache.fetch(
+                spoken, f"gtts:{voice['language']}:{slow}", synthesize,
+                refresh=not cache, track=track, voice_id=voice_id
+            )
+            
+            result = {
+                'success': True,
+                'path': entry['path'],
+                'url': entry['url'],
+                'cached': entry['cached'],
+                'timestamp': datetime.utcnow().isoformat()
+            }
+            if not entry['cached']:
+                result['voice'] = voice_id
+            return result
         except Exception as e:
             self.logger.error(f"Error generating speech: {str(e)}")
             return {
@@ -169,7 +167,6 @@ class TTSEngine:
             # If successful, add additional playback information
             if result['success']:
                 result['text'] = text
-                result['url'] = '/static/audio/tts_cache/' + os.path.basename(result['path'])
                 
                 # Add SSML markup for web audio API (not actually used by gTTS but included for client)
                 ssml = f'<speak>{text}</speak>'
@@ -266,20 +263,9 @@ class TTSEngine:
             }
     
     def cleanup_cache(self, max_age_days=30):
-        """Clean up old cache files."""
+        """Remove cached audio not played for max_age_days (the size budget is enforced automatically)."""
         try:
-            now = time.time()
-            count = 0
-            
-            for filename in os.listdir(self.cache_dir):
-                file_path = os.path.join(self.cache_dir, filename)
-                
-                # Check if file is old enough to delete
-                if os.path.isfile(file_path):
-                    file_age = now - os.path.getmtime(file_path)
-                    if file_age > (max_age_days * 86400):  # Convert days to seconds
-                        os.remove(file_path)
-                        count += 1
+            count = self.audio_cache.evict(max_age=max_age_days * 86400)
             
             self.logger.info(f"Cleaned up {count} old cache files")
             return {
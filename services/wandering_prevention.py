@@ -17,6 +17,7 @@
 import logging
 from datetime import datetime, timedelta
 from geopy.distance import geodesic
+from services.geofence_engine import GeofenceEngine, get_geofence_engine
 
 logger = logging.getLogger(__name__)
 
@@ -30,13 +31,14 @@ class WanderingPrevention:
         self.cooldown_period = timedelta(minutes=15)  # Minimum time between alerts
         self.logger.info("Wandering prevention service initialized")
     
-    def check_wandering(self, patient, safe_zones):
+    def check_wandering(self, patient, safe_zones=None):
         """
         Check if a patient is wandering based on location and safe zones.
         
         Args:
             patient: Patient object with location data
-            safe_zones: List of SafeZone objects
+            safe_zones: Optional list of SafeZone objects; defaults to the
+                shared cached geofence index
             
         Returns:
             bool: True if wandering detected, False otherwise
@@ -74,16 +76,16 @@ class WanderingPrevention:
             self.logger.error(f"Error checking wandering: {str(e)}")
             return False
     
-    def _is_in_safe_zones(self, location, safe_zones):
+    def _get_geofence(self, safe_zones):
+        """Use the shared zone index unless an explicit zone list is given."""
+        if safe_zones is None:
+            return get_geofence_engine()
+        return GeofenceEngine.from_zones(safe_zones)
+    
+    def _is_in_safe_zones(self, location, safe_zones=None):
         """Check if a location is within any safe zone."""
         try:
-            for zone in safe_zones:
-                zone_center = (zone.latitude, zone.longitude)
-                distance = geodesic(location, zone_center).meters
-                
-                if distance <= zone.radius:
-                    return True
-            return False
+            return self._get_geofence(safe_zones).is_inside_any(location[0], location[1])
         except Exception as e:
             self.logger.error(f"Error checking safe zones: {str(e)}")
             return False
@@ -114,13 +116,14 @@ class WanderingPrevention:
         """Set alert cooldown for a patient."""
         self.alert_cooldowns[patient_id] = datetime.utcnow() + self.cooldown_period
     
-    def get_safety_status(self, patient, safe_zones):
+    def get_safety_status(self, patient, safe_zones=None):
         """
         Get comprehensive safety status for a patient.
         
         Args:
             patient: Patient object with location data
-            safe_zones: List of SafeZone objects
+            safe_zones: Optional list of SafeZone objects; defaults to the
+                shared cached geofence index
             
         Returns:
             dict: Safety status data
@@ -142,27 +145,24 @@ class WanderingPrevention:
             closest_distance = float('inf')
             distances = []
             
-            for zone in safe_zones:
-                zone_center = (zone.latitude, zone.longitude)
-                distance = geodesic(current_location, zone_center).meters
-                
+            # Distances come back sorted from closest to furthest
+            geofence = self._get_geofence(safe_zones)
+            for entry in geofence.distances_to_zones(*current_location):
+                zone = entry['zone']
                 distances.append({
                     'zone_id': zone.id,
                     'zone_name': zone.name,
-                    'distance': distance,
-                    'inside': distance <= zone.radius
+                    'distance': entry['distance'],
+                    'inside': entry['inside']
                 })
                 
-                if distance <= zone.radius:
+                if entry['inside']:
                     in_safe_zone = True
                 
-                if distance < closest_distance:
-                    closest_distance = distance
+                if entry['distance'] < closest_distance:
+                    closest_distance = entry['distance']
                     closest_zone = zone
             
-            # Sort distances from closest to furthest
-            distances.sort(key=lambda x: x['distance'])
-            
             # Determine status
             if in_safe_zone:
                 status = 'safe'
@@ -16,22 +16,105 @@
 import logging
 import os
 import json
-import requests
+import time
 import trafilatura
 from datetime import datetime
 from bs4 import BeautifulSoup
 from urllib.parse import urlparse, urljoin
 
+from services.crawl_engine import CrawlEngine, ValidatorStore
+from services.search_index import SearchIndex, file_signature, index_articles
+
+# Path fragments that mark likely article pages
+ARTICLE_PATH_KEYWORDS = ['/article/', '/news/', '/research/', '/blog/', '/story/']
+
+
+def _extract_links(html, base_url, limit):
+    """Same-site links to likely article pages, in page order."""
+    soup = BeautifulSoup(html, 'html.parser')
+    base_netloc = urlparse(base_url).netloc
+    links = []
+    for a in soup.find_all('a', href=True):
+        href = a['href']
+        # Convert relative URLs to absolute
+        if not href.startswith('http'):
+            href = urljoin(base_url, href)
+        
+        # Only include links to the same domain
+        if urlparse(href).netloc == base_netloc:
+            # Filter for likely article pages
+            if any(keyword in href.lower() for keyword in ARTICLE_PATH_KEYWORDS):
+                links.append(href)
+    return links[:limit]
+
+
+def _find_image(html, url):
+    """Find a representative image in a page (og:image, a marked main image, or a large image)."""
+    soup = BeautifulSoup(html, 'html.parser')
+    
+    # Look for og:image meta tag
+    og_image = soup.find('meta', property='og:image')
+    if og_image and og_image.get('content'):
+        return urljoin(url, og_image.get('content'))
+    
+    # Look for main image
+    main_image = soup.find('img', class_='main') or soup.find('img', class_='featured') or soup.find('img', class_='hero') or soup.find('img', class_='banner')
+    if main_image and main_image.get('src'):
+        return urljoin(url, str(main_image.get('src')))
+    
+    # Look for first large image
+    for img in soup.find_all('img'):
+        width = img.get('width')
+        if width and str(width).isdigit() and int(width) > 300 and img.get('src'):
+            return urljoin(url, img['src'])
+    
+    return None
+
+
+def _extract_article(html, url):
+    """
+    Extract an article's content and metadata from downloaded HTML.
+    
+    Runs in the crawl engine's process pool, so it must stay module-level.
+    The image is looked up in the same HTML rather than by fetching the page again.
+    
+    Returns:
+        dict: trafilatura's JSON fields plus 'image', or None if nothing was extracted
+    """
+    extracted = trafilatura.extract(html, output_format='json', with_metadata=True, url=url,
+                                    include_links=True, include_images=True, include_tables=True)
+    if not extracted:
+        return None
+    content = json.loads(extracted)
+    if content.get('image'):
+        content['image'] = urljoin(url, content['image'])
+    else:
+        content['image'] = _find_image(html, url)
+    return content
+
+
 class WebCrawler:
     """Service for crawling web resources related to Alzheimer's and dementia research."""
     
-    def __init__(self):
-        """Initialize the web crawler service."""
+    def __init__(self, data_dir=None):
+        """
+        Initialize the web crawler service.
+        
+        Args:
+            data_dir: Directory for crawled data (default: data)
+        """
         self.logger = logging.getLogger(__name__)
-        self.data_dir = os.path.join('data')
+        self.data_dir = data_dir or os.path.join('data')
         self.articles_file = os.path.join(self.data_dir, 'research_articles.json')
         self.tips_file = os.path.join(self.data_dir, 'daily_tips.json')
         self.resources_file = os.path.join(self.data_dir, 'resources.json')
+        # ETag/Last-Modified per URL, so unchanged pages are skipped on the next crawl
+        self.validators_file = os.path.join(self.data_dir, 'crawl_validators.json')
+        # Full-text index and related-articles table read by ResearchService
+        self.index_file = os.path.join(self.data_dir, 'research_index.db')
+        
+        # CrawlEngine options (max_workers, per_domain_concurrency, per_domain_delay, ...)
+        self.crawl_options = {}
         
         # Create data directory if it doesn't exist
         os.makedirs(self.data_dir, exist_ok=True)
@@ -61,115 +144,143 @@ class WebCrawler:
         self.logger.info("Web crawler service initialized")
     
     def crawl_sources(self, limit=5):
-        """Crawl trusted sources for recent information."""
+        """
+        Crawl trusted sources for recent information.
+        
+        Sources and their article pages are fetched concurrently (with
+        per-site limits), pages unchanged since the last crawl are skipped,
+        and article extraction runs in a process pool.
+        
+        Args:
+            limit: Maximum article links followed per source
+            
+        Returns:
+            dict: Counts of new articles and tips, pages skipped as unchanged,
+                and the crawl's wall time
+        """
         self.logger.info(f"Starting crawl of {len(self.trusted_sources)} trusted sources")
+        started = time.perf_counter()
         
         articles = []
         resources = {}
         tips = []
+        extractions = {}
+        unstored = []
+        unchanged = 0
+        validators = ValidatorStore(self.validators_file)
         
-        for source in self.trusted_sources:
-            try:
-                self.logger.info(f"Crawling {source['name']} at {source['url']}")
-                
-                # Get the main page
-                response = requests.get(source['url'], timeout=10)
-                if response.status_code != 200:
-                    self.logger.warning(f"Failed to access {source['url']}, status code: {response.status_code}")
-                    continue
+        with CrawlEngine(validators=validators, **self.crawl_options) as engine:
+            def expand(key, result):
+                nonlocal unchanged
+                source = self.trusted_sources[key[1]]
                 
-                # Parse HTML
-                soup = BeautifulSoup(response.text, 'html.parser')
+                if key[0] == 'source':
+                    if result.not_modified:
+                        # Same home page as last time: revalidate the links it had
+                        links = result.cached.get('links', [])
+                    elif result.ok:
+                        links = _extract_links(result.text, source['url'], limit)
+                        validators.remember(source['url'], links=links)
+                    else:
+                        self.logger.warning(f"Failed to access {source['url']}: {result.error}")
+                        return []
+                    self.logger.info(f"Crawling {len(links)} links from {source['name']}")
+                    return [(('article', key[1], index), link) for index, link in enumerate(links[:limit])]
                 
-                # Extract links to articles
-                links = []
-                for a in soup.find_all('a', href=True):
-                    href = a['href']
-                    # Convert relative URLs to absolute
-                    if not href.startswith('http'):
-                        href = urljoin(source['url'], href)
+                if result.not_modified:
+                    unchanged += 1
+                elif not result.ok:
+                    self.logger.warning(f"Failed to download content from {result.url}: {result.error}")
+                else:
+                    extractions[key] = (result.url, engine.submit_extract(_extract_article, result.text, result.url))
+                return []
+            
+            results = engine.run(
+                [(('source', index), source['url']) for index, source in enumerate(self.trusted_sources)],
+                expand
+            )
+            unchanged += sum(1 for key, result in results.items() if key[0] == 'source' and result.not_modified)
+            
+            # Build articles in source and link order
+            for key in sorted(extractions):
+                link, future = extractions[key]
+                source = self.trusted_sources[key[1]]
+                try:
+                    content = future.result()
+                    if not content:
+                        self.logger.warning(f"No content extracted from {link}")
+                        unstored.append(link)
+                        continue
                     
-                    # Only include links to the same domain
-                    if urlparse(href).netloc == urlparse(source['url']).netloc:
-                        # Filter for likely article pages
-                        if any(keyword in href.lower() for keyword in ['/article/', '/news/', '/research/', '/blog/', '/story/']):
-                            links.append(href)
-                
-                # Limit the number of links to process
-                links = links[:limit]
-                
-                # Process each link
-                for link in links:
-                    try:
-                        # Extract content using trafilatura
-                        downloaded = trafilatura.fetch_url(link)
-                        if not downloaded:
-                            self.logger.warning(f"Failed to download content from {link}")
-                            continue
+                    # Create structured article
+                    if 'title' in content and content['title']:
+                        raw_text = content.get('raw_text') or content.get('text') or ''
                         
-                        # Extract metadata and main content
-                        extracted = trafilatura.extract(downloaded, output_format='json', include_links=True, 
-                                                       include_images=True, include_tables=True)
+                        # Get current count of articles to use as ID
+                        article_id = len(articles) + 1
                         
-                        if not extracted:
-                            self.logger.warning(f"No content extracted from {link}")
-                            continue
+                        # Create article object
+                        article = {
+                            'id': article_id,
+                            'title': content['title'],
+                            'summary': content.get('description') or content.get('excerpt') or '',
+                            'content': raw_text,
+                            'date': content['date'] if content.get('date') else datetime.now().strftime('%Y-%m-%d'),
+                            'source': source['name'],
+                            'url': link,
+                            'topics': self._extract_topics(content),
+                            'image_url': self._extract_image(content, link),
+                        }
                         
-                        # Parse JSON
-                        content = json.loads(extracted)
+                        articles.append(article)
                         
-                        # Create structured article
-                        if 'title' in content and content['title']:
-                            # Get current count of articles to use as ID
-                            article_id = len(articles) + 1
-                            
-                            # Create article object
-                            article = {
-                                'id': article_id,
+                        # Extract tips if content seems appropriate
+                        if len(raw_text) < 1000 and ('tip' in link.lower() or 'advice' in link.lower()):
+                            tip = {
+                                'id': len(tips) + 1,
                                 'title': content['title'],
-                                'summary': content['description'] if 'description' in content else '',
-                                'content': content['raw_text'] if 'raw_text' in content else '',
-                                'date': content['date'] if 'date' in content else datetime.now().strftime('%Y-%m-%d'),
-                                'source': source['name'],
-                                'url': link,
-                                'topics': self._extract_topics(content),
-                                'image_url': self._extract_image(content, link),
+                                'content': raw_text,
+                                'category': self._categorize_tip(content['title'], raw_text),
+                                'date': datetime.now().strftime('%Y-%m-%d'),
+                                'source': source['name']
                             }
-                            
-                            articles.append(article)
-                            
-                            # Extract tips if content seems appropriate
-                            if len(content['raw_text']) < 1000 and ('tip' in link.lower() or 'advice' in link.lower()):
-                                tip = {
-                                    'id': len(tips) + 1,
-                                    'title': content['title'],
-                                    'content': content['raw_text'],
-                                    'category': self._categorize_tip(content['title'], content['raw_text']),
-                                    'date': datetime.now().strftime('%Y-%m-%d'),
-                                    'source': source['name']
-                                }
-                                tips.append(tip)
-                            
-                            self.logger.info(f"Processed article: {content['title']}")
-                        else:
-                            self.logger.warning(f"No title found for content from {link}")
-                    
-                    except Exception as e:
-                        self.logger.error(f"Error processing link {link}: {str(e)}")
+                            tips.append(tip)
+                        
+                        self.logger.info(f"Processed article: {content['title']}")
+                    else:
+                        self.logger.warning(f"No title found for content from {link}")
+                        unstored.append(link)
+                
+                except Exception as e:
+                    self.logger.error(f"Error processing link {link}: {str(e)}")
+                    unstored.append(link)
             
-            except Exception as e:
-                self.logger.error(f"Error crawling source {source['name']}: {str(e)}")
+            stats = dict(engine.stats)
         
         # Save crawled data
-        if articles:
-            self._save_articles(articles)
+        if articles and not self._save_articles(articles):
+            unstored.extend(article['url'] for article in articles)
+            articles = []
+        
+        if tips and not self._save_tips(tips):
+            tips = []
+        
+        # Validators are saved last, and only for pages whose content was stored;
+        # the rest are fetched in full again next crawl
+        for link in unstored:
+            validators.forget(link)
+        validators.save()
         
-        if tips:
-            self._save_tips(tips)
+        elapsed = time.perf_counter() - started
+        self.logger.info(f"Crawl fetched {stats['fetched']} pages, {unchanged} unchanged, "
+                         f"{stats['failed']} failed in {elapsed:.1f}s")
         
         return {
             'articles_count': len(articles),
-            'tips_count': len(tips)
+            'tips_count': len(tips),
+            'pages_fetched': stats['fetched'],
+            'pages_unchanged': unchanged,
+            'crawl_seconds': elapsed
         }
     
     def _extract_topics(self, content):
@@ -185,7 +296,7 @@ class WebCrawler:
         ]
         
         # Check title and content for topics
-        text = content['title'] + ' ' + content['raw_text']
+        text = content['title'] + ' ' + (content.get('raw_text') or content.get('text') or '')
         for topic in possible_topics:
             if topic.lower() in text.lower():
                 topics.append(topic)
@@ -201,43 +312,10 @@ class WebCrawler:
         # Default image if none found
         default_image = 'https://source.unsplash.com/random/800x500/?brain,medical'
         
-        # Check if content has images
+        # _extract_article already looked in the page itself
         if 'image' in content and content['image']:
             return content['image']
         
-        try:
-            # Try to extract image from page
-            response = requests.get(url, timeout=10)
-            if response.status_code == 200:
-                soup = BeautifulSoup(response.text, 'html.parser')
-                
-                # Look for og:image meta tag
-                og_image = soup.find('meta', property='og:image')
-                if og_image and og_image.get('content'):
-                    return og_image.get('content')
-                
-                # Look for main image
-                main_image = soup.find('img', class_='main') or soup.find('img', class_='featured') or soup.find('img', class_='hero') or soup.find('img', class_='banner')
-                if main_image and main_image.get('src'):
-                    img_src = main_image.get('src')
-                    # Convert relative URL to absolute
-                    if img_src and not str(img_src).startswith('http'):
-                        img_src = urljoin(url, str(img_src))
-                    return img_src
-                
-                # Look for first large image
-                images = soup.find_all('img')
-                for img in images:
-                    if img.get('width') and int(img['width']) > 300:
-                        img_src = img['src']
-                        # Convert relative URL to absolute
-                        if not img_src.startswith('http'):
-                            img_src = urljoin(url, img_src)
-                        return img_src
-        
-        except Exception as e:
-            self.logger.error(f"Error extracting image from {url}: {str(e)}")
-        
         return default_image
     
     def _categorize_tip(self, title, content):
@@ -262,7 +340,12 @@ class WebCrawler:
         return 'General Tips'
     
     def _save_articles(self, articles):
-        """Save articles to JSON file."""
+        """
+        Save articles to JSON file.
+        
+        Returns:
+            bool: True if the articles were written
+        """
         try:
             # Check if file exists and read existing articles
             existing_articles = []
@@ -277,6 +360,7 @@ class WebCrawler:
             for i, article in enumerate(all_articles):
                 article['id'] = i + 1
             
+            previous_signature = file_signature(self.articles_file)
             with open(self.articles_file, 'w') as f:
                 json.dump(all_articles, f, indent=2)
             
@@ -284,9 +368,31 @@ class WebCrawler:
         
         except Exception as e:
             self.logger.error(f"Error saving articles: {str(e)}")
+            return False
+        
+        self._update_index(all_articles, articles, previous_signature)
+        return True
+    
+    def _update_index(self, all_articles, new_articles, previous_signature):
+        """Add new articles to the search index and refresh the related-articles table."""
+        try:
+            index = SearchIndex(self.index_file)
+            if index.get_meta('source_signature') == previous_signature:
+                # The index matches the file we just appended to, so only the new articles need indexing
+                index_articles(index, all_articles, new_articles, signature=file_signature(self.articles_file))
+            else:
+                index_articles(index, all_articles, signature=file_signature(self.articles_file))
+            index.close()
+        except Exception as e:
+            self.logger.error(f"Error updating research index: {str(e)}")
     
     def _save_tips(self, tips):
-        """Save tips to JSON file."""
+        """
+        Save tips to JSON file.
+        
+        Returns:
+            bool: True if the tips were written
+        """
         try:
             # Check if file exists and read existing tips
             existing_tips = []
@@ -305,9 +411,11 @@ class WebCrawler:
                 json.dump(all_tips, f, indent=2)
             
             self.logger.info(f"Saved {len(tips)} new tips, total: {len(all_tips)}")
+            return True
         
         except Exception as e:
             self.logger.error(f"Error saving tips: {str(e)}")
+            return False
     
     def run_scheduled_crawl(self):
         """Run a scheduled crawl job."""